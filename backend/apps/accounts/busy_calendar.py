@@ -0,0 +1,244 @@
+"""Per-user busy calendar across mentoring, tutoring, pre-mentoring and counselling.
+
+A university student can be a mentor, a tutor and a pre-mentor at once (and
+attend other people's sessions), so a booking in one service has to be
+checked against all of them. ``load_calendars`` reads every source for a
+window in four queries, for any number of users; tutoring sessions come
+from the materialized ``TutoringOccurrence`` rows, which already carry
+their approved reschedules.
+
+Each user's intervals are kept in a ``BusyCalendar``: sorted by start with a
+running maximum of end times, so "is the user busy in [a, b)" is a single
+bisection, and listing the intervals that overlap a window only visits the
+candidates that can overlap it.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.counsellors.models import CounsellingSessions
+from apps.mentoring.models import MentoringSessions
+from apps.mentoring.slots import BOOKED_STATUSES as MENTORING_BOOKED_STATUSES, merge_intervals, session_interval
+from apps.pre_mentors.models import PreMentorSessions
+from apps.tutoring.models import TutoringOccurrence
+
+
+MENTORING = 'mentoring'
+TUTORING = 'tutoring'
+PRE_MENTORING = 'pre_mentoring'
+COUNSELLING = 'counselling'
+
+SOURCE_LABELS = {
+    MENTORING: 'mentoring session',
+    TUTORING: 'tutoring session',
+    PRE_MENTORING: 'pre-mentor session',
+    COUNSELLING: 'counselling session',
+}
+
+COUNSELLING_BOOKED_STATUSES = ('pending', 'scheduled')
+TUTORING_BOOKED_STATUSES = ('scheduled', 'active', 'confirmed')
+TUTORING_OCCURRENCE_STATUSES = ('scheduled', 'completed')
+PRE_MENTORING_BOOKED_STATUSES = ('scheduled',)
+
+# Sessions are stored by start time only; one that started this long before
+# a window can still run into it.
+LOOKBACK = timedelta(days=1)
+
+Interval = Tuple[datetime, datetime]
+# (source, id of the session or booking) identifies what an interval came from.
+SourceRef = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class BusyInterval:
+    start: datetime
+    end: datetime
+    source: str
+    ref: int
+    rescheduled: bool = False
+
+    def describe(self) -> str:
+        local_start = timezone.localtime(self.start)
+        local_end = timezone.localtime(self.end)
+        label = SOURCE_LABELS.get(self.source, 'session')
+        if self.rescheduled:
+            label = f'rescheduled {label}'
+        return f'a {label} at {local_start:%Y-%m-%d %H:%M}-{local_end:%H:%M}'
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            'source': self.source,
+            'ref': self.ref,
+            'start': timezone.localtime(self.start).isoformat(),
+            'end': timezone.localtime(self.end).isoformat(),
+            'rescheduled': self.rescheduled,
+        }
+
+
+class BusyCalendar:
+    """One user's busy intervals, indexed for overlap queries."""
+
+    def __init__(self, intervals: Iterable[BusyInterval] = ()):
+        self.intervals: List[BusyInterval] = sorted(intervals, key=lambda interval: (interval.start, interval.end))
+        self._starts = [interval.start for interval in self.intervals]
+        # _max_ends[i] is the latest end among the first i + 1 intervals.
+        self._max_ends = list(accumulate((interval.end for interval in self.intervals), max))
+        self._longest = max((interval.end - interval.start for interval in self.intervals), default=timedelta(0))
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def is_busy(self, start: datetime, end: datetime) -> bool:
+        """Whether any interval overlaps ``[start, end)``."""
+        count = bisect_left(self._starts, end)
+        return count > 0 and self._max_ends[count - 1] > start
+
+    def overlapping(self, start: datetime, end: datetime) -> List[BusyInterval]:
+        """Intervals overlapping ``[start, end)``, by start time."""
+        # Nothing starting at or before start - longest can still be running at start.
+        first = bisect_right(self._starts, start - self._longest)
+        last = bisect_left(self._starts, end)
+        return [interval for interval in self.intervals[first:last] if interval.end > start]
+
+    def busy_periods(self) -> List[Interval]:
+        """The intervals merged into disjoint busy periods."""
+        return merge_intervals((interval.start, interval.end) for interval in self.intervals)
+
+
+def _aware(day: date, moment: time) -> datetime:
+    return timezone.make_aware(datetime.combine(day, moment))
+
+
+def local_interval(day: date, start_time: time, end_time: time) -> Interval:
+    """Wall-clock times on ``day``; an end at or before the start runs past midnight."""
+    end_day = day if end_time > start_time else day + timedelta(days=1)
+    return _aware(day, start_time), _aware(end_day, end_time)
+
+
+def _local_day_range(start: datetime, end: datetime) -> Tuple[date, date]:
+    # A day early for sessions that run past midnight into the window.
+    return (timezone.localtime(start) - LOOKBACK).date(), timezone.localtime(end).date()
+
+
+def load_calendars(user_ids: Iterable[int], start: datetime, end: datetime,
+                   exclude: Iterable[SourceRef] = ()) -> Dict[int, BusyCalendar]:
+    """Busy intervals overlapping ``[start, end)`` for every user in ``user_ids``.
+
+    Users are busy both for sessions they give (as mentor, tutor, pre-mentor
+    or counsellor) and sessions they attend. ``exclude`` drops intervals by
+    ``(source, ref)``, e.g. the session being rescheduled.
+    """
+    user_ids = set(user_ids)
+    excluded: Set[SourceRef] = set(exclude)
+    # Keyed so rows repeated by joins are only counted once.
+    found: Dict[int, Dict[Tuple[str, int, datetime], BusyInterval]] = defaultdict(dict)
+
+    def add(owners: Iterable[Optional[int]], interval: BusyInterval) -> None:
+        if (interval.source, interval.ref) in excluded:
+            return
+        if not (interval.start < end and interval.end > start and interval.start < interval.end):
+            return
+        for user_id in set(owners) & user_ids:
+            found[user_id][(interval.source, interval.ref, interval.start)] = interval
+
+    if user_ids:
+        _load_mentoring(user_ids, start, end, add)
+        _load_counselling(user_ids, start, end, add)
+        _load_pre_mentoring(user_ids, start, end, add)
+        # Excluded bookings can have many occurrences, so they are not fetched at all.
+        _load_tutoring(user_ids, start, end, add, [ref for source, ref in excluded if source == TUTORING])
+    return {user_id: BusyCalendar(found[user_id].values()) for user_id in user_ids}
+
+
+def _load_mentoring(user_ids: Set[int], start: datetime, end: datetime, add) -> None:
+    rows = MentoringSessions.objects.filter(
+        Q(mentor__user_id__in=user_ids) | Q(details__request__student__user_id__in=user_ids),
+        status__in=MENTORING_BOOKED_STATUSES,
+        scheduled_at__gte=start - LOOKBACK,
+        scheduled_at__lt=end,
+    ).values_list('session_id', 'mentor__user_id', 'details__request__student__user_id', 'scheduled_at', 'duration_minutes')
+    for session_id, mentor_user_id, student_user_id, scheduled_at, duration_minutes in rows:
+        session_start, session_end = session_interval(scheduled_at, duration_minutes)
+        add((mentor_user_id, student_user_id), BusyInterval(session_start, session_end, MENTORING, session_id))
+
+
+def _load_counselling(user_ids: Set[int], start: datetime, end: datetime, add) -> None:
+    rows = CounsellingSessions.objects.filter(
+        Q(counsellor__user_id__in=user_ids) | Q(student__user_id__in=user_ids),
+        status__in=COUNSELLING_BOOKED_STATUSES,
+        scheduled_at__gte=start - LOOKBACK,
+        scheduled_at__lt=end,
+    ).values_list('session_id', 'counsellor__user_id', 'student__user_id', 'scheduled_at', 'duration_minutes')
+    for session_id, counsellor_user_id, student_user_id, scheduled_at, duration_minutes in rows:
+        session_start, session_end = session_interval(scheduled_at, duration_minutes)
+        add((counsellor_user_id, student_user_id), BusyInterval(session_start, session_end, COUNSELLING, session_id))
+
+
+def _load_pre_mentoring(user_ids: Set[int], start: datetime, end: datetime, add) -> None:
+    first_day, last_day = _local_day_range(start, end)
+    rows = PreMentorSessions.objects.filter(
+        Q(pre_mentor__user_id__in=user_ids) | Q(student_id__in=user_ids),
+        status__in=PRE_MENTORING_BOOKED_STATUSES,
+        session_date__gte=first_day,
+        session_date__lte=last_day,
+    ).values_list('session_id', 'pre_mentor__user_id', 'student_id', 'session_date', 'start_time', 'end_time')
+    for session_id, pre_mentor_user_id, student_user_id, session_date, start_time, end_time in rows:
+        session_start, session_end = local_interval(session_date, start_time, end_time)
+        add((pre_mentor_user_id, student_user_id), BusyInterval(session_start, session_end, PRE_MENTORING, session_id))
+
+
+def _load_tutoring(user_ids: Set[int], start: datetime, end: datetime, add, exclude_bookings: List[int]) -> None:
+    # Sessions are materialized with their approved reschedules applied (see
+    # apps.tutoring.occurrences), so this is a range scan on starts_at.
+    rows = TutoringOccurrence.objects.filter(
+        Q(tutor__user_id__in=user_ids) | Q(student__user_id__in=user_ids),
+        status__in=TUTORING_OCCURRENCE_STATUSES,
+        booking__status__in=TUTORING_BOOKED_STATUSES,
+        starts_at__gte=start - LOOKBACK,
+        starts_at__lt=end,
+    ).exclude(booking_id__in=exclude_bookings).values_list(
+        'booking_id', 'tutor__user_id', 'student__user_id', 'starts_at', 'ends_at', 'reschedule_id',
+    )
+    for booking_id, tutor_user_id, student_user_id, starts_at, ends_at, reschedule_id in rows:
+        add((tutor_user_id, student_user_id),
+            BusyInterval(starts_at, ends_at, TUTORING, booking_id, rescheduled=reschedule_id is not None))
+
+
+def first_session_date(start_date: date, day_of_week: Optional[int]) -> date:
+    """A booking's first session: the first day on or after ``start_date`` on its slot's weekday."""
+    if day_of_week is None:
+        return start_date
+    # Slots store 0=Sunday; date.weekday() is 0=Monday.
+    return start_date + timedelta(days=(day_of_week - (start_date.weekday() + 1)) % 7)
+
+
+def load_calendar(user_id: int, start: datetime, end: datetime, exclude: Iterable[SourceRef] = ()) -> BusyCalendar:
+    return load_calendars([user_id], start, end, exclude)[user_id]
+
+
+def find_conflicts(user_ids: Iterable[Optional[int]], start: datetime, end: datetime,
+                   exclude: Iterable[SourceRef] = ()) -> List[BusyInterval]:
+    """Everything that keeps any of ``user_ids`` busy during ``[start, end)``."""
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    calendars = load_calendars([user_id for user_id in user_ids if user_id], start, end, exclude)
+    conflicts = {
+        (interval.source, interval.ref, interval.start): interval
+        for calendar in calendars.values()
+        for interval in calendar.overlapping(start, end)
+    }
+    return sorted(conflicts.values(), key=lambda interval: (interval.start, interval.end))
+
+
+def conflict_message(conflicts: List[BusyInterval]) -> str:
+    return f'This time slot conflicts with {conflicts[0].describe()}'
@@ -0,0 +1,45 @@
+"""Version stamps for process-local caches, shared by every process.
+
+Derived data such as the z-score index, the program catalog snapshot and
+mentor slot lists is cached inside each process and keyed by a version
+stamp. The stamps are rows of ``cache_versions`` rather than entries of
+Django's cache, which is local to each process: a bump made by any web
+worker, Celery worker or management command is seen by all of them on
+their next read, and nothing is served from a superseded version.
+
+Hot read paths can pass ``max_age`` to keep a stamp in the process's own
+cache for a few seconds, so most reads make no query at all; bumps from
+other processes then reach them up to ``max_age`` seconds late.
+"""
+from __future__ import annotations
+
+import uuid
+
+from django.core.cache import cache
+
+from .models import CacheVersion
+
+
+LOCAL_VERSION_KEY = 'cache_versions:{key}'
+
+
+def current_version(key: str, max_age: int = 0) -> str:
+    """The stamp for ``key``, created on first use; reused for ``max_age`` seconds once read."""
+    local_key = LOCAL_VERSION_KEY.format(key=key)
+    if max_age > 0:
+        version = cache.get(local_key)
+        if version is not None:
+            return version
+    version = CacheVersion.objects.get_or_create(key=key, defaults={'version': uuid.uuid4().hex})[0].version
+    if max_age > 0:
+        cache.set(local_key, version, timeout=max_age)
+    return version
+
+
+def bump_version(key: str) -> str:
+    """Replace the stamp for ``key``, invalidating what every process cached under the old one."""
+    version = uuid.uuid4().hex
+    CacheVersion.objects.update_or_create(key=key, defaults={'version': version})
+    # This process sees its own bump at once.
+    cache.delete(LOCAL_VERSION_KEY.format(key=key))
+    return version
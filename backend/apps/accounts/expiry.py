@@ -0,0 +1,132 @@
+"""Expiry of time-limited records across mentoring, counselling and tutoring.
+
+Read endpoints never write: a pending request whose ``expiry_date`` has
+passed is reported as expired from the row as it is (``effective_status``,
+``lapsed``), and a pending tutoring booking stops holding its place once
+``BOOKING_HOLD_MINUTES`` are up (``holds_place``). Persisting those states,
+and closing video rooms nobody ended, is left to ``sweep_expired``, which
+runs periodically as the ``accounts.sweep_expired`` Celery task (scheduled
+in ``CELERY_BEAT_SCHEDULE``) or once via ``manage.py sweep_expired``.
+
+Each sweep is a single conditional UPDATE per table, so one that races a
+user action only touches rows that are still in the state it looked for.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.counsellors.models import CounsellingRequests
+from apps.counsellors.stats import refresh_many_counsellor_stats
+from apps.mentoring.models import MentoringRequests, VideoCallParticipant, VideoCallRoom
+from apps.tutoring.models import TutoringBooking, TutoringOccurrence
+from apps.tutoring.reservations import BOOKING_HOLD_MINUTES
+
+
+logger = logging.getLogger(__name__)
+
+# Rooms nobody joined, or nobody ended, are closed after these periods.
+VIDEO_ROOM_WAITING_TTL = timedelta(hours=2)
+VIDEO_ROOM_ACTIVE_TTL = timedelta(hours=6)
+
+
+def lapsed(now: Optional[datetime] = None) -> Q:
+    """Pending requests whose expiry date has passed but that no sweep has marked yet."""
+    return Q(status='pending', expiry_date__lt=now or timezone.now())
+
+
+def expired(now: Optional[datetime] = None) -> Q:
+    """Requests that are expired, whether or not a sweep has marked them yet."""
+    return Q(status='expired') | lapsed(now)
+
+
+def effective_status(status: str, expiry_date: Optional[datetime], now: Optional[datetime] = None) -> str:
+    """The status to show for a request, treating a lapsed pending request as expired."""
+    if status == 'pending' and expiry_date is not None and expiry_date < (now or timezone.now()):
+        return 'expired'
+    return status
+
+
+@dataclass
+class SweepReport:
+    mentoring_requests: int = 0
+    counselling_requests: int = 0
+    video_rooms: int = 0
+    tutoring_bookings: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def expire_mentoring_requests(now: Optional[datetime] = None) -> int:
+    return MentoringRequests.objects.filter(lapsed(now)).update(status='expired')
+
+
+def expire_counselling_requests(now: Optional[datetime] = None) -> int:
+    requests = CounsellingRequests.objects.filter(lapsed(now))
+    counsellor_ids = set(requests.values_list('counsellor_id', flat=True))
+    if not counsellor_ids:
+        return 0
+    updated = requests.update(status='expired')
+    # Their pending-request counts are kept in CounsellorStats.
+    refresh_many_counsellor_stats(counsellor_ids)
+    return updated
+
+
+def end_stale_video_rooms(now: Optional[datetime] = None) -> int:
+    now = now or timezone.now()
+    stale = VideoCallRoom.objects.filter(
+        Q(status='waiting', created_at__lt=now - VIDEO_ROOM_WAITING_TTL)
+        | Q(status='active', started_at__lt=now - VIDEO_ROOM_ACTIVE_TTL)
+        | Q(status='active', started_at__isnull=True, created_at__lt=now - VIDEO_ROOM_ACTIVE_TTL)
+    )
+    room_ids = list(stale.values_list('room_id', flat=True))
+    if not room_ids:
+        return 0
+    with transaction.atomic():
+        ended = VideoCallRoom.objects.filter(room_id__in=room_ids, status__in=('waiting', 'active')).update(
+            status='ended', ended_at=now,
+        )
+        VideoCallParticipant.objects.filter(room_id__in=room_ids, is_online=True).update(is_online=False, left_at=now)
+    return ended
+
+
+def release_lapsed_tutoring_bookings(now: Optional[datetime] = None) -> int:
+    """Cancel unpaid bookings whose hold has run out, with their sessions."""
+    cutoff = (now or timezone.now()) - timedelta(minutes=BOOKING_HOLD_MINUTES)
+    booking_ids = list(
+        TutoringBooking.objects.filter(status='pending', created_at__lt=cutoff).values_list('booking_id', flat=True)
+    )
+    if not booking_ids:
+        return 0
+    with transaction.atomic():
+        # A payment confirmed since the read above keeps its booking.
+        released = TutoringBooking.objects.filter(booking_id__in=booking_ids, status='pending').update(
+            status='cancelled', updated_at=timezone.now(),
+        )
+        TutoringOccurrence.objects.filter(
+            booking__in=booking_ids, booking__status='cancelled', status='scheduled',
+        ).update(status='cancelled', updated_at=timezone.now())
+    return released
+
+
+def sweep_expired(now: Optional[datetime] = None) -> SweepReport:
+    """Persist every expiry that read paths currently derive on the fly."""
+    now = now or timezone.now()
+    report = SweepReport(
+        mentoring_requests=expire_mentoring_requests(now),
+        counselling_requests=expire_counselling_requests(now),
+        video_rooms=end_stale_video_rooms(now),
+        tutoring_bookings=release_lapsed_tutoring_bookings(now),
+    )
+    logger.info(
+        'Expiry sweep: %d mentoring requests, %d counselling requests, %d video rooms, %d tutoring bookings',
+        report.mentoring_requests, report.counselling_requests, report.video_rooms, report.tutoring_bookings,
+    )
+    return report
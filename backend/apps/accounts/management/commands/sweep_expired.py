@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.expiry import sweep_expired
+from apps.accounts.tasks import sweep_expired_task
+
+
+class Command(BaseCommand):
+    help = (
+        'Expire lapsed mentoring and counselling requests, end stale video rooms and release '
+        'unpaid tutoring bookings whose hold has run out. Celery beat runs the same sweep '
+        'periodically; this runs it once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='store_true',
+                            help='Send the sweep to a Celery worker instead of running it here')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            result = sweep_expired_task.delay()
+            self.stdout.write(self.style.SUCCESS(f'Queued expiry sweep {result.id}'))
+            return
+
+        report = sweep_expired()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Expired {report.mentoring_requests} mentoring and {report.counselling_requests} counselling requests, '
+                f'ended {report.video_rooms} video rooms and released {report.tutoring_bookings} tutoring bookings'
+            )
+        )
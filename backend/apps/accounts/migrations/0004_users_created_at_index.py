@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_merge_0002_emailverification_0002_userdailylogin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='users',
+            index=models.Index(fields=['created_at', 'user_id'], name='users_created_a45cbe_idx'),
+        ),
+    ]
@@ -34,6 +34,9 @@ class Users(models.Model):
     class Meta:
         managed = True
         db_table = 'users'
+        indexes = [
+            models.Index(fields=['created_at', 'user_id']),
+        ]
 
 class UserDetails(models.Model):
     user = models.OneToOneField(Users, models.DO_NOTHING, primary_key=True)
@@ -77,4 +80,13 @@ class EmailVerification(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.email} ({self.get_purpose_display()})"
\ No newline at end of file
+        return f"{self.email} ({self.get_purpose_display()})"
+
+class CacheVersion(models.Model):
+    key = models.CharField(primary_key=True, max_length=100)
+    version = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = 'cache_versions'
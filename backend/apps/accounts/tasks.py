@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from celery import shared_task
+
+from .expiry import sweep_expired
+
+
+@shared_task(name='accounts.sweep_expired')
+def sweep_expired_task() -> Dict[str, int]:
+    return sweep_expired().as_dict()
@@ -1,3 +1,289 @@
-from django.test import TestCase
+import json
+from datetime import datetime, time, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.counsellors.models import Counsellors, CounsellingRequests, CounsellingSessions, CounsellorStats
+from apps.mentoring.models import MentoringRequests, MentoringSessions, Mentors, VideoCallParticipant, VideoCallRoom
+from apps.pre_mentors.models import PreMentors, PreMentorSessions
+from apps.students.models import Students
+from apps.tutoring.models import TutorAvailability, TutoringBooking, TutoringSessionReschedule, Tutors
+from apps.tutoring.occurrences import materialize_occurrences
+from apps.tutoring.reservations import BOOKING_HOLD_MINUTES
+from apps.universities.models import Universities
+from apps.university_programs.models import DegreeProgramDurations, DegreePrograms
+from apps.university_students.models import UniversityStudents
+
+from .busy_calendar import COUNSELLING, MENTORING, PRE_MENTORING, TUTORING, BusyCalendar, BusyInterval, load_calendar
+from .expiry import VIDEO_ROOM_ACTIVE_TTL, VIDEO_ROOM_WAITING_TTL, sweep_expired
+from .models import Users, UserTypes
+
+
+def aware(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class BusyCalendarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='uni_student')
+
+        def user(name):
+            return Users.objects.create(
+                user_type=user_type, username=name, email=f'{name}@example.com', password_hash='x', is_active=1,
+            )
+
+        cls.host = user('host')
+        cls.student_user = user('student')
+        counsellor_user = user('counsellor')
+
+        university = Universities.objects.create(name='University of Kelaniya', is_active=1)
+        program = DegreePrograms.objects.create(university=university, title='Physics', is_active=1)
+        duration = DegreeProgramDurations.objects.create(degree_program=program, duration_years=4, degree_type='BSc')
+        uni_student = UniversityStudents.objects.create(
+            user=cls.host, university=university, degree_program=program, duration=duration,
+        )
+
+        cls.mentor = Mentors.objects.create(user=cls.host, approved=1)
+        cls.tutor = Tutors.objects.create(user=cls.host)
+        cls.pre_mentor = PreMentors.objects.create(user=cls.host, university_student=uni_student)
+        cls.student = Students.objects.create(user=cls.student_user, current_stage='al')
+        now = timezone.now()
+        cls.counsellor = Counsellors.objects.create(
+            user=counsellor_user, available_for_sessions=1, created_at=now, updated_at=now,
+        )
+
+        # A day a week out, so every source lands on it or the week after.
+        cls.day = timezone.localdate() + timedelta(days=7)
+        cls.slot = TutorAvailability.objects.create(
+            tutor=cls.tutor, day_of_week=(cls.day.weekday() + 1) % 7, start_time=time(11), end_time=time(12),
+        )
+        cls.booking = TutoringBooking.objects.create(
+            student=cls.student, tutor=cls.tutor, availability_slot=cls.slot, start_date=cls.day, status='confirmed',
+            sessions_paid=4,
+        )
+        # Next week's tutoring session moves to the day after, 15:00-16:00.
+        TutoringSessionReschedule.objects.create(
+            booking=cls.booking, original_date=cls.day + timedelta(days=7), new_date=cls.day + timedelta(days=8),
+            new_start_time=time(15), new_end_time=time(16), requested_by='tutor', status='approved',
+        )
+        materialize_occurrences(cls.booking)
+        cls.session = MentoringSessions.objects.create(
+            mentor=cls.mentor, topic='Physics', scheduled_at=aware(cls.day, 9), duration_minutes=60, status='scheduled',
+        )
+        MentoringSessions.objects.create(
+            mentor=cls.mentor, topic='Cancelled', scheduled_at=aware(cls.day, 16), duration_minutes=60, status='cancelled',
+        )
+        PreMentorSessions.objects.create(
+            pre_mentor=cls.pre_mentor, student=cls.student_user, subject='Maths', session_date=cls.day,
+            start_time=time(13), end_time=time(14), duration_minutes=60, session_fee=500,
+        )
+        CounsellingSessions.objects.create(
+            counsellor=cls.counsellor, student=cls.student, topic='Stress', scheduled_at=aware(cls.day, 17),
+            status='scheduled',
+        )
+
+    def _window(self):
+        return aware(self.day, 0), aware(self.day + timedelta(days=9), 0)
+
+    def test_calendar_combines_every_source_in_constant_queries(self):
+        with self.assertNumQueries(4):
+            calendar = load_calendar(self.host.user_id, *self._window())
+
+        self.assertEqual(
+            [(interval.source, interval.start, interval.end) for interval in calendar.intervals],
+            [
+                (MENTORING, aware(self.day, 9), aware(self.day, 10)),
+                (TUTORING, aware(self.day, 11), aware(self.day, 12)),
+                (PRE_MENTORING, aware(self.day, 13), aware(self.day, 14)),
+                (TUTORING, aware(self.day + timedelta(days=8), 15), aware(self.day + timedelta(days=8), 16)),
+            ],
+        )
+        self.assertTrue(calendar.is_busy(aware(self.day, 9, 30), aware(self.day, 10, 30)))
+        self.assertFalse(calendar.is_busy(aware(self.day, 10), aware(self.day, 11)))
+        # The moved occurrence no longer blocks its original date.
+        self.assertFalse(calendar.is_busy(aware(self.day + timedelta(days=7), 11), aware(self.day + timedelta(days=7), 12)))
+
+        # The student attends the tutoring, pre-mentor and counselling sessions.
+        student_calendar = load_calendar(self.student_user.user_id, *self._window())
+        self.assertEqual(
+            [interval.source for interval in student_calendar.intervals],
+            [TUTORING, PRE_MENTORING, COUNSELLING, TUTORING],
+        )
+
+        excluded = load_calendar(self.host.user_id, *self._window(), exclude=[(TUTORING, self.booking.booking_id)])
+        self.assertEqual([interval.source for interval in excluded.intervals], [MENTORING, PRE_MENTORING])
+
+    def test_overlapping_finds_long_intervals_that_start_before_the_window(self):
+        day = self.day
+        calendar = BusyCalendar([
+            BusyInterval(aware(day, 8), aware(day, 18), TUTORING, 1),
+            BusyInterval(aware(day, 9), aware(day, 10), MENTORING, 2),
+            BusyInterval(aware(day, 12), aware(day, 13), MENTORING, 3),
+        ])
+        self.assertEqual([interval.ref for interval in calendar.overlapping(aware(day, 11), aware(day, 12))], [1])
+        self.assertEqual([interval.ref for interval in calendar.overlapping(aware(day, 9, 30), aware(day, 12, 30))], [1, 2, 3])
+        self.assertEqual(calendar.overlapping(aware(day, 18), aware(day, 19)), [])
+        self.assertEqual(calendar.busy_periods(), [(aware(day, 8), aware(day, 18))])
+
+    def test_booking_paths_reject_conflicts_from_other_services(self):
+        response = self.client.post(
+            f'/api/mentoring/sessions/{self.session.session_id}/reschedule/',
+            data=json.dumps({'new_datetime': aware(self.day, 11, 30).isoformat()}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tutoring session', response.json()['message'])
+
+        response = self.client.post(
+            f'/api/tutoring/bookings/{self.booking.booking_id}/reschedule/',
+            data=json.dumps({
+                'original_date': self.day.isoformat(), 'new_date': self.day.isoformat(),
+                'new_start_time': '09:30', 'new_end_time': '10:30', 'requested_by': 'tutor',
+            }),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([conflict['source'] for conflict in response.json()['conflicts']], [MENTORING])
+
+        # Overlapping the booking's own slot is not a conflict.
+        response = self.client.post(
+            f'/api/tutoring/bookings/{self.booking.booking_id}/reschedule/',
+            data=json.dumps({
+                'original_date': self.day.isoformat(), 'new_date': self.day.isoformat(),
+                'new_start_time': '11:30', 'new_end_time': '12:30', 'requested_by': 'tutor',
+            }),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        mentoring_request = MentoringRequests.objects.create(
+            mentor=self.mentor, student=self.student, topic='Exams', description='Help',
+            preferred_time=aware(self.day, 13, 30).isoformat(), expiry_date=timezone.now() + timedelta(days=3),
+        )
+        response = self.client.post(f'/api/mentoring/requests/{mentoring_request.request_id}/accept/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pre-mentor session', response.json()['message'])
+        mentoring_request.refresh_from_db()
+        self.assertEqual(mentoring_request.status, 'pending')
+
+
+class ExpirySweepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='uni_student')
+
+        def user(name):
+            return Users.objects.create(
+                user_type=user_type, username=name, email=f'{name}@example.com', password_hash='x', is_active=1,
+            )
+
+        host = user('host')
+        cls.mentor = Mentors.objects.create(user=host, approved=1)
+        cls.tutor = Tutors.objects.create(user=host)
+        cls.student = Students.objects.create(user=user('student'), current_stage='al')
+        now = timezone.now()
+        cls.counsellor = Counsellors.objects.create(
+            user=user('counsellor'), available_for_sessions=1, created_at=now, updated_at=now,
+        )
+
+    def setUp(self):
+        now = timezone.now()
+        request_fields = {
+            'student': self.student, 'topic': 'Exams', 'description': 'Help',
+            'preferred_time': (now + timedelta(days=2)).isoformat(),
+        }
+        self.lapsed_mentoring = MentoringRequests.objects.create(
+            mentor=self.mentor, expiry_date=now - timedelta(minutes=1), **request_fields,
+        )
+        self.open_mentoring = MentoringRequests.objects.create(
+            mentor=self.mentor, expiry_date=now + timedelta(days=1), **request_fields,
+        )
+        self.lapsed_counselling = CounsellingRequests.objects.create(
+            counsellor=self.counsellor, expiry_date=now - timedelta(minutes=1), **request_fields,
+        )
+
+    def test_reads_report_lapsed_requests_as_expired_without_writing(self):
+        with CaptureQueriesContext(connection) as queries:
+            mentoring = self.client.get(f'/api/mentoring/requests/{self.mentor.mentor_id}/').json()
+            counselling = self.client.get(f'/api/counsellors/requests/{self.counsellor.counsellor_id}/').json()
+            stats = self.client.get(f'/api/mentoring/stats/{self.mentor.mentor_id}/').json()['stats']
+        self.assertFalse([query for query in queries.captured_queries if not query['sql'].startswith('SELECT')])
+
+        self.assertEqual(
+            {request['id']: request['status'] for request in mentoring['requests']},
+            {self.lapsed_mentoring.request_id: 'expired', self.open_mentoring.request_id: 'pending'},
+        )
+        self.assertEqual([request['status'] for request in counselling['requests']], ['expired'])
+        self.assertEqual((stats['pending_requests'], stats['expired_requests']), (1, 1))
+        self.lapsed_mentoring.refresh_from_db()
+        self.assertEqual(self.lapsed_mentoring.status, 'pending')
+
+        response = self.client.post(f'/api/mentoring/requests/{self.lapsed_mentoring.request_id}/accept/')
+        self.assertEqual((response.status_code, response.json()['message']), (400, 'Request has expired'))
+
+    def test_sweep_persists_expiry_across_services(self):
+        now = timezone.now()
+        slot = TutorAvailability.objects.create(
+            tutor=self.tutor, day_of_week=(timezone.localdate().weekday() + 2) % 7, start_time=time(16), end_time=time(17),
+            max_students=2,
+        )
+        bookings = []
+        for status in ('pending', 'pending', 'confirmed'):
+            booking = TutoringBooking.objects.create(
+                student=self.student, tutor=self.tutor, availability_slot=slot, start_date=timezone.localdate(),
+                status=status, sessions_paid=4,
+            )
+            materialize_occurrences(booking)
+            bookings.append(booking)
+        # Only the first booking's hold has run out.
+        TutoringBooking.objects.filter(pk__in=[bookings[0].pk, bookings[2].pk]).update(
+            created_at=now - timedelta(minutes=BOOKING_HOLD_MINUTES + 1)
+        )
+
+        def room(room_id, status, age, started=None):
+            VideoCallRoom.objects.create(room_id=room_id, mentor=self.mentor, student=self.student, status=status,
+                                         started_at=started)
+            VideoCallRoom.objects.filter(room_id=room_id).update(created_at=now - age)
+
+        room('abandoned', 'waiting', VIDEO_ROOM_WAITING_TTL + timedelta(minutes=1))
+        room('waiting', 'waiting', timedelta(minutes=5))
+        room('forgotten', 'active', VIDEO_ROOM_ACTIVE_TTL + timedelta(hours=1), started=now - VIDEO_ROOM_ACTIVE_TTL - timedelta(minutes=1))
+        room('live', 'active', VIDEO_ROOM_ACTIVE_TTL + timedelta(hours=1), started=now - timedelta(minutes=30))
+        VideoCallParticipant.objects.create(room_id='forgotten', user_id=self.student.student_id, role='student')
+
+        report = sweep_expired()
+        self.assertEqual(report.as_dict(), {
+            'mentoring_requests': 1, 'counselling_requests': 1, 'video_rooms': 2, 'tutoring_bookings': 1,
+        })
+        self.assertEqual(
+            dict(MentoringRequests.objects.values_list('request_id', 'status')),
+            {self.lapsed_mentoring.request_id: 'expired', self.open_mentoring.request_id: 'pending'},
+        )
+        self.assertEqual(CounsellorStats.objects.get(counsellor=self.counsellor).pending_requests, 0)
+        self.assertEqual(
+            dict(VideoCallRoom.objects.values_list('room_id', 'status')),
+            {'abandoned': 'ended', 'waiting': 'waiting', 'forgotten': 'ended', 'live': 'active'},
+        )
+        self.assertFalse(VideoCallParticipant.objects.get(room_id='forgotten').is_online)
+        self.assertEqual(
+            [TutoringBooking.objects.get(pk=booking.pk).status for booking in bookings], ['cancelled', 'pending', 'confirmed']
+        )
+        self.assertEqual(set(bookings[0].occurrences.values_list('status', flat=True)), {'cancelled'})
+        self.assertEqual(set(bookings[2].occurrences.values_list('status', flat=True)), {'scheduled'})
+
+        # Nothing is left for the next run.
+        output = StringIO()
+        call_command('sweep_expired', stdout=output)
+        self.assertIn('Expired 0 mentoring and 0 counselling requests', output.getvalue())
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_queued_sweep_runs_in_process_in_eager_mode(self):
+        call_command('sweep_expired', queue=True, stdout=StringIO())
+        self.assertEqual(MentoringRequests.objects.get(pk=self.lapsed_mentoring.pk).status, 'expired')
+        self.assertEqual(CounsellingRequests.objects.get(pk=self.lapsed_counselling.pk).status, 'expired')
@@ -1,7 +1,7 @@
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from django.db import transaction
-from django.db.models import Q, Prefetch
+from django.db.models import Count, Prefetch, Q, Sum
 from django.core.paginator import Paginator
 from django.utils import timezone
 import json
@@ -13,12 +13,25 @@ from apps.counsellors.models import (
     CounsellingFeedback,
     CounsellingRequests,
     CounsellingSessions,
+    CounsellorStats,
 )
 from apps.students.models import Students
 from apps.university_students.models import UniversityStudents
 from apps.universities.models import Universities
 from apps.companies.models import Companies
 
+from .exports import (
+    COMPANY_EXPORT_COLUMNS,
+    COUNSELLOR_EXPORT_COLUMNS,
+    STUDENT_EXPORT_COLUMNS,
+    UNIVERSITY_STUDENT_EXPORT_COLUMNS,
+    USER_EXPORT_COLUMNS,
+    stream_queryset_export,
+    wants_stream_export,
+)
+from .pagination import InvalidCursor, paginate_by_cursor, wants_cursor_pagination
+from .search import apply_search, search_notice
+
 
 def _split_csv(value):
     if not value:
@@ -56,54 +69,11 @@ def _format_datetime(value):
     return value.isoformat()
 
 
-def _calculate_average_rating(feedback_items):
-    scores = []
-    for feedback in feedback_items:
-        rating = getattr(feedback, 'rating', None)
-        if rating is None:
-            continue
-        if isinstance(rating, (int, float)):
-            scores.append(float(rating))
-            continue
-        if isinstance(rating, dict):
-            for value in rating.values():
-                try:
-                    scores.append(float(value))
-                except (TypeError, ValueError):
-                    continue
-            continue
-        if isinstance(rating, (list, tuple)):
-            for value in rating:
-                try:
-                    scores.append(float(value))
-                except (TypeError, ValueError):
-                    continue
-    if not scores:
-        return 0.0
-    return round(sum(scores) / len(scores), 2)
-
-
 def _serialize_counsellor(counsellor):
     user = getattr(counsellor, 'user', None)
     details = getattr(user, 'userdetails', None) if user else None
-    sessions = getattr(counsellor, 'prefetched_sessions', None)
-    feedback_items = getattr(counsellor, 'prefetched_feedback', None)
-    requests = getattr(counsellor, 'prefetched_requests', None)
-
-    if sessions is None:
-        sessions = counsellor.sessions.all()
-    if feedback_items is None:
-        feedback_items = counsellor.feedback.all()
-    if requests is None:
-        requests = counsellor.requests.all()
-
-    completed_sessions = [session for session in sessions if str(getattr(session, 'status', '')).lower() == 'completed']
-    students_supported = len({getattr(session, 'student_id', None) for session in completed_sessions if getattr(session, 'student_id', None)})
-    last_session_timestamp = None
-    for session in sessions:
-        candidate = getattr(session, 'updated_at', None) or getattr(session, 'scheduled_at', None)
-        if candidate and (last_session_timestamp is None or candidate > last_session_timestamp):
-            last_session_timestamp = candidate
+    # Counsellors with no sessions, requests or feedback yet have no stats row
+    stats = getattr(counsellor, 'stats', None) or CounsellorStats(counsellor_id=counsellor.counsellor_id)
 
     education, certifications = _parse_qualifications(getattr(counsellor, 'qualifications', ''))
 
@@ -126,13 +96,13 @@ def _serialize_counsellor(counsellor):
         'education': education,
         'certifications': certifications,
         'bio': getattr(counsellor, 'bio', '') or '',
-        'studentsSupported': students_supported,
-        'sessionsCompleted': len(completed_sessions),
-        'pendingRequests': len([req for req in requests if str(getattr(req, 'status', '')).lower() == 'pending']) if requests else 0,
-        'averageRating': _calculate_average_rating(feedback_items),
+        'studentsSupported': stats.students_supported,
+        'sessionsCompleted': stats.sessions_completed,
+        'pendingRequests': stats.pending_requests,
+        'averageRating': stats.average_rating,
         'responseTime': 'Not tracked',
         'joinedDate': _format_datetime(getattr(user, 'created_at', None)) if user else '',
-        'lastActive': _format_datetime(last_session_timestamp or getattr(details, 'updated_at', None) or getattr(user, 'created_at', None)),
+        'lastActive': _format_datetime(stats.last_session_at or getattr(details, 'updated_at', None) or getattr(user, 'created_at', None)),
         'createdAt': _format_datetime(getattr(counsellor, 'created_at', None)),
         'updatedAt': _format_datetime(getattr(counsellor, 'updated_at', None)),
     }
@@ -147,17 +117,17 @@ def _get_data_value(payload, *keys):
 
 COUNSELLOR_PREFETCHES = [
     Prefetch(
-        'sessions',
+        'counselling_sessions',
         queryset=CounsellingSessions.objects.select_related('student').order_by('-scheduled_at'),
         to_attr='prefetched_sessions'
     ),
     Prefetch(
-        'feedback',
+        'counselling_feedback',
         queryset=CounsellingFeedback.objects.all(),
         to_attr='prefetched_feedback'
     ),
     Prefetch(
-        'requests',
+        'counselling_requests',
         queryset=CounsellingRequests.objects.all(),
         to_attr='prefetched_requests'
     ),
@@ -180,19 +150,41 @@ def get_all_users(request):
             # Apply filters
             if user_type != 'all':
                 users = users.filter(user_type__type_name=user_type)
+            
+            # Order by creation date
+            users = users.order_by('-created_at')
+
+            # Relevance first, newest first among equal matches
+            search_truncated = False
             if search:
-                users = users.filter(
-                    Q(username__icontains=search) | 
+                users, search_truncated = apply_search(
+                    users,
+                    'user',
+                    search,
+                    fallback=Q(username__icontains=search) |
                     Q(email__icontains=search) |
                     Q(userdetails__full_name__icontains=search)
                 )
-            
-            # Order by creation date
-            users = users.order_by('-created_at')
+
+            if wants_stream_export(request):
+                return stream_queryset_export(request, users, USER_EXPORT_COLUMNS, 'users')
             
             # Pagination
-            paginator = Paginator(users, per_page)
-            page_obj = paginator.get_page(page)
+            if wants_cursor_pagination(request):
+                page_obj = paginate_by_cursor(request, users, per_page)
+                pagination = page_obj.pagination
+            else:
+                paginator = Paginator(users, per_page)
+                page_obj = paginator.get_page(page)
+                pagination = {
+                    'current_page': page_obj.number,
+                    'total_pages': paginator.num_pages,
+                    'total_items': paginator.count,
+                    'has_next': page_obj.has_next(),
+                    'has_previous': page_obj.has_previous()
+                }
+            if search:
+                pagination.update(search_notice(search_truncated))
             
             # Serialize data
             users_data = []
@@ -218,15 +210,11 @@ def get_all_users(request):
             return JsonResponse({
                 'success': True,
                 'users': users_data,
-                'pagination': {
-                    'current_page': page_obj.number,
-                    'total_pages': paginator.num_pages,
-                    'total_items': paginator.count,
-                    'has_next': page_obj.has_next(),
-                    'has_previous': page_obj.has_previous()
-                }
+                'pagination': pagination
             })
             
+        except InvalidCursor as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -248,9 +236,7 @@ def get_all_counsellors(request):
             per_page = int(request.GET.get('per_page', 10) or 10)
             per_page = max(1, min(per_page, 100))
 
-            counsellors_qs = Counsellors.objects.select_related('user', 'user__userdetails').prefetch_related(
-                *COUNSELLOR_PREFETCHES
-            )
+            counsellors_qs = Counsellors.objects.select_related('user', 'user__userdetails', 'stats')
 
             if status_filter in {'active', 'inactive'}:
                 is_active = 1 if status_filter == 'active' else 0
@@ -260,48 +246,72 @@ def get_all_counsellors(request):
                 is_verified = 1 if verification_filter == 'verified' else 0
                 counsellors_qs = counsellors_qs.filter(user__userdetails__is_verified=is_verified)
 
+            counsellors_qs = counsellors_qs.order_by('-created_at')
+
+            search_truncated = False
             if search:
-                counsellors_qs = counsellors_qs.filter(
-                    Q(user__username__icontains=search)
+                counsellors_qs, search_truncated = apply_search(
+                    counsellors_qs,
+                    'counsellor',
+                    search,
+                    fallback=Q(user__username__icontains=search)
                     | Q(user__email__icontains=search)
                     | Q(user__userdetails__full_name__icontains=search)
                     | Q(bio__icontains=search)
                     | Q(specializations__icontains=search)
-                    | Q(expertise__icontains=search)
+                    | Q(expertise__icontains=search),
                 )
 
-            counsellors_qs = counsellors_qs.order_by('-created_at')
-
-            paginator = Paginator(counsellors_qs, per_page)
-            page_obj = paginator.get_page(page)
-
-            counsellor_items = list(page_obj.object_list)
-            counsellors_data = [_serialize_counsellor(item) for item in counsellor_items]
+            if wants_stream_export(request):
+                return stream_queryset_export(request, counsellors_qs, COUNSELLOR_EXPORT_COLUMNS, 'counsellors')
 
             now = timezone.now()
             month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-            filtered_ids = counsellors_qs.values_list('counsellor_id', flat=True)
-
-            total_counsellors = counsellors_qs.count()
-            active_counsellors = counsellors_qs.filter(user__is_active=1).count()
-            students_supported = (
-                CounsellingSessions.objects.filter(
-                    counsellor_id__in=filtered_ids,
-                    status__iexact='completed'
-                ).values('student_id').distinct().count()
+            # One pass over the filtered set; every join is one-to-one so nothing fans out
+            totals = counsellors_qs.order_by().aggregate(
+                total=Count('pk'),
+                active=Count('pk', filter=Q(user__is_active=1)),
+                verified=Count('pk', filter=Q(user__userdetails__is_verified=1)),
+                unverified=Count('pk', filter=Q(user__userdetails__is_verified=0)),
+                new_this_month=Count('pk', filter=Q(created_at__gte=month_start)),
+                students=Sum('stats__students_supported'),
+                sessions=Sum('stats__sessions_completed'),
+                rating_sum=Sum('stats__rating_sum'),
+                rating_count=Sum('stats__rating_count'),
             )
-            sessions_completed = CounsellingSessions.objects.filter(
-                counsellor_id__in=filtered_ids,
-                status__iexact='completed'
-            ).count()
-            feedback_qs = CounsellingFeedback.objects.filter(counsellor_id__in=filtered_ids)
-            average_rating = _calculate_average_rating(feedback_qs)
-            new_this_month = counsellors_qs.filter(created_at__gte=month_start).count()
+
+            if wants_cursor_pagination(request):
+                page_obj = paginate_by_cursor(request, counsellors_qs, per_page)
+                pagination = page_obj.pagination
+            else:
+                paginator = Paginator(counsellors_qs, per_page)
+                paginator.count = totals['total']
+                page_obj = paginator.get_page(page)
+                pagination = {
+                    'current_page': page_obj.number,
+                    'total_pages': paginator.num_pages,
+                    'total_items': paginator.count,
+                    'has_next': page_obj.has_next(),
+                    'has_previous': page_obj.has_previous(),
+                    'per_page': per_page,
+                }
+            if search:
+                pagination.update(search_notice(search_truncated))
+
+            counsellor_items = list(page_obj.object_list)
+            counsellors_data = [_serialize_counsellor(item) for item in counsellor_items]
+
+            total_counsellors = totals['total']
+            active_counsellors = totals['active']
+            students_supported = totals['students'] or 0
+            sessions_completed = totals['sessions'] or 0
+            average_rating = round(totals['rating_sum'] / totals['rating_count'], 2) if totals['rating_count'] else 0.0
+            new_this_month = totals['new_this_month']
 
             verification_counts = {
-                'verified': counsellors_qs.filter(user__userdetails__is_verified=1).count(),
-                'unverified': counsellors_qs.filter(user__userdetails__is_verified=0).count(),
+                'verified': totals['verified'],
+                'unverified': totals['unverified'],
             }
 
             status_counts = {
@@ -326,16 +336,11 @@ def get_all_counsellors(request):
                     'statusCounts': status_counts,
                     'verificationCounts': verification_counts,
                 },
-                'pagination': {
-                    'current_page': page_obj.number,
-                    'total_pages': paginator.num_pages,
-                    'total_items': paginator.count,
-                    'has_next': page_obj.has_next(),
-                    'has_previous': page_obj.has_previous(),
-                    'per_page': per_page,
-                }
+                'pagination': pagination
             })
 
+        except InvalidCursor as exc:
+            return JsonResponse({'success': False, 'message': str(exc)}, status=400)
         except ValueError:
             return JsonResponse({
                 'success': False,
@@ -355,7 +360,7 @@ def get_counsellor_details(request, counsellor_id):
     """Retrieve a single counsellor with associated data"""
     if request.method == 'GET':
         try:
-            counsellor = Counsellors.objects.select_related('user', 'user__userdetails').prefetch_related(
+            counsellor = Counsellors.objects.select_related('user', 'user__userdetails', 'stats').prefetch_related(
                 *COUNSELLOR_PREFETCHES
             ).get(counsellor_id=counsellor_id)
 
@@ -515,9 +520,7 @@ def update_counsellor(request, counsellor_id):
                 user_details.save()
                 counsellor.save()
 
-            refreshed = Counsellors.objects.select_related('user', 'user__userdetails').prefetch_related(
-                *COUNSELLOR_PREFETCHES
-            ).get(counsellor_id=counsellor_id)
+            refreshed = Counsellors.objects.select_related('user', 'user__userdetails', 'stats').get(counsellor_id=counsellor_id)
 
             return JsonResponse({
                 'success': True,
@@ -647,6 +650,9 @@ def get_all_students(request):
             
             # Order by creation date
             students = students.order_by('-user__created_at')
+
+            if wants_stream_export(request):
+                return stream_queryset_export(request, students, STUDENT_EXPORT_COLUMNS, 'students')
             
             # Pagination
             paginator = Paginator(students, per_page)
@@ -728,6 +734,11 @@ def get_all_university_students(request):
             
             # Order by creation date
             university_students = university_students.order_by('-user__created_at')
+
+            if wants_stream_export(request):
+                return stream_queryset_export(
+                    request, university_students, UNIVERSITY_STUDENT_EXPORT_COLUMNS, 'university-students'
+                )
             
             # Pagination
             paginator = Paginator(university_students, per_page)
@@ -1523,6 +1534,9 @@ def get_all_companies(request):
             
             # Order by creation date (newest first)
             companies = companies.order_by('-created_at')
+
+            if wants_stream_export(request):
+                return stream_queryset_export(request, companies, COMPANY_EXPORT_COLUMNS, 'companies')
             
             # Pagination
             paginator = Paginator(companies, per_page)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+# (column name, values() lookup, optional formatter)
+ExportColumn = Tuple[str, str, Optional[Callable[[object], object]]]
+
+
+def as_bool(value) -> bool:
+    return bool(value)
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def wants_stream_export(request) -> bool:
+    return request.GET.get('stream', '').lower() in {'1', 'true', 'yes'}
+
+
+def iter_export_rows(queryset, columns: Sequence[ExportColumn], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[dict]:
+    """Yield export rows newest-first in primary-key keyset batches.
+
+    Each batch is a separate ``values()`` query bounded by ``chunk_size`` so
+    memory stays flat even on backends whose drivers buffer whole result sets.
+    """
+    pk_name = queryset.model._meta.pk.attname
+    lookups = list(dict.fromkeys([pk_name] + [lookup for _, lookup, _ in columns]))
+    base = queryset.prefetch_related(None).order_by(f'-{pk_name}').values(*lookups)
+
+    last_pk = None
+    while True:
+        batch = base if last_pk is None else base.filter(**{f'{pk_name}__lt': last_pk})
+        rows = list(batch[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield {
+                column: _format_value(formatter(row[lookup]) if formatter else row[lookup])
+                for column, lookup, formatter in columns
+            }
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][pk_name]
+
+
+USER_EXPORT_COLUMNS: Sequence[ExportColumn] = (
+    ('user_id', 'user_id', None),
+    ('username', 'username', None),
+    ('email', 'email', None),
+    ('user_type', 'user_type__type_name', None),
+    ('is_active', 'is_active', as_bool),
+    ('full_name', 'userdetails__full_name', None),
+    ('contact_number', 'userdetails__contact_number', None),
+    ('is_verified', 'userdetails__is_verified', as_bool),
+    ('created_at', 'created_at', None),
+)
+
+STUDENT_EXPORT_COLUMNS: Sequence[ExportColumn] = (
+    ('student_id', 'student_id', None),
+    ('user_id', 'user_id', None),
+    ('username', 'user__username', None),
+    ('email', 'user__email', None),
+    ('full_name', 'user__userdetails__full_name', None),
+    ('contact_number', 'user__userdetails__contact_number', None),
+    ('current_stage', 'current_stage', None),
+    ('district', 'district', None),
+    ('school', 'school', None),
+    ('is_active', 'user__is_active', as_bool),
+    ('created_at', 'user__created_at', None),
+)
+
+UNIVERSITY_STUDENT_EXPORT_COLUMNS: Sequence[ExportColumn] = (
+    ('university_student_id', 'university_student_id', None),
+    ('user_id', 'user_id', None),
+    ('username', 'user__username', None),
+    ('email', 'user__email', None),
+    ('full_name', 'user__userdetails__full_name', None),
+    ('contact_number', 'user__userdetails__contact_number', None),
+    ('university', 'university__name', None),
+    ('faculty', 'faculty__name', None),
+    ('degree_program', 'degree_program__title', None),
+    ('year_of_study', 'year_of_study', None),
+    ('registration_number', 'registration_number', None),
+    ('enrollment_date', 'enrollment_date', None),
+    ('status', 'status', None),
+    ('is_active', 'user__is_active', as_bool),
+    ('created_at', 'user__created_at', None),
+)
+
+COUNSELLOR_EXPORT_COLUMNS: Sequence[ExportColumn] = (
+    ('counsellor_id', 'counsellor_id', None),
+    ('user_id', 'user_id', None),
+    ('username', 'user__username', None),
+    ('full_name', 'user__userdetails__full_name', None),
+    ('email', 'user__email', None),
+    ('phone', 'user__userdetails__contact_number', None),
+    ('location', 'user__userdetails__location', None),
+    ('is_active', 'user__is_active', as_bool),
+    ('verified', 'user__userdetails__is_verified', as_bool),
+    ('available_for_sessions', 'available_for_sessions', as_bool),
+    ('experience_years', 'experience_years', None),
+    ('hourly_rate', 'hourly_rate', None),
+    ('specializations', 'specializations', None),
+    ('languages', 'expertise', None),
+    ('qualifications', 'qualifications', None),
+    ('created_at', 'created_at', None),
+)
+
+COMPANY_EXPORT_COLUMNS: Sequence[ExportColumn] = (
+    ('company_id', 'company_id', None),
+    ('name', 'name', None),
+    ('description', 'description', None),
+    ('address', 'address', None),
+    ('district', 'district', None),
+    ('contact_email', 'contact_email', None),
+    ('contact_phone', 'contact_phone', None),
+    ('website', 'website', None),
+    ('created_at', 'created_at', None),
+)
+
+REPORT_EXPORT_COLUMNS: Sequence[ExportColumn] = (
+    ('report_id', 'report_id', None),
+    ('title', 'title', None),
+    ('description', 'description', None),
+    ('priority', 'priority', None),
+    ('status', 'status', None),
+    ('category', 'category__category_name', None),
+    ('reporter_username', 'reporter__username', None),
+    ('reporter_email', 'reporter__email', None),
+    ('reported_username', 'reported_user__username', None),
+    ('assigned_admin', 'assigned_admin__username', None),
+    ('admin_notes', 'admin_notes', None),
+    ('admin_action', 'admin_action', None),
+    ('created_at', 'created_at', None),
+    ('updated_at', 'updated_at', None),
+    ('resolved_at', 'resolved_at', None),
+)
+
+
+class _Echo:
+    """File-like object that hands csv.writer output straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_stream(rows: Iterator[dict], columns: Sequence[ExportColumn]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow([column for column, _, _ in columns])
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row.values()])
+
+
+def _ndjson_stream(rows: Iterator[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_queryset_export(request, queryset, columns: Sequence[ExportColumn], filename: str):
+    """Stream a filtered admin listing as CSV or NDJSON (``?stream=1&format=csv|ndjson``)."""
+    export_format = request.GET.get('format', 'csv').lower()
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return JsonResponse({
+            'success': False,
+            'message': f"Unsupported export format. Use one of: {', '.join(EXPORT_CONTENT_TYPES)}"
+        }, status=400)
+
+    rows = iter_export_rows(queryset, columns, EXPORT_CHUNK_SIZE)
+    content = _csv_stream(rows, columns) if export_format == 'csv' else _ndjson_stream(rows)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    timestamp = timezone.localtime().strftime('%Y%m%d%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{timestamp}.{export_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
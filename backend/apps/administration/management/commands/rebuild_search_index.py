@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.administration.search import SEARCH_ENTITIES, rebuild_search_index, uses_fulltext
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the admin search index (search_entries, plus search_tokens on non-MySQL databases).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entity',
+            action='append',
+            dest='entities',
+            help=f"Entity to rebuild; repeatable. One of: {', '.join(SEARCH_ENTITIES)} (default all)",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Objects per batch (default 500)')
+
+    def handle(self, *args, **options):
+        entities = options['entities'] or list(SEARCH_ENTITIES)
+        unknown = set(entities) - set(SEARCH_ENTITIES)
+        if unknown:
+            raise CommandError(f"Unknown search entity: {', '.join(sorted(unknown))}")
+
+        counts = rebuild_search_index(entities, batch_size=max(options['batch_size'], 1))
+        mode = 'FULLTEXT' if uses_fulltext() else 'token'
+        summary = ', '.join(f'{entity}={count}' for entity, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {mode} search index: {summary}'))
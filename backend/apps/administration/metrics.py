@@ -0,0 +1,134 @@
+"""In-process per-view request metrics.
+
+Each worker process keeps its own registry: request counts and totals since
+start-up, plus a bounded window of recent samples that percentiles are
+computed from. Nothing here touches the database.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Sequence, Tuple
+
+from django.conf import settings
+
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_SAMPLE_SIZE = 1000
+
+# (wall_ms, query_count, db_ms)
+Sample = Tuple[float, int, float]
+
+
+def sample_size() -> int:
+    return max(int(getattr(settings, 'REQUEST_METRICS_SAMPLE_SIZE', DEFAULT_SAMPLE_SIZE) or 0), 1)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return float(sorted_values[rank - 1])
+
+
+@dataclass
+class ViewMetrics:
+    requests: int = 0
+    errors: int = 0
+    over_budget: int = 0
+    wall_ms_total: float = 0.0
+    queries_total: int = 0
+    db_ms_total: float = 0.0
+    samples: Deque[Sample] = field(default_factory=lambda: deque(maxlen=sample_size()))
+
+    def record(self, wall_ms: float, queries: int, db_ms: float, status: int, over_budget: bool) -> None:
+        self.requests += 1
+        self.errors += status >= 500
+        self.over_budget += over_budget
+        self.wall_ms_total += wall_ms
+        self.queries_total += queries
+        self.db_ms_total += db_ms
+        self.samples.append((wall_ms, queries, db_ms))
+
+    def summary(self) -> Dict[str, object]:
+        columns = list(zip(*self.samples)) or [(), (), ()]
+        series = {}
+        for name, values in zip(('wall_ms', 'queries', 'db_ms'), columns):
+            ordered = sorted(values)
+            series[name] = {f'p{pct}': round(percentile(ordered, pct), 3) for pct in PERCENTILES}
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'over_query_budget': self.over_budget,
+            'wall_ms_total': round(self.wall_ms_total, 3),
+            'queries_total': self.queries_total,
+            'db_ms_total': round(self.db_ms_total, 3),
+            'window': len(self.samples),
+            **series,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views: Dict[str, ViewMetrics] = {}
+
+    def record(self, view: str, wall_ms: float, queries: int, db_ms: float, status: int, over_budget: bool = False) -> None:
+        with self._lock:
+            metrics = self._views.get(view)
+            if metrics is None:
+                metrics = self._views[view] = ViewMetrics()
+            metrics.record(wall_ms, queries, db_ms, status, over_budget)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {view: metrics.summary() for view, metrics in sorted(self._views.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(snapshot: Dict[str, Dict[str, object]]) -> str:
+    """Prometheus text exposition (0.0.4) of a registry snapshot.
+
+    Latency and query counts are exported as summaries whose quantiles cover
+    the recent sample window, while ``_sum``/``_count`` are process totals.
+    """
+    lines: List[str] = []
+
+    def counter(name: str, help_text: str, key: str) -> None:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for view, stats in snapshot.items():
+            lines.append(f'{name}{{view="{_label(view)}"}} {stats[key]}')
+
+    def summary(name: str, help_text: str, series: str, total: str, scale: float) -> None:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} summary')
+        for view, stats in snapshot.items():
+            label = _label(view)
+            for pct in PERCENTILES:
+                value = stats[series][f'p{pct}'] * scale
+                lines.append(f'{name}{{view="{label}",quantile="{pct / 100}"}} {float(value)!r}')
+            # repr keeps every digit; '%g' would round large running totals.
+            lines.append(f'{name}_sum{{view="{label}"}} {float(stats[total] * scale)!r}')
+            lines.append(f'{name}_count{{view="{label}"}} {stats["requests"]}')
+
+    counter('uniroute_http_requests_total', 'Requests handled per view.', 'requests')
+    counter('uniroute_http_errors_total', 'Requests per view that returned a 5xx response.', 'errors')
+    counter('uniroute_http_over_query_budget_total', 'Requests per view above REQUEST_QUERY_BUDGET.', 'over_query_budget')
+    summary('uniroute_http_request_seconds', 'Wall time per request.', 'wall_ms', 'wall_ms_total', 0.001)
+    summary('uniroute_db_queries_per_request', 'Database queries per request.', 'queries', 'queries_total', 1)
+    summary('uniroute_db_seconds_per_request', 'Database time per request.', 'db_ms', 'db_ms_total', 0.001)
+    return '\n'.join(lines) + '\n'
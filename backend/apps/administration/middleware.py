@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryTimer:
+    """``execute_wrapper`` hook counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def query_budget() -> int:
+    return int(getattr(settings, 'REQUEST_QUERY_BUDGET', 0) or 0)
+
+
+def _view_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    # Class-based views are reported by their class, like function views by their function.
+    view = getattr(match.func, 'view_class', match.func)
+    if not hasattr(view, '__qualname__'):
+        view = type(view)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, query count and DB time per resolved view.
+
+    Requests running more queries than ``REQUEST_QUERY_BUDGET`` (0 disables
+    the check) are counted and logged with their path.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        view = _view_name(request)
+        budget = query_budget()
+        over_budget = 0 < budget < timer.count
+        if over_budget:
+            logger.warning(
+                'Query budget exceeded: %s %s ran %d queries (budget %d) in %.1fms',
+                request.method, request.path, timer.count, budget, wall_ms,
+            )
+        registry.record(view, wall_ms, timer.count, timer.seconds * 1000, response.status_code, over_budget)
+        return response
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE search_entries ADD FULLTEXT INDEX search_entries_document_ft (document)')
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE search_entries DROP INDEX search_entries_document_ft')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_report_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('entry_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.CharField(max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'search_entries',
+                'constraints': [models.UniqueConstraint(fields=('entity', 'object_id'), name='unique_search_entry')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('token_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.CharField(max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'search_tokens',
+                'indexes': [models.Index(fields=['entity', 'token'], name='search_toke_entity_8c7c41_idx'), models.Index(fields=['entity', 'object_id'], name='search_toke_entity_98fc48_idx')],
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -47,6 +47,9 @@ class Report(models.Model):
     
     class Meta:
         db_table = 'reports'
+        indexes = [
+            models.Index(fields=['created_at', 'report_id']),
+        ]
         ordering = ['-created_at']
     
     def __str__(self):
@@ -74,4 +77,43 @@ class ReportAction(models.Model):
         db_table = 'report_actions'
     
     def __str__(self):
-        return f"{self.action_type} - {self.report.title}"
\ No newline at end of file
+        return f"{self.action_type} - {self.report.title}"
+
+class SearchEntry(models.Model):
+    """Searchable text for one admin-listed object.
+
+    On MySQL ``document`` carries a FULLTEXT index (see migration 0003); other
+    backends search the prefix-indexed SearchToken rows instead.
+    """
+    entry_id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=20)
+    object_id = models.IntegerField()
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'search_entries'
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'object_id'], name='unique_search_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} #{self.object_id}"
+
+
+class SearchToken(models.Model):
+    token_id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=20)
+    object_id = models.IntegerField()
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        db_table = 'search_tokens'
+        indexes = [
+            models.Index(fields=['entity', 'token']),
+            models.Index(fields=['entity', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} #{self.object_id}: {self.token}"
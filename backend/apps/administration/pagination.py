@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from django.core.cache import cache
+from django.db.models import BooleanField, F, Func, Value
+
+
+CURSOR_TOTAL_CACHE_TIMEOUT = 60
+DIRECTION_NEXT = 'next'
+DIRECTION_PREVIOUS = 'prev'
+# Query parameters that pick a page rather than filter the listing
+PAGINATION_PARAMS = frozenset({'cursor', 'pagination', 'page', 'per_page'})
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class CursorPage:
+    object_list: List
+    pagination: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+
+def wants_cursor_pagination(request) -> bool:
+    """Cursor mode is opt-in: ``?pagination=cursor`` for the first page, ``?cursor=...`` after that."""
+    return request.GET.get('pagination', '').lower() == 'cursor' or bool(request.GET.get('cursor'))
+
+
+def encode_cursor(value: Optional[datetime], pk, direction: str) -> str:
+    payload = json.dumps(
+        {'v': value.isoformat() if value is not None else None, 'pk': pk, 'd': direction},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        value = datetime.fromisoformat(payload['v']) if payload['v'] is not None else None
+        pk = int(payload['pk'])
+        direction = payload['d']
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor('Invalid pagination cursor') from exc
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREVIOUS):
+        raise InvalidCursor('Invalid pagination cursor')
+    return value, pk, direction
+
+
+class _Row(Func):
+    template = '(%(expressions)s)'
+
+
+class _RowCompare(Func):
+    """``(a, b) < (x, y)``: one range over an (a, b) index, where the equivalent OR may not use it."""
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+    def __init__(self, lhs, operator: str, rhs):
+        super().__init__(lhs, rhs)
+        self.arg_joiner = f' {operator} '
+
+
+def _seek(queryset, order_field: str, operator: str, value, pk):
+    field = queryset.model._meta.get_field(order_field)
+    return queryset.filter(_RowCompare(
+        _Row(F(order_field), F('pk')),
+        operator,
+        _Row(Value(value, output_field=field), Value(pk)),
+    ))
+
+
+def _segments(queryset, order_field: str, value, pk, direction: str, has_cursor: bool):
+    """The rows after the cursor as querysets, read in order until a page is full.
+
+    Listings run newest-first by (``order_field``, pk) with undated rows last.
+    Dated and undated rows are separate segments, so each is one range over
+    the (``order_field``, pk) index instead of an OR across both.
+    """
+    dated = queryset.filter(**{f'{order_field}__isnull': False})
+    undated = queryset.filter(**{f'{order_field}__isnull': True})
+    newest_first = (F(order_field).desc(), F('pk').desc())
+    oldest_first = (F(order_field).asc(), F('pk').asc())
+
+    if direction == DIRECTION_PREVIOUS:
+        if value is None:
+            return [undated.filter(pk__gt=pk).order_by('pk'), dated.order_by(*oldest_first)]
+        return [_seek(dated, order_field, '>', value, pk).order_by(*oldest_first)]
+    if not has_cursor:
+        return [dated.order_by(*newest_first), undated.order_by('-pk')]
+    if value is None:
+        return [undated.filter(pk__lt=pk).order_by('-pk')]
+    return [_seek(dated, order_field, '<', value, pk).order_by(*newest_first), undated.order_by('-pk')]
+
+
+def _take(segments, limit: int) -> List:
+    rows: List = []
+    for segment in segments:
+        rows.extend(segment[:limit - len(rows)])
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def _total_cache_key(request, queryset) -> str:
+    # The listing's own filters, not its SQL: the same filters always share a count.
+    filters = sorted(
+        (name, sorted(values)) for name, values in request.GET.lists() if name not in PAGINATION_PARAMS
+    )
+    digest = hashlib.sha256(json.dumps([request.path, filters]).encode()).hexdigest()
+    return f'admin:cursor-total:{queryset.model._meta.label_lower}:{digest}'
+
+
+def cached_total(queryset, key: str, timeout: int = CURSOR_TOTAL_CACHE_TIMEOUT) -> int:
+    """Row count for a filtered listing, shared between requests with the same ``key`` for ``timeout`` seconds."""
+    return cache.get_or_set(key, queryset.order_by().count, timeout)
+
+
+def paginate_by_cursor(request, queryset, per_page: int, order_field: str = 'created_at') -> CursorPage:
+    """Keyset page over ``queryset`` ordered newest-first by (``order_field``, pk).
+
+    Each page is a ``LIMIT per_page + 1`` seek from the cursor (a second one
+    only where dated rows run out into undated ones), so deep pages cost the
+    same as the first one. The total is a cached count rather than an exact
+    ``COUNT(*)`` per request.
+    """
+    token = request.GET.get('cursor')
+    value = pk = None
+    direction = DIRECTION_NEXT
+    if token:
+        value, pk, direction = decode_cursor(token)
+
+    rows = _take(_segments(queryset, order_field, value, pk, direction, bool(token)), per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == DIRECTION_PREVIOUS:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(token)
+
+    first, last = (rows[0], rows[-1]) if rows else (None, None)
+    pagination = {
+        'mode': 'cursor',
+        'per_page': per_page,
+        'has_next': has_next,
+        'has_previous': has_previous,
+        'next_cursor': encode_cursor(getattr(last, order_field), last.pk, DIRECTION_NEXT) if has_next and last else None,
+        'previous_cursor': (
+            encode_cursor(getattr(first, order_field), first.pk, DIRECTION_PREVIOUS) if has_previous and first else None
+        ),
+        'total_items': cached_total(queryset, _total_cache_key(request, queryset)),
+        'total_is_exact': False,
+    }
+    return CursorPage(rows, pagination)
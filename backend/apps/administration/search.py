@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import reduce
+from operator import add, or_
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, IntegerField, Max, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from apps.accounts.models import Users
+from apps.counsellors.models import Counsellors
+from apps.mentoring.models import Mentors
+
+from .models import Report, SearchEntry, SearchToken
+
+
+# Only the best matches are kept (``apply_search`` reports when more matched);
+# admin search is for finding a record, not paging through thousands.
+SEARCH_RESULT_LIMIT = 500
+MAX_QUERY_TERMS = 8
+TOKEN_MAX_LENGTH = 64
+# InnoDB ignores shorter words (innodb_ft_min_token_size)
+FULLTEXT_MIN_TERM_LENGTH = 3
+# Upper bound for prefix ranges on the token index
+_PREFIX_SENTINEL = '\U0010ffff'
+
+WeightedText = Tuple[Optional[str], int]
+Ranking = List[Tuple[int, float]]
+
+
+@dataclass(frozen=True)
+class SearchEntity:
+    queryset: Callable[[], object]
+    fields: Callable[[object], List[WeightedText]]
+
+
+def _user_identity(user) -> List[WeightedText]:
+    details = getattr(user, 'userdetails', None) if user else None
+    return [
+        (getattr(user, 'username', None), 3),
+        (getattr(details, 'full_name', None), 3),
+        (getattr(user, 'email', None), 2),
+    ]
+
+
+def _counsellor_fields(counsellor) -> List[WeightedText]:
+    return _user_identity(counsellor.user) + [
+        (counsellor.specializations, 2),
+        (counsellor.expertise, 2),
+        (counsellor.bio, 1),
+    ]
+
+
+def _mentor_fields(mentor) -> List[WeightedText]:
+    uni_student = mentor.university_student
+    return _user_identity(mentor.user) + [
+        (getattr(getattr(uni_student, 'university', None), 'name', None), 1),
+        (getattr(getattr(uni_student, 'degree_program', None), 'title', None), 1),
+    ]
+
+
+def _report_fields(report) -> List[WeightedText]:
+    return [
+        (report.title, 3),
+        (getattr(report.reporter, 'username', None), 2),
+        (report.description, 1),
+    ]
+
+
+SEARCH_ENTITIES: Dict[str, SearchEntity] = {
+    'user': SearchEntity(lambda: Users.objects.select_related('userdetails'), _user_identity),
+    'counsellor': SearchEntity(lambda: Counsellors.objects.select_related('user__userdetails'), _counsellor_fields),
+    'mentor': SearchEntity(
+        lambda: Mentors.objects.select_related(
+            'user__userdetails', 'university_student__university', 'university_student__degree_program'
+        ),
+        _mentor_fields,
+    ),
+    'report': SearchEntity(lambda: Report.objects.select_related('reporter'), _report_fields),
+}
+
+
+def uses_fulltext() -> bool:
+    return connection.vendor == 'mysql'
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [token[:TOKEN_MAX_LENGTH] for token in re.findall(r'\w+', text.lower())]
+
+
+def query_terms(query: str) -> List[str]:
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if uses_fulltext():
+        terms = [term for term in terms if len(term) >= FULLTEXT_MIN_TERM_LENGTH]
+    return terms
+
+
+def _document(fields: Sequence[WeightedText]) -> str:
+    # Repeating a field raises its term frequency, which is how FULLTEXT weights it.
+    return ' '.join(' '.join([text] * weight) for text, weight in fields if text)
+
+
+def _tokens(entity: str, object_id: int, fields: Sequence[WeightedText]) -> List[SearchToken]:
+    weights: Dict[str, int] = {}
+    for text, weight in fields:
+        for token in tokenize(text):
+            weights[token] = max(weights.get(token, 0), weight)
+    return [
+        SearchToken(entity=entity, object_id=object_id, token=token, weight=weight)
+        for token, weight in weights.items()
+    ]
+
+
+def index_objects(entity: str, objects: Iterable) -> int:
+    """Replace the search rows for ``objects``; returns how many were indexed."""
+    spec = SEARCH_ENTITIES[entity]
+    entries: List[SearchEntry] = []
+    tokens: List[SearchToken] = []
+    with_tokens = not uses_fulltext()
+    for obj in objects:
+        fields = spec.fields(obj)
+        entries.append(SearchEntry(entity=entity, object_id=obj.pk, document=_document(fields)))
+        if with_tokens:
+            tokens.extend(_tokens(entity, obj.pk, fields))
+
+    object_ids = [entry.object_id for entry in entries]
+    with transaction.atomic():
+        SearchEntry.objects.filter(entity=entity, object_id__in=object_ids).delete()
+        SearchToken.objects.filter(entity=entity, object_id__in=object_ids).delete()
+        SearchEntry.objects.bulk_create(entries, batch_size=500)
+        SearchToken.objects.bulk_create(tokens, batch_size=1000)
+    return len(entries)
+
+
+def reindex(entity: str, object_ids: Iterable[int]) -> None:
+    """Bring the index in line with the current rows for ``object_ids``, dropping deleted ones."""
+    object_ids = set(object_ids)
+    if not object_ids:
+        return
+    objects = list(SEARCH_ENTITIES[entity].queryset().filter(pk__in=object_ids))
+    missing = object_ids - {obj.pk for obj in objects}
+    with transaction.atomic():
+        if missing:
+            SearchEntry.objects.filter(entity=entity, object_id__in=missing).delete()
+            SearchToken.objects.filter(entity=entity, object_id__in=missing).delete()
+        index_objects(entity, objects)
+
+
+def reindex_mentors(**filters) -> None:
+    """Reindex the mentors matching ``filters``, whose entries include their university and degree program."""
+    reindex('mentor', Mentors.objects.filter(**filters).values_list('pk', flat=True))
+
+
+def reindex_for_user(user_id: int) -> None:
+    """A user's name or email feeds the user, counsellor, mentor and report entries."""
+    reindex('user', [user_id])
+    reindex('counsellor', Counsellors.objects.filter(user_id=user_id).values_list('pk', flat=True))
+    reindex_mentors(user_id=user_id)
+    reindex('report', Report.objects.filter(reporter_id=user_id).values_list('pk', flat=True))
+
+
+def rebuild_search_index(entities: Optional[Iterable[str]] = None, batch_size: int = 500) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for entity in entities or SEARCH_ENTITIES:
+        SearchEntry.objects.filter(entity=entity).delete()
+        SearchToken.objects.filter(entity=entity).delete()
+        queryset = SEARCH_ENTITIES[entity].queryset().order_by('pk')
+        counts[entity] = 0
+        last_pk = None
+        while True:
+            batch_qs = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:batch_size])
+            if not batch:
+                break
+            counts[entity] += index_objects(entity, batch)
+            last_pk = batch[-1].pk
+    return counts
+
+
+def _fulltext_ranking(entity: str, terms: List[str], limit: int) -> Ranking:
+    boolean_query = ' '.join(f'+{term}*' for term in terms)
+    return list(
+        SearchEntry.objects.filter(entity=entity)
+        .annotate(score=RawSQL('MATCH (document) AGAINST (%s IN BOOLEAN MODE)', (boolean_query,), output_field=FloatField()))
+        .filter(score__gt=0)
+        .order_by('-score', '-object_id')
+        .values_list('object_id', 'score')[:limit]
+    )
+
+
+def _prefix(term: str) -> Q:
+    # A range rather than LIKE so every backend can seek the (entity, token) index.
+    return Q(token__gte=term, token__lt=term + _PREFIX_SENTINEL)
+
+
+def _token_ranking(entity: str, terms: List[str], limit: int) -> Ranking:
+    # Per term: best weight among the object's tokens it prefixes, +1 for an exact token.
+    term_scores = {
+        f'term_{index}': Max(Case(
+            When(token=term, then=F('weight') + 1),
+            When(_prefix(term), then=F('weight')),
+            default=0,
+            output_field=IntegerField(),
+        ))
+        for index, term in enumerate(terms)
+    }
+    rows = (
+        SearchToken.objects.filter(entity=entity)
+        .filter(reduce(or_, (_prefix(term) for term in terms)))
+        .values('object_id')
+        .annotate(**term_scores)
+        .filter(**{f'{alias}__gt': 0 for alias in term_scores})
+        .annotate(score=reduce(add, (F(alias) for alias in term_scores)))
+        .order_by('-score', '-object_id')
+        .values_list('object_id', 'score')[:limit]
+    )
+    return [(object_id, float(score)) for object_id, score in rows]
+
+
+def search_ranking(entity: str, query: str, limit: int = SEARCH_RESULT_LIMIT) -> Optional[Ranking]:
+    """Matching object ids, best first; ``None`` when the query has no searchable terms.
+
+    Every term must match, each as a word prefix.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    if uses_fulltext():
+        return _fulltext_ranking(entity, terms, limit)
+    return _token_ranking(entity, terms, limit)
+
+
+def apply_search(queryset, entity: str, query: str, fallback: Optional[Q] = None):
+    """Restrict ``queryset`` to search matches ordered by relevance.
+
+    Returns ``(queryset, truncated)``; ``truncated`` is true when more than
+    ``SEARCH_RESULT_LIMIT`` objects matched and only the best were kept. The
+    queryset's existing ordering breaks ties. Queries with no indexable
+    terms (punctuation, or words below the FULLTEXT minimum) use ``fallback``.
+    """
+    ranking = search_ranking(entity, query, SEARCH_RESULT_LIMIT + 1)
+    if ranking is None:
+        return (queryset.filter(fallback) if fallback is not None else queryset), False
+    if not ranking:
+        return queryset.none(), False
+    truncated = len(ranking) > SEARCH_RESULT_LIMIT
+    ranking = ranking[:SEARCH_RESULT_LIMIT]
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    search_rank = Case(
+        *[When(pk=object_id, then=Value(score)) for object_id, score in ranking],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    queryset = (
+        queryset.filter(pk__in=[object_id for object_id, _ in ranking])
+        .annotate(search_rank=search_rank)
+        .order_by('-search_rank', *ordering)
+    )
+    return queryset, truncated
+
+
+def search_notice(truncated: bool) -> Dict[str, object]:
+    """Pagination fields telling clients whether the search cap cut the results short."""
+    return {'search_truncated': truncated, 'search_result_limit': SEARCH_RESULT_LIMIT}
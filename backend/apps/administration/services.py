@@ -0,0 +1,626 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from apps.accounts.models import UserDailyLogin, Users
+from apps.companies.models import Companies, InternshipOpportunities
+from apps.mentoring.models import MentoringRequests, Mentors
+from apps.payments.models import MentoringPayments, TutoringPayments
+from apps.pre_university_courses.models import PreUniversityCourse
+from apps.reports.rollups import load_daily_metrics, sum_by_day
+from apps.students.models import Students
+from apps.tutoring.models import TutoringSessions, Tutors
+from apps.universities.models import Universities
+from apps.university_programs.models import DegreePrograms
+from apps.university_students.models import UniversityStudents
+
+
+logger = logging.getLogger(__name__)
+
+GROWTH_CHART_MONTHS = 6
+DAILY_ACTIVITY_DAYS = 7
+TIMELINE_RANGE_DAYS = 60
+
+MENTORING_REQUEST_STATUSES = ('pending', 'scheduled', 'completed', 'declined')
+TUTORING_SESSION_STATUSES = ('pending', 'scheduled', 'completed', 'cancelled')
+
+COUNSELLOR_TYPE_FILTER = Q(user_type__type_name__iexact='counselor') | Q(user_type__type_name__iexact='counsellor')
+
+USER_TYPE_LABELS = {
+    'student': 'Student',
+    'uni_student': 'University Student',
+    'mentor': 'Mentor',
+    'tutor': 'Tutor',
+    'university': 'University',
+    'company': 'Company',
+    'admin': 'Administrator',
+}
+
+TIMELINE_EVENT_LABELS = {
+    'logins': 'User logins',
+    'registrations': 'New registrations',
+    'mentoring_requests': 'Mentoring session requests',
+    'tutoring_bookings': 'Tutoring sessions booked',
+    'courses_published': 'Pre-university courses published',
+    'mentor_applications': 'Mentor applications submitted',
+}
+
+
+def _shift_month(month_start: datetime, months: int) -> datetime:
+    month_index = month_start.year * 12 + (month_start.month - 1) + months
+    return month_start.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def _growth_percent(total: int, baseline: int) -> float:
+    return round((total - baseline) / baseline * 100, 1) if baseline > 0 else 0
+
+
+def _month_key(value) -> Optional[tuple]:
+    if value is None:
+        return None
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.year, value.month
+
+
+def _totals_with_baseline(queryset, date_field: str, cutoff: datetime, **extra) -> Dict[str, int]:
+    """Total rows and rows created before ``cutoff`` in a single conditional aggregate."""
+    return queryset.aggregate(
+        total=Count('pk'),
+        baseline=Count('pk', filter=Q(**{f'{date_field}__lt': cutoff})),
+        **extra,
+    )
+
+
+def _status_breakdown(queryset, statuses: Iterable[str]) -> Dict[str, int]:
+    aggregates = {'total': Count('pk')}
+    for status in statuses:
+        aggregates[status] = Count('pk', filter=Q(status__iexact=status))
+    return queryset.aggregate(**aggregates)
+
+
+def _cumulative_monthly_counts(queryset, date_field: str, months: List[datetime], before_window: int) -> List[int]:
+    """Running totals at the end of each month, bucketed with one grouped query."""
+    window_end = _shift_month(months[-1], 1)
+    per_month = {
+        _month_key(entry['month']): entry['total']
+        for entry in queryset.filter(**{
+            f'{date_field}__gte': months[0],
+            f'{date_field}__lt': window_end,
+        }).annotate(month=TruncMonth(date_field)).values('month').annotate(total=Count('pk')).order_by()
+    }
+
+    running = before_window
+    cumulative = []
+    for month_start in months:
+        running += per_month.get(_month_key(month_start), 0)
+        cumulative.append(running)
+    return cumulative
+
+
+def _counts_by_day(queryset, date_field: str, start_date: date, end_date: date) -> Dict[date, int]:
+    return {
+        entry['activity_date']: entry['total']
+        for entry in queryset.filter(**{
+            f'{date_field}__isnull': False,
+            f'{date_field}__date__gte': start_date,
+            f'{date_field}__date__lte': end_date,
+        }).annotate(activity_date=TruncDate(date_field)).values('activity_date').annotate(total=Count('pk')).order_by()
+    }
+
+
+def _payments_on_day(model, day_start: datetime, day_end: datetime) -> Dict[str, object]:
+    totals = model.objects.filter(
+        Q(paid_at__isnull=False, paid_at__gte=day_start, paid_at__lt=day_end)
+        | Q(
+            paid_at__isnull=True,
+            created_at__isnull=False,
+            created_at__gte=day_start,
+            created_at__lt=day_end,
+        )
+    ).aggregate(total=Sum('amount'), count=Count('pk'))
+    return {'total': totals['total'] or Decimal('0'), 'count': totals['count']}
+
+
+def _time_ago(now: datetime, created_at: datetime) -> str:
+    time_diff = now - created_at
+    if time_diff.total_seconds() < 3600:  # Less than 1 hour
+        return f"{int(time_diff.total_seconds() // 60)} minutes ago"
+    if time_diff.total_seconds() < 86400:  # Less than 1 day
+        return f"{int(time_diff.total_seconds() // 3600)} hours ago"
+    return f"{time_diff.days} days ago"
+
+
+def _safe_get_related(instance, attribute):
+    if not instance:
+        return None
+    try:
+        return getattr(instance, attribute)
+    except Exception:
+        return None
+
+
+def _display_name(user) -> str:
+    if not user:
+        return 'Unknown user'
+    details = _safe_get_related(user, 'userdetails')
+    if details and getattr(details, 'full_name', None):
+        return details.full_name
+    return getattr(user, 'username', 'User')
+
+
+def _normalize_datetime(value):
+    if not value:
+        return None
+    try:
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, timezone.get_current_timezone())
+        return timezone.localtime(value)
+    except Exception:
+        return value if isinstance(value, datetime) else None
+
+
+def _collect_timeline_events(start_date: date, end_date: date) -> Dict[date, List[dict]]:
+    events_by_day: Dict[date, List[dict]] = defaultdict(list)
+
+    def append_event(date_obj, payload):
+        if not date_obj:
+            return
+        events_by_day[date_obj].append(payload)
+
+    login_activity_records = (
+        UserDailyLogin.objects.filter(
+            login_date__gte=start_date,
+            login_date__lte=end_date,
+        ).select_related('user__userdetails', 'user__user_type')
+    )
+
+    for login_record in login_activity_records:
+        user = _safe_get_related(login_record, 'user')
+        display_name = _display_name(user) if user else 'User'
+        login_count = int(getattr(login_record, 'login_count', 0) or 0)
+        subtitle = 'Login recorded today' if login_count <= 1 else f"{login_count} logins recorded today"
+        normalized_last_login = _normalize_datetime(getattr(login_record, 'last_login_at', None))
+        append_event(
+            getattr(login_record, 'login_date', None),
+            {
+                'id': f'login-{login_record.pk}',
+                'type': 'login',
+                'title': f'{display_name} logged in',
+                'subtitle': subtitle,
+                'timestamp': normalized_last_login.isoformat() if normalized_last_login else None,
+            },
+        )
+
+    registrations = (
+        Users.objects.filter(
+            created_at__isnull=False,
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date,
+        ).select_related('user_type', 'userdetails')
+    )
+
+    for user in registrations:
+        created_at = _normalize_datetime(getattr(user, 'created_at', None))
+        type_name = getattr(getattr(user, 'user_type', None), 'type_name', 'user')
+        type_label = USER_TYPE_LABELS.get(type_name, type_name.replace('_', ' ').title())
+        append_event(
+            created_at.date() if created_at else None,
+            {
+                'id': f'registration-{user.user_id}',
+                'type': 'registration',
+                'title': f'{_display_name(user)} registered as {type_label}',
+                'subtitle': 'New account created',
+                'timestamp': created_at.isoformat() if created_at else None,
+            },
+        )
+
+    mentoring_requests = (
+        MentoringRequests.objects.filter(
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date,
+        ).select_related(
+            'student__user__userdetails',
+            'mentor__user__userdetails',
+        )
+    )
+
+    for mentoring_request in mentoring_requests:
+        created_at = _normalize_datetime(getattr(mentoring_request, 'created_at', None))
+        student_user = _safe_get_related(_safe_get_related(mentoring_request, 'student'), 'user')
+        mentor_user = _safe_get_related(_safe_get_related(mentoring_request, 'mentor'), 'user')
+        student_name = _display_name(student_user) if student_user else 'A student'
+        mentor_name = _display_name(mentor_user) if mentor_user else 'a mentor'
+        subtitle_parts = []
+        if getattr(mentoring_request, 'topic', None):
+            subtitle_parts.append(f'Topic: {mentoring_request.topic}')
+        try:
+            session_type_label = mentoring_request.get_session_type_display()
+        except Exception:
+            session_type_label = None
+        if session_type_label:
+            subtitle_parts.append(session_type_label)
+        append_event(
+            created_at.date() if created_at else None,
+            {
+                'id': f'mentoring-request-{mentoring_request.request_id}',
+                'type': 'mentoring_request',
+                'title': f'{student_name} requested mentoring with {mentor_name}',
+                'subtitle': ' • '.join(subtitle_parts) if subtitle_parts else 'Mentoring request submitted',
+                'timestamp': created_at.isoformat() if created_at else None,
+            },
+        )
+
+    tutoring_payments = (
+        TutoringPayments.objects.annotate(
+            activity_datetime=Coalesce('paid_at', 'created_at')
+        ).filter(
+            activity_datetime__isnull=False,
+            activity_datetime__date__gte=start_date,
+            activity_datetime__date__lte=end_date,
+        ).select_related(
+            'student__user__userdetails',
+            'booking__tutor__user__userdetails',
+            'booking__subject',
+        )
+    )
+
+    for payment in tutoring_payments:
+        activity_at = _normalize_datetime(getattr(payment, 'activity_datetime', None))
+        student_user = _safe_get_related(_safe_get_related(payment, 'student'), 'user')
+        booking = _safe_get_related(payment, 'booking')
+        tutor_user = _safe_get_related(_safe_get_related(booking, 'tutor'), 'user') if booking else None
+        student_name = _display_name(student_user) if student_user else 'A student'
+        tutor_name = _display_name(tutor_user) if tutor_user else 'a tutor'
+        subject = _safe_get_related(booking, 'subject') if booking else None
+        subtitle_parts = []
+        if getattr(subject, 'subject_name', None):
+            subtitle_parts.append(f'Subject: {subject.subject_name}')
+        if payment.amount is not None:
+            subtitle_parts.append(f'Amount: LKR {payment.amount}')
+        append_event(
+            activity_at.date() if activity_at else None,
+            {
+                'id': f'tutoring-booking-{payment.payment_id}',
+                'type': 'tutoring_booking',
+                'title': f'{student_name} booked a tutoring session with {tutor_name}',
+                'subtitle': ' • '.join(subtitle_parts) if subtitle_parts else 'Tutoring session booked',
+                'timestamp': activity_at.isoformat() if activity_at else None,
+            },
+        )
+
+    published_courses = (
+        PreUniversityCourse.objects.filter(
+            status='published',
+            updated_at__date__gte=start_date,
+            updated_at__date__lte=end_date,
+        ).select_related('mentor__user__userdetails')
+    )
+
+    for course in published_courses:
+        updated_at = _normalize_datetime(getattr(course, 'updated_at', None))
+        mentor_user = _safe_get_related(_safe_get_related(course, 'mentor'), 'user')
+        mentor_name = _display_name(mentor_user) if mentor_user else 'Mentor'
+        append_event(
+            updated_at.date() if updated_at else None,
+            {
+                'id': f'course-published-{course.id}',
+                'type': 'course_published',
+                'title': f'Course "{course.title}" published',
+                'subtitle': f'Published by {mentor_name}',
+                'timestamp': updated_at.isoformat() if updated_at else None,
+            },
+        )
+
+    mentor_applications = (
+        Mentors.objects.filter(
+            created_at__isnull=False,
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date,
+        ).select_related('user__userdetails')
+    )
+
+    for mentor in mentor_applications:
+        created_at = _normalize_datetime(getattr(mentor, 'created_at', None))
+        mentor_user = _safe_get_related(mentor, 'user')
+        mentor_name = _display_name(mentor_user) if mentor_user else 'User'
+        append_event(
+            created_at.date() if created_at else None,
+            {
+                'id': f'mentor-application-{mentor.mentor_id}',
+                'type': 'mentor_application',
+                'title': f'{mentor_name} applied to become a mentor',
+                'subtitle': 'Application approved' if getattr(mentor, 'approved', None) else 'Application submitted',
+                'timestamp': created_at.isoformat() if created_at else None,
+            },
+        )
+
+    for day_events in events_by_day.values():
+        day_events.sort(key=lambda event: event.get('timestamp') or '', reverse=True)
+
+    return events_by_day
+
+
+def _recent_activities(now: datetime) -> List[dict]:
+    recent_users = Users.objects.select_related('user_type').order_by('-created_at')[:5]
+    recent_activities = []
+    for user in recent_users:
+        type_name = user.user_type.type_name
+        type_label = USER_TYPE_LABELS.get(type_name) if type_name != 'admin' else None
+        recent_activities.append({
+            'id': user.user_id,
+            'user': user.username,
+            'action': f"registered as {type_label or 'User'}",
+            'time': _time_ago(now, user.created_at),
+            'date': user.created_at.strftime('%Y-%m-%d'),
+            'performedBy': 'user'
+        })
+    return recent_activities
+
+
+def build_dashboard_statistics(now: Optional[datetime] = None) -> Dict[str, object]:
+    """Compute the admin dashboard payload with a fixed number of queries.
+
+    Every entity contributes one conditional aggregate (totals, growth baseline
+    and status breakdowns together); chart series are bucketed in the database
+    with TruncMonth/TruncDate or read from the daily metrics rollup instead of
+    one COUNT per month or day.
+    """
+    now = now or timezone.now()
+    local_now = timezone.localtime(now)
+    today_date = local_now.date()
+    today_start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    current_month_start = today_start.replace(day=1)
+    growth_months = [
+        _shift_month(current_month_start, offset)
+        for offset in range(-(GROWTH_CHART_MONTHS - 1), 1)
+    ]
+    growth_window_start = growth_months[0]
+
+    # Entity totals and growth baselines: one query per table
+    users = _totals_with_baseline(
+        Users.objects.all(),
+        'created_at',
+        current_month_start,
+        before_growth_window=Count('pk', filter=Q(created_at__lt=growth_window_start)),
+        counsellors=Count('pk', filter=COUNSELLOR_TYPE_FILTER),
+        counsellors_baseline=Count('pk', filter=COUNSELLOR_TYPE_FILTER & Q(created_at__lt=current_month_start)),
+    )
+    students = _totals_with_baseline(
+        Students.objects.all(),
+        'user__created_at',
+        current_month_start,
+        before_growth_window=Count('pk', filter=Q(user__created_at__lt=growth_window_start)),
+    )
+    university_students = _totals_with_baseline(
+        UniversityStudents.objects.all(),
+        'user__created_at',
+        current_month_start,
+        before_growth_window=Count('pk', filter=Q(user__created_at__lt=growth_window_start)),
+    )
+    mentors = _totals_with_baseline(Mentors.objects.all(), 'user__created_at', current_month_start)
+    tutors = _totals_with_baseline(Tutors.objects.all(), 'user__created_at', current_month_start)
+    universities = _totals_with_baseline(Universities.objects.all(), 'created_at', current_month_start)
+    companies = _totals_with_baseline(Companies.objects.all(), 'created_at', current_month_start)
+    programs = _totals_with_baseline(DegreePrograms.objects.filter(is_active=1), 'created_at', current_month_start)
+    published_courses = _totals_with_baseline(
+        PreUniversityCourse.objects.filter(status='published'),
+        'updated_at',
+        current_month_start,
+    )
+
+    mentoring_requests = _status_breakdown(MentoringRequests.objects.all(), MENTORING_REQUEST_STATUSES)
+    tutoring_sessions = _status_breakdown(TutoringSessions.objects.all(), TUTORING_SESSION_STATUSES)
+
+    internships = InternshipOpportunities.objects.aggregate(
+        total=Count('pk'),
+        currently_open=Count(
+            'pk',
+            filter=Q(application_deadline__isnull=True) | Q(application_deadline__gte=today_date),
+        ),
+    )
+
+    # User growth data for charts (last 6 months, cumulative)
+    users_series = _cumulative_monthly_counts(
+        Users.objects.all(), 'created_at', growth_months, users['before_growth_window'],
+    )
+    students_series = _cumulative_monthly_counts(
+        Students.objects.all(), 'user__created_at', growth_months, students['before_growth_window'],
+    )
+    university_students_series = _cumulative_monthly_counts(
+        UniversityStudents.objects.all(), 'user__created_at', growth_months,
+        university_students['before_growth_window'],
+    )
+    user_growth_data = [
+        {
+            'month': month_start.strftime('%b'),
+            'users': users_series[index],
+            'students': students_series[index],
+            'universityStudents': university_students_series[index],
+        }
+        for index, month_start in enumerate(growth_months)
+    ]
+
+    user_distribution = [
+        {'name': 'Students', 'value': students['total'], 'color': '#81C784'},
+        {'name': 'University Students', 'value': university_students['total'], 'color': '#75C2F6'},
+        {'name': 'Mentors', 'value': mentors['total'], 'color': '#F4D160'},
+        {'name': 'Tutors', 'value': tutors['total'], 'color': '#4C7FB1'},
+        {'name': 'Counsellors', 'value': users['counsellors'], 'color': '#B39DDB'},
+        {'name': 'Universities', 'value': universities['total'], 'color': '#1D5D9B'},
+        {'name': 'Companies', 'value': companies['total'], 'color': '#E57373'}
+    ]
+
+    # Daily series come from the rollup table: one row per day and metric
+    # covering both the six month charts and the 60 day timeline.
+    timeline_start_date = today_date - timedelta(days=TIMELINE_RANGE_DAYS)
+    daily_metrics = load_daily_metrics(
+        min(growth_window_start.date(), timeline_start_date),
+        today_date,
+        ('new_users', 'logins', 'tutoring_payments', 'tutoring_revenue'),
+    )
+    login_totals = sum_by_day(daily_metrics, 'logins')
+    registrations_by_day = sum_by_day(daily_metrics, 'new_users')
+    tutoring_bookings_by_day = sum_by_day(daily_metrics, 'tutoring_payments')
+    tutoring_revenue_by_day = sum_by_day(daily_metrics, 'tutoring_revenue')
+
+    # Monthly transaction trends (last 6 months)
+    transactions_by_month = defaultdict(lambda: {'transaction_count': 0, 'total_amount': Decimal('0')})
+    for day, count in tutoring_bookings_by_day.items():
+        transactions_by_month[(day.year, day.month)]['transaction_count'] += int(count)
+    for day, amount in tutoring_revenue_by_day.items():
+        transactions_by_month[(day.year, day.month)]['total_amount'] += amount
+
+    monthly_transaction_data = []
+    for month_start in growth_months:
+        bucket = transactions_by_month[(month_start.year, month_start.month)]
+        monthly_transaction_data.append({
+            'month': month_start.strftime('%b'),
+            'label': month_start.strftime('%b %Y'),
+            'transaction_count': bucket['transaction_count'],
+            'total_amount': float(bucket['total_amount']),
+        })
+
+    # Activity timeline for calendar (last 60 days); the 7-day chart and
+    # today's figures are read from the same buckets.
+    mentoring_requests_by_day = _counts_by_day(
+        MentoringRequests.objects.all(), 'created_at', timeline_start_date, today_date,
+    )
+    courses_published_by_day = _counts_by_day(
+        PreUniversityCourse.objects.filter(status='published'), 'updated_at', timeline_start_date, today_date,
+    )
+    mentor_applications_by_day = _counts_by_day(
+        Mentors.objects.all(), 'created_at', timeline_start_date, today_date,
+    )
+
+    daily_activity = []
+    for offset in range(DAILY_ACTIVITY_DAYS - 1, -1, -1):
+        day = today_date - timedelta(days=offset)
+        daily_activity.append({
+            'date': day.strftime('%b %d'),
+            'registrations': int(registrations_by_day.get(day, 0) or 0),
+            'logins': int(login_totals.get(day, 0) or 0),
+        })
+
+    try:
+        events_by_day = _collect_timeline_events(timeline_start_date, today_date)
+    except Exception as timeline_error:
+        logger.exception('Failed to build activity events timeline: %s', timeline_error)
+        events_by_day = defaultdict(list)
+
+    activity_timeline = {}
+    for day_offset in range(TIMELINE_RANGE_DAYS + 1):
+        date_value = timeline_start_date + timedelta(days=day_offset)
+        counts = {
+            'logins': int(login_totals.get(date_value, 0) or 0),
+            'registrations': int(registrations_by_day.get(date_value, 0) or 0),
+            'mentoring_requests': int(mentoring_requests_by_day.get(date_value, 0) or 0),
+            'tutoring_bookings': int(tutoring_bookings_by_day.get(date_value, 0) or 0),
+            'courses_published': int(courses_published_by_day.get(date_value, 0) or 0),
+            'mentor_applications': int(mentor_applications_by_day.get(date_value, 0) or 0),
+        }
+        events = events_by_day.get(date_value, [])
+        activity_timeline[date_value.isoformat()] = {
+            **counts,
+            'total_events': len(events),
+            'highlights': [
+                {
+                    'type': event_key,
+                    'label': TIMELINE_EVENT_LABELS[event_key],
+                    'count': value,
+                }
+                for event_key, value in counts.items() if value
+            ],
+            'events': events,
+        }
+
+    # Today's stats
+    tutoring_today = _payments_on_day(TutoringPayments, today_start, today_end)
+    mentoring_today = _payments_on_day(MentoringPayments, today_start, today_end)
+    today_transaction_total = tutoring_today['total'] + mentoring_today['total']
+
+    mentoring_summary = {
+        'total': mentoring_requests['total'],
+        'total_requests': mentoring_requests['total'],
+        'pending_requests': mentoring_requests['pending'],
+        'scheduled_sessions': mentoring_requests['scheduled'],
+        'completed_sessions': mentoring_requests['completed'],
+        'declined_requests': mentoring_requests['declined'],
+    }
+
+    tutoring_summary = {
+        'total': tutoring_sessions['total'],
+        'pending_sessions': tutoring_sessions['pending'],
+        'scheduled_sessions': tutoring_sessions['scheduled'],
+        'completed_sessions': tutoring_sessions['completed'],
+        'cancelled_sessions': tutoring_sessions['cancelled'],
+    }
+
+    internships_summary = {
+        'total': internships['total'],
+        'currently_open': internships['currently_open'],
+    }
+
+    published_courses_growth = published_courses['total'] - published_courses['baseline']
+
+    return {
+        # User Management Stats
+        'total_users': users['total'],
+        'users_growth': _growth_percent(users['total'], users['baseline']),
+        'total_students': students['total'],
+        'students_growth': _growth_percent(students['total'], students['baseline']),
+        'total_university_students': university_students['total'],
+        'university_students_growth': _growth_percent(university_students['total'], university_students['baseline']),
+        'total_mentors': mentors['total'],
+        'mentors_growth': _growth_percent(mentors['total'], mentors['baseline']),
+        'total_counsellors': users['counsellors'],
+        'counsellors_growth': _growth_percent(users['counsellors'], users['counsellors_baseline']),
+
+        # Institution Management Stats
+        'total_tutors': tutors['total'],
+        'tutors_growth': _growth_percent(tutors['total'], tutors['baseline']),
+        'total_universities': universities['total'],
+        'universities_growth': universities['total'] - universities['baseline'],
+        'total_companies': companies['total'],
+        'companies_growth': companies['total'] - companies['baseline'],
+        'total_programs': programs['total'],
+        'programs_growth': programs['total'] - programs['baseline'],
+        'total_published_courses': published_courses['total'],
+        'published_courses_growth': published_courses_growth,
+        'mentoring_summary': mentoring_summary,
+        'tutoring_summary': tutoring_summary,
+        'internships_summary': internships_summary,
+        'content_management': {
+            'published_courses': {
+                'total': published_courses['total'],
+                'growth': published_courses_growth,
+            },
+            'mentoring_sessions': mentoring_summary,
+            'tutoring_sessions': tutoring_summary,
+            'internships': internships_summary,
+        },
+
+        # Chart Data
+        'user_growth_data': user_growth_data,
+        'user_distribution': user_distribution,
+        'daily_activity': daily_activity,
+        'recent_activities': _recent_activities(now),
+        'monthly_transaction_data': monthly_transaction_data,
+        'activity_timeline': activity_timeline,
+
+        # Today's Stats
+        'today_revenue': float(today_transaction_total),
+        'today_registrations': int(registrations_by_day.get(today_date, 0) or 0),
+        'today_logins': int(login_totals.get(today_date, 0) or 0),
+        'today_transactions': tutoring_today['count'] + mentoring_today['count'],
+        'today_transaction_total': float(today_transaction_total),
+    }
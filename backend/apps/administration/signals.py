@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import UserDetails, Users
+from apps.counsellors.models import Counsellors
+from apps.mentoring.models import Mentors
+from apps.universities.models import Universities
+from apps.university_programs.models import DegreePrograms
+from apps.university_students.models import UniversityStudents
+
+from .models import Report
+from .search import reindex, reindex_for_user, reindex_mentors
+
+
+# Mentor entries include their university's name and degree program's title.
+MENTOR_FILTER_BY_MODEL = {
+    UniversityStudents: 'university_student_id',
+    Universities: 'university_student__university_id',
+    DegreePrograms: 'university_student__degree_program_id',
+}
+
+SEARCH_ENTITY_BY_MODEL = {
+    Counsellors: 'counsellor',
+    Mentors: 'mentor',
+    Report: 'report',
+}
+
+
+@receiver(post_save, sender=Users)
+@receiver(post_delete, sender=Users)
+@receiver(post_save, sender=UserDetails)
+def reindex_user_search(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    user_id = instance.pk if sender is Users else instance.user_id
+    transaction.on_commit(lambda: reindex_for_user(user_id))
+
+
+@receiver(post_save, sender=Counsellors)
+@receiver(post_delete, sender=Counsellors)
+@receiver(post_save, sender=Mentors)
+@receiver(post_delete, sender=Mentors)
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def reindex_search_entry(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    entity, object_id = SEARCH_ENTITY_BY_MODEL[sender], instance.pk
+    transaction.on_commit(lambda: reindex(entity, [object_id]))
+
+
+@receiver(post_save, sender=UniversityStudents)
+@receiver(post_delete, sender=UniversityStudents)
+@receiver(post_save, sender=Universities)
+@receiver(post_delete, sender=Universities)
+@receiver(post_save, sender=DegreePrograms)
+@receiver(post_delete, sender=DegreePrograms)
+def reindex_mentor_search(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    filters = {MENTOR_FILTER_BY_MODEL[sender]: instance.pk}
+    transaction.on_commit(lambda: reindex_mentors(**filters))
@@ -1,3 +1,523 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import UserDailyLogin, UserDetails, UserTypes, Users
+from apps.counsellors.models import (
+    CounsellingFeedback,
+    CounsellingRequests,
+    CounsellingSessions,
+    Counsellors,
+    CounsellorStats,
+)
+from apps.counsellors.stats import refresh_counsellor_stats
+from apps.mentoring.models import Mentors
+from apps.students.models import Students
+from apps.universities.models import Universities
+from apps.university_programs.models import DegreeProgramDurations, DegreePrograms
+from apps.university_students.models import UniversityStudents
+
+from .models import Report, ReportCategory
+from .metrics import registry as metrics_registry, render_prometheus
+from .pagination import DIRECTION_NEXT, DIRECTION_PREVIOUS, _segments
+from .search import rebuild_search_index
+
+
+# The dashboard used to issue ~70 queries; every entity now costs a fixed
+# number of aggregates regardless of how many rows or months are involved.
+DASHBOARD_QUERY_BUDGET = 31
+
+
+class DashboardStatisticsQueryBudgetTests(TestCase):
+    url = '/api/administration/dashboard/statistics/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student_type = UserTypes.objects.create(type_name='student')
+        cls.counsellor_type = UserTypes.objects.create(type_name='counsellor')
+
+    def _create_users(self, count, user_type, days_ago=0):
+        now = timezone.now()
+        for index in range(count):
+            offset = Users.objects.count()
+            user = Users.objects.create(
+                user_type=user_type,
+                username=f'user{offset}',
+                email=f'user{offset}@example.com',
+                password_hash='x',
+                is_active=1,
+                created_at=now - timedelta(days=days_ago + index * 17),
+            )
+            UserDetails.objects.create(user=user, full_name=f'User {offset}')
+            UserDailyLogin.objects.create(user=user, login_date=timezone.localdate(), login_count=2)
+            if user_type == self.student_type:
+                Students.objects.create(user=user, current_stage='al')
+
+    def _fetch_statistics(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['statistics'], len(queries.captured_queries)
+
+    def test_query_count_stays_within_budget(self):
+        self._create_users(3, self.student_type)
+        _, query_count = self._fetch_statistics()
+        self.assertLessEqual(query_count, DASHBOARD_QUERY_BUDGET)
+
+    def test_query_count_does_not_grow_with_data(self):
+        self._create_users(2, self.student_type)
+        _, small_count = self._fetch_statistics()
+
+        self._create_users(12, self.student_type, days_ago=1)
+        self._create_users(4, self.counsellor_type, days_ago=40)
+        _, large_count = self._fetch_statistics()
+
+        self.assertEqual(small_count, large_count)
+
+    def test_totals_and_series_match_data(self):
+        self._create_users(3, self.student_type)
+        self._create_users(2, self.counsellor_type, days_ago=200)
+
+        statistics, _ = self._fetch_statistics()
+
+        self.assertEqual(statistics['total_users'], 5)
+        self.assertEqual(statistics['total_students'], 3)
+        self.assertEqual(statistics['total_counsellors'], 2)
+        self.assertEqual(len(statistics['user_growth_data']), 6)
+        self.assertEqual(statistics['user_growth_data'][-1]['users'], 5)
+        self.assertEqual(statistics['user_growth_data'][-1]['students'], 3)
+        self.assertEqual(len(statistics['daily_activity']), 7)
+        self.assertEqual(statistics['today_logins'], 10)
+        self.assertEqual(len(statistics['activity_timeline']), 61)
+
+
+class StreamingExportTests(TestCase):
+    url = '/api/administration/users/'
+
+    @classmethod
+    def setUpTestData(cls):
+        student_type = UserTypes.objects.create(type_name='student')
+        for index in range(5):
+            user = Users.objects.create(
+                user_type=student_type,
+                username=f'student{index}',
+                email=f'student{index}@example.com',
+                password_hash='x',
+                is_active=index % 2,
+                created_at=timezone.now() - timedelta(days=index),
+            )
+            UserDetails.objects.create(user=user, full_name=f'Student, "{index}"')
+        rebuild_search_index(['user'])
+
+    def _stream(self, **params):
+        response = self.client.get(self.url, {'stream': '1', **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_export_contains_every_filtered_row(self):
+        with mock.patch('apps.administration.exports.EXPORT_CHUNK_SIZE', 2):
+            body = self._stream(format='csv', search='student')
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['username'], 'student4')
+        self.assertEqual(rows[0]['full_name'], 'Student, "4"')
+        self.assertEqual({row['is_active'] for row in rows}, {'True', 'False'})
+
+    def test_ndjson_export_emits_one_object_per_line(self):
+        body = self._stream(format='ndjson')
+
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([record['username'] for record in records], [f'student{i}' for i in range(4, -1, -1)])
+        self.assertEqual(records[0]['user_type'], 'student')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(self.url, {'stream': '1', 'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class CursorPaginationTests(TestCase):
+    url = '/api/administration/users/'
+
+    @classmethod
+    def setUpTestData(cls):
+        student_type = UserTypes.objects.create(type_name='student')
+        created_at = timezone.now()
+        for index in range(7):
+            Users.objects.create(
+                user_type=student_type,
+                username=f'member{index}',
+                email=f'member{index}@example.com',
+                password_hash='x',
+                is_active=1,
+                # Pairs share a timestamp so the pk tie-breaker is exercised.
+                created_at=created_at - timedelta(hours=index // 2),
+            )
+        Users.objects.create(
+            user_type=student_type, username='undated', email='undated@example.com', password_hash='x', is_active=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _page(self, **params):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'per_page': 3, **params})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [user['username'] for user in body['users']], body['pagination']
+
+    def test_walks_forward_and_back_without_gaps(self):
+        expected = list(
+            Users.objects.order_by(F('created_at').desc(nulls_last=True), '-pk').values_list('username', flat=True)
+        )
+
+        seen, pages, cursor = [], [], None
+        while True:
+            usernames, pagination = self._page(**({'cursor': cursor} if cursor else {}))
+            seen.extend(usernames)
+            pages.append((usernames, pagination))
+            if not pagination['has_next']:
+                break
+            cursor = pagination['next_cursor']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(seen[-1], 'undated')
+        self.assertEqual(pages[0][1]['total_items'], 8)
+        self.assertFalse(pages[0][1]['has_previous'])
+
+        previous, _ = self._page(cursor=pages[-1][1]['previous_cursor'])
+        self.assertEqual(previous, pages[-2][0])
+
+    def test_later_pages_skip_the_count_query(self):
+        _, first = self._page()
+        with CaptureQueriesContext(connection) as queries:
+            self._page(cursor=first['next_cursor'])
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+    def _counts(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            self._page(**params)
+        return sum('COUNT(' in query['sql'].upper() for query in queries.captured_queries)
+
+    def test_totals_are_cached_per_filter_set(self):
+        self.assertEqual(self._counts(type='student', search=''), 1)
+        self.assertEqual(self._counts(search='', type='student'), 0)
+        self.assertEqual(self._counts(type='admin'), 1)
+
+    def test_seek_is_a_row_value_range_on_the_created_at_index(self):
+        newest = Users.objects.order_by('-created_at').first()
+        table, quote = 'users', connection.ops.quote_name
+        row = f'({quote(table)}.{quote("created_at")}, {quote(table)}.{quote("user_id")})'
+        for direction in (DIRECTION_NEXT, DIRECTION_PREVIOUS):
+            seek = _segments(Users.objects.all(), 'created_at', newest.created_at, newest.pk, direction, True)[0]
+            self.assertIn(row, str(seek.query))
+            plan = seek[:4].explain()
+            self.assertIn('users_created_a45cbe_idx', plan)
+            # Neither SQLite nor MySQL should sort: the index already gives the order.
+            self.assertNotIn('TEMP B-TREE', plan.upper())
+            self.assertNotIn('FILESORT', plan.upper())
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class CounsellorListingStatsTests(TestCase):
+    url = '/api/administration/counsellors/'
+
+    @classmethod
+    def setUpTestData(cls):
+        counsellor_type = UserTypes.objects.create(type_name='counsellor')
+        student_type = UserTypes.objects.create(type_name='student')
+        now = timezone.now()
+        cls.counsellors = []
+        for index in range(3):
+            user = Users.objects.create(
+                user_type=counsellor_type, username=f'counsellor{index}', email=f'counsellor{index}@example.com',
+                password_hash='x', is_active=1, created_at=now,
+            )
+            UserDetails.objects.create(user=user, full_name=f'Counsellor {index}', is_verified=index % 2)
+            cls.counsellors.append(
+                Counsellors.objects.create(user=user, available_for_sessions=1, created_at=now, updated_at=now)
+            )
+        cls.students = []
+        for index in range(2):
+            user = Users.objects.create(
+                user_type=student_type, username=f'pupil{index}', email=f'pupil{index}@example.com',
+                password_hash='x', is_active=1, created_at=now,
+            )
+            cls.students.append(Students.objects.create(user=user, current_stage='al'))
+
+    def _add_activity(self, counsellor):
+        sessions = [
+            CounsellingSessions.objects.create(
+                counsellor=counsellor, student=student, topic='Careers', scheduled_at=timezone.now(), status='completed',
+            )
+            for student in self.students
+        ]
+        CounsellingFeedback.objects.create(
+            session=sessions[0], student=self.students[0], counsellor=counsellor, rating={'clarity': 4, 'empathy': 5},
+        )
+        CounsellingRequests.objects.create(
+            counsellor=counsellor, student=self.students[1], topic='Subjects', description='Help', preferred_time='Evening',
+        )
+
+    def test_signals_keep_stats_current(self):
+        counsellor = self.counsellors[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_activity(counsellor)
+
+        stats = CounsellorStats.objects.get(counsellor=counsellor)
+        self.assertEqual((stats.sessions_completed, stats.students_supported, stats.pending_requests), (2, 2, 1))
+        self.assertEqual(stats.average_rating, 4.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CounsellingRequests.objects.filter(counsellor=counsellor).get().delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.pending_requests, 0)
+
+    def test_refresh_absorbs_a_concurrent_first_insert(self):
+        counsellor = self.counsellors[0]
+        self._add_activity(counsellor)
+        real_get = QuerySet.get
+
+        def racing_get(queryset, *args, **kwargs):
+            # Another request commits the first row after this one looked for it.
+            if queryset.model is CounsellorStats and not CounsellorStats.objects.filter(counsellor=counsellor).exists():
+                CounsellorStats.objects.create(counsellor=counsellor, sessions_completed=99)
+                raise CounsellorStats.DoesNotExist
+            return real_get(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'get', racing_get):
+            refresh_counsellor_stats(counsellor.pk)
+        stats = CounsellorStats.objects.get(counsellor=counsellor)
+        self.assertEqual((stats.sessions_completed, stats.pending_requests), (2, 1))
+
+    def test_rebuild_command_matches_signal_maintained_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for counsellor in self.counsellors[:2]:
+                self._add_activity(counsellor)
+        expected = list(CounsellorStats.objects.order_by('pk').values_list(
+            'counsellor_id', 'students_supported', 'sessions_completed', 'pending_requests', 'rating_sum', 'rating_count',
+        ))
+
+        CounsellorStats.objects.all().delete()
+        call_command('rebuild_counsellor_stats', stdout=io.StringIO())
+
+        rebuilt = CounsellorStats.objects.order_by('pk').values_list(
+            'counsellor_id', 'students_supported', 'sessions_completed', 'pending_requests', 'rating_sum', 'rating_count',
+        )
+        self.assertEqual(list(rebuilt)[:2], expected)
+        self.assertEqual(CounsellorStats.objects.count(), 3)
+
+    def test_listing_reads_stats_in_constant_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_activity(self.counsellors[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        body = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries.captured_queries), 2)
+        self.assertEqual(body['statistics']['total'], 3)
+        self.assertEqual(body['statistics']['sessions'], 2)
+        self.assertEqual(body['statistics']['avgRating'], 4.5)
+        self.assertEqual(body['filters']['verificationCounts'], {'verified': 1, 'unverified': 2})
+        by_id = {item['id']: item for item in body['counsellors']}
+        self.assertEqual(by_id[self.counsellors[0].pk]['pendingRequests'], 1)
+        self.assertEqual(by_id[self.counsellors[1].pk]['sessionsCompleted'], 0)
+
+        details = self.client.get(f'{self.url}{self.counsellors[0].pk}/').json()
+        self.assertEqual(len(details['sessions']), 2)
+        self.assertEqual(details['counsellor']['studentsSupported'], 2)
+
+
+class AdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student_type = UserTypes.objects.create(type_name='student')
+        cls.category = ReportCategory.objects.create(category_name='Abuse')
+
+    def _user(self, username, full_name=''):
+        user = Users.objects.create(
+            user_type=self.student_type, username=username, email=f'{username}@example.com',
+            password_hash='x', is_active=1, created_at=timezone.now(),
+        )
+        UserDetails.objects.create(user=user, full_name=full_name)
+        return user
+
+    def _search_users(self, query):
+        response = self.client.get('/api/administration/users/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [user['username'] for user in response.json()['users']]
+
+    def test_prefix_terms_must_all_match_and_rank_by_relevance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._user('kamal', 'Kamal Perera')
+            self._user('perera_n', 'Nimal Silva')
+            self._user('silva', 'Amal Fernando')
+
+        self.assertEqual(self._search_users('per'), ['perera_n', 'kamal'])
+        self.assertEqual(self._search_users('kam per'), ['kamal'])
+        self.assertEqual(self._search_users('nobody'), [])
+
+    def test_index_follows_profile_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = self._user('ruwan', 'Ruwan Jay')
+        self.assertEqual(self._search_users('jay'), ['ruwan'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserDetails.objects.filter(user=user).update(full_name='Ruwan Dias')
+            user.userdetails.refresh_from_db()
+            user.userdetails.save()
+        self.assertEqual(self._search_users('jay'), [])
+        self.assertEqual(self._search_users('dias'), ['ruwan'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserDetails.objects.filter(user=user).delete()
+            user.delete()
+        self.assertEqual(self._search_users('ruwan'), [])
+
+    def test_reports_search_title_and_reporter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reporter = self._user('reporter1')
+            Report.objects.create(reporter=reporter, category=self.category, title='Spam messages', description='Repeated ads')
+            Report.objects.create(reporter=reporter, category=self.category, title='Harassment', description='Spamming chat')
+
+        response = self.client.get('/api/administration/reports/', {'search': 'spam'})
+        titles = [report['title'] for report in response.json()['reports']]
+        self.assertEqual(titles, ['Spam messages', 'Harassment'])
+
+        response = self.client.get('/api/administration/reports/', {'search': 'reporter1'})
+        self.assertEqual(len(response.json()['reports']), 2)
+
+    def _search_mentors(self, query):
+        response = self.client.get('/api/administration/mentors/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [mentor['id'] for mentor in response.json()['mentors']]
+
+    def test_mentor_entries_follow_university_and_program_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            university = Universities.objects.create(name='University of Ruhuna', is_active=1)
+            program = DegreePrograms.objects.create(university=university, title='Marine Biology', is_active=1)
+            duration = DegreeProgramDurations.objects.create(degree_program=program, duration_years=4)
+            user = self._user('mentor1', 'Sunil Silva')
+            uni_student = UniversityStudents.objects.create(
+                user=user, university=university, degree_program=program, duration=duration,
+            )
+            mentor = Mentors.objects.create(user=user, university_student=uni_student, approved=1)
+        self.assertEqual(self._search_mentors('ruhuna marine'), [mentor.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            university.name = 'University of Kelaniya'
+            university.save()
+            program.title = 'Zoology'
+            program.save()
+        self.assertEqual(self._search_mentors('ruhuna'), [])
+        self.assertEqual(self._search_mentors('kelaniya zoology'), [mentor.pk])
+
+        other = Universities.objects.create(name='Open University', is_active=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            uni_student.university = other
+            uni_student.save()
+        self.assertEqual(self._search_mentors('kelaniya'), [])
+        self.assertEqual(self._search_mentors('open'), [mentor.pk])
+
+    def test_results_beyond_the_cap_are_reported(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._user('nimal1', 'Nimal Perera')
+            self._user('nimal2', 'Nimal Silva')
+
+        response = self.client.get('/api/administration/users/', {'search': 'nimal'})
+        self.assertEqual(response.json()['pagination']['search_truncated'], False)
+        with mock.patch('apps.administration.search.SEARCH_RESULT_LIMIT', 1):
+            response = self.client.get('/api/administration/users/', {'search': 'nimal'})
+        body = response.json()
+        self.assertEqual(len(body['users']), 1)
+        self.assertEqual((body['pagination']['search_truncated'], body['pagination']['search_result_limit']), (True, 1))
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin_type = UserTypes.objects.create(type_name='admin')
+        cls.admin = Users.objects.create(
+            user_type=admin_type, username='admin', email='admin@example.com',
+            password_hash='x', is_active=1, created_at=timezone.now(),
+        )
+
+    def setUp(self):
+        metrics_registry.reset()
+
+    def _metrics(self, **params):
+        return self.client.get('/api/administration/metrics/', {'admin_id': self.admin.user_id, **params})
+
+    def test_records_requests_and_queries_per_view(self):
+        for _ in range(3):
+            self.client.get('/api/administration/reports/categories/')
+        self.client.get('/api/administration/not-a-route/')
+
+        views = self._metrics().json()['views']
+        stats = views['apps.administration.views.get_report_categories']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['queries_total'], 3)
+        self.assertEqual(stats['queries']['p99'], 1)
+        self.assertGreater(stats['wall_ms']['p50'], 0)
+        self.assertEqual(views['<unresolved>']['requests'], 1)
+
+    def test_class_based_views_are_named_by_their_class(self):
+        self.client.get('/api/mentoring/available-slots/1/', {'duration_minutes': 5})
+        self.assertIn('apps.mentoring.views.AvailableTimeSlotsView', self._metrics().json()['views'])
+
+    @override_settings(REQUEST_QUERY_BUDGET=1)
+    def test_flags_requests_over_the_query_budget(self):
+        with self.assertLogs('apps.administration.middleware', 'WARNING') as logs:
+            self.client.get('/api/administration/reports/statistics/')
+        self.assertIn('/api/administration/reports/statistics/', logs.output[0])
+
+        stats = self._metrics().json()['views']['apps.administration.views.get_report_statistics']
+        self.assertEqual(stats['over_query_budget'], 1)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_requires_admin_or_token(self):
+        self.assertEqual(self.client.get('/api/administration/metrics/').status_code, 403)
+        self.assertEqual(
+            self.client.get('/api/administration/metrics/', {'admin_id': self.admin.user_id + 1}).status_code, 403
+        )
+        response = self.client.get(
+            '/api/administration/metrics/', {'format': 'prometheus'}, HTTP_AUTHORIZATION='Bearer scrape-token'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE uniroute_http_request_seconds summary', body)
+        self.assertIn('uniroute_db_queries_per_request_count{view="apps.administration.views.get_request_metrics"}', body)
+
+    def test_non_numeric_admin_id_is_unauthorized(self):
+        self.assertEqual(self._metrics(admin_id='not-a-number').status_code, 403)
 
-# Create your tests here.
+    def test_prometheus_totals_keep_every_digit(self):
+        metrics_registry.record('busy', wall_ms=1234567891.0, queries=1234567, db_ms=0.5, status=200)
+        samples = dict(
+            line.rsplit(' ', 1) for line in render_prometheus(metrics_registry.snapshot()).splitlines()
+            if not line.startswith('#')
+        )
+        self.assertEqual(samples['uniroute_db_queries_per_request_sum{view="busy"}'], '1234567.0')
+        self.assertAlmostEqual(float(samples['uniroute_http_request_seconds_sum{view="busy"}']), 1234567.891)
+        self.assertEqual(samples['uniroute_db_seconds_per_request_sum{view="busy"}'], '0.0005')
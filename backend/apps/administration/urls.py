@@ -45,6 +45,7 @@ urlpatterns = [
     
     # Dashboard statistics
     path('dashboard/statistics/', views.get_dashboard_statistics, name='get_dashboard_statistics'),
+    path('metrics/', views.get_request_metrics, name='get_request_metrics'),
     
     # Admin management endpoints
     path('users/', get_all_users, name='get_all_users'),
@@ -1,29 +1,28 @@
 import json
 import logging
-from datetime import datetime, timedelta
-from decimal import Decimal
-from collections import defaultdict
 
 from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Q, Count, Sum, Avg
-from django.db.models.functions import TruncDate, Coalesce
-from django.http import JsonResponse
+from django.db.models import Q, Count, Avg
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.csrf import csrf_exempt
 
-from apps.accounts.models import Users, UserDetails, UserTypes, UserDailyLogin
+from apps.accounts.models import Users, UserDetails, UserTypes
 from apps.companies.models import Companies, InternshipOpportunities
 from apps.advertisements.models import AdBookings, Advertisements, AdSpaces
-from apps.universities.models import Universities
-from apps.students.models import Students
-from apps.university_students.models import UniversityStudents
-from apps.tutoring.models import Tutors, TutoringSessions
+from apps.tutoring.models import TutoringSessions
 from apps.mentoring.models import Mentors, MentoringRequests, MentoringSessions
-from apps.university_programs.models import DegreePrograms
-from apps.payments.models import TutoringPayments, MentoringPayments
 from apps.pre_university_courses.models import PreUniversityCourse
 from .models import Report, ReportCategory, ReportAction
+from .exports import REPORT_EXPORT_COLUMNS, stream_queryset_export, wants_stream_export
+from .metrics import registry as metrics_registry, render_prometheus
+from .middleware import query_budget
+from .pagination import InvalidCursor, paginate_by_cursor, wants_cursor_pagination
+from .search import apply_search, search_notice
+from .services import build_dashboard_statistics
 from django.contrib.auth.hashers import check_password, make_password
 
 logger = logging.getLogger(__name__)
@@ -304,16 +303,36 @@ def get_reports(request):
                 reports = reports.filter(category_id=category)
             if priority != 'all':
                 reports = reports.filter(priority=priority)
+            search_truncated = False
             if search:
-                reports = reports.filter(
-                    Q(title__icontains=search) | 
+                reports, search_truncated = apply_search(
+                    reports,
+                    'report',
+                    search,
+                    fallback=Q(title__icontains=search) |
                     Q(description__icontains=search) |
                     Q(reporter__username__icontains=search)
                 )
+
+            if wants_stream_export(request):
+                return stream_queryset_export(request, reports, REPORT_EXPORT_COLUMNS, 'reports')
             
             # Pagination
-            paginator = Paginator(reports, per_page)
-            page_obj = paginator.get_page(page)
+            if wants_cursor_pagination(request):
+                page_obj = paginate_by_cursor(request, reports, per_page)
+                pagination = page_obj.pagination
+            else:
+                paginator = Paginator(reports, per_page)
+                page_obj = paginator.get_page(page)
+                pagination = {
+                    'current_page': page_obj.number,
+                    'total_pages': paginator.num_pages,
+                    'total_items': paginator.count,
+                    'has_next': page_obj.has_next(),
+                    'has_previous': page_obj.has_previous()
+                }
+            if search:
+                pagination.update(search_notice(search_truncated))
             
             # Serialize data
             reports_data = []
@@ -353,15 +372,11 @@ def get_reports(request):
             return JsonResponse({
                 'success': True,
                 'reports': reports_data,
-                'pagination': {
-                    'current_page': page_obj.number,
-                    'total_pages': paginator.num_pages,
-                    'total_items': paginator.count,
-                    'has_next': page_obj.has_next(),
-                    'has_previous': page_obj.has_previous()
-                }
+                'pagination': pagination
             })
             
+        except InvalidCursor as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -1064,674 +1079,45 @@ def get_dashboard_statistics(request):
     """Get comprehensive dashboard statistics for admin panel"""
     if request.method == 'GET':
         try:
-            # Get current date for time-based calculations
-            now = timezone.now()
-            thirty_days_ago = now - timedelta(days=30)
-            current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
-            
-            # User Management Statistics
-            total_users = Users.objects.count()
-            last_month_users = Users.objects.filter(created_at__lt=current_month_start).count()
-            users_growth = ((total_users - last_month_users) / last_month_users * 100) if last_month_users > 0 else 0
-            
-            # Students (high school)
-            total_students = Students.objects.count()
-            last_month_students = Students.objects.filter(user__created_at__lt=current_month_start).count()
-            students_growth = ((total_students - last_month_students) / last_month_students * 100) if last_month_students > 0 else 0
-            
-            # University Students
-            total_university_students = UniversityStudents.objects.count()
-            last_month_uni_students = UniversityStudents.objects.filter(user__created_at__lt=current_month_start).count()
-            uni_students_growth = ((total_university_students - last_month_uni_students) / last_month_uni_students * 100) if last_month_uni_students > 0 else 0
-            
-            # Mentors
-            total_mentors = Mentors.objects.count()
-            last_month_mentors = Mentors.objects.filter(user__created_at__lt=current_month_start).count()
-            mentors_growth = ((total_mentors - last_month_mentors) / last_month_mentors * 100) if last_month_mentors > 0 else 0
-
-            counselor_type_filter = Q(user_type__type_name__iexact='counselor') | Q(user_type__type_name__iexact='counsellor')
-            total_counsellors = Users.objects.filter(counselor_type_filter).count()
-            last_month_counsellors = Users.objects.filter(
-                counselor_type_filter,
-                created_at__lt=current_month_start
-            ).count()
-            counsellors_growth = (
-                (total_counsellors - last_month_counsellors) / last_month_counsellors * 100
-            ) if last_month_counsellors > 0 else 0
-            
-            # Institution Management Statistics
-            # Tutors
-            total_tutors = Tutors.objects.count()
-            last_month_tutors = Tutors.objects.filter(user__created_at__lt=current_month_start).count()
-            tutors_growth = ((total_tutors - last_month_tutors) / last_month_tutors * 100) if last_month_tutors > 0 else 0
-            
-            # Universities
-            total_universities = Universities.objects.count()
-            last_month_universities = Universities.objects.filter(created_at__lt=current_month_start).count()
-            universities_growth = total_universities - last_month_universities
-            
-            # Companies
-            total_companies = Companies.objects.count()
-            last_month_companies = Companies.objects.filter(created_at__lt=current_month_start).count()
-            companies_growth = total_companies - last_month_companies
-            
-            # Active Programs
-            total_programs = DegreePrograms.objects.filter(is_active=1).count()
-            last_month_programs = DegreePrograms.objects.filter(
-                is_active=1,
-                created_at__lt=current_month_start
-            ).count()
-            programs_growth = total_programs - last_month_programs
-
-            published_courses_qs = PreUniversityCourse.objects.filter(status='published')
-            total_published_courses = published_courses_qs.count()
-            last_month_published_courses = published_courses_qs.filter(
-                updated_at__isnull=False,
-                updated_at__lt=current_month_start
-            ).count()
-            published_courses_growth = total_published_courses - last_month_published_courses
-
-            mentoring_requests_total = MentoringRequests.objects.count()
-            mentoring_pending = MentoringRequests.objects.filter(status__iexact='pending').count()
-            mentoring_scheduled = MentoringRequests.objects.filter(status__iexact='scheduled').count()
-            mentoring_completed = MentoringRequests.objects.filter(status__iexact='completed').count()
-            mentoring_declined = MentoringRequests.objects.filter(status__iexact='declined').count()
-
-            tutoring_sessions_total = TutoringSessions.objects.count()
-            tutoring_pending = TutoringSessions.objects.filter(status__iexact='pending').count()
-            tutoring_scheduled = TutoringSessions.objects.filter(status__iexact='scheduled').count()
-            tutoring_completed = TutoringSessions.objects.filter(status__iexact='completed').count()
-            tutoring_cancelled = TutoringSessions.objects.filter(status__iexact='cancelled').count()
-
-            internship_total = InternshipOpportunities.objects.count()
-            internship_open = InternshipOpportunities.objects.filter(
-                Q(application_deadline__isnull=True) |
-                Q(application_deadline__gte=timezone.localdate(now))
-            ).count()
-            
-            # User Growth Data for Charts (last 6 months)
-            user_growth_data = []
-            for i in range(6):
-                month_start = (now.replace(day=1) - timedelta(days=30*i)).replace(day=1)
-                month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-                
-                users_count = Users.objects.filter(created_at__lte=month_end).count()
-                students_count = Students.objects.filter(user__created_at__lte=month_end).count()
-                uni_students_count = UniversityStudents.objects.filter(user__created_at__lte=month_end).count()
-                
-                user_growth_data.insert(0, {
-                    'month': month_start.strftime('%b'),
-                    'users': users_count,
-                    'students': students_count,
-                    'universityStudents': uni_students_count
-                })
-            
-            # User Distribution for Pie Chart
-            user_distribution = [
-                {'name': 'Students', 'value': total_students, 'color': '#81C784'},
-                {'name': 'University Students', 'value': total_university_students, 'color': '#75C2F6'},
-                {'name': 'Mentors', 'value': total_mentors, 'color': '#F4D160'},
-                {'name': 'Tutors', 'value': total_tutors, 'color': '#4C7FB1'},
-                {'name': 'Counsellors', 'value': total_counsellors, 'color': '#B39DDB'},
-                {'name': 'Universities', 'value': total_universities, 'color': '#1D5D9B'},
-                {'name': 'Companies', 'value': total_companies, 'color': '#E57373'}
-            ]
-
-            # Monthly transaction trends (last 6 months)
-            monthly_transaction_data = []
-            for offset in range(5, -1, -1):
-                year = current_month_start.year
-                month = current_month_start.month - offset
-                while month <= 0:
-                    month += 12
-                    year -= 1
-
-                period_start = current_month_start.replace(year=year, month=month)
-                if period_start.month == 12:
-                    next_month_start = period_start.replace(year=period_start.year + 1, month=1)
-                else:
-                    next_month_start = period_start.replace(month=period_start.month + 1)
-
-                month_filter = (
-                    Q(paid_at__isnull=False, paid_at__gte=period_start, paid_at__lt=next_month_start)
-                    | Q(
-                        paid_at__isnull=True,
-                        created_at__isnull=False,
-                        created_at__gte=period_start,
-                        created_at__lt=next_month_start,
-                    )
-                )
-                tutoring_month_qs = TutoringPayments.objects.filter(month_filter)
-
-                month_total_amount = tutoring_month_qs.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-                month_transaction_count = tutoring_month_qs.count()
-
-                monthly_transaction_data.append({
-                    'month': period_start.strftime('%b'),
-                    'label': period_start.strftime('%b %Y'),
-                    'transaction_count': month_transaction_count,
-                    'total_amount': float(month_total_amount),
-                })
-            
-            # Daily Activity for last 7 days
-            daily_activity = []
-            today_date = timezone.localdate(now)
-            seven_days_ago_date = today_date - timedelta(days=6)
-
-            login_totals = {
-                record['login_date']: record['total_logins']
-                for record in UserDailyLogin.objects.filter(
-                    login_date__gte=seven_days_ago_date,
-                    login_date__lte=today_date
-                ).values('login_date').annotate(total_logins=Sum('login_count'))
-            }
-
-            for offset in range(6, -1, -1):
-                day = now - timedelta(days=offset)
-                day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_end = day_start + timedelta(days=1)
-
-                registrations = Users.objects.filter(
-                    created_at__gte=day_start,
-                    created_at__lt=day_end
-                ).count()
-
-                logins = int(login_totals.get(day_start.date(), 0) or 0)
-
-                daily_activity.append({
-                    'date': day_start.strftime('%b %d'),
-                    'registrations': registrations,
-                    'logins': logins
-                })
-
-            # Activity timeline for calendar (last 60 days)
-            timeline_range_days = 60
-            timeline_start_date = today_date - timedelta(days=timeline_range_days)
-            timeline_end_date = today_date
-
-            login_totals_timeline = {
-                record['login_date']: record['total_logins']
-                for record in UserDailyLogin.objects.filter(
-                    login_date__gte=timeline_start_date,
-                    login_date__lte=timeline_end_date,
-                ).values('login_date').annotate(total_logins=Sum('login_count'))
-            }
-
-            registrations_by_day = {
-                entry['activity_date']: entry['total']
-                for entry in Users.objects.filter(
-                    created_at__isnull=False,
-                    created_at__date__gte=timeline_start_date,
-                    created_at__date__lte=timeline_end_date,
-                ).annotate(activity_date=TruncDate('created_at')).values('activity_date').annotate(total=Count('user_id'))
-            }
-
-            mentoring_requests_by_day = {
-                entry['activity_date']: entry['total']
-                for entry in MentoringRequests.objects.filter(
-                    created_at__date__gte=timeline_start_date,
-                    created_at__date__lte=timeline_end_date,
-                ).annotate(activity_date=TruncDate('created_at')).values('activity_date').annotate(total=Count('request_id'))
-            }
-
-            tutoring_bookings_by_day = {
-                entry['activity_date']: entry['total']
-                for entry in TutoringPayments.objects.annotate(
-                    activity_date=TruncDate(Coalesce('paid_at', 'created_at'))
-                ).filter(
-                    activity_date__isnull=False,
-                    activity_date__gte=timeline_start_date,
-                    activity_date__lte=timeline_end_date,
-                ).values('activity_date').annotate(total=Count('payment_id'))
-            }
-
-            courses_published_by_day = {
-                entry['activity_date']: entry['total']
-                for entry in PreUniversityCourse.objects.filter(
-                    status='published',
-                    updated_at__date__gte=timeline_start_date,
-                    updated_at__date__lte=timeline_end_date,
-                ).annotate(activity_date=TruncDate('updated_at')).values('activity_date').annotate(total=Count('id'))
-            }
-
-            mentor_applications_by_day = {
-                entry['activity_date']: entry['total']
-                for entry in Mentors.objects.filter(
-                    created_at__isnull=False,
-                    created_at__date__gte=timeline_start_date,
-                    created_at__date__lte=timeline_end_date,
-                ).annotate(activity_date=TruncDate('created_at')).values('activity_date').annotate(total=Count('mentor_id'))
-            }
-
-            events_by_day = defaultdict(list)
-
-            try:
-                USER_TYPE_LABELS = {
-                    'student': 'Student',
-                    'uni_student': 'University Student',
-                    'mentor': 'Mentor',
-                    'tutor': 'Tutor',
-                    'university': 'University',
-                    'company': 'Company',
-                    'admin': 'Administrator',
-                }
-
-                def safe_get_related(instance, attribute):
-                    if not instance:
-                        return None
-                    try:
-                        return getattr(instance, attribute)
-                    except Exception:
-                        return None
-
-                def get_user_display_name(user):
-                    if not user:
-                        return 'Unknown user'
-                    details = safe_get_related(user, 'userdetails')
-                    if details and getattr(details, 'full_name', None):
-                        return details.full_name
-                    return getattr(user, 'username', 'User')
-
-                def normalize_datetime(value):
-                    if not value:
-                        return None
-                    try:
-                        if timezone.is_naive(value):
-                            value = timezone.make_aware(value, timezone.get_current_timezone())
-                        return timezone.localtime(value)
-                    except Exception:
-                        return value if isinstance(value, datetime) else None
-
-                def append_event(date_obj, payload):
-                    if not date_obj:
-                        return
-                    events_by_day[date_obj].append(payload)
-
-                login_activity_records = (
-                    UserDailyLogin.objects.filter(
-                        login_date__gte=timeline_start_date,
-                        login_date__lte=timeline_end_date,
-                    ).select_related('user__userdetails', 'user__user_type')
-                )
-
-                for login_record in login_activity_records:
-                    user = safe_get_related(login_record, 'user')
-                    display_name = get_user_display_name(user) if user else 'User'
-                    login_count = int(getattr(login_record, 'login_count', 0) or 0)
-                    subtitle = 'Login recorded today' if login_count <= 1 else f"{login_count} logins recorded today"
-                    last_login_at = getattr(login_record, 'last_login_at', None)
-                    normalized_last_login = normalize_datetime(last_login_at)
-                    append_event(
-                        getattr(login_record, 'login_date', None),
-                        {
-                            'id': f'login-{login_record.pk}',
-                            'type': 'login',
-                            'title': f'{display_name} logged in',
-                            'subtitle': subtitle,
-                            'timestamp': normalized_last_login.isoformat() if normalized_last_login else None,
-                        },
-                    )
-
-                registrations = (
-                    Users.objects.filter(
-                        created_at__isnull=False,
-                        created_at__date__gte=timeline_start_date,
-                        created_at__date__lte=timeline_end_date,
-                    ).select_related('user_type', 'userdetails')
-                )
-
-                for user in registrations:
-                    created_at = normalize_datetime(getattr(user, 'created_at', None))
-                    date_key = created_at.date() if created_at else None
-                    type_name = getattr(getattr(user, 'user_type', None), 'type_name', 'user')
-                    type_label = USER_TYPE_LABELS.get(type_name, type_name.replace('_', ' ').title())
-                    display_name = get_user_display_name(user)
-                    append_event(
-                        date_key,
-                        {
-                            'id': f'registration-{user.user_id}',
-                            'type': 'registration',
-                            'title': f'{display_name} registered as {type_label}',
-                            'subtitle': 'New account created',
-                            'timestamp': created_at.isoformat() if created_at else None,
-                        },
-                    )
-
-                mentoring_requests = (
-                    MentoringRequests.objects.filter(
-                        created_at__date__gte=timeline_start_date,
-                        created_at__date__lte=timeline_end_date,
-                    ).select_related(
-                        'student__user__userdetails',
-                        'mentor__user__userdetails',
-                    )
-                )
-
-                for request in mentoring_requests:
-                    created_at = normalize_datetime(getattr(request, 'created_at', None))
-                    date_key = created_at.date() if created_at else None
-                    student_user = safe_get_related(safe_get_related(request, 'student'), 'user')
-                    mentor_user = safe_get_related(safe_get_related(request, 'mentor'), 'user')
-                    student_name = get_user_display_name(student_user) if student_user else 'A student'
-                    mentor_name = get_user_display_name(mentor_user) if mentor_user else 'a mentor'
-                    subtitle_parts = []
-                    topic = getattr(request, 'topic', None)
-                    if topic:
-                        subtitle_parts.append(f'Topic: {topic}')
-                    try:
-                        session_type_label = request.get_session_type_display()
-                    except Exception:
-                        session_type_label = None
-                    if session_type_label:
-                        subtitle_parts.append(session_type_label)
-                    subtitle_text = ' • '.join(subtitle_parts) if subtitle_parts else 'Mentoring request submitted'
-                    append_event(
-                        date_key,
-                        {
-                            'id': f'mentoring-request-{request.request_id}',
-                            'type': 'mentoring_request',
-                            'title': f'{student_name} requested mentoring with {mentor_name}',
-                            'subtitle': subtitle_text,
-                            'timestamp': created_at.isoformat() if created_at else None,
-                        },
-                    )
-
-                tutoring_payments = (
-                    TutoringPayments.objects.annotate(
-                        activity_datetime=Coalesce('paid_at', 'created_at')
-                    ).filter(
-                        activity_datetime__isnull=False,
-                        activity_datetime__date__gte=timeline_start_date,
-                        activity_datetime__date__lte=timeline_end_date,
-                    ).select_related(
-                        'student__user__userdetails',
-                        'session__tutor__user__userdetails',
-                        'session__subject',
-                    )
-                )
-
-                for payment in tutoring_payments:
-                    activity_at = normalize_datetime(getattr(payment, 'activity_datetime', None))
-                    date_key = activity_at.date() if activity_at else None
-                    student_user = safe_get_related(safe_get_related(payment, 'student'), 'user')
-                    tutor = safe_get_related(payment, 'session')
-                    tutor_user = safe_get_related(safe_get_related(tutor, 'tutor'), 'user') if tutor else None
-                    student_name = get_user_display_name(student_user) if student_user else 'A student'
-                    tutor_name = get_user_display_name(tutor_user) if tutor_user else 'a tutor'
-                    subject = safe_get_related(tutor, 'subject') if tutor else None
-                    subject_name = getattr(subject, 'subject_name', None)
-                    subtitle_parts = []
-                    if subject_name:
-                        subtitle_parts.append(f'Subject: {subject_name}')
-                    amount = getattr(payment, 'amount', None)
-                    if amount is not None:
-                        subtitle_parts.append(f'Amount: LKR {amount}')
-                    subtitle_text = ' • '.join(subtitle_parts) if subtitle_parts else 'Tutoring session booked'
-                    append_event(
-                        date_key,
-                        {
-                            'id': f'tutoring-booking-{payment.payment_id}',
-                            'type': 'tutoring_booking',
-                            'title': f'{student_name} booked a tutoring session with {tutor_name}',
-                            'subtitle': subtitle_text,
-                            'timestamp': activity_at.isoformat() if activity_at else None,
-                        },
-                    )
-
-                published_courses = (
-                    PreUniversityCourse.objects.filter(
-                        status='published',
-                        updated_at__date__gte=timeline_start_date,
-                        updated_at__date__lte=timeline_end_date,
-                    ).select_related('mentor__user__userdetails')
-                )
-
-                for course in published_courses:
-                    updated_at = normalize_datetime(getattr(course, 'updated_at', None))
-                    date_key = updated_at.date() if updated_at else None
-                    mentor_user = safe_get_related(safe_get_related(course, 'mentor'), 'user')
-                    mentor_name = get_user_display_name(mentor_user) if mentor_user else 'Mentor'
-                    append_event(
-                        date_key,
-                        {
-                            'id': f'course-published-{course.id}',
-                            'type': 'course_published',
-                            'title': f'Course "{course.title}" published',
-                            'subtitle': f'Published by {mentor_name}',
-                            'timestamp': updated_at.isoformat() if updated_at else None,
-                        },
-                    )
-
-                mentor_applications = (
-                    Mentors.objects.filter(
-                        created_at__isnull=False,
-                        created_at__date__gte=timeline_start_date,
-                        created_at__date__lte=timeline_end_date,
-                    ).select_related('user__userdetails')
-                )
-
-                for mentor in mentor_applications:
-                    created_at = normalize_datetime(getattr(mentor, 'created_at', None))
-                    date_key = created_at.date() if created_at else None
-                    mentor_user = safe_get_related(mentor, 'user')
-                    mentor_name = get_user_display_name(mentor_user) if mentor_user else 'User'
-                    status_text = 'Application approved' if getattr(mentor, 'approved', None) else 'Application submitted'
-                    append_event(
-                        date_key,
-                        {
-                            'id': f'mentor-application-{mentor.mentor_id}',
-                            'type': 'mentor_application',
-                            'title': f'{mentor_name} applied to become a mentor',
-                            'subtitle': status_text,
-                            'timestamp': created_at.isoformat() if created_at else None,
-                        },
-                    )
-
-                for date_key in events_by_day:
-                    events_by_day[date_key].sort(
-                        key=lambda event: event.get('timestamp') or '',
-                        reverse=True,
-                    )
-
-            except Exception as timeline_error:
-                logger.exception('Failed to build activity events timeline: %s', timeline_error)
-                events_by_day = defaultdict(list)
-
-            activity_timeline = {}
-            event_labels = {
-                'logins': 'User logins',
-                'registrations': 'New registrations',
-                'mentoring_requests': 'Mentoring session requests',
-                'tutoring_bookings': 'Tutoring sessions booked',
-                'courses_published': 'Pre-university courses published',
-                'mentor_applications': 'Mentor applications submitted',
-            }
-
-            for day_offset in range(timeline_range_days + 1):
-                date_value = timeline_start_date + timedelta(days=day_offset)
-                counts = {
-                    'logins': int(login_totals_timeline.get(date_value, 0) or 0),
-                    'registrations': int(registrations_by_day.get(date_value, 0) or 0),
-                    'mentoring_requests': int(mentoring_requests_by_day.get(date_value, 0) or 0),
-                    'tutoring_bookings': int(tutoring_bookings_by_day.get(date_value, 0) or 0),
-                    'courses_published': int(courses_published_by_day.get(date_value, 0) or 0),
-                    'mentor_applications': int(mentor_applications_by_day.get(date_value, 0) or 0),
-                }
-
-                highlights = [
-                    {
-                        'type': event_key,
-                        'label': event_labels[event_key],
-                        'count': value,
-                    }
-                    for event_key, value in counts.items() if value
-                ]
-
-                events = events_by_day.get(date_value, [])
-
-                activity_timeline[date_value.isoformat()] = {
-                    **counts,
-                    'total_events': len(events),
-                    'highlights': highlights,
-                    'events': events,
-                }
-            
-            # Recent Activities
-            recent_users = Users.objects.select_related('user_type').order_by('-created_at')[:5]
-            recent_activities = []
-            
-            for user in recent_users:
-                time_diff = now - user.created_at
-                if time_diff.total_seconds() < 3600:  # Less than 1 hour
-                    time_ago = f"{int(time_diff.total_seconds() // 60)} minutes ago"
-                elif time_diff.total_seconds() < 86400:  # Less than 1 day
-                    time_ago = f"{int(time_diff.total_seconds() // 3600)} hours ago"
-                else:
-                    time_ago = f"{time_diff.days} days ago"
-                
-                activity_text = "registered as User"
-                if user.user_type.type_name == 'student':
-                    activity_text = "registered as Student"
-                elif user.user_type.type_name == 'uni_student':
-                    activity_text = "registered as University Student"
-                elif user.user_type.type_name == 'mentor':
-                    activity_text = "registered as Mentor"
-                elif user.user_type.type_name == 'tutor':
-                    activity_text = "registered as Tutor"
-                elif user.user_type.type_name == 'university':
-                    activity_text = "registered as University"
-                elif user.user_type.type_name == 'company':
-                    activity_text = "registered as Company"
-                
-                recent_activities.append({
-                    'id': user.user_id,
-                    'user': user.username,
-                    'action': activity_text,
-                    'time': time_ago,
-                    'date': user.created_at.strftime('%Y-%m-%d'),
-                    'performedBy': 'user'
-                })
-            
-            # Today's stats
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            today_registrations = Users.objects.filter(created_at__gte=today_start, created_at__lt=today_end).count()
-            today_logins = int(
-                UserDailyLogin.objects.filter(login_date=today_date)
-                .aggregate(total=Sum('login_count'))
-                .get('total')
-                or 0
-            )
-            payments_date_filter = (
-                Q(paid_at__isnull=False, paid_at__gte=today_start, paid_at__lt=today_end)
-                | Q(
-                    paid_at__isnull=True,
-                    created_at__isnull=False,
-                    created_at__gte=today_start,
-                    created_at__lt=today_end,
-                )
-            )
-
-            tutoring_payments_today = TutoringPayments.objects.filter(payments_date_filter)
-            mentoring_payments_today = MentoringPayments.objects.filter(payments_date_filter)
-
-            tutoring_total = tutoring_payments_today.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-            mentoring_total = mentoring_payments_today.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-
-            today_transactions = tutoring_payments_today.count() + mentoring_payments_today.count()
-            today_transaction_total = tutoring_total + mentoring_total
-            today_revenue = float(today_transaction_total)
-
-            mentoring_summary = {
-                'total': mentoring_requests_total,
-                'total_requests': mentoring_requests_total,
-                'pending_requests': mentoring_pending,
-                'scheduled_sessions': mentoring_scheduled,
-                'completed_sessions': mentoring_completed,
-                'declined_requests': mentoring_declined,
-            }
-
-            tutoring_summary = {
-                'total': tutoring_sessions_total,
-                'pending_sessions': tutoring_pending,
-                'scheduled_sessions': tutoring_scheduled,
-                'completed_sessions': tutoring_completed,
-                'cancelled_sessions': tutoring_cancelled,
-            }
-
-            internships_summary = {
-                'total': internship_total,
-                'currently_open': internship_open,
-            }
-
-            content_management = {
-                'published_courses': {
-                    'total': total_published_courses,
-                    'growth': published_courses_growth,
-                },
-                'mentoring_sessions': mentoring_summary,
-                'tutoring_sessions': tutoring_summary,
-                'internships': internships_summary,
-            }
-            
-            return JsonResponse({
-                'success': True,
-                'statistics': {
-                    # User Management Stats
-                    'total_users': total_users,
-                    'users_growth': round(users_growth, 1),
-                    'total_students': total_students,
-                    'students_growth': round(students_growth, 1),
-                    'total_university_students': total_university_students,
-                    'university_students_growth': round(uni_students_growth, 1),
-                    'total_mentors': total_mentors,
-                    'mentors_growth': round(mentors_growth, 1),
-                    'total_counsellors': total_counsellors,
-                    'counsellors_growth': round(counsellors_growth, 1),
-                    
-                    # Institution Management Stats
-                    'total_tutors': total_tutors,
-                    'tutors_growth': round(tutors_growth, 1),
-                    'total_universities': total_universities,
-                    'universities_growth': universities_growth,
-                    'total_companies': total_companies,
-                    'companies_growth': companies_growth,
-                    'total_programs': total_programs,
-                    'programs_growth': programs_growth,
-                    'total_published_courses': total_published_courses,
-                    'published_courses_growth': published_courses_growth,
-                    'mentoring_summary': mentoring_summary,
-                    'tutoring_summary': tutoring_summary,
-                    'internships_summary': internships_summary,
-                    'content_management': content_management,
-                    
-                    # Chart Data
-                    'user_growth_data': user_growth_data,
-                    'user_distribution': user_distribution,
-                    'daily_activity': daily_activity,
-                    'recent_activities': recent_activities,
-                    'monthly_transaction_data': monthly_transaction_data,
-                    'activity_timeline': activity_timeline,
-                    
-                    # Today's Stats
-                    'today_revenue': today_revenue,
-                    'today_registrations': today_registrations,
-                    'today_logins': today_logins,
-                    'today_transactions': today_transactions,
-                    'today_transaction_total': float(today_transaction_total)
-                }
-            })
-            
+            statistics = build_dashboard_statistics()
         except Exception as e:
             return JsonResponse({
                 'success': False,
                 'message': f'Failed to fetch dashboard statistics: {str(e)}'
             }, status=500)
+
+        return JsonResponse({'success': True, 'statistics': statistics})
     
     return JsonResponse({'success': False, 'message': 'Only GET method allowed'}, status=405)
 
 
+def _metrics_token_matches(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and header.startswith('Bearer ') and constant_time_compare(header[len('Bearer '):], token)
+
+
+@csrf_exempt
+def get_request_metrics(request):
+    """Per-view request, SQL and latency metrics for this worker process."""
+    if request.method == 'GET':
+        if not _metrics_token_matches(request):
+            admin_id = request.GET.get('admin_id', '')
+            if not admin_id.isdigit() or not Users.objects.filter(user_id=admin_id, user_type__type_name='admin').exists():
+                return JsonResponse({'success': False, 'message': 'Unauthorized access'}, status=403)
+
+        snapshot = metrics_registry.snapshot()
+        if request.GET.get('format') == 'prometheus':
+            return HttpResponse(render_prometheus(snapshot), content_type='text/plain; version=0.0.4; charset=utf-8')
+        return JsonResponse({
+            'success': True,
+            'query_budget': query_budget(),
+            'views': snapshot,
+        })
+
+    return JsonResponse({'success': False, 'message': 'Only GET method allowed'}, status=405)
+
+
 @csrf_exempt
 def get_published_courses_overview(request):
     if request.method == 'GET':
@@ -1834,19 +1220,37 @@ def get_mentors_overview(request):
                 expected_value = 1 if status_filter == 'active' else 0
                 mentors_qs = mentors_qs.filter(user__is_active=expected_value)
 
+            mentors_qs = mentors_qs.order_by('-created_at', '-mentor_id')
+
+            search_truncated = False
             if search:
-                mentors_qs = mentors_qs.filter(
-                    Q(user__username__icontains=search) |
+                mentors_qs, search_truncated = apply_search(
+                    mentors_qs,
+                    'mentor',
+                    search,
+                    fallback=Q(user__username__icontains=search) |
                     Q(user__email__icontains=search) |
                     Q(user__userdetails__full_name__icontains=search) |
                     Q(university_student__university__name__icontains=search) |
                     Q(university_student__degree_program__title__icontains=search)
                 )
 
-            mentors_qs = mentors_qs.order_by('-created_at', '-mentor_id')
-
-            paginator = Paginator(mentors_qs, per_page)
-            page_obj = paginator.get_page(page)
+            if wants_cursor_pagination(request):
+                page_obj = paginate_by_cursor(request, mentors_qs, per_page)
+                pagination = page_obj.pagination
+            else:
+                paginator = Paginator(mentors_qs, per_page)
+                page_obj = paginator.get_page(page)
+                pagination = {
+                    'current_page': page_obj.number,
+                    'total_pages': paginator.num_pages,
+                    'total_items': paginator.count,
+                    'has_next': page_obj.has_next(),
+                    'has_previous': page_obj.has_previous(),
+                    'per_page': per_page,
+                }
+            if search:
+                pagination.update(search_notice(search_truncated))
 
             mentors_data = []
             for mentor in page_obj.object_list:
@@ -1887,15 +1291,10 @@ def get_mentors_overview(request):
                 'success': True,
                 'mentors': mentors_data,
                 'summary': summary,
-                'pagination': {
-                    'current_page': page_obj.number,
-                    'total_pages': paginator.num_pages,
-                    'total_items': paginator.count,
-                    'has_next': page_obj.has_next(),
-                    'has_previous': page_obj.has_previous(),
-                    'per_page': per_page,
-                }
+                'pagination': pagination
             })
+        except InvalidCursor as exc:
+            return JsonResponse({'success': False, 'message': str(exc)}, status=400)
         except Exception as exc:
             return JsonResponse({
                 'success': False,
@@ -2019,8 +1418,19 @@ def get_mentoring_sessions_overview(request):
                     Q(student__user__userdetails__full_name__icontains=search)
                 )
 
-            paginator = Paginator(base_query, per_page)
-            page_obj = paginator.get_page(page)
+            if wants_cursor_pagination(request):
+                page_obj = paginate_by_cursor(request, base_query, per_page)
+                pagination = page_obj.pagination
+            else:
+                paginator = Paginator(base_query, per_page)
+                page_obj = paginator.get_page(page)
+                pagination = {
+                    'current_page': page_obj.number,
+                    'total_pages': paginator.num_pages,
+                    'total_items': paginator.count,
+                    'has_next': page_obj.has_next(),
+                    'has_previous': page_obj.has_previous(),
+                }
 
             requests_data = []
             for request_obj in page_obj.object_list:
@@ -2050,14 +1460,10 @@ def get_mentoring_sessions_overview(request):
                 'success': True,
                 'summary': summary,
                 'requests': requests_data,
-                'pagination': {
-                    'current_page': page_obj.number,
-                    'total_pages': paginator.num_pages,
-                    'total_items': paginator.count,
-                    'has_next': page_obj.has_next(),
-                    'has_previous': page_obj.has_previous(),
-                }
+                'pagination': pagination
             })
+        except InvalidCursor as exc:
+            return JsonResponse({'success': False, 'message': str(exc)}, status=400)
         except Exception as exc:
             return JsonResponse({
                 'success': False,
@@ -2092,8 +1498,19 @@ def get_tutoring_sessions_overview(request):
                     Q(description__icontains=search)
                 )
 
-            paginator = Paginator(base_query, per_page)
-            page_obj = paginator.get_page(page)
+            if wants_cursor_pagination(request):
+                page_obj = paginate_by_cursor(request, base_query, per_page)
+                pagination = page_obj.pagination
+            else:
+                paginator = Paginator(base_query, per_page)
+                page_obj = paginator.get_page(page)
+                pagination = {
+                    'current_page': page_obj.number,
+                    'total_pages': paginator.num_pages,
+                    'total_items': paginator.count,
+                    'has_next': page_obj.has_next(),
+                    'has_previous': page_obj.has_previous(),
+                }
 
             sessions_data = []
             for session in page_obj.object_list:
@@ -2122,14 +1539,10 @@ def get_tutoring_sessions_overview(request):
                 'success': True,
                 'summary': summary,
                 'sessions': sessions_data,
-                'pagination': {
-                    'current_page': page_obj.number,
-                    'total_pages': paginator.num_pages,
-                    'total_items': paginator.count,
-                    'has_next': page_obj.has_next(),
-                    'has_previous': page_obj.has_previous(),
-                }
+                'pagination': pagination
             })
+        except InvalidCursor as exc:
+            return JsonResponse({'success': False, 'message': str(exc)}, status=400)
         except Exception as exc:
             return JsonResponse({
                 'success': False,
@@ -6,9 +6,8 @@ from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.utils import timezone
 
-from .models import Messages
+from .summaries import create_message, mark_messages_read
 from .utils import (
     are_users_allowed_to_chat,
     generate_room_id,
@@ -157,13 +156,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
     def _save_message(self, sender_id: int, receiver_id: int, message_text: str):
-        message = Messages.objects.create(
-            sender_id=sender_id,
-            receiver_id=receiver_id,
-            message_text=message_text,
-            sent_at=timezone.now(),
-            is_read=0,
-        )
+        message = create_message(sender_id, receiver_id, message_text)
         data = serialize_message(message)
         data["room_id"] = self.room_id
         return data
@@ -172,10 +165,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await database_sync_to_async(self._update_messages_read)(message_ids)
 
     def _update_messages_read(self, message_ids):
-        Messages.objects.filter(
-            message_id__in=message_ids,
-            receiver_id=self.user_id,
-        ).exclude(is_read=1).update(is_read=1)
+        mark_messages_read(self.user_id, message_ids)
 
     async def _are_users_allowed(self, user_a_id: int, user_b_id: int) -> bool:
         return await database_sync_to_async(are_users_allowed_to_chat)(
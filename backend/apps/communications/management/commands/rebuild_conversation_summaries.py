@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.communications.summaries import rebuild_conversation_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute conversation_summaries (the chat inbox) from the full messages history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per batch (default 500)')
+
+    def handle(self, *args, **options):
+        written = rebuild_conversation_summaries(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} conversation summaries'))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_users_created_at_index'),
+        ('communications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('summary_id', models.AutoField(primary_key=True, serialize=False)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('last_message_preview', models.CharField(blank=True, default='', max_length=255)),
+                ('unread_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'conversation_summaries',
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='messages',
+            index=models.Index(fields=['receiver', 'sender', 'is_read'], name='messages_unread_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='last_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='communications.messages'),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='peer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.users'),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='conversation_summaries', to='accounts.users'),
+        ),
+        migrations.AddIndex(
+            model_name='conversationsummary',
+            index=models.Index(fields=['user', '-last_message_at', '-last_message'], name='conversation_inbox_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationsummary',
+            constraint=models.UniqueConstraint(fields=('user', 'peer'), name='unique_conversation_summary'),
+        ),
+    ]
@@ -11,3 +11,31 @@ class Messages(models.Model):
     class Meta:
         managed = True
         db_table = 'messages'
+        indexes = [
+            # Unread messages from one peer, and a pair's history
+            models.Index(fields=['receiver', 'sender', 'is_read'], name='messages_unread_idx'),
+        ]
+
+
+class ConversationSummary(models.Model):
+    """One user's view of a conversation: its latest message and how many they have not read."""
+    summary_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey('accounts.Users', models.DO_NOTHING, related_name='conversation_summaries')
+    peer = models.ForeignKey('accounts.Users', models.DO_NOTHING, related_name='+')
+    last_message = models.ForeignKey(
+        'communications.Messages', models.DO_NOTHING, null=True, blank=True, related_name='+', db_constraint=False
+    )
+    last_message_at = models.DateTimeField(blank=True, null=True)
+    last_message_preview = models.CharField(max_length=255, blank=True, default='')
+    unread_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = 'conversation_summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'peer'], name='unique_conversation_summary'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-last_message'], name='conversation_inbox_idx'),
+        ]
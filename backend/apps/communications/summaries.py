@@ -0,0 +1,181 @@
+"""Per-user conversation summaries backing the chat inbox.
+
+Each participant of a conversation has a ``ConversationSummary`` row with
+the latest message, a preview of it and how many messages from the peer
+they have not read. Rows are updated in the same transaction as the
+message writes that change them, so the inbox is a single indexed query
+on ``(user, last_message_at)`` however long the message history is.
+
+Both writers lock the summary rows before touching ``messages``: sending
+locks the two participants' rows, inserts the message and then updates
+them; marking messages read locks the reader's row and recounts what is
+still unread. A message that arrives mid-read is therefore either marked
+read or still counted, never lost.
+
+``rebuild_conversation_summaries`` recomputes every row from ``messages``.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from .models import ConversationSummary, Messages
+
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_LENGTH = ConversationSummary._meta.get_field('last_message_preview').max_length
+
+
+def preview(message_text: str) -> str:
+    text = ' '.join(message_text.split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH - 1].rstrip() + '…'
+
+
+def _unread(user_id: int, peer_id: int) -> Q:
+    return Q(sender_id=peer_id, receiver_id=user_id) & ~Q(is_read=1)
+
+
+def _lock_summaries(sender_id: int, receiver_id: int) -> Set[Tuple[int, int]]:
+    """Lock both participants' summary rows, in (user, peer) order; returns the pairs that exist."""
+    return set(ConversationSummary.objects.select_for_update().filter(
+        Q(user_id=sender_id, peer_id=receiver_id) | Q(user_id=receiver_id, peer_id=sender_id)
+    ).order_by('user_id', 'peer_id').values_list('user_id', 'peer_id'))
+
+
+def create_message(sender_id: int, receiver_id: int, message_text: str) -> Messages:
+    """Store a new unread message and make it the latest of both participants' summaries."""
+    pairs = sorted({(sender_id, receiver_id), (receiver_id, sender_id)})
+    with transaction.atomic():
+        if sender_id != receiver_id:
+            # Summary rows are always locked before messages are written, in
+            # (user, peer) order, so concurrent senders and readers queue
+            # instead of deadlocking. Only a conversation's first message
+            # inserts them: an insert that hits an existing key takes a
+            # shared lock on it, which two senders would both then try to
+            # upgrade.
+            existing = _lock_summaries(sender_id, receiver_id)
+            if len(existing) < len(pairs):
+                for user_id, peer_id in pairs:
+                    if (user_id, peer_id) in existing:
+                        continue
+                    try:
+                        with transaction.atomic():
+                            ConversationSummary.objects.create(user_id=user_id, peer_id=peer_id)
+                    except IntegrityError:
+                        pass  # inserted by a concurrent first message
+                _lock_summaries(sender_id, receiver_id)
+
+        message = Messages.objects.create(
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            message_text=message_text,
+            sent_at=timezone.now(),
+            is_read=0,
+        )
+        if sender_id != receiver_id:
+            latest = {
+                'last_message_id': message.message_id,
+                'last_message_at': message.sent_at,
+                'last_message_preview': preview(message_text),
+                'updated_at': timezone.now(),
+            }
+            ConversationSummary.objects.filter(user_id=sender_id, peer_id=receiver_id).update(**latest)
+            ConversationSummary.objects.filter(user_id=receiver_id, peer_id=sender_id).update(
+                unread_count=F('unread_count') + 1, **latest,
+            )
+    return message
+
+
+def mark_read(user_id: int, peer_id: int, message_ids: Optional[Iterable[int]] = None) -> int:
+    """Mark messages from ``peer_id`` to ``user_id`` read (all, or only ``message_ids``).
+
+    Returns the number of messages marked.
+    """
+    with transaction.atomic():
+        summary = ConversationSummary.objects.select_for_update().filter(user_id=user_id, peer_id=peer_id).first()
+        unread = Messages.objects.filter(_unread(user_id, peer_id))
+        if message_ids is not None:
+            marked = unread.filter(message_id__in=list(message_ids)).update(is_read=1)
+            remaining = unread.count() if summary is not None else 0
+        else:
+            marked = unread.update(is_read=1)
+            remaining = 0
+        if summary is not None and summary.unread_count != remaining:
+            summary.unread_count = remaining
+            summary.save(update_fields=['unread_count', 'updated_at'])
+    return marked
+
+
+def mark_messages_read(user_id: int, message_ids: Iterable[int]) -> int:
+    """Mark the listed messages addressed to ``user_id`` read, whoever sent them."""
+    message_ids = list(message_ids)
+    by_peer: Dict[int, List[int]] = defaultdict(list)
+    for message_id, sender_id in Messages.objects.filter(
+        message_id__in=message_ids, receiver_id=user_id,
+    ).values_list('message_id', 'sender_id'):
+        by_peer[sender_id].append(message_id)
+    return sum(mark_read(user_id, peer_id, ids) for peer_id, ids in sorted(by_peer.items()))
+
+
+def compute_summaries(user_ids: Optional[Iterable[int]] = None) -> List[ConversationSummary]:
+    """Build (unsaved) summary rows from ``messages``, for every user or only ``user_ids``."""
+    sent = Messages.objects.exclude(sender_id=F('receiver_id'))
+    received = sent
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        sent = sent.filter(sender_id__in=user_ids)
+        received = received.filter(receiver_id__in=user_ids)
+
+    last_ids: Dict[Tuple[int, int], int] = {}
+    unread: Dict[Tuple[int, int], int] = {}
+    for sender_id, receiver_id, last_id in sent.values('sender_id', 'receiver_id').annotate(
+        last_id=Max('message_id'),
+    ).order_by().values_list('sender_id', 'receiver_id', 'last_id'):
+        last_ids[(sender_id, receiver_id)] = last_id
+    for receiver_id, sender_id, last_id, unread_count in received.values('receiver_id', 'sender_id').annotate(
+        last_id=Max('message_id'),
+        unread_count=Count('pk', filter=~Q(is_read=1)),
+    ).order_by().values_list('receiver_id', 'sender_id', 'last_id', 'unread_count'):
+        key = (receiver_id, sender_id)
+        last_ids[key] = max(last_ids.get(key, 0), last_id)
+        unread[key] = unread_count
+
+    messages = Messages.objects.in_bulk(set(last_ids.values()))
+    rows = []
+    for (user_id, peer_id), last_id in last_ids.items():
+        message = messages[last_id]
+        rows.append(ConversationSummary(
+            user_id=user_id,
+            peer_id=peer_id,
+            last_message_id=last_id,
+            last_message_at=message.sent_at,
+            last_message_preview=preview(message.message_text),
+            unread_count=unread.get((user_id, peer_id), 0),
+        ))
+    return rows
+
+
+def rebuild_conversation_summaries(batch_size: int = 500) -> int:
+    """Recompute every user's summary rows; returns the number of rows written."""
+    user_ids = sorted(
+        set(Messages.objects.values_list('sender_id', flat=True).distinct())
+        | set(Messages.objects.values_list('receiver_id', flat=True).distinct())
+    )
+    written = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch_user_ids = user_ids[start:start + batch_size]
+        batch = compute_summaries(batch_user_ids)
+        with transaction.atomic():
+            ConversationSummary.objects.filter(user_id__in=batch_user_ids).delete()
+            ConversationSummary.objects.bulk_create(batch)
+        written += len(batch)
+    logger.info('Rebuilt %d conversation summaries for %d users', written, len(user_ids))
+    return written
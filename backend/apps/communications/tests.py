@@ -1,3 +1,117 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import UserDetails, Users, UserTypes
+
+from .consumers import ChatConsumer
+from .models import ConversationSummary, Messages
+from .summaries import PREVIEW_LENGTH
+
+
+class ConversationSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        student = UserTypes.objects.create(type_name='student')
+        uni_student = UserTypes.objects.create(type_name='uni_student')
+        admin = UserTypes.objects.create(type_name='admin')
+
+        def user(name, user_type):
+            return Users.objects.create(
+                user_type=user_type, username=name, email=f'{name}@example.com', password_hash='x', is_active=1,
+            )
+
+        cls.me = user('me', student)
+        cls.mentor = user('mentor', uni_student)
+        cls.friend = user('friend', student)
+        cls.admin = user('admin', admin)
+        UserDetails.objects.create(user=cls.mentor, full_name='Nimal Perera', profile_picture='nimal.png')
+
+    def _send(self, sender, receiver, text):
+        response = self.client.post('/api/communications/messages/send/', data=json.dumps({
+            'sender_id': sender.user_id, 'receiver_id': receiver.user_id, 'message_text': text,
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['message']
+
+    def _inbox(self, user):
+        return self.client.get('/api/communications/conversations/', {'user_id': user.user_id}).json()['conversations']
+
+    def _consumer(self, user, peer):
+        consumer = ChatConsumer()
+        consumer.user_id, consumer.peer_id, consumer.room_id = user.user_id, peer.user_id, 'room'
+        return consumer
+
+    def test_inbox_is_one_query_over_summaries_kept_current_by_sends_and_reads(self):
+        self._send(self.mentor, self.me, 'Welcome!')
+        self._send(self.me, self.friend, 'Hi')
+        self._send(self.mentor, self.me, 'Physics at 5?')
+        self._send(self.friend, self.me, 'x' * 400)
+        # Messages from users who may not chat never reach the inbox.
+        Messages.objects.create(sender=self.admin, receiver=self.me, message_text='Notice', is_read=0)
+
+        with self.assertNumQueries(2):  # the user, then their conversations
+            inbox = self._inbox(self.me)
+        self.assertEqual(
+            [(conversation['user']['user_id'], conversation['unread_count']) for conversation in inbox],
+            [(self.friend.user_id, 1), (self.mentor.user_id, 2)],
+        )
+        self.assertEqual(len(inbox[0]['last_message']), PREVIEW_LENGTH)
+        self.assertEqual(inbox[1]['last_message'], 'Physics at 5?')
+        self.assertEqual((inbox[1]['user']['full_name'], inbox[1]['user']['profile_picture']), ('Nimal Perera', 'nimal.png'))
+        self.assertEqual(inbox[0]['user']['full_name'], 'friend')
+        self.assertEqual([conversation['unread_count'] for conversation in self._inbox(self.mentor)], [0])
+
+        # Opening a conversation reads it.
+        self.client.get(f'/api/communications/messages/{self.mentor.user_id}/', {'user_id': self.me.user_id})
+        self.assertEqual([conversation['unread_count'] for conversation in self._inbox(self.me)], [1, 0])
+
+        # So does the socket, message by message.
+        consumer = self._consumer(self.mentor, self.me)
+        first = consumer._save_message(self.mentor.user_id, self.me.user_id, 'One')
+        consumer._save_message(self.mentor.user_id, self.me.user_id, 'Two')
+        self.assertEqual(self._inbox(self.me)[0]['unread_count'], 2)
+        self._consumer(self.me, self.mentor)._update_messages_read([first['message_id']])
+        inbox = self._inbox(self.me)
+        self.assertEqual([(conversation['last_message'], conversation['unread_count']) for conversation in inbox],
+                         [('Two', 1), ('x' * (PREVIEW_LENGTH - 1) + '…', 1)])
+
+        self.client.post('/api/communications/messages/mark-read/', data=json.dumps({
+            'user_id': self.me.user_id, 'peer_id': self.friend.user_id,
+        }), content_type='application/json')
+        self.assertEqual([conversation['unread_count'] for conversation in self._inbox(self.me)], [1, 0])
+
+    def test_only_a_conversations_first_message_inserts_summaries(self):
+        self._send(self.me, self.friend, 'Hi')
+        self.assertEqual(ConversationSummary.objects.count(), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self._send(self.friend, self.me, 'Hello')
+        # Inserting over existing keys would take shared locks that concurrent senders deadlock on.
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertFalse([sql for sql in inserts if '"conversation_summaries"' in sql])
+        self.assertEqual(self._inbox(self.me)[0]['last_message'], 'Hello')
+
+    def test_rebuild_reproduces_incrementally_maintained_summaries(self):
+        self._send(self.mentor, self.me, 'Welcome!')
+        self._send(self.me, self.mentor, 'Thanks')
+        self._send(self.friend, self.me, 'Hi')
+        self._send(self.mentor, self.me, 'See you')
+        self.client.post('/api/communications/messages/mark-read/', data=json.dumps({
+            'user_id': self.me.user_id, 'peer_id': self.friend.user_id,
+        }), content_type='application/json')
+
+        def summaries():
+            return sorted(ConversationSummary.objects.values_list(
+                'user_id', 'peer_id', 'last_message_id', 'last_message_at', 'last_message_preview', 'unread_count',
+            ))
 
-# Create your tests here.
+        maintained = summaries()
+        ConversationSummary.objects.all().delete()
+        output = StringIO()
+        call_command('rebuild_conversation_summaries', stdout=output)
+        self.assertIn('Rebuilt 4 conversation summaries', output.getvalue())
+        self.assertEqual(summaries(), maintained)
@@ -7,6 +7,7 @@ from django.db.models import Q
 
 from apps.accounts.models import Users, UserDetails
 from .models import Messages
+from .summaries import mark_read
 
 ALLOWED_USER_TYPES = {"student", "uni_student"}
 
@@ -88,9 +89,6 @@ def fetch_conversation_messages(user_id: int, peer_id: int, limit: int = 50):
     return list(reversed(messages))  # chronological order
 
 
-def mark_messages_as_read(user_id: int, peer_id: int):
-    """Mark all messages from peer to user as read."""
-    Messages.objects.filter(
-        sender_id=peer_id,
-        receiver_id=user_id,
-    ).exclude(is_read=1).update(is_read=1)
+def mark_messages_as_read(user_id: int, peer_id: int) -> int:
+    """Mark all messages from peer to user as read, clearing the user's unread count."""
+    return mark_read(user_id, peer_id)
@@ -4,22 +4,20 @@ from __future__ import annotations
 import json
 from typing import Dict, List
 
-from django.db.models import Q
 from django.http import JsonResponse
-from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 from apps.accounts.models import UserDetails, Users
 from apps.students.models import Students
 from apps.university_students.models import UniversityStudents
 
-from .models import Messages
+from .models import ConversationSummary
+from .summaries import create_message
 from .utils import (
 	ALLOWED_USER_TYPES,
 	are_users_allowed_to_chat,
 	fetch_conversation_messages,
 	generate_room_id,
-	get_user_snapshot,
 	mark_messages_as_read,
 	serialize_message,
 )
@@ -57,81 +55,41 @@ def list_conversations(request):
 	if user.user_type.type_name not in ALLOWED_USER_TYPES:
 		return _json_error("This user type is not allowed to use chat", 403)
 
-	message_queryset = (
-		Messages.objects.filter(Q(sender_id=user_id) | Q(receiver_id=user_id))
-		.select_related("sender__user_type", "receiver__user_type")
-		.order_by("-sent_at", "-message_id")
-	)
-
-	partner_ids: List[int] = []
-	for msg in message_queryset:
-		other_id = msg.receiver_id if msg.sender_id == user_id else msg.sender_id
-		partner_ids.append(other_id)
-
-	unique_partner_ids = list({pid for pid in partner_ids if pid != user_id})
-
-	partners = {
-		p.user_id: p
-		for p in Users.objects.select_related("user_type").filter(
-			user_id__in=unique_partner_ids,
-			user_type__type_name__in=ALLOWED_USER_TYPES,
+	# One row per conversation, kept current as messages are sent and read
+	summaries = (
+		ConversationSummary.objects.filter(
+			user_id=user_id,
+			peer__user_type__type_name__in=ALLOWED_USER_TYPES,
 		)
-	}
-
-	details_map = {
-		detail.user_id: detail
-		for detail in UserDetails.objects.filter(user_id__in=partners.keys())
-	}
-
-	conversations: Dict[int, Dict[str, object]] = {}
+		.select_related("peer__user_type", "peer__userdetails")
+		.order_by("-last_message_at", "-last_message_id")
+	)
 
-	for msg in message_queryset:
-		other_id = msg.receiver_id if msg.sender_id == user_id else msg.sender_id
-		if other_id == user_id or other_id not in partners:
-			continue
+	convo_list: List[Dict[str, object]] = []
+	for summary in summaries:
+		peer = summary.peer
+		try:
+			detail = peer.userdetails
+		except UserDetails.DoesNotExist:
+			detail = None
 
-		convo = conversations.setdefault(other_id, {
-			"room_id": generate_room_id(user_id, other_id),
+		convo_list.append({
+			"room_id": generate_room_id(user_id, peer.user_id),
 			"user": {
-				"user_id": other_id,
-				"full_name": "",
-				"username": partners[other_id].username,
-				"email": partners[other_id].email,
-				"user_type": partners[other_id].user_type.type_name,
-				"profile_picture": None,
+				"user_id": peer.user_id,
+				"full_name": (detail.full_name if detail else "") or peer.username,
+				"username": peer.username,
+				"email": peer.email,
+				"user_type": peer.user_type.type_name,
+				"profile_picture": detail.profile_picture if detail else None,
 			},
-			"last_message": "",
-			"last_message_time": None,
-			"unread_count": 0,
+			"last_message": summary.last_message_preview,
+			"last_message_time": (
+				summary.last_message_at.isoformat() if summary.last_message_at else None
+			),
+			"unread_count": summary.unread_count,
 		})
 
-		if not convo["last_message"]:
-			convo["last_message"] = msg.message_text
-			convo["last_message_time"] = (
-				msg.sent_at.isoformat() if msg.sent_at else None
-			)
-
-		if msg.receiver_id == user_id and (msg.is_read is None or msg.is_read == 0):
-			convo["unread_count"] += 1
-
-	# Enrich with user details
-	for other_id, convo in conversations.items():
-		detail = details_map.get(other_id)
-		if detail:
-			convo["user"]["full_name"] = detail.full_name or convo["user"]["username"]
-			convo["user"]["profile_picture"] = detail.profile_picture
-		else:
-			snapshot = get_user_snapshot(other_id)
-			if snapshot:
-				convo["user"]["full_name"] = snapshot.display_name
-				convo["user"]["profile_picture"] = snapshot.profile_picture
-
-	convo_list = sorted(
-		conversations.values(),
-		key=lambda item: item.get("last_message_time") or "",
-		reverse=True,
-	)
-
 	return JsonResponse({"success": True, "conversations": convo_list})
 
 
@@ -205,13 +163,7 @@ def send_message(request):
 	if not are_users_allowed_to_chat(sender_id, receiver_id):
 		return _json_error("Chat between these users is not allowed", 403)
 
-	message = Messages.objects.create(
-		sender_id=sender_id,
-		receiver_id=receiver_id,
-		message_text=message_text,
-		sent_at=timezone.now(),
-		is_read=0,
-	)
+	message = create_message(sender_id, receiver_id, message_text)
 
 	return JsonResponse(
 		{
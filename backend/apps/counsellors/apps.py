@@ -5,3 +5,6 @@ class CounsellorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.counsellors'
     verbose_name = 'Counsellors'
+
+    def ready(self):
+        import apps.counsellors.signals
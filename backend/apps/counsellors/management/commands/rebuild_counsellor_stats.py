@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.counsellors.stats import rebuild_counsellor_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute counsellor_stats from counselling sessions, requests and feedback.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Counsellors per batch (default 500)')
+
+    def handle(self, *args, **options):
+        written = rebuild_counsellor_stats(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {written} counsellors'))
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counsellors', '0006_alter_counselloravailability_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='counsellors',
+            index=models.Index(fields=['created_at', 'counsellor_id'], name='counsellors_created_4e6833_idx'),
+        ),
+    ]
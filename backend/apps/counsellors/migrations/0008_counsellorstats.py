@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counsellors', '0007_counsellors_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounsellorStats',
+            fields=[
+                ('counsellor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='counsellors.counsellors')),
+                ('students_supported', models.IntegerField(default=0)),
+                ('sessions_completed', models.IntegerField(default=0)),
+                ('pending_requests', models.IntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('last_session_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'counsellor_stats',
+                'managed': True,
+            },
+        ),
+    ]
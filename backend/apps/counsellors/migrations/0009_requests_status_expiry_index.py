@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counsellors', '0008_counsellorstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='counsellingrequests',
+            index=models.Index(fields=['status', 'expiry_date'], name='counselling_req_expiry_idx'),
+        ),
+    ]
@@ -23,6 +23,9 @@ class Counsellors(models.Model):
     class Meta:
         managed = True
         db_table = 'counsellors'
+        indexes = [
+            models.Index(fields=['created_at', 'counsellor_id']),
+        ]
 
     def __str__(self):
         if hasattr(self, 'user') and self.user:
@@ -95,6 +98,9 @@ class CounsellingRequests(models.Model):
     class Meta:
         managed = True
         db_table = 'counselling_requests'
+        indexes = [
+            models.Index(fields=['status', 'expiry_date'], name='counselling_req_expiry_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.expiry_date:
@@ -155,3 +161,29 @@ class CounsellingFeedback(models.Model):
 
     def __str__(self):
         return f"Feedback for Session {self.session.session_id} by {self.student}"
+
+
+class CounsellorStats(models.Model):
+    """Per-counsellor totals kept current by apps.counsellors.signals for the admin listing."""
+    counsellor = models.OneToOneField('counsellors.Counsellors', models.CASCADE, primary_key=True, related_name='stats')
+    students_supported = models.IntegerField(default=0)
+    sessions_completed = models.IntegerField(default=0)
+    pending_requests = models.IntegerField(default=0)
+    # Sum and count of every individual feedback score, so averages can be combined across counsellors
+    rating_sum = models.FloatField(default=0)
+    rating_count = models.IntegerField(default=0)
+    last_session_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = 'counsellor_stats'
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 2)
+
+    def __str__(self):
+        return f"Stats for counsellor {self.counsellor_id}"
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CounsellingFeedback, CounsellingRequests, CounsellingSessions
+from .stats import refresh_counsellor_stats
+
+
+@receiver(post_save, sender=CounsellingSessions)
+@receiver(post_delete, sender=CounsellingSessions)
+@receiver(post_save, sender=CounsellingRequests)
+@receiver(post_delete, sender=CounsellingRequests)
+@receiver(post_save, sender=CounsellingFeedback)
+@receiver(post_delete, sender=CounsellingFeedback)
+def update_counsellor_stats(sender, instance, **kwargs):
+    """Keep CounsellorStats in step with the rows it summarises.
+
+    The refresh runs on commit so a counsellor deleted in the same
+    transaction (cascading to these rows) is not given a fresh stats row.
+    """
+    if kwargs.get('raw'):
+        return
+    counsellor_id = instance.counsellor_id
+    transaction.on_commit(lambda: refresh_counsellor_stats(counsellor_id))
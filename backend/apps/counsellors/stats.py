@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from .models import CounsellingFeedback, CounsellingRequests, CounsellingSessions, Counsellors, CounsellorStats
+
+
+STATS_FIELDS = (
+    'students_supported', 'sessions_completed', 'pending_requests', 'rating_sum', 'rating_count', 'last_session_at',
+)
+
+
+def rating_scores(rating) -> List[float]:
+    """Flatten a feedback rating (number, criteria dict or list) into numeric scores."""
+    if rating is None:
+        return []
+    if isinstance(rating, (int, float)):
+        return [float(rating)]
+    values = rating.values() if isinstance(rating, dict) else rating if isinstance(rating, (list, tuple)) else []
+    scores = []
+    for value in values:
+        try:
+            scores.append(float(value))
+        except (TypeError, ValueError):
+            continue
+    return scores
+
+
+def compute_counsellor_stats(counsellor_ids: Iterable[int]) -> List[CounsellorStats]:
+    """Build (unsaved) summary rows for ``counsellor_ids`` with one grouped query per source table."""
+    counsellor_ids = list(counsellor_ids)
+    sessions = {
+        row['counsellor_id']: row
+        for row in CounsellingSessions.objects.filter(counsellor_id__in=counsellor_ids)
+        .values('counsellor_id')
+        .annotate(
+            sessions_completed=Count('pk', filter=Q(status__iexact='completed')),
+            students_supported=Count('student', filter=Q(status__iexact='completed'), distinct=True),
+            last_session_at=Max('updated_at'),
+        )
+        .order_by()
+    }
+    pending_requests = dict(
+        CounsellingRequests.objects.filter(counsellor_id__in=counsellor_ids, status__iexact='pending')
+        .values('counsellor_id')
+        .annotate(pending=Count('pk'))
+        .order_by()
+        .values_list('counsellor_id', 'pending')
+    )
+    ratings = defaultdict(lambda: [0.0, 0])
+    for counsellor_id, rating in CounsellingFeedback.objects.filter(counsellor_id__in=counsellor_ids).values_list('counsellor_id', 'rating'):
+        scores = rating_scores(rating)
+        ratings[counsellor_id][0] += sum(scores)
+        ratings[counsellor_id][1] += len(scores)
+
+    rows = []
+    for counsellor_id in counsellor_ids:
+        session_row = sessions.get(counsellor_id, {})
+        rating_sum, rating_count = ratings.get(counsellor_id, (0.0, 0))
+        rows.append(CounsellorStats(
+            counsellor_id=counsellor_id,
+            students_supported=session_row.get('students_supported', 0),
+            sessions_completed=session_row.get('sessions_completed', 0),
+            pending_requests=pending_requests.get(counsellor_id, 0),
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            last_session_at=session_row.get('last_session_at'),
+        ))
+    return rows
+
+
+def refresh_counsellor_stats(counsellor_id: Optional[int]) -> Optional[CounsellorStats]:
+    """Recompute one counsellor's summary row from its sessions, requests and feedback."""
+    if counsellor_id is None or not Counsellors.objects.filter(pk=counsellor_id).exists():
+        return None
+    computed = compute_counsellor_stats([counsellor_id])[0]
+    # Concurrent first writes for a counsellor both try to insert the row;
+    # update_or_create retries the loser as an update instead of raising.
+    stats, _ = CounsellorStats.objects.update_or_create(counsellor_id=counsellor_id, defaults={
+        field: getattr(computed, field) for field in STATS_FIELDS
+    })
+    return stats
+
+
+def refresh_many_counsellor_stats(counsellor_ids: Iterable[int]) -> None:
+    """Recompute summary rows after bulk updates that bypass model signals."""
+    counsellor_ids = set(Counsellors.objects.filter(pk__in=set(counsellor_ids)).values_list('pk', flat=True))
+    if not counsellor_ids:
+        return
+    batch = compute_counsellor_stats(counsellor_ids)
+    with transaction.atomic():
+        CounsellorStats.objects.filter(counsellor_id__in=counsellor_ids).delete()
+        CounsellorStats.objects.bulk_create(batch)
+
+
+def rebuild_counsellor_stats(batch_size: int = 500) -> int:
+    """Recompute every counsellor's summary row; returns the number of rows written."""
+    counsellor_ids = list(Counsellors.objects.order_by('pk').values_list('pk', flat=True))
+    written = 0
+    for start in range(0, len(counsellor_ids), batch_size):
+        batch = compute_counsellor_stats(counsellor_ids[start:start + batch_size])
+        with transaction.atomic():
+            CounsellorStats.objects.filter(counsellor_id__in=[stats.counsellor_id for stats in batch]).delete()
+            CounsellorStats.objects.bulk_create(batch)
+        written += len(batch)
+    return written
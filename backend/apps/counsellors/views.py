@@ -4,10 +4,12 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.hashers import make_password, check_password
 from django.db import transaction
 from django.utils import timezone
-from datetime import time
+from datetime import time, timedelta
 import json
 
 # Import your custom models
+from apps.accounts.busy_calendar import COUNSELLING, conflict_message, find_conflicts
+from apps.accounts.expiry import effective_status
 from apps.accounts.models import Users, UserDetails, UserTypes
 from apps.counsellors.models import Counsellors, CounsellorAvailability, CounsellingRequests, CounsellingSessions, CounsellingFeedback
 from apps.students.models import Students
@@ -1202,9 +1204,8 @@ def get_counselling_requests(request, counsellor_id):
     """Get all counselling requests for a counsellor"""
     if request.method == 'GET':
         try:
-            # Update expired requests first
-            update_expired_requests()
-            
+            # Lapsed pending requests are reported as expired; the sweeper persists it.
+            now = timezone.now()
             counsellor = Counsellors.objects.get(counsellor_id=counsellor_id)
             requests = CounsellingRequests.objects.filter(
                 counsellor=counsellor
@@ -1227,7 +1228,7 @@ def get_counselling_requests(request, counsellor_id):
                     'preferred_time': req.preferred_time,
                     'session_type': req.session_type,
                     'urgency': req.urgency,
-                    'status': req.status,
+                    'status': effective_status(req.status, req.expiry_date, now),
                     'requested_date': req.requested_date.isoformat(),
                     'expiry_date': req.expiry_date.isoformat(),
                     'decline_reason': req.decline_reason,
@@ -1329,6 +1330,12 @@ def accept_counselling_request(request, request_id):
                     'message': 'Request is not in pending status'
                 }, status=400)
             
+            if effective_status(counselling_request.status, counselling_request.expiry_date) == 'expired':
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'Request has expired'
+                }, status=400)
+            
             # Validate required fields
             scheduled_at = data.get('scheduled_at')
             if not scheduled_at:
@@ -1340,6 +1347,19 @@ def accept_counselling_request(request, request_id):
             # Parse the datetime
             from datetime import datetime
             scheduled_datetime = datetime.fromisoformat(scheduled_at.replace('Z', '+00:00'))
+            duration_minutes = int(data.get('duration_minutes', 60))
+            
+            conflicts = find_conflicts(
+                [counselling_request.counsellor.user_id, counselling_request.student.user_id],
+                scheduled_datetime,
+                scheduled_datetime + timedelta(minutes=duration_minutes),
+            )
+            if conflicts:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': conflict_message(conflicts),
+                    'conflicts': [conflict.as_dict() for conflict in conflicts]
+                }, status=400)
             
             # Create the session
             with transaction.atomic():
@@ -1349,7 +1369,7 @@ def accept_counselling_request(request, request_id):
                     request=counselling_request,
                     topic=counselling_request.topic,
                     scheduled_at=scheduled_datetime,
-                    duration_minutes=data.get('duration_minutes', 60),
+                    duration_minutes=duration_minutes,
                     session_type=counselling_request.session_type,
                     meeting_link=data.get('meeting_link', ''),
                     location=data.get('location', ''),
@@ -1508,6 +1528,19 @@ def reschedule_counselling_session(request, session_id):
             from datetime import datetime
             new_datetime = datetime.fromisoformat(new_scheduled_at.replace('Z', '+00:00'))
             
+            conflicts = find_conflicts(
+                [session.counsellor.user_id, session.student.user_id],
+                new_datetime,
+                new_datetime + timedelta(minutes=session.duration_minutes or 60),
+                exclude=[(COUNSELLING, session.session_id)],
+            )
+            if conflicts:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': conflict_message(conflicts),
+                    'conflicts': [conflict.as_dict() for conflict in conflicts]
+                }, status=400)
+            
             # Update session
             session.scheduled_at = new_datetime
             session.meeting_link = data.get('meeting_link', session.meeting_link)
@@ -1592,7 +1625,9 @@ def get_counselling_stats(request, counsellor_id):
             
             # Get counts
             total_requests = CounsellingRequests.objects.filter(counsellor=counsellor).count()
-            pending_requests = CounsellingRequests.objects.filter(counsellor=counsellor, status='pending').count()
+            pending_requests = CounsellingRequests.objects.filter(
+                counsellor=counsellor, status='pending', expiry_date__gte=timezone.now()
+            ).count()
             scheduled_sessions = CounsellingSessions.objects.filter(counsellor=counsellor, status='scheduled').count()
             completed_sessions = CounsellingSessions.objects.filter(counsellor=counsellor, status='completed').count()
             
@@ -1629,17 +1664,3 @@ def get_counselling_stats(request, counsellor_id):
         'status': 'error',
         'message': 'Only GET method allowed'
     }, status=405)
-
-
-def update_expired_requests():
-    """Helper function to update expired counselling requests"""
-    try:
-        expired_requests = CounsellingRequests.objects.filter(
-            status='pending',
-            expiry_date__lt=timezone.now()
-        )
-        expired_requests.update(status='expired')
-        return expired_requests.count()
-    except Exception as e:
-        print(f"Error updating expired requests: {e}")
-        return 0
\ No newline at end of file
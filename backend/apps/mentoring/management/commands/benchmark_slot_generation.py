@@ -0,0 +1,139 @@
+import random
+import time as timer
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import Users, UserTypes
+from apps.mentoring.models import MentorAvailability, MentorAvailabilityExceptions, MentoringSessions, Mentors
+from apps.mentoring.slots import load_schedule
+
+
+def legacy_available_slots(mentor_id, start_date, end_date, now):
+    """The per-day, per-slot loop AvailableTimeSlotsView used before the interval sweep."""
+    availability = MentorAvailability.objects.filter(mentor_id=mentor_id, is_active=True)
+    exceptions = MentorAvailabilityExceptions.objects.filter(mentor_id=mentor_id, date__gte=start_date, date__lte=end_date)
+    existing_sessions = MentoringSessions.objects.filter(
+        mentor_id=mentor_id,
+        scheduled_at__date__gte=start_date,
+        scheduled_at__date__lte=end_date,
+        status__in=['pending', 'scheduled'],
+    )
+    available_slots = []
+    current_date = start_date
+    while current_date <= end_date:
+        our_day_of_week = (current_date.weekday() + 1) % 7
+        day_availability = availability.filter(day_of_week=our_day_of_week)
+        day_exceptions = exceptions.filter(date=current_date)
+        for avail in day_availability:
+            slot_available = True
+            for exception in day_exceptions:
+                if exception.exception_type == 'unavailable':
+                    if (not exception.start_time and not exception.end_time) or \
+                       (exception.start_time and exception.end_time and
+                        exception.start_time <= avail.start_time and exception.end_time >= avail.end_time):
+                        slot_available = False
+                        break
+            if slot_available:
+                session_duration = timedelta(hours=1)
+                current_time = datetime.combine(current_date, avail.start_time)
+                end_time = datetime.combine(current_date, avail.end_time)
+                while current_time + session_duration <= end_time:
+                    slot_datetime = timezone.make_aware(current_time)
+                    slot_end = slot_datetime + session_duration
+                    if slot_datetime <= now:
+                        current_time += session_duration
+                        continue
+                    conflict = False
+                    for session in existing_sessions:
+                        session_start = session.scheduled_at
+                        if timezone.is_naive(session_start):
+                            session_start = timezone.make_aware(session_start)
+                        session_end = session_start + timedelta(hours=1)
+                        if slot_datetime < session_end and slot_end > session_start:
+                            conflict = True
+                            break
+                    if not conflict:
+                        available_slots.append(slot_datetime.isoformat())
+                    current_time += session_duration
+        current_date += timedelta(days=1)
+    return sorted(available_slots)
+
+
+class Command(BaseCommand):
+    help = 'Compare the interval-sweep slot engine with the previous per-slot loop for a busy mentor (changes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions-per-day', type=int, default=8, help='Booked sessions per day (default 8)')
+        parser.add_argument('--days', type=int, default=14, help='Days of availability to generate (default 14)')
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per implementation (default 5)')
+
+    def _seed(self, days, sessions_per_day):
+        rng = random.Random(0)
+        user_type, _ = UserTypes.objects.get_or_create(type_name='mentor')
+        suffix = uuid.uuid4().hex[:12]
+        user = Users.objects.create(
+            user_type=user_type, username=f'slot-benchmark-{suffix}', email=f'slot-benchmark-{suffix}@example.com',
+            password_hash='!', is_active=1, created_at=timezone.now(),
+        )
+        mentor = Mentors.objects.create(user=user, approved=1, created_at=timezone.now())
+        for day_of_week in range(7):
+            MentorAvailability.objects.create(mentor=mentor, day_of_week=day_of_week, start_time=time(7), end_time=time(12))
+            MentorAvailability.objects.create(mentor=mentor, day_of_week=day_of_week, start_time=time(13), end_time=time(22))
+
+        today = timezone.localdate()
+        sessions = []
+        for offset in range(days + 1):
+            day = today + timedelta(days=offset)
+            if offset % 5 == 0:
+                MentorAvailabilityExceptions.objects.create(
+                    mentor=mentor, date=day, start_time=time(13), end_time=time(22), exception_type='unavailable',
+                )
+            for _ in range(sessions_per_day):
+                start = timezone.make_aware(datetime.combine(day, time(rng.randrange(7, 21), rng.choice((0, 30)))))
+                sessions.append(MentoringSessions(
+                    mentor=mentor, topic='Benchmark', scheduled_at=start, duration_minutes=60,
+                    status=rng.choice(('pending', 'scheduled')), created_at=timezone.now(),
+                ))
+        MentoringSessions.objects.bulk_create(sessions)
+        return mentor, today + timedelta(days=1), today + timedelta(days=days)
+
+    def _measure(self, runs, func):
+        with CaptureQueriesContext(connection) as queries:
+            result = func()
+        started = timer.perf_counter()
+        for _ in range(runs):
+            func()
+        return result, (timer.perf_counter() - started) / runs, len(queries)
+
+    def handle(self, *args, **options):
+        runs = max(options['runs'], 1)
+        with transaction.atomic():
+            mentor, start_date, end_date = self._seed(max(options['days'], 1), max(options['sessions_per_day'], 0))
+            now = timezone.now()
+
+            legacy, legacy_elapsed, legacy_queries = self._measure(
+                runs, lambda: legacy_available_slots(mentor.mentor_id, start_date, end_date, now)
+            )
+            sweep, sweep_elapsed, sweep_queries = self._measure(
+                runs,
+                lambda: [
+                    slot.start.isoformat()
+                    for slot in load_schedule(mentor.mentor_id, start_date, end_date).free_slots(
+                        start_date, end_date, timedelta(hours=1), now=now
+                    )
+                ],
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"legacy loop":>14}: {len(legacy)} slots, {legacy_queries} queries, {legacy_elapsed * 1000:.1f}ms per request')
+        self.stdout.write(
+            f'{"interval sweep":>14}: {len(sweep)} slots, {sweep_queries} queries, {sweep_elapsed * 1000:.1f}ms per request '
+            f'({legacy_elapsed / sweep_elapsed:.1f}x)'
+        )
+        # The sweep also honours partial exceptions, so it may offer fewer slots than the loop did.
+        self.stdout.write(self.style.SUCCESS('Slot generation benchmark complete'))
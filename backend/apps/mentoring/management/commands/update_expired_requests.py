@@ -1,19 +1,12 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from apps.mentoring.models import MentoringRequests
+from apps.accounts.expiry import expire_mentoring_requests
 
 
 class Command(BaseCommand):
-    help = 'Update expired mentoring requests'
+    help = 'Update expired mentoring requests (sweep_expired also covers counselling, video rooms and bookings)'
 
     def handle(self, *args, **options):
-        expired_requests = MentoringRequests.objects.filter(
-            status='pending',
-            expiry_date__lt=timezone.now()
-        )
-        
-        count = expired_requests.count()
-        expired_requests.update(status='expired')
+        count = expire_mentoring_requests()
         
         self.stdout.write(
             self.style.SUCCESS(
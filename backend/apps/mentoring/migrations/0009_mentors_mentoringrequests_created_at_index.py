@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentoring', '0008_alter_mentors_approved'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentors',
+            index=models.Index(fields=['created_at', 'mentor_id'], name='mentors_created_f50e97_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentoringrequests',
+            index=models.Index(fields=['created_at', 'request_id'], name='mentoring_r_created_bd26dc_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentoring', '0009_mentors_mentoringrequests_created_at_index'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentoringrequests',
+            index=models.Index(fields=['status', 'expiry_date'], name='mentoring_req_expiry_idx'),
+        ),
+    ]
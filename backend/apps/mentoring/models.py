@@ -15,6 +15,9 @@ class Mentors(models.Model):
     class Meta:
         managed = True
         db_table = 'mentors'
+        indexes = [
+            models.Index(fields=['created_at', 'mentor_id']),
+        ]
 
 class MentoringRequests(models.Model):
     STATUS_CHOICES = [
@@ -54,6 +57,10 @@ class MentoringRequests(models.Model):
     class Meta:
         managed = True
         db_table = 'mentoring_requests'
+        indexes = [
+            models.Index(fields=['created_at', 'request_id']),
+            models.Index(fields=['status', 'expiry_date'], name='mentoring_req_expiry_idx'),
+        ]
 
 class SessionDetails(models.Model):
     detail_id = models.AutoField(primary_key=True)
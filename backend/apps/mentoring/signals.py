@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Mentors
+from .models import MentorAvailability, MentorAvailabilityExceptions, MentoringSessions, Mentors
+from .slots import invalidate_mentor_slots
 from apps.pre_mentors.models import PreMentors, PreMentorAvailability, PreMentorSessions, PreMentorEarnings
 import logging
 
@@ -97,4 +99,18 @@ def log_mentor_status_changes(sender, instance, created, **kwargs):
         old_approved = getattr(instance, '_old_approved', None)
         if old_approved is not None and old_approved != instance.approved:
             status_change = f"{'Pending' if old_approved == 0 else 'Approved'} -> {'Approved' if instance.approved == 1 else 'Pending'}"
-            logger.info(f"Mentor status changed: ID {instance.mentor_id}, User {instance.user_id}, Change: {status_change}")
\ No newline at end of file
+            logger.info(f"Mentor status changed: ID {instance.mentor_id}, User {instance.user_id}, Change: {status_change}")
+
+
+@receiver(post_save, sender=MentorAvailability)
+@receiver(post_delete, sender=MentorAvailability)
+@receiver(post_save, sender=MentorAvailabilityExceptions)
+@receiver(post_delete, sender=MentorAvailabilityExceptions)
+@receiver(post_save, sender=MentoringSessions)
+@receiver(post_delete, sender=MentoringSessions)
+def invalidate_cached_slots(sender, instance, **kwargs):
+    """Drop the mentor's cached slot lists once the change is visible to other connections."""
+    if kwargs.get('raw'):
+        return
+    mentor_id = instance.mentor_id
+    transaction.on_commit(lambda: invalidate_mentor_slots(mentor_id))
@@ -0,0 +1,245 @@
+"""Free-slot generation for mentor availability.
+
+A mentor's weekly availability, date exceptions and booked sessions are
+loaded once for the whole date range (three queries, for any number of
+mentors). Slots are then produced per availability window by sweeping a
+sorted, merged list of blocked intervals: partial ``unavailable``
+exceptions and bookings only remove the time they cover, and
+``custom_available`` exceptions add a window for their date.
+
+Slots sit on a grid anchored at each window's start with a step equal to
+the session length, and are offered only if they fit entirely in free time.
+
+Single-mentor slot lists are cached under a per-mentor version stamp that
+``signals.py`` replaces whenever that mentor's availability, exceptions or
+sessions change, so a cached list is never served after a change. Stamps
+are ``cache_versions`` rows, so a change handled by one worker reaches the
+others.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.accounts.cache_versions import bump_version, current_version
+
+from .models import MentorAvailability, MentorAvailabilityExceptions, MentoringSessions
+
+
+DEFAULT_SESSION_MINUTES = 60
+MIN_SESSION_MINUTES = 15
+MAX_SESSION_MINUTES = 8 * 60
+BOOKED_STATUSES = ('pending', 'scheduled')
+
+SLOT_CACHE_TIMEOUT = 60 * 60
+VERSION_CACHE_KEY = 'mentoring:slots_version:{mentor_id}'
+SLOTS_CACHE_KEY = 'mentoring:slots:{mentor_id}:{version}:{start}:{end}:{minutes}:{exclude}'
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and coalesce overlapping or touching intervals; ends of the result ascend."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_segments(window: Interval, blocked: List[Interval], blocked_ends: List[datetime]) -> List[Interval]:
+    """Parts of ``window`` not covered by ``blocked`` (merged, with ``blocked_ends`` its end times)."""
+    start, end = window
+    segments = []
+    cursor = start
+    index = bisect_right(blocked_ends, start)
+    while index < len(blocked) and blocked[index][0] < end:
+        block_start, block_end = blocked[index]
+        if block_start > cursor:
+            segments.append((cursor, block_start))
+        cursor = max(cursor, block_end)
+        index += 1
+    if cursor < end:
+        segments.append((cursor, end))
+    return segments
+
+
+@dataclass(frozen=True)
+class Slot:
+    start: datetime
+    end: datetime
+
+    def as_dict(self) -> Dict[str, str]:
+        local_start = timezone.localtime(self.start)
+        local_end = timezone.localtime(self.end)
+        return {
+            'date': local_start.date().isoformat(),
+            'start_time': local_start.strftime('%H:%M'),
+            'end_time': local_end.strftime('%H:%M'),
+            'datetime': local_start.isoformat(),
+            'day_name': local_start.strftime('%A'),
+            'formatted_date': local_start.strftime('%B %d, %Y'),
+            'formatted_time': local_start.strftime('%I:%M %p'),
+        }
+
+
+@dataclass
+class MentorSchedule:
+    mentor_id: int
+    # Weekly windows keyed by day_of_week (0=Sunday, as stored)
+    weekly: Dict[int, List[Tuple[time, time]]] = field(default_factory=lambda: defaultdict(list))
+    # Extra windows and whole/partial unavailability keyed by date
+    extra_windows: Dict[date, List[Tuple[time, time]]] = field(default_factory=lambda: defaultdict(list))
+    unavailable: Dict[date, List[Tuple[Optional[time], Optional[time]]]] = field(default_factory=lambda: defaultdict(list))
+    busy: List[Interval] = field(default_factory=list)
+
+    def windows(self, day: date) -> List[Interval]:
+        our_day_of_week = (day.weekday() + 1) % 7
+        windows = []
+        for start_time, end_time in [*self.weekly.get(our_day_of_week, []), *self.extra_windows.get(day, [])]:
+            if start_time < end_time:
+                windows.append((_aware(day, start_time), _aware(day, end_time)))
+        return windows
+
+    def blocked(self, start_date: date, end_date: date) -> List[Interval]:
+        intervals = list(self.busy)
+        for day, periods in self.unavailable.items():
+            if not start_date <= day <= end_date:
+                continue
+            for start_time, end_time in periods:
+                if start_time is None and end_time is None:
+                    # No times means the whole day is off.
+                    intervals.append((_aware(day, time.min), _aware(day + timedelta(days=1), time.min)))
+                elif start_time is not None and end_time is not None:
+                    intervals.append((_aware(day, start_time), _aware(day, end_time)))
+        return merge_intervals(intervals)
+
+    def free_slots(self, start_date: date, end_date: date, duration: timedelta,
+                   now: Optional[datetime] = None, limit: Optional[int] = None) -> List[Slot]:
+        """Bookable slots of ``duration`` between the two dates (inclusive) that start after ``now``.
+
+        With ``limit``, only the earliest ``limit`` slots are returned and
+        later days are not swept once enough have been found.
+        """
+        now = now or timezone.now()
+        blocked = self.blocked(start_date, end_date)
+        blocked_ends = [end for _, end in blocked]
+        slots: Dict[datetime, Slot] = {}
+        day = start_date
+        while day <= end_date:
+            for window in self.windows(day):
+                anchor = window[0]
+                for segment_start, segment_end in free_segments(window, blocked, blocked_ends):
+                    # First grid point at or after the segment start
+                    steps = -((anchor - segment_start) // duration)
+                    slot_start = anchor + steps * duration
+                    while slot_start + duration <= segment_end:
+                        if slot_start > now:
+                            slots.setdefault(slot_start, Slot(slot_start, slot_start + duration))
+                        slot_start += duration
+            if limit is not None and len(slots) >= limit:
+                break
+            day += timedelta(days=1)
+        return [slots[start] for start in sorted(slots)][:limit]
+
+
+def _aware(day: date, moment: time) -> datetime:
+    return timezone.make_aware(datetime.combine(day, moment))
+
+
+def session_interval(scheduled_at: datetime, duration_minutes: Optional[int]) -> Interval:
+    if timezone.is_naive(scheduled_at):
+        scheduled_at = timezone.make_aware(scheduled_at)
+    return scheduled_at, scheduled_at + timedelta(minutes=duration_minutes or DEFAULT_SESSION_MINUTES)
+
+
+def load_schedules(mentor_ids: Iterable[int], start_date: date, end_date: date,
+                   exclude_session_id: Optional[int] = None) -> Dict[int, MentorSchedule]:
+    """Availability, exceptions and booked sessions for ``mentor_ids`` in three queries."""
+    mentor_ids = list(mentor_ids)
+    schedules = {mentor_id: MentorSchedule(mentor_id) for mentor_id in mentor_ids}
+
+    for mentor_id, day_of_week, start_time, end_time in MentorAvailability.objects.filter(
+        mentor_id__in=mentor_ids, is_active=True
+    ).values_list('mentor_id', 'day_of_week', 'start_time', 'end_time'):
+        schedules[mentor_id].weekly[day_of_week].append((start_time, end_time))
+
+    for mentor_id, day, start_time, end_time, exception_type in MentorAvailabilityExceptions.objects.filter(
+        mentor_id__in=mentor_ids, date__gte=start_date, date__lte=end_date
+    ).values_list('mentor_id', 'date', 'start_time', 'end_time', 'exception_type'):
+        if exception_type == 'unavailable':
+            schedules[mentor_id].unavailable[day].append((start_time, end_time))
+        elif exception_type == 'custom_available' and start_time and end_time:
+            schedules[mentor_id].extra_windows[day].append((start_time, end_time))
+
+    # Start a day early so sessions running past midnight still block the first day.
+    sessions = MentoringSessions.objects.filter(
+        mentor_id__in=mentor_ids,
+        scheduled_at__gte=_aware(start_date - timedelta(days=1), time.min),
+        scheduled_at__lt=_aware(end_date + timedelta(days=1), time.min),
+        status__in=BOOKED_STATUSES,
+    )
+    if exclude_session_id:
+        sessions = sessions.exclude(session_id=exclude_session_id)
+    for mentor_id, scheduled_at, duration_minutes in sessions.values_list('mentor_id', 'scheduled_at', 'duration_minutes'):
+        schedules[mentor_id].busy.append(session_interval(scheduled_at, duration_minutes))
+    return schedules
+
+
+def load_schedule(mentor_id: int, start_date: date, end_date: date,
+                  exclude_session_id: Optional[int] = None) -> MentorSchedule:
+    return load_schedules([mentor_id], start_date, end_date, exclude_session_id)[mentor_id]
+
+
+def rank_by_earliest_slot(schedules: Iterable[MentorSchedule], start_date: date, end_date: date, duration: timedelta,
+                          now: Optional[datetime] = None, slots_per_mentor: int = 1) -> List[Tuple[int, List[Slot]]]:
+    """``(mentor_id, earliest slots)`` for mentors with a free slot, soonest first."""
+    now = now or timezone.now()
+    ranked = []
+    for schedule in schedules:
+        slots = schedule.free_slots(start_date, end_date, duration, now=now, limit=slots_per_mentor)
+        if slots:
+            ranked.append((schedule.mentor_id, slots))
+    ranked.sort(key=lambda item: (item[1][0].start, item[0]))
+    return ranked
+
+
+def slots_version(mentor_id: int) -> str:
+    return current_version(VERSION_CACHE_KEY.format(mentor_id=mentor_id))
+
+
+def invalidate_mentor_slots(mentor_id: int) -> None:
+    bump_version(VERSION_CACHE_KEY.format(mentor_id=mentor_id))
+
+
+def cached_free_slots(mentor_id: int, start_date: date, end_date: date, duration: timedelta,
+                      exclude_session_id: Optional[int] = None, now: Optional[datetime] = None) -> List[Slot]:
+    """``free_slots`` for one mentor, computed once per version of their schedule.
+
+    The cached list ignores ``now``; past slots are dropped on each read so
+    an entry does not go stale as the day goes on.
+    """
+    now = now or timezone.now()
+    # Read the version before loading: a change committed mid-computation
+    # bumps it, and the entry stored under the old version is never read.
+    key = SLOTS_CACHE_KEY.format(
+        mentor_id=mentor_id, version=slots_version(mentor_id), start=start_date.isoformat(), end=end_date.isoformat(),
+        minutes=int(duration.total_seconds() // 60), exclude=exclude_session_id or '',
+    )
+    slots = cache.get(key)
+    if slots is None:
+        schedule = load_schedule(mentor_id, start_date, end_date, exclude_session_id)
+        slots = schedule.free_slots(start_date, end_date, duration, now=_aware(start_date - timedelta(days=1), time.min))
+        cache.set(key, slots, timeout=SLOT_CACHE_TIMEOUT)
+    return [slot for slot in slots if slot.start > now]
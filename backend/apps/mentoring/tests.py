@@ -1,3 +1,219 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.models import CacheVersion, Users, UserTypes
+
+from .models import MentorAvailability, MentorAvailabilityExceptions, MentoringSessions, Mentors
+from .slots import VERSION_CACHE_KEY, invalidate_mentor_slots, load_schedule
+
+
+def aware(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class MentorSlotEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='mentor')
+        user = Users.objects.create(
+            user_type=user_type, username='mentor1', email='mentor1@example.com', password_hash='x', is_active=1,
+        )
+        cls.mentor = Mentors.objects.create(user=user, approved=1)
+        cls.day = timezone.localdate() + timedelta(days=3)
+        cls.day_of_week = (cls.day.weekday() + 1) % 7
+        MentorAvailability.objects.create(mentor=cls.mentor, day_of_week=cls.day_of_week, start_time=time(9), end_time=time(14))
+
+    def setUp(self):
+        # Writes in TestCase never commit, so the slot cache is not invalidated between tests.
+        cache.clear()
+
+    def _starts(self, duration=timedelta(hours=1), exclude_session_id=None):
+        schedule = load_schedule(self.mentor.mentor_id, self.day, self.day, exclude_session_id=exclude_session_id)
+        return [timezone.localtime(slot.start).strftime('%H:%M') for slot in schedule.free_slots(self.day, self.day, duration)]
+
+    def test_partial_exceptions_and_sessions_only_block_what_they_cover(self):
+        MentorAvailabilityExceptions.objects.create(
+            mentor=self.mentor, date=self.day, start_time=time(10), end_time=time(11), exception_type='unavailable',
+        )
+        session = MentoringSessions.objects.create(
+            mentor=self.mentor, topic='Maths', scheduled_at=aware(self.day, 12, 30), duration_minutes=30, status='scheduled',
+        )
+        MentoringSessions.objects.create(
+            mentor=self.mentor, topic='Old', scheduled_at=aware(self.day, 9), duration_minutes=60, status='cancelled',
+        )
+
+        self.assertEqual(self._starts(), ['09:00', '11:00', '13:00'])
+        self.assertEqual(self._starts(exclude_session_id=session.session_id), ['09:00', '11:00', '12:00', '13:00'])
+
+    def test_arbitrary_durations_whole_day_and_custom_exceptions(self):
+        self.assertEqual(self._starts(timedelta(minutes=90)), ['09:00', '10:30', '12:00'])
+
+        MentorAvailabilityExceptions.objects.create(mentor=self.mentor, date=self.day, exception_type='unavailable')
+        self.assertEqual(self._starts(), [])
+
+        other_day = self.day + timedelta(days=1)
+        MentorAvailabilityExceptions.objects.create(
+            mentor=self.mentor, date=other_day, start_time=time(18), end_time=time(20), exception_type='custom_available',
+        )
+        schedule = load_schedule(self.mentor.mentor_id, other_day, other_day)
+        self.assertEqual([slot.start for slot in schedule.free_slots(other_day, other_day, timedelta(hours=1))],
+                         [aware(other_day, 18), aware(other_day, 19)])
+
+    def test_view_loads_schedule_in_constant_queries(self):
+        for hour in (9, 11):
+            MentoringSessions.objects.create(
+                mentor=self.mentor, topic='Busy', scheduled_at=aware(self.day, hour), duration_minutes=60, status='pending',
+            )
+        invalidate_mentor_slots(self.mentor.mentor_id)
+        with self.assertNumQueries(4):  # the version stamp, then the schedule
+            response = self.client.get(f'/api/mentoring/available-slots/{self.mentor.mentor_id}/', {
+                'start_date': self.day.isoformat(), 'end_date': self.day.isoformat(), 'duration_minutes': 60,
+            })
+        slots = response.json()['available_slots']
+        self.assertEqual([slot['start_time'] for slot in slots], ['10:00', '12:00', '13:00'])
+        self.assertEqual(slots[0]['end_time'], '11:00')
+        self.assertEqual(slots[0]['datetime'], aware(self.day, 10).isoformat())
+
+        response = self.client.get(f'/api/mentoring/available-slots/{self.mentor.mentor_id}/', {'duration_minutes': 5})
+        self.assertEqual(response.status_code, 400)
+
+
+class MentorAvailabilitySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='mentor')
+        cls.day = timezone.localdate() + timedelta(days=3)
+        day_of_week = (cls.day.weekday() + 1) % 7
+        cls.mentors = {}
+        for name, expertise, start_hour, approved in [
+            ('late', 'Combined Maths, Physics', 15, 1),
+            ('early', 'Maths', 9, 1),
+            ('physics', 'Physics', 8, 1),
+            ('unapproved', 'Maths', 7, 0),
+            ('booked', 'Maths', 10, 1),
+        ]:
+            user = Users.objects.create(
+                user_type=user_type, username=name, email=f'{name}@example.com', password_hash='x', is_active=1,
+            )
+            mentor = Mentors.objects.create(user=user, expertise=expertise, approved=approved)
+            MentorAvailability.objects.create(
+                mentor=mentor, day_of_week=day_of_week, start_time=time(start_hour), end_time=time(start_hour + 2),
+            )
+            cls.mentors[name] = mentor
+        # Fully booked for the day
+        for hour in (10, 11):
+            MentoringSessions.objects.create(
+                mentor=cls.mentors['booked'], topic='Busy', scheduled_at=aware(cls.day, hour), duration_minutes=60,
+                status='scheduled',
+            )
+
+    def test_matching_mentors_ranked_by_earliest_slot_in_constant_queries(self):
+        params = {'expertise': 'maths', 'start_date': self.day.isoformat(), 'end_date': self.day.isoformat()}
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/mentoring/available-mentors/', params)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(
+            [mentor['mentor_id'] for mentor in body['mentors']],
+            [self.mentors['early'].mentor_id, self.mentors['late'].mentor_id],
+        )
+        self.assertEqual(body['mentors'][0]['earliest_slot']['start_time'], '09:00')
+        self.assertEqual([slot['start_time'] for slot in body['mentors'][1]['available_slots']], ['15:00', '16:00'])
+
+        response = self.client.get('/api/mentoring/available-mentors/', {
+            **params, 'expertise': 'chemistry, physics', 'slots_per_mentor': 1, 'limit': 1,
+        })
+        body = response.json()
+        self.assertEqual(body['total'], 2)
+        self.assertEqual([mentor['mentor_id'] for mentor in body['mentors']], [self.mentors['physics'].mentor_id])
+        self.assertEqual(len(body['mentors'][0]['available_slots']), 1)
+
+        response = self.client.get('/api/mentoring/available-mentors/', {**params, 'limit': 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class MentorSlotCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='mentor')
+        user = Users.objects.create(
+            user_type=user_type, username='cached', email='cached@example.com', password_hash='x', is_active=1,
+        )
+        cls.mentor = Mentors.objects.create(user=user, approved=1)
+        cls.day = timezone.localdate() + timedelta(days=3)
+        cls.availability = MentorAvailability.objects.create(
+            mentor=cls.mentor, day_of_week=(cls.day.weekday() + 1) % 7, start_time=time(9), end_time=time(12),
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Create the mentor's version stamp so every request reads it the same way.
+        invalidate_mentor_slots(self.mentor.mentor_id)
+
+    def _starts(self, recomputed=False):
+        # The version stamp, then the schedule's three queries if the list is not cached
+        with self.assertNumQueries(4 if recomputed else 1):
+            response = self.client.get(f'/api/mentoring/available-slots/{self.mentor.mentor_id}/', {
+                'start_date': self.day.isoformat(), 'end_date': self.day.isoformat(),
+            })
+        return [slot['start_time'] for slot in response.json()['available_slots']]
+
+    def test_cached_slots_are_invalidated_by_every_mutation(self):
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '10:00', '11:00'])
+        self.assertEqual(self._starts(), ['09:00', '10:00', '11:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session = MentoringSessions.objects.create(
+                mentor=self.mentor, topic='Maths', scheduled_at=aware(self.day, 10), duration_minutes=60, status='scheduled',
+            )
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '11:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session.status = 'cancelled'
+            session.save()
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '10:00', '11:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            exception = MentorAvailabilityExceptions.objects.create(
+                mentor=self.mentor, date=self.day, start_time=time(9), end_time=time(10), exception_type='unavailable',
+            )
+        self.assertEqual(self._starts(recomputed=True), ['10:00', '11:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            exception.delete()
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '10:00', '11:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.availability.end_time = time(11)
+            self.availability.save()
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '10:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session.delete()
+            self.availability.delete()
+        self.assertEqual(self._starts(recomputed=True), [])
+        self.assertEqual(self._starts(), [])
+
+    def test_other_mentors_changes_keep_the_cache(self):
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '10:00', '11:00'])
+        other_user = Users.objects.create(
+            user_type=self.mentor.user.user_type, username='other', email='other@example.com', password_hash='x', is_active=1,
+        )
+        other = Mentors.objects.create(user=other_user, approved=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            MentorAvailability.objects.create(mentor=other, day_of_week=1, start_time=time(9), end_time=time(10))
+        self.assertEqual(self._starts(), ['09:00', '10:00', '11:00'])
 
-# Create your tests here.
+    def test_bumps_from_other_processes_invalidate_the_cache(self):
+        self.assertEqual(self._starts(recomputed=True), ['09:00', '10:00', '11:00'])
+        # Queryset updates send no signals, so this process keeps its list...
+        MentorAvailability.objects.filter(pk=self.availability.pk).update(end_time=time(10))
+        self.assertEqual(self._starts(), ['09:00', '10:00', '11:00'])
+        # ...until a bump made by another worker reaches it through the database.
+        CacheVersion.objects.filter(key=VERSION_CACHE_KEY.format(mentor_id=self.mentor.mentor_id)).update(
+            version='bumped-elsewhere',
+        )
+        self.assertEqual(self._starts(recomputed=True), ['09:00'])
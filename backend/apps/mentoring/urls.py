@@ -23,6 +23,7 @@ urlpatterns = [
     # Availability management
     path('availability/<int:mentor_id>/', views.MentorAvailabilityView.as_view(), name='mentor_availability'),
     path('available-slots/<int:mentor_id>/', views.AvailableTimeSlotsView.as_view(), name='available_slots'),
+    path('available-mentors/', views.MentorAvailabilitySearchView.as_view(), name='available_mentors'),
     
     # Mentor lookup by university student
     path('by-university-student/<int:university_student_id>/', MentorByUniversityStudentView.as_view(), name='mentor_by_university_student'),
@@ -38,9 +38,15 @@ def parse_request_json(request):
         return {}
 from .models import (
     MentoringSessions, MentoringRequests, SessionDetails, Mentors, 
-    MentoringSessionEnrollments, MentorAvailability, MentorAvailabilityExceptions,
+    MentoringSessionEnrollments, MentorAvailability,
     MentoringFeedback
 )
+from .slots import (
+    DEFAULT_SESSION_MINUTES, MAX_SESSION_MINUTES, MIN_SESSION_MINUTES,
+    cached_free_slots, load_schedules, rank_by_earliest_slot,
+)
+from apps.accounts.busy_calendar import MENTORING, conflict_message, find_conflicts
+from apps.accounts.expiry import effective_status, expired
 from apps.accounts.models import UserDetails
 from apps.students.models import Students
 
@@ -53,9 +59,8 @@ class MentoringRequestsView(View):
     def get(self, request, mentor_id):
         """Get all mentoring requests for a specific mentor"""
         try:
-            # Update expired requests
-            self.update_expired_requests()
-            
+            # Lapsed pending requests are reported as expired; the sweeper persists it.
+            now = timezone.now()
             requests = MentoringRequests.objects.filter(
                 mentor_id=mentor_id
             ).select_related(
@@ -77,7 +82,7 @@ class MentoringRequestsView(View):
                     'preferred_time': req.preferred_time,
                     'session_type': req.session_type,
                     'urgency': req.urgency,
-                    'status': req.status,
+                    'status': effective_status(req.status, req.expiry_date, now),
                     'requested_date': req.requested_date.isoformat(),
                     'expiry_date': req.expiry_date.isoformat(),
                     'decline_reason': req.decline_reason,
@@ -114,14 +119,6 @@ class MentoringRequestsView(View):
                 'message': str(e)
             }, status=500)
     
-    def update_expired_requests(self):
-        """Update expired requests"""
-        expired_requests = MentoringRequests.objects.filter(
-            status='pending',
-            expiry_date__lt=timezone.now()
-        )
-        expired_requests.update(status='expired')
-
     def post(self, request, mentor_id):
         """Create a new mentoring request"""
         try:
@@ -308,6 +305,12 @@ def accept_request(request, request_id):
                     'message': 'Request is not in pending status'
                 }, status=400)
             
+            if effective_status(mentoring_request.status, mentoring_request.expiry_date) == 'expired':
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'Request has expired'
+                }, status=400)
+            
             # Use the student's preferred time if scheduled_datetime is not provided
             if scheduled_datetime:
                 scheduled_dt = datetime.fromisoformat(scheduled_datetime.replace('Z', '+00:00'))
@@ -322,20 +325,18 @@ def accept_request(request, request_id):
                         'message': 'Invalid preferred time format in the request'
                     }, status=400)
             
-            # Check for conflicts with existing scheduled sessions
+            # Check both people's calendars across every service
             mentor = mentoring_request.mentor
-            session_end = scheduled_dt + timedelta(hours=1)  # 1 hour session
-            
-            conflicting_sessions = MentoringSessions.objects.filter(
-                mentor=mentor,
-                status='scheduled',
-                scheduled_at__lt=session_end,
-                scheduled_at__gte=scheduled_dt - timedelta(hours=1)
-            ).exists()
-            
-            if conflicting_sessions:
-                # Log warning but still allow scheduling
-                print(f"Warning: Potential conflict detected for mentor {mentor.mentor_id} at {scheduled_dt}")
+            session_end = scheduled_dt + timedelta(minutes=DEFAULT_SESSION_MINUTES)
+            conflicts = find_conflicts(
+                [mentor.user_id, mentoring_request.student.user_id], scheduled_dt, session_end
+            )
+            if conflicts:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': conflict_message(conflicts),
+                    'conflicts': [conflict.as_dict() for conflict in conflicts]
+                }, status=400)
             
             # Update the request status
             mentoring_request.status = 'scheduled'
@@ -502,21 +503,20 @@ def reschedule_session(request, session_id):
                 'message': 'The new time is the same as the current session time'
             }, status=400)
         
-        # Check for conflicts with other scheduled sessions (excluding current session)
+        # Check for conflicts in any service (excluding current session)
         mentor = session.mentor
-        session_end = new_dt + timedelta(hours=1)  # 1 hour session
-        
-        conflicting_sessions = MentoringSessions.objects.filter(
-            mentor=mentor,
-            status='scheduled',
-            scheduled_at__lt=session_end,
-            scheduled_at__gte=new_dt - timedelta(hours=1)
-        ).exclude(session_id=session_id).exists()
+        session_end = new_dt + timedelta(minutes=session.duration_minutes or DEFAULT_SESSION_MINUTES)
+        participants = [mentor.user_id]
+        session_details = SessionDetails.objects.filter(session=session).select_related('request__student').first()
+        if session_details and session_details.request:
+            participants.append(session_details.request.student.user_id)
         
-        if conflicting_sessions:
+        conflicts = find_conflicts(participants, new_dt, session_end, exclude=[(MENTORING, session.session_id)])
+        if conflicts:
             return JsonResponse({
                 'status': 'error',
-                'message': 'This time slot conflicts with another scheduled session'
+                'message': conflict_message(conflicts),
+                'conflicts': [conflict.as_dict() for conflict in conflicts]
             }, status=400)
         
         with transaction.atomic():
@@ -657,7 +657,8 @@ def get_mentor_stats(request, mentor_id):
     try:
         # Get all requests and sessions for this mentor
         total_requests = MentoringRequests.objects.filter(mentor_id=mentor_id).count()
-        pending_requests = MentoringRequests.objects.filter(mentor_id=mentor_id, status='pending').count()
+        now = timezone.now()
+        pending_requests = MentoringRequests.objects.filter(mentor_id=mentor_id, status='pending', expiry_date__gte=now).count()
         
         # Use case-insensitive queries for sessions
         all_sessions = MentoringSessions.objects.filter(mentor_id=mentor_id)
@@ -666,7 +667,7 @@ def get_mentor_stats(request, mentor_id):
         
         # Calculate additional metrics
         declined_requests = MentoringRequests.objects.filter(mentor_id=mentor_id, status='declined').count()
-        expired_requests = MentoringRequests.objects.filter(mentor_id=mentor_id, status='expired').count()
+        expired_requests = MentoringRequests.objects.filter(expired(now), mentor_id=mentor_id).count()
         
         # Calculate response rate (accepted + declined vs total pending + accepted + declined)
         responded_requests = (total_requests - pending_requests - expired_requests)
@@ -1044,6 +1045,53 @@ class MentorAvailabilityView(View):
             }, status=500)
 
 
+SLOT_SEARCH_DAYS = 14
+MAX_SEARCH_MENTORS = 100
+MAX_SLOTS_PER_MENTOR = 20
+
+
+def parse_slot_window(params, now, include_today):
+    """Date range and session length for a slot listing from query params.
+
+    Dates default to the next two weeks (from tomorrow for new bookings, so
+    there is a day's notice) and are clamped to that range. Raises
+    ``ValueError`` with a user-facing message for bad values.
+    """
+    today = timezone.localtime(now).date()
+    start_date = today if include_today else today + timedelta(days=1)
+    end_date = today + timedelta(days=SLOT_SEARCH_DAYS)
+    try:
+        if 'start_date' in params:
+            start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+        if 'end_date' in params:
+            end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Dates must be in YYYY-MM-DD format')
+    
+    # Never in the past, never more than two weeks ahead
+    start_date = max(start_date, today)
+    end_date = min(end_date, today + timedelta(days=SLOT_SEARCH_DAYS))
+    
+    # Session length in minutes (defaults to 1 hour)
+    try:
+        duration_minutes = int(params.get('duration_minutes', DEFAULT_SESSION_MINUTES))
+    except ValueError:
+        duration_minutes = 0
+    if not MIN_SESSION_MINUTES <= duration_minutes <= MAX_SESSION_MINUTES:
+        raise ValueError(f'duration_minutes must be between {MIN_SESSION_MINUTES} and {MAX_SESSION_MINUTES}')
+    return start_date, end_date, duration_minutes
+
+
+def _bounded_int(params, name, default, maximum):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+    if not 1 <= value <= maximum:
+        raise ValueError(f'{name} must be between 1 and {maximum}')
+    return value
+
+
 class AvailableTimeSlotsView(View):
     @method_decorator(csrf_exempt)
     def dispatch(self, request, *args, **kwargs):
@@ -1058,142 +1106,106 @@ class AvailableTimeSlotsView(View):
             # Get current time for filtering past slots
             now = timezone.now()
             
-            # Get date range - start from today for rescheduling, tomorrow for new bookings
-            if exclude_session_id:
-                # For rescheduling, allow today's future slots
-                start_date = now.date()
-            else:
-                # For new bookings, require 24 hours advance notice
-                start_date = now.date() + timedelta(days=1)
-            
-            end_date = now.date() + timedelta(days=14)  # 2 weeks from today
-            
-            # Override dates if provided in query params
-            if 'start_date' in request.GET:
-                start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
-            if 'end_date' in request.GET:
-                end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
-            
-            # Ensure start date is not in the past
-            if start_date < now.date():
-                start_date = now.date()
-            
-            # Ensure end date is within 2 weeks from today
-            max_date = now.date() + timedelta(days=14)
-            if end_date > max_date:
-                end_date = max_date
-            
-            # Get mentor's regular availability
-            availability = MentorAvailability.objects.filter(
-                mentor_id=mentor_id,
-                is_active=True
-            )
+            # Rescheduling may use today's remaining slots; new bookings start tomorrow
+            try:
+                if exclude_session_id:
+                    exclude_session_id = _bounded_int(request.GET, 'exclude_session_id', None, 2 ** 31 - 1)
+                start_date, end_date, duration_minutes = parse_slot_window(
+                    request.GET, now, include_today=bool(exclude_session_id)
+                )
+            except ValueError as e:
+                return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+            
+            # Served from the mentor's slot cache until their availability, exceptions
+            # or sessions change (excluding the session being rescheduled)
+            available_slots = [
+                slot.as_dict()
+                for slot in cached_free_slots(
+                    mentor_id, start_date, end_date, timedelta(minutes=duration_minutes),
+                    exclude_session_id=exclude_session_id, now=now,
+                )
+            ]
             
-            # Get mentor's exceptions
-            exceptions = MentorAvailabilityExceptions.objects.filter(
-                mentor_id=mentor_id,
-                date__gte=start_date,
-                date__lte=end_date
-            )
+            return JsonResponse({
+                'status': 'success',
+                'available_slots': available_slots,
+                'date_range': {
+                    'start_date': start_date.isoformat(),
+                    'end_date': end_date.isoformat()
+                }
+            })
             
-            # Get existing sessions (booked slots), excluding the session being rescheduled
-            existing_sessions_query = MentoringSessions.objects.filter(
-                mentor_id=mentor_id,
-                scheduled_at__date__gte=start_date,
-                scheduled_at__date__lte=end_date,
-                status__in=['pending', 'scheduled']
+        except Exception as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=500)
+
+
+class MentorAvailabilitySearchView(View):
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+    
+    def get(self, request):
+        """Approved mentors with a free slot in the window, soonest available first.
+
+        ``expertise`` takes comma-separated terms; a mentor matches if their
+        expertise contains any of them. Schedules for every candidate are
+        loaded together, so the query count does not grow with the number
+        of mentors.
+        """
+        try:
+            now = timezone.now()
+            try:
+                start_date, end_date, duration_minutes = parse_slot_window(request.GET, now, include_today=False)
+                limit = _bounded_int(request.GET, 'limit', 20, MAX_SEARCH_MENTORS)
+                slots_per_mentor = _bounded_int(request.GET, 'slots_per_mentor', 3, MAX_SLOTS_PER_MENTOR)
+            except ValueError as e:
+                return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+            
+            mentors = Mentors.objects.filter(approved=1).select_related('user')
+            terms = [term.strip() for term in request.GET.get('expertise', '').split(',') if term.strip()]
+            if terms:
+                matches = Q()
+                for term in terms:
+                    matches |= Q(expertise__icontains=term)
+                mentors = mentors.filter(matches)
+            mentors = {mentor.mentor_id: mentor for mentor in mentors}
+            
+            schedules = load_schedules(mentors, start_date, end_date)
+            ranked = rank_by_earliest_slot(
+                schedules.values(), start_date, end_date, timedelta(minutes=duration_minutes),
+                now=now, slots_per_mentor=slots_per_mentor,
             )
-            
-            # Exclude the current session if rescheduling
-            if exclude_session_id:
-                existing_sessions_query = existing_sessions_query.exclude(session_id=exclude_session_id)
-            
-            existing_sessions = existing_sessions_query
-            
-            available_slots = []
-            current_date = start_date
-            
-            while current_date <= end_date:
-                day_of_week = current_date.weekday()
-                # Convert Python weekday (0=Monday) to our weekday (0=Sunday)
-                our_day_of_week = (day_of_week + 1) % 7
-                
-                # Get regular availability for this day
-                day_availability = availability.filter(day_of_week=our_day_of_week)
-                
-                # Check for exceptions on this date
-                day_exceptions = exceptions.filter(date=current_date)
-                
-                for avail in day_availability:
-                    # Check if this slot is affected by exceptions
-                    slot_available = True
-                    
-                    for exception in day_exceptions:
-                        if exception.exception_type == 'unavailable':
-                            # If exception covers whole day or overlaps with this slot
-                            if (not exception.start_time and not exception.end_time) or \
-                               (exception.start_time and exception.end_time and 
-                                exception.start_time <= avail.start_time and 
-                                exception.end_time >= avail.end_time):
-                                slot_available = False
-                                break
-                    
-                    if slot_available:
-                        # Generate time slots (assuming 1-hour sessions)
-                        session_duration = timedelta(hours=1)
-                        current_time = datetime.combine(current_date, avail.start_time)
-                        end_time = datetime.combine(current_date, avail.end_time)
-                        
-                        while current_time + session_duration <= end_time:
-                            # Make slot_datetime timezone-aware for proper comparison
-                            slot_datetime = timezone.make_aware(current_time)
-                            slot_end = slot_datetime + session_duration
-                            
-                            # Skip past time slots (must be at least current time or later)
-                            if slot_datetime <= now:
-                                current_time += session_duration
-                                continue
-                            
-                            # Check if this slot conflicts with existing sessions
-                            # A conflict occurs if there's overlap between slot and existing session
-                            conflict = False
-                            for session in existing_sessions:
-                                session_start = session.scheduled_at
-                                # Ensure session_start is timezone-aware
-                                if timezone.is_naive(session_start):
-                                    session_start = timezone.make_aware(session_start)
-                                session_end = session_start + timedelta(hours=1)
-                                
-                                # Check for overlap: slot starts before session ends AND slot ends after session starts
-                                if slot_datetime < session_end and slot_end > session_start:
-                                    conflict = True
-                                    break
-                            
-                            if not conflict:
-                                available_slots.append({
-                                    'date': current_date.isoformat(),
-                                    'start_time': current_time.time().strftime('%H:%M'),
-                                    'end_time': (current_time + session_duration).time().strftime('%H:%M'),
-                                    'datetime': slot_datetime.isoformat(),
-                                    'day_name': current_date.strftime('%A'),
-                                    'formatted_date': current_date.strftime('%B %d, %Y'),
-                                    'formatted_time': current_time.time().strftime('%I:%M %p')
-                                })
-                            
-                            current_time += session_duration
-                
-                current_date += timedelta(days=1)
-            
-            # Sort slots by datetime
-            available_slots.sort(key=lambda x: x['datetime'])
+            total = len(ranked)
+            ranked = ranked[:limit]
+            
+            names = dict(UserDetails.objects.filter(
+                user_id__in=[mentors[mentor_id].user_id for mentor_id, _ in ranked]
+            ).values_list('user_id', 'full_name'))
+            
+            results = []
+            for mentor_id, slots in ranked:
+                mentor = mentors[mentor_id]
+                results.append({
+                    'mentor_id': mentor_id,
+                    'user_id': mentor.user_id,
+                    'name': names.get(mentor.user_id) or mentor.user.username,
+                    'expertise': mentor.expertise,
+                    'earliest_slot': slots[0].as_dict(),
+                    'available_slots': [slot.as_dict() for slot in slots],
+                })
             
             return JsonResponse({
                 'status': 'success',
-                'available_slots': available_slots,
+                'mentors': results,
+                'total': total,
                 'date_range': {
                     'start_date': start_date.isoformat(),
                     'end_date': end_date.isoformat()
-                }
+                },
+                'duration_minutes': duration_minutes
             })
             
         except Exception as e:
@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.reports.pdf import generate_admin_report_pdf
+from apps.reports.rendering import shutdown_render_pool
+
+
+DEFAULT_RENDERS = 24
+DEFAULT_WORKERS = '0,2,4'
+
+
+def sample_report_data(rows: int = 25) -> dict:
+    return {
+        'metadata': {'start': '2025-01-01T00:00:00', 'end': '2025-01-31T23:59:59'},
+        'user_management': {
+            'total_new_users': 1250,
+            'active_users_total': 8400,
+            'inactive_users_total': 310,
+            'breakdown': [{'user_type__type_name': f'type_{index}', 'count': index * 7} for index in range(8)],
+        },
+        'content': {
+            'courses_created': 40,
+            'courses_published': 31,
+            'mentoring_sessions_created': 520,
+            'mentoring_sessions_completed': 470,
+            'tutoring_sessions_created': 610,
+            'tutoring_sessions_completed': 580,
+            'popular_courses': [{'course__title': f'Course {index}', 'enrollments': 500 - index} for index in range(rows)],
+        },
+        'tutoring_earnings': {
+            'total_revenue': 1250000.0,
+            'payment_count': 980,
+            'average_payment': 1275.51,
+            'top_tutors': [
+                {'tutor_id': index, 'tutor_username': f'tutor{index}', 'sessions': 90 - index, 'total_earnings': 45000.0 - index * 900}
+                for index in range(rows)
+            ],
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measure admin report PDF throughput for N concurrent renders at different PDF_RENDER_WORKERS sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=DEFAULT_RENDERS, help=f'Concurrent renders per run (default {DEFAULT_RENDERS})')
+        parser.add_argument(
+            '--workers',
+            default=DEFAULT_WORKERS,
+            help=f'Comma-separated pool sizes to compare; 0 renders in-process (default {DEFAULT_WORKERS})',
+        )
+        parser.add_argument('--rows', type=int, default=25, help='Rows per table in the sample report (default 25)')
+
+    def _run(self, workers: int, renders: int, report_data: dict) -> float:
+        with override_settings(PDF_RENDER_WORKERS=workers):
+            try:
+                # Warm every worker so process start-up is not counted as render time.
+                with ThreadPoolExecutor(max_workers=max(workers, 1)) as warmup:
+                    list(warmup.map(lambda _: generate_admin_report_pdf(report_data), range(max(workers, 1) * 2)))
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=renders) as requests:
+                    sizes = list(requests.map(lambda _: len(generate_admin_report_pdf(report_data)), range(renders)))
+                elapsed = time.perf_counter() - started
+            finally:
+                shutdown_render_pool()
+        if not all(sizes):
+            raise CommandError(f'Empty PDF produced with {workers} workers')
+        return elapsed
+
+    def handle(self, *args, **options):
+        try:
+            pool_sizes = [int(value) for value in options['workers'].split(',') if value.strip()]
+        except ValueError as exc:
+            raise CommandError('--workers must be a comma-separated list of integers') from exc
+        renders = max(options['renders'], 1)
+        report_data = sample_report_data(options['rows'])
+
+        baseline = None
+        for workers in pool_sizes:
+            elapsed = self._run(workers, renders, report_data)
+            throughput = renders / elapsed
+            baseline = baseline or throughput
+            label = 'in-process' if workers == 0 else f'{workers} workers'
+            self.stdout.write(
+                f'{label:>12}: {renders} renders in {elapsed:.2f}s '
+                f'({throughput:.1f} renders/s, {throughput / baseline:.2f}x)'
+            )
+
+        self.stdout.write(self.style.SUCCESS('PDF rendering benchmark complete'))
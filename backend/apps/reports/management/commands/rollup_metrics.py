@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.rollups import last_complete_day, rollup_daily_metrics, trailing_window
+
+
+DATE_FORMAT = '%Y-%m-%d'
+DEFAULT_TRAILING_DAYS = 3
+CHUNK_DAYS = 31
+
+
+class Command(BaseCommand):
+    help = (
+        'Roll up daily platform metrics into daily_platform_metrics. '
+        'Without --start/--end the trailing --days complete days are refreshed; '
+        'status-based metrics (completed sessions, published courses) only settle '
+        'once their day falls out of that window, so re-run a backfill after bulk status edits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to roll up (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to roll up (YYYY-MM-DD), defaults to yesterday')
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_TRAILING_DAYS,
+            help=f'Trailing complete days to refresh when --start is omitted (default {DEFAULT_TRAILING_DAYS})',
+        )
+
+    def _parse_date(self, value, option):
+        try:
+            return datetime.strptime(value, DATE_FORMAT).date()
+        except ValueError as exc:
+            raise CommandError(f'{option} must use the YYYY-MM-DD format') from exc
+
+    def handle(self, *args, **options):
+        latest = last_complete_day()
+
+        if options['start']:
+            start_date = self._parse_date(options['start'], '--start')
+            end_date = self._parse_date(options['end'], '--end') if options['end'] else latest
+        else:
+            if options['end']:
+                raise CommandError('--end requires --start')
+            start_date, end_date = trailing_window(options['days'])
+
+        if end_date > latest:
+            self.stdout.write(f'Today is still in progress; stopping the rollup at {latest}.')
+            end_date = latest
+        if start_date > end_date:
+            raise CommandError('Start date must be before or equal to end date')
+
+        total_rows = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS - 1), end_date)
+            total_rows += rollup_daily_metrics(chunk_start, chunk_end)
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rolled up {total_rows} metric rows for {start_date} to {end_date}'
+            )
+        )
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPlatformMetrics',
+            fields=[
+                ('metric_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('metric_date', models.DateField()),
+                ('metric', models.CharField(max_length=64)),
+                ('dimension', models.CharField(blank=True, default='', max_length=100)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'daily_platform_metrics',
+                'ordering': ['metric_date', 'metric', 'dimension'],
+                'indexes': [models.Index(fields=['metric', 'metric_date'], name='daily_platf_metric_cff3a6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric_date', 'metric', 'dimension'), name='unique_daily_platform_metric')],
+            },
+        ),
+    ]
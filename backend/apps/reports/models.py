@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 
@@ -24,3 +26,78 @@ class AdminReportRecord(models.Model):
 
     def __str__(self) -> str:
         return f"{self.title} ({self.start_date} - {self.end_date})"
+
+
+class AdminReportJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    requested_by = models.ForeignKey(
+        'accounts.Users',
+        models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='admin_report_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    stage = models.CharField(max_length=100, blank=True, default='')
+    report = models.ForeignKey(
+        AdminReportRecord,
+        models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='jobs'
+    )
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'admin_report_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f"Report job {self.job_id} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+
+class DailyPlatformMetrics(models.Model):
+    metric_id = models.BigAutoField(primary_key=True)
+    metric_date = models.DateField()
+    metric = models.CharField(max_length=64)
+    dimension = models.CharField(max_length=100, blank=True, default='')
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_platform_metrics'
+        ordering = ['metric_date', 'metric', 'dimension']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric_date', 'metric', 'dimension'],
+                name='unique_daily_platform_metric',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'metric_date']),
+        ]
+
+    def __str__(self) -> str:
+        suffix = f" [{self.dimension}]" if self.dimension else ''
+        return f"{self.metric_date} {self.metric}{suffix}: {self.value}"
@@ -1,13 +1,40 @@
 from __future__ import annotations
 
-from io import BytesIO
 from typing import Dict, List
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+from .rendering import build_pdf, render_pdf, sample_styles
+
+
+SECTION_TITLE_STYLE = ParagraphStyle(name='SectionTitle', fontSize=12, leading=15, spaceAfter=6, fontName='Helvetica-Bold')
+
+KEY_VALUE_TABLE_STYLE = TableStyle(
+    [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F3F4F6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F2937')),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#E5E7EB')),
+    ]
+)
+
+DATA_TABLE_STYLE = TableStyle(
+    [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1D4ED8')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#E5E7EB')),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F9FAFB')]),
+    ]
+)
 
 
 def _title_case(value: str) -> str:
@@ -17,63 +44,28 @@ def _title_case(value: str) -> str:
 
 
 def _build_section_title(text: str) -> Paragraph:
-    styles = getSampleStyleSheet()
-    return Paragraph(text, styles['Heading2'])
+    return Paragraph(text, sample_styles()['Heading2'])
 
 
 def _build_key_value_table(data: List[List[str]]) -> Table:
     table = Table(data, hAlign='LEFT', colWidths=[2.8 * inch, 2.0 * inch])
-    table.setStyle(
-        TableStyle(
-            [
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F3F4F6')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F2937')),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#E5E7EB')),
-            ]
-        )
-    )
+    table.setStyle(KEY_VALUE_TABLE_STYLE)
     return table
 
 
 def _build_table(title: str, headers: List[str], rows: List[List[str]]) -> List:
     story: List = []
-    story.append(Paragraph(title, ParagraphStyle(name='SectionTitle', fontSize=12, leading=15, spaceAfter=6, fontName='Helvetica-Bold')))
+    story.append(Paragraph(title, SECTION_TITLE_STYLE))
     table_data = [headers] + rows if rows else [headers, ['No data available'] + [''] * (len(headers) - 1)]
     table = Table(table_data, hAlign='LEFT')
-    table.setStyle(
-        TableStyle(
-            [
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1D4ED8')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#E5E7EB')),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F9FAFB')]),
-            ]
-        )
-    )
+    table.setStyle(DATA_TABLE_STYLE)
     story.append(table)
     story.append(Spacer(1, 12))
     return story
 
 
-def generate_admin_report_pdf(report_data: Dict[str, object]) -> bytes:
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=36,
-        leftMargin=36,
-        topMargin=48,
-        bottomMargin=48,
-    )
-
-    styles = getSampleStyleSheet()
+def render_admin_report(report_data: Dict[str, object]) -> bytes:
+    styles = sample_styles()
     story: List = []
 
     metadata = report_data.get('metadata', {})
@@ -151,7 +143,8 @@ def generate_admin_report_pdf(report_data: Dict[str, object]) -> bytes:
         _build_table('Top Performing Tutors', ['Tutor', 'Sessions', 'Earnings'], tutor_rows)
     )
 
-    doc.build(story)
-    pdf_content = buffer.getvalue()
-    buffer.close()
-    return pdf_content
+    return build_pdf(story, rightMargin=36, leftMargin=36, topMargin=48, bottomMargin=48)
+
+
+def generate_admin_report_pdf(report_data: Dict[str, object]) -> bytes:
+    return render_pdf(render_admin_report, report_data)
@@ -0,0 +1,88 @@
+"""Shared ReportLab rendering service.
+
+Renderers are plain module-level functions that turn a picklable payload into
+PDF bytes without touching the database, so they can run either in-process or
+in the worker pool below. Stylesheets and table styles are built once per
+process and reused by every render.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import StyleSheet1, getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate
+
+
+logger = logging.getLogger(__name__)
+
+Renderer = Callable[[object], bytes]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def sample_styles() -> StyleSheet1:
+    return getSampleStyleSheet()
+
+
+def build_pdf(story: List, **doc_options) -> bytes:
+    buffer = BytesIO()
+    doc_options.setdefault('pagesize', A4)
+    SimpleDocTemplate(buffer, **doc_options).build(story)
+    return buffer.getvalue()
+
+
+def render_workers() -> int:
+    return max(int(getattr(settings, 'PDF_RENDER_WORKERS', 0) or 0), 0)
+
+
+def _pool_available() -> bool:
+    # Daemonic processes (e.g. Celery prefork children) may not start children.
+    return render_workers() > 0 and not multiprocessing.current_process().daemon
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=render_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def shutdown_render_pool(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def render_pdf(renderer: Renderer, payload, timeout: Optional[float] = None) -> bytes:
+    """Render ``payload`` with ``renderer``, off the request thread when a pool is configured.
+
+    With ``PDF_RENDER_WORKERS`` set to 0, or inside a daemonic worker process,
+    the render runs inline. A pool that dies mid-render is discarded and the
+    render is retried inline.
+    """
+    if not _pool_available():
+        return renderer(payload)
+
+    try:
+        return get_render_pool().submit(renderer, payload).result(timeout=timeout)
+    except BrokenProcessPool:
+        logger.exception('PDF render pool broke; rendering %s inline', getattr(renderer, '__name__', renderer))
+        shutdown_render_pool(wait=False)
+        return renderer(payload)
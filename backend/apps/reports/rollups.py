@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.accounts.models import UserDailyLogin, Users
+from apps.mentoring.models import MentoringSessions
+from apps.payments.models import TutoringPayments
+from apps.pre_university_courses.models import CourseEnrollment, PreUniversityCourse
+from apps.tutoring.models import TutoringSessions
+
+from .models import DailyPlatformMetrics
+
+
+# Written once per rolled-up day so readers can tell "no activity" apart from
+# "not rolled up yet".
+ROLLUP_MARKER = 'rollup_complete'
+
+MetricKey = Tuple[date, str, str]
+MetricRow = Tuple[date, str, str, Decimal]
+
+
+def _day_bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _grouped_by_day(queryset, date_expression, aggregates: Dict[str, object], dimension_field: Optional[str] = None) -> Iterator[MetricRow]:
+    """One grouped query yielding a row per (day, dimension) for every metric in ``aggregates``."""
+    group_fields = ['activity_date'] + ([dimension_field] if dimension_field else [])
+    rows = (
+        queryset.annotate(activity_date=TruncDate(date_expression))
+        .values(*group_fields)
+        .annotate(**aggregates)
+        .order_by()
+    )
+    for row in rows:
+        if row['activity_date'] is None:
+            continue
+        dimension = str(row.get(dimension_field) or '') if dimension_field else ''
+        for metric in aggregates:
+            yield row['activity_date'], metric, dimension, Decimal(row[metric] or 0)
+
+
+def _user_metrics(start: datetime, end: datetime) -> Iterator[MetricRow]:
+    users = Users.objects.filter(created_at__gte=start, created_at__lt=end)
+    yield from _grouped_by_day(users, 'created_at', {'new_users': Count('pk')}, 'user_type__type_name')
+
+
+def _login_metrics(start: datetime, end: datetime) -> Iterator[MetricRow]:
+    rows = (
+        UserDailyLogin.objects.filter(login_date__gte=timezone.localdate(start), login_date__lt=timezone.localdate(end))
+        .values('login_date')
+        .annotate(logins=Sum('login_count'), active_login_users=Count('user', distinct=True))
+        .order_by()
+    )
+    for row in rows:
+        yield row['login_date'], 'logins', '', Decimal(row['logins'] or 0)
+        yield row['login_date'], 'active_login_users', '', Decimal(row['active_login_users'] or 0)
+
+
+def _tutoring_payment_metrics(start: datetime, end: datetime) -> Iterator[MetricRow]:
+    payments = TutoringPayments.objects.annotate(
+        activity_datetime=Coalesce('paid_at', 'created_at')
+    ).filter(activity_datetime__gte=start, activity_datetime__lt=end)
+    yield from _grouped_by_day(
+        payments,
+        'activity_datetime',
+        {'tutoring_payments': Count('pk'), 'tutoring_revenue': Sum('amount')},
+    )
+
+
+def _session_metrics(model, prefix: str) -> Callable[[datetime, datetime], Iterator[MetricRow]]:
+    def collect(start: datetime, end: datetime) -> Iterator[MetricRow]:
+        yield from _grouped_by_day(
+            model.objects.filter(created_at__gte=start, created_at__lt=end),
+            'created_at',
+            {
+                f'{prefix}_created': Count('pk'),
+                f'{prefix}_completed': Count('pk', filter=Q(status='completed')),
+            },
+        )
+    return collect
+
+
+def _course_metrics(start: datetime, end: datetime) -> Iterator[MetricRow]:
+    yield from _grouped_by_day(
+        PreUniversityCourse.objects.filter(created_at__gte=start, created_at__lt=end),
+        'created_at',
+        {
+            'courses_created': Count('pk'),
+            'courses_published': Count('pk', filter=Q(status='published')),
+        },
+    )
+
+
+def _enrollment_metrics(start: datetime, end: datetime) -> Iterator[MetricRow]:
+    enrollments = CourseEnrollment.objects.filter(enrolled_at__gte=start, enrolled_at__lt=end)
+    yield from _grouped_by_day(enrollments, 'enrolled_at', {'course_enrollments': Count('pk')}, 'course_id')
+
+
+# source name -> (metrics it produces, collector over an aware [start, end) window)
+METRIC_SOURCES: Dict[str, Tuple[Tuple[str, ...], Callable[[datetime, datetime], Iterable[MetricRow]]]] = {
+    'users': (('new_users',), _user_metrics),
+    'logins': (('logins', 'active_login_users'), _login_metrics),
+    'tutoring_payments': (('tutoring_payments', 'tutoring_revenue'), _tutoring_payment_metrics),
+    'mentoring_sessions': (
+        ('mentoring_sessions_created', 'mentoring_sessions_completed'),
+        _session_metrics(MentoringSessions, 'mentoring_sessions'),
+    ),
+    'tutoring_sessions': (
+        ('tutoring_sessions_created', 'tutoring_sessions_completed'),
+        _session_metrics(TutoringSessions, 'tutoring_sessions'),
+    ),
+    'courses': (('courses_created', 'courses_published'), _course_metrics),
+    'course_enrollments': (('course_enrollments',), _enrollment_metrics),
+}
+
+ALL_METRICS = tuple(metric for metrics, _ in METRIC_SOURCES.values() for metric in metrics)
+
+
+def compute_daily_metrics(start_date: date, end_date: date, metrics: Optional[Iterable[str]] = None) -> Dict[MetricKey, Decimal]:
+    """Aggregate the raw event tables into per-day metric values.
+
+    Only the sources that produce one of ``metrics`` are queried; each source
+    is a single grouped query over the window.
+    """
+    wanted = set(metrics) if metrics is not None else set(ALL_METRICS)
+    start, end = _day_bounds(start_date, end_date)
+    values: Dict[MetricKey, Decimal] = {}
+    for produced, collect in METRIC_SOURCES.values():
+        if wanted.isdisjoint(produced):
+            continue
+        for metric_date, metric, dimension, value in collect(start, end):
+            if metric in wanted:
+                values[(metric_date, metric, dimension)] = value
+    return values
+
+
+def rollup_daily_metrics(start_date: date, end_date: date) -> int:
+    """Recompute and store every metric for the given days.
+
+    Existing rows in the range are replaced, so re-running a range is
+    idempotent. Returns the number of metric rows written.
+    """
+    values = compute_daily_metrics(start_date, end_date)
+    rows = [
+        DailyPlatformMetrics(metric_date=metric_date, metric=metric, dimension=dimension, value=value)
+        for (metric_date, metric, dimension), value in values.items()
+    ]
+    day = start_date
+    while day <= end_date:
+        rows.append(DailyPlatformMetrics(metric_date=day, metric=ROLLUP_MARKER, value=1))
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        DailyPlatformMetrics.objects.filter(metric_date__gte=start_date, metric_date__lte=end_date).delete()
+        DailyPlatformMetrics.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def load_daily_metrics(start_date: date, end_date: date, metrics: Iterable[str]) -> Dict[MetricKey, Decimal]:
+    """Read per-day metric values for a date range from the rollup table.
+
+    Days that have not been rolled up yet, and today (which is still
+    changing), are computed live over the smallest window that covers them.
+    Reads never write to the rollup table.
+    """
+    metrics = tuple(metrics)
+    stored_end = min(end_date, last_complete_day())
+
+    rolled_up_days = set()
+    values: Dict[MetricKey, Decimal] = {}
+    if start_date <= stored_end:
+        for row in DailyPlatformMetrics.objects.filter(
+            metric_date__gte=start_date,
+            metric_date__lte=stored_end,
+            metric__in=metrics + (ROLLUP_MARKER,),
+        ).values_list('metric_date', 'metric', 'dimension', 'value'):
+            metric_date, metric, dimension, value = row
+            if metric == ROLLUP_MARKER:
+                rolled_up_days.add(metric_date)
+            else:
+                values[(metric_date, metric, dimension)] = value
+
+    live_start = None
+    day = start_date
+    while day <= end_date:
+        if day not in rolled_up_days:
+            live_start = day
+            break
+        day += timedelta(days=1)
+
+    if live_start is not None:
+        values = {key: value for key, value in values.items() if key[0] < live_start}
+        values.update(compute_daily_metrics(live_start, end_date, metrics))
+    return values
+
+
+def sum_metrics(values: Dict[MetricKey, Decimal]) -> Dict[str, Decimal]:
+    totals: Dict[str, Decimal] = defaultdict(Decimal)
+    for (_, metric, _), value in values.items():
+        totals[metric] += value
+    return totals
+
+
+def sum_by_dimension(values: Dict[MetricKey, Decimal], metric: str) -> Dict[str, Decimal]:
+    totals: Dict[str, Decimal] = defaultdict(Decimal)
+    for (_, key_metric, dimension), value in values.items():
+        if key_metric == metric:
+            totals[dimension] += value
+    return totals
+
+
+def sum_by_day(values: Dict[MetricKey, Decimal], metric: str) -> Dict[date, Decimal]:
+    totals: Dict[date, Decimal] = defaultdict(Decimal)
+    for (metric_date, key_metric, _), value in values.items():
+        if key_metric == metric:
+            totals[metric_date] += value
+    return totals
+
+
+def last_complete_day() -> date:
+    """Most recent day that can be stored; today is still accumulating events."""
+    return timezone.localdate() - timedelta(days=1)
+
+
+def trailing_window(days: int) -> Tuple[date, date]:
+    """The last ``days`` complete days, ending yesterday."""
+    end_date = last_complete_day()
+    return end_date - timedelta(days=max(days, 1) - 1), end_date
@@ -1,18 +1,28 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import date, datetime, time
-from typing import Dict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
 
-from django.db import OperationalError
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import OperationalError, ProgrammingError
 from django.db.models import Count, Q, Sum
 from django.utils import timezone
 
 from apps.accounts.models import Users
-from apps.mentoring.models import MentoringSessions
 from apps.payments.models import TutoringPayments
-from apps.pre_university_courses.models import CourseEnrollment, PreUniversityCourse
-from apps.tutoring.models import TutoringSessions
+from apps.pre_university_courses.models import PreUniversityCourse
+
+from .models import AdminReportRecord
+from .rollups import load_daily_metrics, sum_by_dimension, sum_metrics
+
+
+# Bump whenever the shape or meaning of collect_report_data() changes so that
+# stored snapshots from older versions are no longer served.
+REPORT_SCHEMA_VERSION = 1
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 @dataclass(frozen=True)
@@ -57,64 +67,75 @@ def _tutoring_payments_within(date_range: DateRange):
     )
 
 
-def collect_report_data(date_range: DateRange) -> Dict[str, object]:
-    users_qs = Users.objects.filter(
-        created_at__isnull=False,
-        created_at__gte=date_range.start,
-        created_at__lte=date_range.end,
-    )
-
-    user_breakdown = (
-        users_qs.values('user_type__type_name')
-        .annotate(count=Count('user_id'))
-        .order_by('-count')
+REPORT_METRICS = (
+    'new_users',
+    'courses_created',
+    'courses_published',
+    'mentoring_sessions_created',
+    'mentoring_sessions_completed',
+    'tutoring_sessions_created',
+    'tutoring_sessions_completed',
+    'course_enrollments',
+    'tutoring_payments',
+    'tutoring_revenue',
+)
+
+
+def _popular_courses(enrollments_by_course: Dict[str, Decimal]) -> List[Dict[str, object]]:
+    top = sorted(
+        ((course_id, int(total)) for course_id, total in enrollments_by_course.items() if total),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:5]
+    titles = dict(
+        PreUniversityCourse.objects.filter(id__in=[course_id for course_id, _ in top]).values_list('id', 'title')
     )
+    return [
+        {'course__title': titles.get(int(course_id)), 'enrollments': total}
+        for course_id, total in top
+    ]
 
-    active_users_total = Users.objects.filter(is_active=1).count()
-    inactive_users_total = Users.objects.filter(Q(is_active=0) | Q(is_active__isnull=True)).count()
 
-    courses_created = PreUniversityCourse.objects.filter(
-        created_at__gte=date_range.start,
-        created_at__lte=date_range.end,
-    )
+def collect_report_data(date_range: DateRange) -> Dict[str, object]:
+    start_date = timezone.localdate(date_range.start)
+    end_date = timezone.localdate(date_range.end)
+    daily_values = load_daily_metrics(start_date, end_date, REPORT_METRICS)
+    totals = sum_metrics(daily_values)
 
-    mentoring_sessions = MentoringSessions.objects.filter(
-        created_at__gte=date_range.start,
-        created_at__lte=date_range.end,
+    user_breakdown = sorted(
+        (
+            {'user_type__type_name': type_name or None, 'count': int(count)}
+            for type_name, count in sum_by_dimension(daily_values, 'new_users').items()
+            if count
+        ),
+        key=lambda item: item['count'],
+        reverse=True,
     )
 
-    tutoring_sessions = TutoringSessions.objects.filter(
-        created_at__gte=date_range.start,
-        created_at__lte=date_range.end,
+    activity_totals = Users.objects.aggregate(
+        active=Count('pk', filter=Q(is_active=1)),
+        inactive=Count('pk', filter=Q(is_active=0) | Q(is_active__isnull=True)),
     )
 
     tutoring_payments = _tutoring_payments_within(date_range)
 
-    total_revenue = tutoring_payments.aggregate(total=Sum('amount'))['total'] or 0
-    payment_count = tutoring_payments.count()
+    total_revenue = totals['tutoring_revenue']
+    payment_count = int(totals['tutoring_payments'])
 
     try:
         top_tutors_raw = list(
             tutoring_payments.values(
-                'session__tutor__tutor_id',
-                'session__tutor__user__username',
+                'booking__tutor__tutor_id',
+                'booking__tutor__user__username',
             )
-            .annotate(total_earnings=Sum('amount'), sessions=Count('session', distinct=True))
+            .annotate(total_earnings=Sum('amount'), sessions=Count('booking', distinct=True))
             .order_by('-total_earnings')[:5]
         )
     except OperationalError:
         top_tutors_raw = []
 
     try:
-        popular_courses = list(
-            CourseEnrollment.objects.filter(
-                enrolled_at__gte=date_range.start,
-                enrolled_at__lte=date_range.end,
-            )
-            .values('course__title')
-            .annotate(enrollments=Count('id'))
-            .order_by('-enrollments')[:5]
-        )
+        popular_courses = _popular_courses(sum_by_dimension(daily_values, 'course_enrollments'))
     except OperationalError:
         popular_courses = []
 
@@ -123,21 +144,22 @@ def collect_report_data(date_range: DateRange) -> Dict[str, object]:
             'start': date_range.start.isoformat(),
             'end': date_range.end.isoformat(),
             'generated_at': timezone.now().isoformat(),
+            'schema_version': REPORT_SCHEMA_VERSION,
         },
         'user_management': {
-            'total_new_users': users_qs.count(),
-            'active_users_total': active_users_total,
-            'inactive_users_total': inactive_users_total,
-            'breakdown': list(user_breakdown),
+            'total_new_users': int(totals['new_users']),
+            'active_users_total': activity_totals['active'],
+            'inactive_users_total': activity_totals['inactive'],
+            'breakdown': user_breakdown,
         },
         'content': {
-            'courses_created': courses_created.count(),
-            'courses_published': courses_created.filter(status='published').count(),
-            'mentoring_sessions_created': mentoring_sessions.count(),
-            'mentoring_sessions_completed': mentoring_sessions.filter(status='completed').count(),
-            'tutoring_sessions_created': tutoring_sessions.count(),
-            'tutoring_sessions_completed': tutoring_sessions.filter(status='completed').count(),
-            'popular_courses': list(popular_courses),
+            'courses_created': int(totals['courses_created']),
+            'courses_published': int(totals['courses_published']),
+            'mentoring_sessions_created': int(totals['mentoring_sessions_created']),
+            'mentoring_sessions_completed': int(totals['mentoring_sessions_completed']),
+            'tutoring_sessions_created': int(totals['tutoring_sessions_created']),
+            'tutoring_sessions_completed': int(totals['tutoring_sessions_completed']),
+            'popular_courses': popular_courses,
         },
         'tutoring_earnings': {
             'total_revenue': float(total_revenue),
@@ -145,8 +167,8 @@ def collect_report_data(date_range: DateRange) -> Dict[str, object]:
             'average_payment': float(total_revenue / payment_count) if payment_count else 0.0,
             'top_tutors': [
                 {
-                    'tutor_id': item['session__tutor__tutor_id'],
-                    'tutor_username': item['session__tutor__user__username'],
+                    'tutor_id': item['booking__tutor__tutor_id'],
+                    'tutor_username': item['booking__tutor__user__username'],
                     'total_earnings': float(item['total_earnings'] or 0),
                     'sessions': item['sessions'],
                 }
@@ -154,3 +176,59 @@ def collect_report_data(date_range: DateRange) -> Dict[str, object]:
             ],
         },
     }
+
+
+def is_closed_range(start_date: date, end_date: date) -> bool:
+    """A range that ended before today can no longer change."""
+    return end_date < timezone.localdate()
+
+
+def _snapshot_cache_key(start_date: date, end_date: date) -> str:
+    return f'admin-report-snapshot:v{REPORT_SCHEMA_VERSION}:{start_date.isoformat()}:{end_date.isoformat()}'
+
+
+def find_report_snapshot(start_date: date, end_date: date, require_file: bool = False) -> Optional[AdminReportRecord]:
+    """Latest stored report for a closed range that was generated after the range ended.
+
+    Records generated while the range was still open, or with an older
+    schema version, are ignored.
+    """
+    if not is_closed_range(start_date, end_date):
+        return None
+
+    closed_at = datetime.combine(end_date + timedelta(days=1), time.min)
+    records = AdminReportRecord.objects.filter(
+        start_date=start_date,
+        end_date=end_date,
+        created_at__gte=_ensure_aware(closed_at),
+        data_snapshot__metadata__schema_version=REPORT_SCHEMA_VERSION,
+    ).select_related('requested_by').order_by('-created_at')
+    try:
+        for record in records[:5]:
+            if not require_file or (record.file_path and default_storage.exists(record.file_path)):
+                return record
+    except ProgrammingError:
+        return None
+    return None
+
+
+def get_report_data(start_date: date, end_date: date) -> Dict[str, object]:
+    """Report data for a date range, reusing snapshots for closed ranges.
+
+    Closed ranges are served from the cache, then from the newest matching
+    AdminReportRecord snapshot, and are only computed once. Ranges that
+    include today are always recomputed.
+    """
+    date_range = build_date_range(start_date, end_date)
+    if not is_closed_range(start_date, end_date):
+        return collect_report_data(date_range)
+
+    cache_key = _snapshot_cache_key(start_date, end_date)
+    report_data = cache.get(cache_key)
+    if report_data is not None:
+        return report_data
+
+    record = find_report_snapshot(start_date, end_date)
+    report_data = record.data_snapshot if record else collect_report_data(date_range)
+    cache.set(cache_key, report_data, SNAPSHOT_CACHE_TIMEOUT)
+    return report_data
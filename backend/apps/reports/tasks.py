@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+import os
+from datetime import date
+
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import AdminReportJob, AdminReportRecord
+from .pdf import generate_admin_report_pdf
+from .services import get_report_data
+
+
+logger = logging.getLogger(__name__)
+
+
+def report_title(start_date: date, end_date: date) -> str:
+    return f"Platform Performance Report ({start_date} - {end_date})"
+
+
+def save_report_pdf(start_date: date, end_date: date, pdf_bytes: bytes) -> str:
+    timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    filename = f"admin-report-{start_date}-{end_date}-{timestamp}.pdf"
+    return default_storage.save(os.path.join('reports', filename), ContentFile(pdf_bytes))
+
+
+def _update_job(job: AdminReportJob, **fields) -> None:
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=[*fields, 'updated_at'])
+
+
+def run_admin_report_job(job_id) -> AdminReportJob:
+    """Collect, render and store the report for a queued job, recording progress on the job row."""
+    job = AdminReportJob.objects.select_related('requested_by').get(job_id=job_id)
+    if job.is_finished:
+        return job
+
+    try:
+        _update_job(job, status=AdminReportJob.STATUS_RUNNING, progress=10, stage='Collecting platform metrics')
+        report_data = get_report_data(job.start_date, job.end_date)
+
+        _update_job(job, progress=50, stage='Rendering PDF')
+        pdf_bytes = generate_admin_report_pdf(report_data)
+
+        _update_job(job, progress=85, stage='Saving report')
+        saved_path = save_report_pdf(job.start_date, job.end_date, pdf_bytes)
+        record = AdminReportRecord.objects.create(
+            title=report_title(job.start_date, job.end_date),
+            start_date=job.start_date,
+            end_date=job.end_date,
+            requested_by=job.requested_by,
+            file_path=saved_path,
+            file_size=len(pdf_bytes),
+            data_snapshot=report_data,
+        )
+    except Exception as exc:
+        logger.exception('Admin report job %s failed', job.job_id)
+        _update_job(
+            job,
+            status=AdminReportJob.STATUS_FAILED,
+            stage='Failed',
+            error_message=str(exc),
+            finished_at=timezone.now(),
+        )
+        return job
+
+    _update_job(
+        job,
+        status=AdminReportJob.STATUS_COMPLETED,
+        progress=100,
+        stage='Completed',
+        report=record,
+        finished_at=timezone.now(),
+    )
+    return job
+
+
+@shared_task(name='reports.generate_admin_report')
+def generate_admin_report_task(job_id: str) -> str:
+    return run_admin_report_job(job_id).status
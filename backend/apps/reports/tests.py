@@ -0,0 +1,264 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import UserDailyLogin, UserTypes, Users
+
+from apps.university_students.pdf import generate_feedback_report_pdf
+
+from .management.commands.benchmark_pdf_rendering import sample_report_data
+from .models import AdminReportJob, AdminReportRecord, DailyPlatformMetrics
+from .pdf import generate_admin_report_pdf
+from .rendering import shutdown_render_pool
+from .rollups import ROLLUP_MARKER, compute_daily_metrics, load_daily_metrics, rollup_daily_metrics
+from .services import REPORT_SCHEMA_VERSION, build_date_range, collect_report_data, get_report_data
+from .tasks import generate_admin_report_task
+
+
+class DailyMetricsRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        student_type = UserTypes.objects.create(type_name='student')
+        tutor_type = UserTypes.objects.create(type_name='tutor')
+        now = timezone.now()
+        for index in range(6):
+            user = Users.objects.create(
+                user_type=student_type if index % 2 else tutor_type,
+                username=f'user{index}',
+                email=f'user{index}@example.com',
+                password_hash='x',
+                is_active=1,
+                created_at=now - timedelta(days=index * 3),
+            )
+            UserDailyLogin.objects.create(
+                user=user,
+                login_date=timezone.localdate() - timedelta(days=index),
+                login_count=index + 1,
+            )
+        cls.today = timezone.localdate()
+        cls.start = cls.today - timedelta(days=20)
+        cls.yesterday = cls.today - timedelta(days=1)
+
+    def test_rollup_is_idempotent(self):
+        rollup_daily_metrics(self.start, self.yesterday)
+        first = sorted(DailyPlatformMetrics.objects.values_list('metric_date', 'metric', 'dimension', 'value'))
+        rollup_daily_metrics(self.start, self.yesterday)
+        second = sorted(DailyPlatformMetrics.objects.values_list('metric_date', 'metric', 'dimension', 'value'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            DailyPlatformMetrics.objects.filter(metric=ROLLUP_MARKER).count(),
+            (self.yesterday - self.start).days + 1,
+        )
+
+    def test_rolled_up_reads_match_live_aggregation(self):
+        metrics = ('new_users', 'logins')
+        live = compute_daily_metrics(self.start, self.today, metrics)
+        rollup_daily_metrics(self.start, self.yesterday)
+
+        self.assertEqual(load_daily_metrics(self.start, self.today, metrics), live)
+
+    def test_reads_fill_missing_days_without_writing(self):
+        rollup_daily_metrics(self.start, self.start + timedelta(days=5))
+        stored = DailyPlatformMetrics.objects.count()
+
+        values = load_daily_metrics(self.start, self.today, ('logins',))
+
+        self.assertEqual(DailyPlatformMetrics.objects.count(), stored)
+        self.assertEqual(sum(values.values()), Decimal(sum(range(1, 7))))
+
+    def test_report_totals_survive_rollup(self):
+        date_range = build_date_range(self.start, self.today)
+        before = collect_report_data(date_range)
+        call_command('rollup_metrics', start=self.start.isoformat(), stdout=StringIO())
+        after = collect_report_data(date_range)
+
+        self.assertEqual(before['user_management'], after['user_management'])
+        self.assertEqual(after['user_management']['total_new_users'], 6)
+        self.assertEqual(before['tutoring_earnings'], after['tutoring_earnings'])
+
+
+class AdminReportJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root, CELERY_TASK_ALWAYS_EAGER=True)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def _request_export(self, payload):
+        return self.client.post('/api/admin-reports/export/', json.dumps(payload), content_type='application/json')
+
+    def test_export_queues_job_and_status_reports_completion(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._request_export({
+                'start_date': (today - timedelta(days=7)).isoformat(),
+                'end_date': today.isoformat(),
+            })
+            self.assertEqual(response.status_code, 202)
+            job = response.json()['job']
+            self.assertEqual(job['status'], AdminReportJob.STATUS_QUEUED)
+            self.assertIsNone(job['report'])
+
+        status_response = self.client.get(f"/api/admin-reports/jobs/{job['job_id']}/")
+        self.assertEqual(status_response.status_code, 200)
+        finished = status_response.json()['job']
+        self.assertEqual(finished['status'], AdminReportJob.STATUS_COMPLETED)
+        self.assertEqual(finished['progress'], 100)
+        self.assertEqual(finished['report']['report_id'], AdminReportRecord.objects.get().report_id)
+        self.assertGreater(finished['report']['file_size'], 0)
+
+    def test_failed_render_marks_job_failed(self):
+        job = AdminReportJob.objects.create(start_date=timezone.localdate(), end_date=timezone.localdate())
+
+        with mock.patch('apps.reports.tasks.generate_admin_report_pdf', side_effect=RuntimeError('render failed')):
+            with self.assertLogs('apps.reports.tasks', level='ERROR'):
+                generate_admin_report_task.delay(str(job.job_id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AdminReportJob.STATUS_FAILED)
+        self.assertEqual(job.error_message, 'render failed')
+        self.assertFalse(AdminReportRecord.objects.exists())
+
+    def test_unknown_job_returns_404(self):
+        response = self.client.get('/api/admin-reports/jobs/00000000-0000-0000-0000-000000000000/')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class ReportSnapshotReuseTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.closed_start = self.today - timedelta(days=14)
+        self.closed_end = self.today - timedelta(days=7)
+
+    def _export(self, start_date, end_date):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/admin-reports/export/',
+                json.dumps({'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()}),
+                content_type='application/json',
+            )
+        return response
+
+    def test_closed_range_is_computed_once(self):
+        first = get_report_data(self.closed_start, self.closed_end)
+        with self.assertNumQueries(0):
+            second = get_report_data(self.closed_start, self.closed_end)
+        self.assertEqual(first, second)
+        self.assertEqual(first['metadata']['schema_version'], REPORT_SCHEMA_VERSION)
+
+    def test_closed_range_served_from_stored_snapshot(self):
+        snapshot = collect_report_data(build_date_range(self.closed_start, self.closed_end))
+        snapshot['user_management']['total_new_users'] = 42
+        AdminReportRecord.objects.create(
+            title='Stored', start_date=self.closed_start, end_date=self.closed_end,
+            file_path='reports/stored.pdf', data_snapshot=snapshot,
+        )
+
+        data = get_report_data(self.closed_start, self.closed_end)
+
+        self.assertEqual(data['user_management']['total_new_users'], 42)
+
+    def test_snapshot_from_older_schema_is_ignored(self):
+        snapshot = collect_report_data(build_date_range(self.closed_start, self.closed_end))
+        snapshot['metadata']['schema_version'] = REPORT_SCHEMA_VERSION - 1
+        snapshot['user_management']['total_new_users'] = 42
+        AdminReportRecord.objects.create(
+            title='Old', start_date=self.closed_start, end_date=self.closed_end,
+            file_path='reports/old.pdf', data_snapshot=snapshot,
+        )
+
+        data = get_report_data(self.closed_start, self.closed_end)
+
+        self.assertEqual(data['user_management']['total_new_users'], 0)
+
+    def test_range_touching_today_is_recomputed(self):
+        get_report_data(self.closed_start, self.today)
+        with CaptureQueriesContext(connection) as queries:
+            get_report_data(self.closed_start, self.today)
+        self.assertGreater(len(queries.captured_queries), 0)
+
+    def test_export_reuses_rendered_pdf_for_closed_range(self):
+        self._export(self.closed_start, self.closed_end)
+        second_response = self._export(self.closed_start, self.closed_end)
+        second = second_response.json()
+
+        self.assertEqual(second_response.status_code, 200)
+        self.assertIsNone(second['job'])
+        self.assertTrue(second['report']['reused'])
+        self.assertEqual(second['report']['report_id'], AdminReportRecord.objects.get().report_id)
+        self.assertEqual(AdminReportRecord.objects.count(), 1)
+        self.assertEqual(AdminReportJob.objects.count(), 1)
+
+    def test_export_renders_again_for_open_range(self):
+        self._export(self.closed_start, self.today)
+        self._export(self.closed_start, self.today)
+
+        self.assertEqual(AdminReportRecord.objects.count(), 2)
+
+
+class PdfRenderingServiceTests(TestCase):
+    def tearDown(self):
+        shutdown_render_pool()
+
+    def test_pool_renders_admin_report(self):
+        with override_settings(PDF_RENDER_WORKERS=1):
+            pdf_bytes = generate_admin_report_pdf(sample_report_data(rows=3))
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+
+    def test_zero_workers_renders_inline(self):
+        with override_settings(PDF_RENDER_WORKERS=0), mock.patch('apps.reports.rendering.get_render_pool') as pool:
+            pdf_bytes = generate_admin_report_pdf(sample_report_data(rows=3))
+        pool.assert_not_called()
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+
+    def test_feedback_report_uses_shared_service(self):
+        payload = {
+            'generated_at': '2025-01-01 10:00:00',
+            'university_student_id': 7,
+            'service_type': 'all',
+            'stats': {
+                'total_feedback': 1, 'average_rating': 5.0, 'positive': 1, 'neutral': 0, 'negative': 0,
+                'mentoring_count': 1, 'tutoring_count': 0,
+            },
+            'feedback': [{
+                'date': '2025-01-01', 'student': 'Student', 'service_type': 'mentoring',
+                'rating': 5, 'sentiment': 'positive', 'comment': 'Helpful session',
+            }],
+        }
+        with override_settings(PDF_RENDER_WORKERS=1):
+            pdf_bytes = generate_feedback_report_pdf(payload)
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
@@ -7,6 +7,7 @@ app_name = 'admin_reports'
 urlpatterns = [
     path('overview/', views.admin_report_overview, name='overview'),
     path('export/', views.generate_admin_report, name='export'),
+    path('jobs/<uuid:job_id>/', views.admin_report_job_status, name='job_status'),
     path('history/', views.list_admin_reports, name='history'),
     path('history/<int:report_id>/download/', views.download_admin_report, name='download'),
 ]
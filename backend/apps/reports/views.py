@@ -1,26 +1,30 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
 from datetime import datetime
 from typing import Optional
 
 from django.conf import settings
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.http import FileResponse, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.db import ProgrammingError
+from django.db import ProgrammingError, transaction
 
 from apps.accounts.models import Users
 
-from .models import AdminReportRecord
+from .models import AdminReportJob, AdminReportRecord
 from .pdf import generate_admin_report_pdf
-from .services import InvalidDateRange, build_date_range, collect_report_data
+from .services import InvalidDateRange, build_date_range, find_report_snapshot, get_report_data
+from .tasks import generate_admin_report_task, report_title, save_report_pdf
 
 
+logger = logging.getLogger(__name__)
+
 DATE_FORMAT = '%Y-%m-%d'
 DEFAULT_HISTORY_LIMIT = 10
 
@@ -73,47 +77,57 @@ def admin_report_overview(request: HttpRequest) -> HttpResponse:
 
     try:
         start_date, end_date = _parse_dates(start_raw, end_raw)
-        date_range = build_date_range(start_date, end_date)
+        build_date_range(start_date, end_date)
     except InvalidDateRange as exc:
         return JsonResponse({'success': False, 'message': str(exc)}, status=400)
 
-    report_data = collect_report_data(date_range)
+    report_data = get_report_data(start_date, end_date)
     return JsonResponse({'success': True, 'data': report_data})
 
 
-@csrf_exempt
-def generate_admin_report(request: HttpRequest) -> HttpResponse:
-    if request.method != 'POST':
-        return JsonResponse({'success': False, 'message': 'Only POST method allowed'}, status=405)
-
-    try:
-        payload = json.loads(request.body.decode('utf-8')) if request.body else {}
-    except json.JSONDecodeError:
-        return JsonResponse({'success': False, 'message': 'Invalid JSON payload'}, status=400)
+def _serialize_job(job: AdminReportJob, request: HttpRequest) -> dict:
+    payload = {
+        'job_id': str(job.job_id),
+        'status': job.status,
+        'progress': job.progress,
+        'stage': job.stage,
+        'start_date': job.start_date.isoformat(),
+        'end_date': job.end_date.isoformat(),
+        'error': job.error_message,
+        'status_url': request.build_absolute_uri(reverse('admin_reports:job_status', args=[job.job_id])),
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'report': None,
+    }
+    if job.report:
+        serialized = _serialize_report(job.report, request)
+        serialized['persisted'] = True
+        payload['report'] = serialized
+    return payload
 
-    start_raw = payload.get('start_date')
-    end_raw = payload.get('end_date')
-    if not start_raw or not end_raw:
-        return JsonResponse({'success': False, 'message': 'start_date and end_date are required'}, status=400)
-
-    requested_by = _resolve_user(payload.get('requested_by'))
 
+def _enqueue_report_job(job_id: str) -> None:
     try:
-        start_date, end_date = _parse_dates(start_raw, end_raw)
-        date_range = build_date_range(start_date, end_date)
-    except InvalidDateRange as exc:
-        return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+        generate_admin_report_task.delay(job_id)
+    except Exception as exc:
+        logger.exception('Could not queue admin report job %s', job_id)
+        AdminReportJob.objects.filter(job_id=job_id).update(
+            status=AdminReportJob.STATUS_FAILED,
+            stage='Failed',
+            error_message=f'Could not queue report job: {exc}',
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
 
-    report_data = collect_report_data(date_range)
-    pdf_bytes = generate_admin_report_pdf(report_data)
 
-    timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-    filename = f"admin-report-{start_date}-{end_date}-{timestamp}.pdf"
-    storage_path = os.path.join('reports', filename)
-    saved_path = default_storage.save(storage_path, ContentFile(pdf_bytes))
+def _generate_report_inline(request: HttpRequest, start_date, end_date, requested_by) -> HttpResponse:
+    """Render in the request thread; used when the job table has not been migrated yet."""
+    report_data = get_report_data(start_date, end_date)
+    pdf_bytes = generate_admin_report_pdf(report_data)
+    saved_path = save_report_pdf(start_date, end_date, pdf_bytes)
 
     download_url = request.build_absolute_uri(f"{settings.MEDIA_URL}{saved_path}".replace('\\', '/'))
-    title = f"Platform Performance Report ({start_date} - {end_date})"
+    title = report_title(start_date, end_date)
 
     try:
         record = AdminReportRecord.objects.create(
@@ -148,6 +162,72 @@ def generate_admin_report(request: HttpRequest) -> HttpResponse:
     return JsonResponse(response_data, status=201)
 
 
+@csrf_exempt
+def generate_admin_report(request: HttpRequest) -> HttpResponse:
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Only POST method allowed'}, status=405)
+
+    try:
+        payload = json.loads(request.body.decode('utf-8')) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON payload'}, status=400)
+
+    start_raw = payload.get('start_date')
+    end_raw = payload.get('end_date')
+    if not start_raw or not end_raw:
+        return JsonResponse({'success': False, 'message': 'start_date and end_date are required'}, status=400)
+
+    requested_by = _resolve_user(payload.get('requested_by'))
+
+    try:
+        start_date, end_date = _parse_dates(start_raw, end_raw)
+        build_date_range(start_date, end_date)
+    except InvalidDateRange as exc:
+        return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    existing_record = find_report_snapshot(start_date, end_date, require_file=True)
+    if existing_record:
+        serialized = _serialize_report(existing_record, request)
+        serialized.update(persisted=True, reused=True)
+        return JsonResponse({'success': True, 'job': None, 'report': serialized})
+
+    try:
+        job = AdminReportJob.objects.create(
+            start_date=start_date,
+            end_date=end_date,
+            requested_by=requested_by,
+        )
+    except ProgrammingError:
+        return _generate_report_inline(request, start_date, end_date, requested_by)
+
+    job_id = str(job.job_id)
+    transaction.on_commit(lambda: _enqueue_report_job(job_id))
+
+    # In eager mode the job has already run by the time we get here.
+    job = AdminReportJob.objects.select_related('report__requested_by').get(job_id=job.job_id)
+    serialized_job = _serialize_job(job, request)
+    response_data = {'success': True, 'job': serialized_job, 'report': serialized_job['report']}
+    if job.status == AdminReportJob.STATUS_FAILED:
+        response_data.update(success=False, message=job.error_message or 'Failed to generate report')
+        return JsonResponse(response_data, status=500)
+    return JsonResponse(response_data, status=201 if job.status == AdminReportJob.STATUS_COMPLETED else 202)
+
+
+@csrf_exempt
+def admin_report_job_status(request: HttpRequest, job_id) -> HttpResponse:
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Only GET method allowed'}, status=405)
+
+    try:
+        job = AdminReportJob.objects.select_related('report__requested_by').get(job_id=job_id)
+    except AdminReportJob.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Report job not found'}, status=404)
+    except ProgrammingError:
+        return JsonResponse({'success': False, 'message': 'Report jobs are not available yet.'}, status=503)
+
+    return JsonResponse({'success': True, 'job': _serialize_job(job, request)})
+
+
 @csrf_exempt
 def list_admin_reports(request: HttpRequest) -> HttpResponse:
     if request.method != 'GET':
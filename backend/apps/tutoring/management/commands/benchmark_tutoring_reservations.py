@@ -0,0 +1,138 @@
+import threading
+import time as timer
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from apps.accounts.models import Users, UserTypes
+from apps.students.models import Students
+from apps.tutoring.models import TutorAvailability, TutoringBooking, Tutors
+from apps.tutoring.reservations import DuplicateBooking, SlotFull, holds_place, reserve_booking
+
+
+def legacy_reserve(student, tutor, slot_id, fields):
+    """The check-then-insert create_tutoring_booking used before reservations took a slot lock."""
+    slot = TutorAvailability.objects.get(availability_id=slot_id, tutor=tutor, is_active=True)
+    active_bookings = TutoringBooking.objects.filter(availability_slot=slot, status__in=['confirmed', 'active', 'pending']).count()
+    if active_bookings >= slot.max_students:
+        raise SlotFull('This time slot is fully booked')
+    if TutoringBooking.objects.filter(student=student, availability_slot=slot, status__in=['pending', 'confirmed', 'active']).exists():
+        raise DuplicateBooking('You already have a booking in this time slot')
+    with transaction.atomic():
+        return TutoringBooking.objects.create(student=student, tutor=tutor, availability_slot=slot, status='pending', **fields)
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent booking requests at one tutor slot and report throughput and overbooking. '
+        'Rows are committed so every thread sees them, and removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requesters', type=int, default=200,
+                            help='Concurrent students, each on its own database connection (default 200)')
+        parser.add_argument('--capacity', type=int, default=10, help="The slot's max_students (default 10)")
+        parser.add_argument('--retries', type=int, default=1,
+                            help='Extra attempts per student with the same idempotency key (default 1)')
+        parser.add_argument('--legacy', action='store_true', help='Also run the previous unlocked check-then-insert')
+
+    def _seed(self, requesters, capacity):
+        suffix = uuid.uuid4().hex[:12]
+        user_type, _ = UserTypes.objects.get_or_create(type_name='student')
+        Users.objects.bulk_create([
+            Users(user_type=user_type, username=f'reserve-{suffix}-{index}', email=f'reserve-{suffix}-{index}@example.com',
+                  password_hash='!', is_active=1, created_at=timezone.now())
+            for index in range(requesters + 1)
+        ])
+        users = list(Users.objects.filter(username__startswith=f'reserve-{suffix}-').order_by('user_id'))
+        tutor = Tutors.objects.create(user=users[0], created_at=timezone.now())
+        Students.objects.bulk_create([Students(user=user, current_stage='al') for user in users[1:]])
+        students = list(Students.objects.filter(user__in=users[1:]).order_by('student_id'))
+        slot = TutorAvailability.objects.create(
+            tutor=tutor, day_of_week=1, start_time=time(16), end_time=time(17), max_students=capacity,
+        )
+        return users, tutor, students, slot
+
+    def _cleanup(self, users, tutor, students, slot):
+        TutoringBooking.objects.filter(availability_slot=slot).delete()
+        slot.delete()
+        Students.objects.filter(pk__in=[student.pk for student in students]).delete()
+        tutor.delete()
+        Users.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def _run(self, reserve, tutor, students, slot, attempts):
+        outcomes = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(students))
+        fields = {'start_date': timezone.localdate(), 'payment_type': 'single', 'sessions_paid': 1}
+
+        def requester(student):
+            barrier.wait()
+            try:
+                for attempt in range(attempts):
+                    try:
+                        outcome = reserve(student, tutor, slot.availability_id, fields, f'bench-{student.student_id}')
+                    except SlotFull:
+                        outcome = 'full'
+                    except DuplicateBooking:
+                        outcome = 'duplicate'
+                    except Exception:
+                        outcome = 'error'
+                    with lock:
+                        outcomes[outcome] += 1
+            finally:
+                close_old_connections()
+                connection.close()
+
+        started = timer.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(students)) as pool:
+            list(pool.map(requester, students))
+        elapsed = timer.perf_counter() - started
+        held = TutoringBooking.objects.filter(holds_place(), availability_slot=slot).count()
+        return outcomes, held, elapsed
+
+    def _report(self, label, outcomes, held, capacity, elapsed):
+        total = sum(outcomes.values())
+        overbooked = max(held - capacity, 0)
+        self.stdout.write(
+            f'{label:>8}: {total} requests in {elapsed:.2f}s ({total / elapsed:.0f}/s); '
+            f'{outcomes["reserved"]} reserved, {outcomes["replayed"]} replayed, {outcomes["full"]} full, '
+            f'{outcomes["duplicate"]} duplicate, {outcomes["error"]} errors; '
+            f'{held}/{capacity} places held, {overbooked} overbooked'
+        )
+        return overbooked
+
+    def handle(self, *args, **options):
+        requesters = max(options['requesters'], 1)
+        capacity = max(options['capacity'], 1)
+        attempts = 1 + max(options['retries'], 0)
+
+        def locked(student, tutor, slot_id, fields, key):
+            reservation = reserve_booking(student, tutor, slot_id, fields, idempotency_key=key)
+            return 'reserved' if reservation.created else 'replayed'
+
+        def unlocked(student, tutor, slot_id, fields, key):
+            legacy_reserve(student, tutor, slot_id, fields)
+            return 'reserved'
+
+        runs = [('locked', locked)] + ([('legacy', unlocked)] if options['legacy'] else [])
+        overbooked = 0
+        for label, reserve in runs:
+            users, tutor, students, slot = self._seed(requesters, capacity)
+            try:
+                outcomes, held, elapsed = self._run(reserve, tutor, students, slot, attempts)
+                result = self._report(label, outcomes, held, capacity, elapsed)
+                if label == 'locked':
+                    overbooked = result
+            finally:
+                self._cleanup(users, tutor, students, slot)
+
+        if overbooked:
+            self.stdout.write(self.style.ERROR(f'Slot overbooked by {overbooked}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Reservation benchmark complete: no overbooking'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tutoring.occurrences import OCCURRENCE_HORIZON_WEEKS, extend_occurrences, horizon_date
+
+
+class Command(BaseCommand):
+    help = (
+        'Materialize tutoring booking sessions up to --weeks ahead. '
+        'Run daily to keep the rolling horizon ahead of today; the first run also '
+        'backfills bookings made before sessions were materialized.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weeks',
+            type=int,
+            default=OCCURRENCE_HORIZON_WEEKS,
+            help=f'How far ahead to materialize sessions (default {OCCURRENCE_HORIZON_WEEKS})',
+        )
+
+    def handle(self, *args, **options):
+        if options['weeks'] < 0:
+            raise CommandError('--weeks must not be negative')
+
+        until = horizon_date(weeks=options['weeks'])
+        report = extend_occurrences(until)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Materialized {report.created} sessions for {report.bookings} bookings up to {until}'
+            )
+        )
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0008_merge_20251021_0816'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tutoringsessions',
+            index=models.Index(fields=['created_at', 'session_id'], name='tutoring_se_created_7a7752_idx'),
+        ),
+    ]
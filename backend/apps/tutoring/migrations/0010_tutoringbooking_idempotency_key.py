@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_results', '0002_initial'),
+        ('students', '0001_initial'),
+        ('tutoring', '0009_tutoringsessions_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutoringbooking',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Client-supplied key; a retried request with the same key returns this booking', max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='tutoringbooking',
+            constraint=models.UniqueConstraint(fields=('student', 'idempotency_key'), name='unique_booking_idempotency_key'),
+        ),
+    ]
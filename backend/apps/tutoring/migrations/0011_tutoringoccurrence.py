@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+        ('tutoring', '0010_tutoringbooking_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutoringOccurrence',
+            fields=[
+                ('occurrence_id', models.AutoField(primary_key=True, serialize=False)),
+                ('sequence', models.IntegerField(help_text='Session number within the booking, starting at 1')),
+                ('original_date', models.DateField(help_text='Date the weekly pattern puts this session on')),
+                ('session_date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='scheduled', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='tutoring.tutoringbooking')),
+                ('reschedule', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='tutoring.tutoringsessionreschedule')),
+                ('student', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tutoring_occurrences', to='students.students')),
+                ('tutor', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tutoring_occurrences', to='tutoring.tutors')),
+            ],
+            options={
+                'db_table': 'tutoring_occurrences',
+                'ordering': ['starts_at'],
+                'managed': True,
+                'indexes': [models.Index(fields=['tutor', 'starts_at'], name='occurrence_tutor_starts_idx'), models.Index(fields=['student', 'starts_at'], name='occurrence_student_starts_idx'), models.Index(fields=['booking', 'status', 'sequence'], name='occurrence_booking_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('booking', 'original_date'), name='unique_occurrence_original_date')],
+            },
+        ),
+    ]
@@ -63,6 +63,10 @@ class TutoringBooking(models.Model):
     )
     sessions_paid = models.IntegerField(default=1, help_text="Number of sessions paid for")
     sessions_completed = models.IntegerField(default=0)
+    idempotency_key = models.CharField(
+        max_length=64, blank=True, null=True,
+        help_text="Client-supplied key; a retried request with the same key returns this booking"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -70,6 +74,9 @@ class TutoringBooking(models.Model):
         managed = True
         db_table = 'tutoring_bookings'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'idempotency_key'], name='unique_booking_idempotency_key'),
+        ]
 
     def __str__(self):
         return f"Booking {self.booking_id}: {self.student.user.username} with {self.tutor.user.username}"
@@ -114,6 +121,56 @@ class TutoringSessionReschedule(models.Model):
         return f"Reschedule {self.reschedule_id}: Booking {self.booking_id} from {self.original_date} to {self.new_date}"
 
 
+class TutoringOccurrence(models.Model):
+    """One dated session of a booking, with any approved reschedule already applied"""
+    occurrence_id = models.AutoField(primary_key=True)
+    booking = models.ForeignKey('tutoring.TutoringBooking', models.CASCADE, related_name='occurrences', db_constraint=False)
+    tutor = models.ForeignKey('tutoring.Tutors', models.DO_NOTHING, related_name='tutoring_occurrences', db_constraint=False)
+    student = models.ForeignKey('students.Students', models.DO_NOTHING, related_name='tutoring_occurrences', db_constraint=False)
+    sequence = models.IntegerField(help_text="Session number within the booking, starting at 1")
+    original_date = models.DateField(help_text="Date the weekly pattern puts this session on")
+    session_date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('scheduled', 'Scheduled'),
+            ('completed', 'Completed'),
+            ('cancelled', 'Cancelled')
+        ],
+        default='scheduled'
+    )
+    reschedule = models.ForeignKey(
+        'tutoring.TutoringSessionReschedule', models.SET_NULL, null=True, blank=True,
+        related_name='occurrences', db_constraint=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = 'tutoring_occurrences'
+        ordering = ['starts_at']
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'original_date'], name='unique_occurrence_original_date'),
+        ]
+        indexes = [
+            models.Index(fields=['tutor', 'starts_at'], name='occurrence_tutor_starts_idx'),
+            models.Index(fields=['student', 'starts_at'], name='occurrence_student_starts_idx'),
+            models.Index(fields=['booking', 'status', 'sequence'], name='occurrence_booking_status_idx'),
+        ]
+
+    @property
+    def is_rescheduled(self):
+        return self.reschedule_id is not None
+
+    def __str__(self):
+        return f"Occurrence {self.sequence} of booking {self.booking_id} on {self.session_date}"
+
+
 class TutorFeedback(models.Model):
     feedback_id = models.AutoField(primary_key=True)
     tutor = models.ForeignKey('tutoring.Tutors', models.DO_NOTHING)
@@ -160,6 +217,9 @@ class TutoringSessions(models.Model):
     class Meta:
         managed = True
         db_table = 'tutoring_sessions'
+        indexes = [
+            models.Index(fields=['created_at', 'session_id']),
+        ]
 
 class Tutors(models.Model):
     tutor_id = models.AutoField(primary_key=True)
@@ -0,0 +1,195 @@
+"""Materialized sessions of recurring tutoring bookings.
+
+A ``TutoringBooking`` only describes a weekly pattern (its slot's weekday
+and times from ``start_date``, for ``sessions_paid`` sessions, until
+``end_date`` if set). Each session is stored as a ``TutoringOccurrence``
+row with its approved reschedule already applied, so calendars, "next
+session" lookups and completion are range scans on ``(tutor, starts_at)``,
+``(student, starts_at)`` or ``(booking, status, sequence)`` instead of a
+re-expansion of every booking in Python.
+
+Rows are written when a booking is created, paid for, rescheduled,
+completed or cancelled. Only sessions up to ``OCCURRENCE_HORIZON_WEEKS``
+ahead are created up front; the ``tutoring.extend_occurrences`` beat task
+(also ``manage.py extend_tutoring_occurrences``) moves the horizon forward
+daily and backfills bookings that predate the table.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from apps.accounts.busy_calendar import first_session_date, local_interval
+
+from .models import TutoringBooking, TutoringOccurrence, TutoringSessionReschedule
+
+
+logger = logging.getLogger(__name__)
+
+OCCURRENCE_HORIZON_WEEKS = 12
+# Bookings whose remaining sessions are still materialized as time goes on
+MATERIALIZED_BOOKING_STATUSES = ('pending', 'scheduled', 'confirmed', 'active')
+UPCOMING_BOOKING_STATUSES = ('scheduled', 'active', 'confirmed')
+
+
+def horizon_date(today: Optional[date] = None, weeks: int = OCCURRENCE_HORIZON_WEEKS) -> date:
+    return (today or timezone.localdate()) + timedelta(weeks=weeks)
+
+
+def pattern_dates(booking: TutoringBooking, day_of_week: int, after: Optional[date], until: date) -> Iterator[date]:
+    """Dates the booking's weekly pattern puts a session on, later than ``after`` and up to ``until``."""
+    # The busy calendar places sessions with the same helper, so both agree on every date.
+    day = first_session_date(booking.start_date, day_of_week)
+    if after is not None and day <= after:
+        day += timedelta(weeks=(after - day).days // 7 + 1)
+    last = min(booking.end_date, until) if booking.end_date else until
+    while day <= last:
+        yield day
+        if not booking.is_recurring:
+            return
+        day += timedelta(weeks=1)
+
+
+def _place(occurrence: TutoringOccurrence, session_date: date, start_time, end_time) -> None:
+    occurrence.session_date = session_date
+    occurrence.start_time = start_time
+    occurrence.end_time = end_time
+    occurrence.starts_at, occurrence.ends_at = local_interval(session_date, start_time, end_time)
+
+
+def materialize_occurrences(booking: TutoringBooking, until: Optional[date] = None) -> int:
+    """Create the booking's missing occurrences up to ``until`` (the rolling horizon by default).
+
+    Approved reschedules of the new dates are applied as the rows are
+    created. Returns the number of rows created.
+    """
+    slot = booking.availability_slot
+    if slot is None:
+        return 0
+    until = until or horizon_date()
+    existing = booking.occurrences.aggregate(count=Count('pk'), last=Max('original_date'))
+    remaining = booking.sessions_paid - existing['count']
+    if remaining <= 0:
+        return 0
+
+    dates: List[date] = []
+    for day in pattern_dates(booking, slot.day_of_week, existing['last'], until):
+        dates.append(day)
+        if len(dates) == remaining:
+            break
+    if not dates:
+        return 0
+
+    reschedules: Dict[date, TutoringSessionReschedule] = {}
+    # Oldest first, so the latest reschedule of a date wins.
+    for reschedule in TutoringSessionReschedule.objects.filter(
+        booking=booking, status='approved', original_date__in=dates,
+    ).order_by('created_at', 'reschedule_id'):
+        reschedules[reschedule.original_date] = reschedule
+
+    if booking.status == 'cancelled':
+        upcoming_status = 'cancelled'
+    else:
+        upcoming_status = 'scheduled'
+    rows = []
+    for sequence, day in enumerate(dates, start=existing['count'] + 1):
+        occurrence = TutoringOccurrence(
+            booking=booking,
+            tutor_id=booking.tutor_id,
+            student_id=booking.student_id,
+            sequence=sequence,
+            original_date=day,
+            status='completed' if sequence <= booking.sessions_completed else upcoming_status,
+        )
+        reschedule = reschedules.get(day)
+        if reschedule is not None:
+            occurrence.reschedule = reschedule
+            _place(occurrence, reschedule.new_date, reschedule.new_start_time, reschedule.new_end_time)
+        else:
+            _place(occurrence, day, slot.start_time, slot.end_time)
+        rows.append(occurrence)
+    # A concurrent call may have written some of these already.
+    TutoringOccurrence.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def occurrence_on(booking: TutoringBooking, original_date: date) -> Optional[TutoringOccurrence]:
+    """The session the booking's pattern puts on ``original_date``, materializing up to it if needed."""
+    occurrence = booking.occurrences.filter(original_date=original_date).first()
+    if occurrence is None and materialize_occurrences(booking, until=max(original_date, horizon_date())):
+        occurrence = booking.occurrences.filter(original_date=original_date).first()
+    return occurrence
+
+
+def apply_reschedule(occurrence: TutoringOccurrence, reschedule: TutoringSessionReschedule) -> None:
+    """Move ``occurrence`` to the reschedule's date and times."""
+    occurrence.reschedule = reschedule
+    _place(occurrence, reschedule.new_date, reschedule.new_start_time, reschedule.new_end_time)
+    occurrence.save(update_fields=[
+        'reschedule', 'session_date', 'start_time', 'end_time', 'starts_at', 'ends_at', 'updated_at',
+    ])
+
+
+def complete_next_occurrence(booking: TutoringBooking) -> Optional[TutoringOccurrence]:
+    """Mark the booking's earliest scheduled session completed and return it.
+
+    Sessions not materialized yet are created first; ``None`` means the
+    booking has no scheduled session left to complete.
+    """
+    materialize_occurrences(booking)
+    occurrence = booking.occurrences.filter(status='scheduled').order_by('sequence').first()
+    if occurrence is not None:
+        occurrence.status = 'completed'
+        occurrence.save(update_fields=['status', 'updated_at'])
+    return occurrence
+
+
+def cancel_occurrences(booking: TutoringBooking) -> int:
+    return booking.occurrences.filter(status='scheduled').update(status='cancelled', updated_at=timezone.now())
+
+
+def next_occurrence(tutor_id: Optional[int] = None, student_id: Optional[int] = None,
+                    now: Optional[datetime] = None) -> Optional[TutoringOccurrence]:
+    """The earliest session still to come for a tutor or a student, from one indexed range scan."""
+    occurrences = TutoringOccurrence.objects.filter(
+        starts_at__gte=now or timezone.now(),
+        status='scheduled',
+        booking__status__in=UPCOMING_BOOKING_STATUSES,
+    )
+    if tutor_id is not None:
+        occurrences = occurrences.filter(tutor_id=tutor_id)
+    if student_id is not None:
+        occurrences = occurrences.filter(student_id=student_id)
+    return occurrences.order_by('starts_at', 'occurrence_id').first()
+
+
+@dataclass
+class ExtensionReport:
+    bookings: int = 0
+    created: int = 0
+
+
+def extend_occurrences(until: Optional[date] = None) -> ExtensionReport:
+    """Materialize every live booking's sessions up to ``until`` (the rolling horizon by default)."""
+    until = until or horizon_date()
+    report = ExtensionReport()
+    # Only bookings that still have sessions left to materialize
+    bookings = TutoringBooking.objects.filter(
+        status__in=MATERIALIZED_BOOKING_STATUSES, start_date__lte=until,
+    ).annotate(materialized=Count('occurrences')).filter(
+        materialized__lt=F('sessions_paid'),
+    ).select_related('availability_slot').order_by('booking_id')
+    for booking in bookings.iterator():
+        with transaction.atomic():
+            created = materialize_occurrences(booking, until=until)
+        if created:
+            report.bookings += 1
+            report.created += created
+    logger.info('Materialized %d tutoring occurrences for %d bookings up to %s', report.created, report.bookings, until)
+    return report
@@ -0,0 +1,225 @@
+"""Reserving places in tutor availability slots.
+
+A booking holds one of its slot's ``max_students`` places from the moment it
+is created: a pending booking (awaiting payment) for ``BOOKING_HOLD_MINUTES``,
+a confirmed or active one until it ends. The capacity and duplicate checks
+and the insert run while holding a row lock on the slot, so concurrent
+requests for the same slot take turns and cannot overbook it; requests for
+different slots never wait on each other. Confirming a payment takes the
+same lock: a booking paid for after its hold lapsed only gets a place if
+the slot still has one.
+
+A student's own lapsed pending booking in the slot is cancelled when they
+reserve it again, so the old booking cannot be paid for later and leave
+them holding two places.
+
+Clients may send an idempotency key with a booking request. A retry with a
+key that already produced a booking gets that booking back after a single
+indexed lookup, without locking the slot or reserving a second place; a
+request reusing the key for a different booking is rejected.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.payments.models import TutoringPayments
+
+from .models import TutorAvailability, TutoringBooking, TutoringOccurrence
+from .occurrences import materialize_occurrences
+
+
+logger = logging.getLogger(__name__)
+
+# How long an unpaid booking keeps its place before others may take it
+BOOKING_HOLD_MINUTES = 30
+CONFIRMED_STATUSES = ('confirmed', 'active')
+IDEMPOTENCY_KEY_MAX_LENGTH = TutoringBooking._meta.get_field('idempotency_key').max_length
+
+
+class ReservationError(Exception):
+    """A booking request that cannot be honoured; ``status`` is the HTTP status to answer with."""
+    status = 400
+
+
+class SlotUnavailable(ReservationError):
+    status = 404
+
+
+class SlotFull(ReservationError):
+    pass
+
+
+class DuplicateBooking(ReservationError):
+    pass
+
+
+class IdempotencyKeyReused(ReservationError):
+    status = 422
+
+
+class BookingNotFound(ReservationError):
+    status = 404
+
+
+class BookingNotPending(ReservationError):
+    pass
+
+
+@dataclass
+class Reservation:
+    booking: TutoringBooking
+    # False when an earlier request with the same idempotency key made the booking
+    created: bool
+
+
+def holds_place(prefix: str = '', now: Optional[datetime] = None) -> Q:
+    """Bookings that take up a place; ``prefix`` (e.g. ``'bookings__'``) filters through a relation."""
+    hold_cutoff = (now or timezone.now()) - timedelta(minutes=BOOKING_HOLD_MINUTES)
+    return Q(**{f'{prefix}status__in': CONFIRMED_STATUSES}) | Q(**{
+        f'{prefix}status': 'pending', f'{prefix}created_at__gte': hold_cutoff,
+    })
+
+
+def _replay(student_id: int, idempotency_key: Optional[str]) -> Optional[TutoringBooking]:
+    if not idempotency_key:
+        return None
+    # Joined with everything the booking serializer reads
+    return TutoringBooking.objects.select_related(
+        'student__user__userdetails', 'tutor__user__userdetails', 'availability_slot', 'subject',
+    ).filter(student_id=student_id, idempotency_key=idempotency_key).first()
+
+
+def _check_replay(booking: TutoringBooking, tutor, availability_slot_id: int,
+                  booking_fields: Dict[str, Any]) -> TutoringBooking:
+    """``booking`` if it is what this request asks for; raises ``IdempotencyKeyReused`` otherwise."""
+    requested = dict(booking_fields, tutor_id=tutor.tutor_id, availability_slot_id=availability_slot_id)
+    mismatched = sorted(
+        field for field, value in requested.items()
+        if TutoringBooking._meta.get_field(field).to_python(value) != getattr(booking, field)
+    )
+    if mismatched:
+        raise IdempotencyKeyReused(
+            f'idempotency_key was already used for a different booking ({", ".join(mismatched)} differ)'
+        )
+    return booking
+
+
+def _release_lapsed(slot: TutorAvailability, student_id: int) -> int:
+    """Cancel the student's pending bookings in ``slot`` whose hold has run out."""
+    booking_ids = list(
+        TutoringBooking.objects.filter(availability_slot=slot, student_id=student_id, status='pending').exclude(
+            holds_place(),
+        ).values_list('booking_id', flat=True)
+    )
+    if not booking_ids:
+        return 0
+    now = timezone.now()
+    TutoringBooking.objects.filter(booking_id__in=booking_ids).update(status='cancelled', updated_at=now)
+    TutoringOccurrence.objects.filter(booking__in=booking_ids, status='scheduled').update(
+        status='cancelled', updated_at=now,
+    )
+    return len(booking_ids)
+
+
+def reserve_booking(student, tutor, availability_slot_id: int, booking_fields: Dict[str, Any],
+                    idempotency_key: Optional[str] = None) -> Reservation:
+    """Create a pending booking in the slot, with its sessions, if it has a free place.
+
+    ``booking_fields`` are the remaining TutoringBooking fields. Raises a
+    ``ReservationError`` subclass when the slot is missing, full, the
+    student already holds a place in it, or ``idempotency_key`` belongs to
+    a booking with other details.
+    """
+    existing = _replay(student.student_id, idempotency_key)
+    if existing is not None:
+        return Reservation(_check_replay(existing, tutor, availability_slot_id, booking_fields), created=False)
+
+    try:
+        with transaction.atomic():
+            try:
+                # Everyone reserving this slot queues on this lock until we commit.
+                slot = TutorAvailability.objects.select_for_update().get(
+                    availability_id=availability_slot_id, tutor=tutor, is_active=True,
+                )
+            except TutorAvailability.DoesNotExist:
+                raise SlotUnavailable('Availability slot not found or inactive')
+
+            # A concurrent retry may have committed while we waited for the lock.
+            existing = _replay(student.student_id, idempotency_key)
+            if existing is not None:
+                return Reservation(_check_replay(existing, tutor, availability_slot_id, booking_fields), created=False)
+
+            _release_lapsed(slot, student.student_id)
+            held = list(
+                TutoringBooking.objects.filter(holds_place(), availability_slot=slot).values_list('student_id', flat=True)
+            )
+            if student.student_id in held:
+                raise DuplicateBooking('You already have a booking in this time slot')
+            if len(held) >= slot.max_students:
+                raise SlotFull('This time slot is fully booked')
+
+            booking = TutoringBooking.objects.create(
+                student=student,
+                tutor=tutor,
+                availability_slot=slot,
+                subject_id=slot.subject_id,
+                status='pending',
+                idempotency_key=idempotency_key or None,
+                **booking_fields,
+            )
+            materialize_occurrences(booking)
+    except IntegrityError:
+        # Same key committed concurrently by a request for another slot
+        existing = _replay(student.student_id, idempotency_key)
+        if existing is None:
+            raise
+        return Reservation(_check_replay(existing, tutor, availability_slot_id, booking_fields), created=False)
+
+    logger.info('Reserved slot %s for student %s (booking %s)', slot.availability_id, student.student_id, booking.booking_id)
+    return Reservation(booking, created=True)
+
+
+def confirm_booking(booking_id: int, payment_fields: Dict[str, Any],
+                    now: Optional[datetime] = None) -> Tuple[TutoringBooking, TutoringPayments]:
+    """Record the payment for a pending booking and confirm it.
+
+    ``payment_fields`` are the TutoringPayments fields besides the student
+    and booking. A booking whose hold has lapsed is confirmed only if its
+    slot still has a free place; otherwise ``SlotFull`` is raised and
+    nothing is recorded.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        slot_id = TutoringBooking.objects.filter(booking_id=booking_id).values_list(
+            'availability_slot_id', flat=True,
+        ).first()
+        # Same lock order as reserve_booking: the slot, then its bookings.
+        slot = TutorAvailability.objects.select_for_update().filter(availability_id=slot_id).first()
+        booking = TutoringBooking.objects.select_for_update().filter(booking_id=booking_id).first()
+        if booking is None:
+            raise BookingNotFound('Booking not found')
+        if booking.status != 'pending':
+            raise BookingNotPending(f'Booking is already {booking.status}')
+
+        hold_cutoff = now - timedelta(minutes=BOOKING_HOLD_MINUTES)
+        if slot is not None and booking.created_at < hold_cutoff:
+            held = TutoringBooking.objects.filter(holds_place(now=now), availability_slot=slot).exclude(
+                booking_id=booking.booking_id,
+            ).count()
+            if held >= slot.max_students:
+                raise SlotFull('Your reservation has expired and this time slot has since been fully booked')
+
+        payment = TutoringPayments.objects.create(student_id=booking.student_id, booking=booking, **payment_fields)
+        booking.status = 'confirmed'
+        booking.save()
+        materialize_occurrences(booking)
+
+    logger.info('Confirmed booking %s for student %s', booking.booking_id, booking.student_id)
+    return booking, payment
@@ -1,23 +1,47 @@
 # Serializer utility functions for tutoring app
 # Using plain Python dictionaries instead of DRF serializers for consistency with existing codebase
 
+from django.db.models import Count
+
 from .models import TutorAvailability, TutoringBooking, Tutors
+from .reservations import holds_place
 from apps.accounts.models import UserDetails
 
 
+def with_booking_counts(availability_queryset):
+    """Availability rows ready for serialize_tutor_availability in a single query.
+
+    Joins the tutor, their user details and the subject, and annotates
+    ``active_bookings`` (bookings holding a place) so the serializer does not
+    query per slot.
+    """
+    return availability_queryset.select_related('tutor__user__userdetails', 'subject').annotate(
+        active_bookings=Count('bookings', filter=holds_place('bookings__'))
+    )
+
+
+def display_name(user):
+    """Full name from the user's details (joined if select_related) or the username"""
+    try:
+        return user.userdetails.full_name or user.username
+    except UserDetails.DoesNotExist:
+        return user.username
+
+
 def serialize_tutor_availability(availability_obj):
-    """Convert TutorAvailability model instance to dictionary"""
+    """Convert TutorAvailability model instance to dictionary
+
+    Uses ``active_bookings`` when the instance comes from with_booking_counts.
+    """
     days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
     
     # Get tutor name
-    try:
-        user_details = UserDetails.objects.get(user=availability_obj.tutor.user)
-        tutor_name = user_details.full_name or availability_obj.tutor.user.username
-    except UserDetails.DoesNotExist:
-        tutor_name = availability_obj.tutor.user.username
+    tutor_name = display_name(availability_obj.tutor.user)
     
     # Count current bookings
-    current_bookings = availability_obj.bookings.filter(status__in=['confirmed', 'active']).count()
+    current_bookings = getattr(availability_obj, 'active_bookings', None)
+    if current_bookings is None:
+        current_bookings = availability_obj.bookings.filter(holds_place()).count()
     
     return {
         'availability_id': availability_obj.availability_id,
@@ -42,19 +66,9 @@ def serialize_tutoring_booking(booking_obj):
     """Convert TutoringBooking model instance to dictionary"""
     days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
     
-    # Get student name
-    try:
-        user_details = UserDetails.objects.get(user=booking_obj.student.user)
-        student_name = user_details.full_name or booking_obj.student.user.username
-    except UserDetails.DoesNotExist:
-        student_name = booking_obj.student.user.username
-    
-    # Get tutor name
-    try:
-        user_details = UserDetails.objects.get(user=booking_obj.tutor.user)
-        tutor_name = user_details.full_name or booking_obj.tutor.user.username
-    except UserDetails.DoesNotExist:
-        tutor_name = booking_obj.tutor.user.username
+    # Get student and tutor names
+    student_name = display_name(booking_obj.student.user)
+    tutor_name = display_name(booking_obj.tutor.user)
     
     return {
         'booking_id': booking_obj.booking_id,
@@ -106,7 +120,7 @@ def serialize_tutor_detail(tutor_obj):
     ]
     
     # Get available slots
-    availability = TutorAvailability.objects.filter(tutor=tutor_obj, is_active=True)
+    availability = with_booking_counts(TutorAvailability.objects.filter(tutor=tutor_obj, is_active=True))
     available_slots = [serialize_tutor_availability(slot) for slot in availability]
     
     return {
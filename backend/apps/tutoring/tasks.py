@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from celery import shared_task
+
+from .occurrences import extend_occurrences
+
+
+@shared_task(name='tutoring.extend_occurrences')
+def extend_occurrences_task() -> Dict[str, int]:
+    report = extend_occurrences()
+    return {'bookings': report.bookings, 'created': report.created}
@@ -1,3 +1,426 @@
+import json
+from datetime import datetime, time, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.busy_calendar import find_conflicts
+from apps.accounts.models import UserDetails, Users, UserTypes
+from apps.mentoring.models import MentoringSessions, Mentors
+from apps.payments.models import TutoringPayments
+from apps.students.models import Students
+
+from .models import TutorAvailability, TutoringBooking, TutoringOccurrence, TutoringSessionReschedule, Tutors
+from .occurrences import apply_reschedule, materialize_occurrences, occurrence_on
+from .reservations import BOOKING_HOLD_MINUTES
+from .tasks import extend_occurrences_task
+
+
+class RescheduleConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='uni_student')
+        tutor_user = Users.objects.create(
+            user_type=user_type, username='tutor', email='tutor@example.com', password_hash='x', is_active=1,
+        )
+        cls.tutor = Tutors.objects.create(user=tutor_user)
+        cls.mentor = Mentors.objects.create(user=tutor_user, approved=1)
+        cls.students = []
+        for index in range(3):
+            user = Users.objects.create(
+                user_type=user_type, username=f'student{index}', email=f'student{index}@example.com',
+                password_hash='x', is_active=1,
+            )
+            cls.students.append(Students.objects.create(user=user, current_stage='al'))
+
+        cls.day = timezone.localdate() + timedelta(days=7)
+        cls.day_of_week = (cls.day.weekday() + 1) % 7
+        cls.booking = cls._book(cls.students[0], (cls.day_of_week + 1) % 7, 8, start_date=cls.day + timedelta(days=1))
+
+    @classmethod
+    def _book(cls, student, day_of_week, hour, start_date=None):
+        slot = TutorAvailability.objects.create(
+            tutor=cls.tutor, day_of_week=day_of_week, start_time=time(hour), end_time=time(hour + 1),
+        )
+        booking = TutoringBooking.objects.create(
+            student=student, tutor=cls.tutor, availability_slot=slot, start_date=start_date or timezone.localdate(),
+            status='confirmed', sessions_paid=4,
+        )
+        materialize_occurrences(booking)
+        return booking
+
+    def _reschedule(self, start, end):
+        return self.client.post(
+            f'/api/tutoring/bookings/{self.booking.booking_id}/reschedule/',
+            data=json.dumps({
+                'original_date': (self.day + timedelta(days=1)).isoformat(), 'new_date': self.day.isoformat(),
+                'new_start_time': start, 'new_end_time': end, 'requested_by': 'student',
+            }),
+            content_type='application/json',
+        )
+
+    def test_all_conflicts_are_reported_in_constant_queries(self):
+        # Sessions on other weekdays never overlap the new date.
+        for hour in range(9, 15):
+            self._book(self.students[1], (self.day_of_week + 2) % 7, hour)
+        clash = self._book(self.students[1], self.day_of_week, 10)
+        moved = self._book(self.students[2], self.day_of_week, 14)
+        apply_reschedule(occurrence_on(moved, self.day), TutoringSessionReschedule.objects.create(
+            booking=moved, original_date=self.day, new_date=self.day, new_start_time=time(11), new_end_time=time(12),
+            requested_by='tutor', status='approved',
+        ))
+        session = MentoringSessions.objects.create(
+            mentor=self.mentor, topic='Maths', scheduled_at=timezone.make_aware(datetime.combine(self.day, time(11, 30))),
+            duration_minutes=60, status='scheduled',
+        )
+
+        # The booking and the session moved, then the calendar: one query per source
+        with self.assertNumQueries(6):
+            response = self._reschedule('10:30', '12:00')
+        self.assertEqual(response.status_code, 400)
+        conflicts = response.json()['conflicts']
+        self.assertEqual(
+            [(conflict['source'], conflict['ref'], conflict['rescheduled']) for conflict in conflicts],
+            [('tutoring', clash.booking_id, False), ('tutoring', moved.booking_id, True), ('mentoring', session.session_id, False)],
+        )
+
+        # The moved booking's own 14:00 session no longer takes place that day.
+        response = self._reschedule('14:00', '15:00')
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        def conflict_queries():
+            with self.assertNumQueries(6):
+                response = self._reschedule('16:30', '17:30')
+            self.assertEqual(response.status_code, 400)
+            return len(response.json()['conflicts'])
+
+        self._book(self.students[1], self.day_of_week, 16)
+        self.assertEqual(conflict_queries(), 1)
+        for hour in range(17, 20):
+            for _ in range(5):
+                self._book(self.students[1], self.day_of_week, hour)
+        self.assertEqual(conflict_queries(), 6)
+
+
+class TutorSlotListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='uni_student')
+        tutor_user = Users.objects.create(
+            user_type=user_type, username='tutor', email='tutor@example.com', password_hash='x', is_active=1,
+        )
+        UserDetails.objects.create(user=tutor_user, full_name='Nimal Perera')
+        cls.tutor = Tutors.objects.create(user=tutor_user)
+        student_user = Users.objects.create(
+            user_type=user_type, username='student', email='student@example.com', password_hash='x', is_active=1,
+        )
+        student = Students.objects.create(user=student_user, current_stage='al')
+
+        cls.slots = [
+            TutorAvailability.objects.create(
+                tutor=cls.tutor, day_of_week=index % 7, start_time=time(6 + index // 7), end_time=time(7 + index // 7),
+                max_students=2,
+            )
+            for index in range(50)
+        ]
+        # Slot 0 is full and slots 1 and 2 have one place left: an unpaid booking holds
+        # its place for a while, a cancelled one does not.
+        for slot, status in [
+            (cls.slots[0], 'confirmed'), (cls.slots[0], 'active'), (cls.slots[1], 'confirmed'),
+            (cls.slots[2], 'pending'), (cls.slots[2], 'cancelled'),
+        ]:
+            TutoringBooking.objects.create(
+                student=student, tutor=cls.tutor, availability_slot=slot, start_date=timezone.localdate(), status=status,
+            )
+
+    def test_listing_is_two_queries_with_capacity_from_the_database(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/tutoring/available-slots/{self.tutor.tutor_id}/')
+        slots = {slot['availability_id']: slot for slot in response.json()['available_slots']}
+
+        self.assertEqual(len(slots), 49)
+        self.assertNotIn(self.slots[0].availability_id, slots)
+        self.assertEqual(slots[self.slots[1].availability_id]['available_spots'], 1)
+        self.assertEqual(slots[self.slots[1].availability_id]['current_bookings'], 1)
+        self.assertEqual(slots[self.slots[2].availability_id]['available_spots'], 1)
+        self.assertEqual(slots[self.slots[3].availability_id]['available_spots'], 2)
+        self.assertEqual({slot['tutor_name'] for slot in slots.values()}, {'Nimal Perera'})
+
+
+class TutoringReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='uni_student')
+        tutor_user = Users.objects.create(
+            user_type=user_type, username='tutor', email='tutor@example.com', password_hash='x', is_active=1,
+        )
+        cls.tutor = Tutors.objects.create(user=tutor_user)
+        cls.students = []
+        for index in range(3):
+            user = Users.objects.create(
+                user_type=user_type, username=f'student{index}', email=f'student{index}@example.com',
+                password_hash='x', is_active=1,
+            )
+            cls.students.append(Students.objects.create(user=user, current_stage='al'))
+        cls.slot = TutorAvailability.objects.create(
+            tutor=cls.tutor, day_of_week=1, start_time=time(16), end_time=time(17), max_students=2,
+        )
+
+    def _book(self, student, key=None, **fields):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/tutoring/bookings/create/', data=json.dumps({
+            'student_id': student.student_id, 'tutor_id': self.tutor.tutor_id,
+            'availability_slot_id': self.slot.availability_id, 'start_date': timezone.localdate().isoformat(),
+            'payment_type': 'monthly', **fields,
+        }), content_type='application/json', **headers)
+
+    def test_unpaid_bookings_hold_places_until_the_hold_expires(self):
+        self.assertEqual(self._book(self.students[0]).status_code, 200)
+        duplicate = self._book(self.students[0])
+        self.assertEqual((duplicate.status_code, duplicate.json()['message']),
+                         (400, 'You already have a booking in this time slot'))
+        self.assertEqual(self._book(self.students[1]).status_code, 200)
+
+        full = self._book(self.students[2])
+        self.assertEqual((full.status_code, full.json()['message']), (400, 'This time slot is fully booked'))
+
+        # An abandoned payment frees its place once the hold runs out.
+        TutoringBooking.objects.filter(student=self.students[0]).update(
+            created_at=timezone.now() - timedelta(minutes=BOOKING_HOLD_MINUTES + 1)
+        )
+        self.assertEqual(self._book(self.students[2]).status_code, 200)
+
+    def test_retries_with_an_idempotency_key_return_the_first_booking(self):
+        first = self._book(self.students[0], key='retry-1')
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.json()['idempotent_replay'])
+
+        with self.assertNumQueries(3):  # student, tutor, then the stored booking with everything joined
+            retry = self._book(self.students[0], key='retry-1')
+        self.assertEqual(retry.status_code, 200)
+        self.assertTrue(retry.json()['idempotent_replay'])
+        self.assertEqual(retry.json()['booking']['booking_id'], first.json()['booking']['booking_id'])
+        self.assertEqual(TutoringBooking.objects.filter(student=self.students[0]).count(), 1)
+
+        # Keys are per student.
+        other = self._book(self.students[1], key='retry-1')
+        self.assertFalse(other.json()['idempotent_replay'])
+        self.assertEqual(TutoringBooking.objects.count(), 2)
+
+        # Reusing a key for a different booking is not a retry.
+        reused = self._book(self.students[0], key='retry-1', payment_type='term',
+                            start_date=(timezone.localdate() + timedelta(days=7)).isoformat())
+        self.assertEqual((reused.status_code, reused.json()['message']), (
+            422, 'idempotency_key was already used for a different booking (payment_type, sessions_paid, start_date differ)',
+        ))
+        self.assertEqual(TutoringBooking.objects.count(), 2)
+
+    def _pay(self, booking_id):
+        return self.client.post(f'/api/tutoring/bookings/{booking_id}/confirm-payment/', data=json.dumps({
+            'amount': '4000.00', 'payment_method': 'card',
+        }), content_type='application/json')
+
+    def test_payment_after_the_hold_lapses_only_confirms_if_a_place_is_left(self):
+        late = self._book(self.students[0]).json()['booking']['booking_id']
+        TutoringBooking.objects.filter(pk=late).update(
+            created_at=timezone.now() - timedelta(minutes=BOOKING_HOLD_MINUTES + 1)
+        )
+        # One place is still free, so the late payment keeps the booking.
+        self.assertEqual(self._pay(late).status_code, 200)
+        self.assertEqual(TutoringBooking.objects.get(pk=late).status, 'confirmed')
+
+        lapsed = self._book(self.students[1]).json()['booking']['booking_id']
+        TutoringBooking.objects.filter(pk=lapsed).update(
+            created_at=timezone.now() - timedelta(minutes=BOOKING_HOLD_MINUTES + 1)
+        )
+        self.assertEqual(self._book(self.students[2]).status_code, 200)
+
+        # The place it held has been taken since.
+        response = self._pay(lapsed)
+        self.assertEqual((response.status_code, response.json()['message']),
+                         (400, 'Your reservation has expired and this time slot has since been fully booked'))
+        self.assertEqual(TutoringBooking.objects.get(pk=lapsed).status, 'pending')
+        self.assertFalse(TutoringPayments.objects.filter(booking_id=lapsed).exists())
+
+        self.assertEqual(self._pay(late).json()['message'], 'Booking is already confirmed')
+        self.assertEqual(self._pay(999999).status_code, 404)
+
+    def test_rebooking_after_the_hold_lapses_cancels_the_lapsed_booking(self):
+        lapsed = self._book(self.students[0]).json()['booking']['booking_id']
+        TutoringBooking.objects.filter(pk=lapsed).update(
+            created_at=timezone.now() - timedelta(minutes=BOOKING_HOLD_MINUTES + 1)
+        )
+        rebooked = self._book(self.students[0]).json()['booking']['booking_id']
+        self.assertEqual(TutoringBooking.objects.get(pk=lapsed).status, 'cancelled')
+        self.assertFalse(TutoringOccurrence.objects.filter(booking_id=lapsed, status='scheduled').exists())
+
+        # Paying for both cannot leave the student with two places.
+        self.assertEqual(self._pay(lapsed).json()['message'], 'Booking is already cancelled')
+        self.assertEqual(self._pay(rebooked).status_code, 200)
+        self.assertEqual(TutoringBooking.objects.filter(student=self.students[0], status='confirmed').count(), 1)
+
+
+class TutoringOccurrenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_type = UserTypes.objects.create(type_name='uni_student')
+        tutor_user = Users.objects.create(
+            user_type=user_type, username='tutor', email='tutor@example.com', password_hash='x', is_active=1,
+        )
+        cls.tutor = Tutors.objects.create(user=tutor_user)
+        cls.students = []
+        for index in range(3):
+            user = Users.objects.create(
+                user_type=user_type, username=f'student{index}', email=f'student{index}@example.com',
+                password_hash='x', is_active=1,
+            )
+            UserDetails.objects.create(user=user, full_name=f'Student {index}')
+            cls.students.append(Students.objects.create(user=user, current_stage='al'))
+        cls.day = timezone.localdate() + timedelta(days=1)
+        cls.slot = TutorAvailability.objects.create(
+            tutor=cls.tutor, day_of_week=(cls.day.weekday() + 1) % 7, start_time=time(16), end_time=time(17),
+            max_students=3,
+        )
+
+    def _calendar(self, **params):
+        return self.client.get(f'/api/tutoring/tutor/{self.tutor.tutor_id}/sessions/', params).json()
+
+    def test_sessions_are_materialized_when_booked_and_follow_reschedules(self):
+        response = self.client.post('/api/tutoring/bookings/create/', data=json.dumps({
+            'student_id': self.students[0].student_id, 'tutor_id': self.tutor.tutor_id,
+            'availability_slot_id': self.slot.availability_id, 'start_date': timezone.localdate().isoformat(),
+            'payment_type': 'monthly',
+        }), content_type='application/json')
+        booking_id = response.json()['booking']['booking_id']
+        self.assertEqual(
+            list(TutoringOccurrence.objects.filter(booking_id=booking_id).values_list('sequence', 'session_date')),
+            [(week + 1, self.day + timedelta(weeks=week)) for week in range(4)],
+        )
+        TutoringBooking.objects.filter(pk=booking_id).update(status='confirmed')
+
+        second_week = self.day + timedelta(weeks=1)
+        response = self.client.post(f'/api/tutoring/bookings/{booking_id}/reschedule/', data=json.dumps({
+            'original_date': second_week.isoformat(), 'new_date': (second_week + timedelta(days=1)).isoformat(),
+            'new_start_time': '09:00', 'new_end_time': '10:00', 'requested_by': 'tutor',
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f'/api/tutoring/bookings/{booking_id}/reschedule/', data=json.dumps({
+            'original_date': (self.day + timedelta(days=2)).isoformat(), 'new_date': second_week.isoformat(),
+            'new_start_time': '09:00', 'new_end_time': '10:00', 'requested_by': 'tutor',
+        }), content_type='application/json')
+        self.assertEqual(response.json()['message'], 'No session of this booking falls on the original date')
+
+        self.client.post(f'/api/tutoring/bookings/{booking_id}/mark-completed/')
+
+        # One range scan however many bookings and sessions the tutor has
+        for student in self.students[1:]:
+            materialize_occurrences(TutoringBooking.objects.create(
+                student=student, tutor=self.tutor, availability_slot=self.slot, start_date=self.day,
+                status='confirmed', sessions_paid=12,
+            ))
+        with self.assertNumQueries(2):  # tutor, then sessions joined with bookings and students
+            calendar = self._calendar(status='upcoming')
+        self.assertEqual(calendar['count'], 28)
+
+        own = [session for session in calendar['sessions'] if session['booking_id'] == booking_id]
+        self.assertEqual(
+            [(session['date'], session['start_time'], session['status'], session['is_rescheduled']) for session in own],
+            [
+                (self.day.isoformat(), '16:00', 'completed', False),
+                ((second_week + timedelta(days=1)).isoformat(), '09:00', 'scheduled', True),
+                ((self.day + timedelta(weeks=2)).isoformat(), '16:00', 'scheduled', False),
+                ((self.day + timedelta(weeks=3)).isoformat(), '16:00', 'scheduled', False),
+            ],
+        )
+        self.assertEqual(own[0]['student_name'], 'Student 0')
+
+        window = self._calendar(status='upcoming', **{'from': second_week.isoformat(), 'to': second_week.isoformat()})
+        self.assertEqual([session['booking_id'] for session in window['sessions']], [
+            booking.booking_id for booking in TutoringBooking.objects.exclude(pk=booking_id).order_by('booking_id')
+        ])
+
+        stats = self.client.get(f'/api/tutoring/tutor/{self.tutor.tutor_id}/stats/').json()['stats']
+        self.assertEqual((stats['next_session']['date'], stats['next_session']['start_time']), (self.day.isoformat(), '16:00'))
+        self.assertNotEqual(stats['next_session']['booking_id'], booking_id)
+
+        self.client.post(f'/api/tutoring/bookings/{booking_id}/cancel/', data='{}', content_type='application/json')
+        self.assertEqual(
+            list(TutoringOccurrence.objects.filter(booking_id=booking_id).values_list('status', flat=True)),
+            ['completed', 'cancelled', 'cancelled', 'cancelled'],
+        )
+
+    def test_one_off_sessions_fall_on_the_same_day_in_the_calendar_and_conflict_checks(self):
+        # Booked from a date two days before the slot's weekday
+        booking = TutoringBooking.objects.create(
+            student=self.students[0], tutor=self.tutor, availability_slot=self.slot, is_recurring=False,
+            start_date=self.day + timedelta(days=5), status='confirmed',
+        )
+        materialize_occurrences(booking)
+        session = booking.occurrences.get()
+        self.assertEqual(session.session_date, self.day + timedelta(weeks=1))
+
+        busy = find_conflicts([self.tutor.user_id], session.starts_at, session.ends_at)
+        self.assertEqual([(interval.start, interval.ref) for interval in busy], [(session.starts_at, booking.booking_id)])
+        start = session.starts_at - timedelta(days=2)
+        self.assertEqual(find_conflicts([self.tutor.user_id], start, start + timedelta(hours=1)), [])
+
+    def test_completion_materializes_missing_sessions_and_never_counts_without_one(self):
+        # Made before sessions were materialized
+        booking = TutoringBooking.objects.create(
+            student=self.students[0], tutor=self.tutor, availability_slot=self.slot, start_date=self.day,
+            status='confirmed', sessions_paid=4,
+        )
+        response = self.client.post(f'/api/tutoring/bookings/{booking.booking_id}/mark-completed/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(booking.occurrences.order_by('sequence').values_list('status', flat=True)),
+                         ['completed', 'scheduled', 'scheduled', 'scheduled'])
+
+        booking.occurrences.filter(status='scheduled').update(status='cancelled')
+        response = self.client.post(f'/api/tutoring/bookings/{booking.booking_id}/mark-completed/')
+        self.assertEqual(response.status_code, 409)
+        booking.refresh_from_db()
+        self.assertEqual(booking.sessions_completed, 1)
+
+    def test_extension_command_rolls_the_horizon_forward(self):
+        booking = TutoringBooking.objects.create(
+            student=self.students[0], tutor=self.tutor, availability_slot=self.slot, start_date=self.day,
+            status='confirmed', payment_type='term', sessions_paid=12, sessions_completed=1,
+        )
+        # Made before sessions were materialized
+        TutoringSessionReschedule.objects.create(
+            booking=booking, original_date=self.day + timedelta(weeks=1), new_date=self.day + timedelta(weeks=1),
+            new_start_time=time(18), new_end_time=time(19), requested_by='student', status='approved',
+        )
+
+        call_command('extend_tutoring_occurrences', weeks=4, stdout=StringIO())
+        occurrences = list(booking.occurrences.order_by('sequence'))
+        self.assertEqual([occurrence.original_date for occurrence in occurrences],
+                         [self.day + timedelta(weeks=week) for week in range(4)])
+        self.assertEqual([occurrence.status for occurrence in occurrences[:2]], ['completed', 'scheduled'])
+        self.assertEqual((occurrences[1].start_time, occurrences[1].is_rescheduled), (time(18), True))
+
+        output = StringIO()
+        call_command('extend_tutoring_occurrences', weeks=52, stdout=output)
+        self.assertIn('Materialized 8 sessions for 1 bookings', output.getvalue())
+        self.assertEqual(booking.occurrences.count(), 12)
+        self.assertEqual(booking.occurrences.order_by('-sequence').first().original_date, self.day + timedelta(weeks=11))
+
+        output = StringIO()
+        call_command('extend_tutoring_occurrences', stdout=output)
+        self.assertIn('Materialized 0 sessions', output.getvalue())
 
-# Create your tests here.
+    def test_beat_extends_the_horizon_with_the_default_window(self):
+        self.assertIn('tutoring.extend_occurrences', {
+            entry['task'] for entry in settings.CELERY_BEAT_SCHEDULE.values()
+        })
+        booking = TutoringBooking.objects.create(
+            student=self.students[0], tutor=self.tutor, availability_slot=self.slot, start_date=self.day,
+            status='confirmed', payment_type='term', sessions_paid=24,
+        )
+        self.assertEqual(extend_occurrences_task(), {'bookings': 1, 'created': 12})
+        self.assertEqual(booking.occurrences.order_by('-sequence').first().original_date,
+                         self.day + timedelta(weeks=11))
@@ -2,13 +2,15 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction, connection
+from django.db.models import F
 from django.utils import timezone
 import json
 from .models import Tutors, TutoringSessions, TutorSubjects, TutorRatings, TutorFeedback, TutorAvailability, TutoringBooking, TutoringSessionReschedule
-from .serializers import serialize_tutor_availability, serialize_tutoring_booking, serialize_tutor_detail
+from .occurrences import cancel_occurrences
+from .reservations import IDEMPOTENCY_KEY_MAX_LENGTH, ReservationError, confirm_booking, reserve_booking
+from .serializers import serialize_tutor_availability, serialize_tutoring_booking, serialize_tutor_detail, with_booking_counts
 from apps.accounts.models import Users, UserDetails
 from apps.students.models import Students
-from apps.payments.models import TutoringPayments
 from django.views.decorators.http import require_http_methods
 from django.utils.dateparse import parse_datetime, parse_date
 from datetime import datetime, timedelta, date
@@ -554,7 +556,7 @@ def manage_tutor_availability(request, tutor_id):
 
     if request.method == 'GET':
         try:
-            availability = TutorAvailability.objects.filter(tutor=tutor)
+            availability = with_booking_counts(TutorAvailability.objects.filter(tutor=tutor))
             availability_data = [serialize_tutor_availability(slot) for slot in availability]
             return JsonResponse({
                 'status': 'success',
@@ -856,21 +858,18 @@ def get_tutor_available_slots(request, tutor_id):
         if subject_id:
             filters['subject_id'] = subject_id
         
-        availability = TutorAvailability.objects.filter(**filters)
+        # Booking counts and tutor details come with the slots in one query;
+        # full slots are filtered out by the database
+        availability = with_booking_counts(
+            TutorAvailability.objects.filter(**filters)
+        ).filter(active_bookings__lt=F('max_students')).order_by('day_of_week', 'start_time', 'availability_id')
         
-        # Check booking capacity for each slot
         slots_with_capacity = []
         for slot in availability:
-            active_bookings = TutoringBooking.objects.filter(
-                availability_slot=slot,
-                status__in=['confirmed', 'active']
-            ).count()
-            
-            if active_bookings < slot.max_students:
-                slot_data = serialize_tutor_availability(slot)
-                slot_data['available_spots'] = slot.max_students - active_bookings
-                slot_data['total_spots'] = slot.max_students
-                slots_with_capacity.append(slot_data)
+            slot_data = serialize_tutor_availability(slot)
+            slot_data['available_spots'] = slot.max_students - slot.active_bookings
+            slot_data['total_spots'] = slot.max_students
+            slots_with_capacity.append(slot_data)
         
         return JsonResponse({
             'status': 'success',
@@ -912,36 +911,12 @@ def create_tutoring_booking(request):
         except Tutors.DoesNotExist:
             return JsonResponse({'status': 'error', 'message': 'Tutor not found'}, status=404)
         
-        # Validate availability slot
-        try:
-            availability_slot = TutorAvailability.objects.get(
-                availability_id=data['availability_slot_id'],
-                tutor=tutor,
-                is_active=True
-            )
-        except TutorAvailability.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Availability slot not found or inactive'}, status=404)
-        
-        # Check if slot is full
-        active_bookings = TutoringBooking.objects.filter(
-            availability_slot=availability_slot,
-            status__in=['confirmed', 'active']
-        ).count()
-        
-        if active_bookings >= availability_slot.max_students:
-            return JsonResponse({'status': 'error', 'message': 'This time slot is fully booked'}, status=400)
-        
-        # Check if student already has a booking in this slot
-        existing_booking = TutoringBooking.objects.filter(
-            student=student,
-            availability_slot=availability_slot,
-            status__in=['pending', 'confirmed', 'active']
-        ).first()
-        
-        if existing_booking:
+        # Optional key that makes client retries safe
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        if idempotency_key and len(str(idempotency_key)) > IDEMPOTENCY_KEY_MAX_LENGTH:
             return JsonResponse({
                 'status': 'error',
-                'message': 'You already have a booking in this time slot'
+                'message': f'idempotency_key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
             }, status=400)
         
         # Parse dates
@@ -965,49 +940,53 @@ def create_tutoring_booking(request):
         elif payment_type == 'term':
             sessions_paid = 12  # 12 weeks (3 months)
         
-        # Create booking with pending status (awaiting payment)
-        with transaction.atomic():
-            booking_data = {
-                'student': student,
-                'tutor': tutor,
-                'availability_slot': availability_slot,
-                'subject': availability_slot.subject,
-                'is_recurring': data.get('is_recurring', True),
-                'start_date': start_date,
-                'end_date': end_date,
-                'status': 'pending',
-                'topic': data.get('topic', ''),
-                'description': data.get('description', ''),
-                'payment_type': payment_type,
-                'sessions_paid': sessions_paid,
-                'sessions_completed': 0
+        # Reserve a place with pending status (awaiting payment). Capacity and
+        # duplicate checks run under a lock on the slot, so concurrent requests
+        # cannot overbook it.
+        try:
+            reservation = reserve_booking(
+                student,
+                tutor,
+                data['availability_slot_id'],
+                {
+                    'is_recurring': data.get('is_recurring', True),
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'topic': data.get('topic', ''),
+                    'description': data.get('description', ''),
+                    'payment_type': payment_type,
+                    'sessions_paid': sessions_paid,
+                },
+                idempotency_key=str(idempotency_key) if idempotency_key else None,
+            )
+        except ReservationError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=e.status)
+        booking = reservation.booking
+        
+        # Calculate payment amount using tutor's hourly rate
+        base_rate = booking.tutor.hourly_rate  # Dynamic rate from tutor profile
+        
+        if booking.payment_type == 'monthly':
+            amount = base_rate * 4 * Decimal('0.95')  # 5% discount
+        elif booking.payment_type == 'term':
+            amount = base_rate * 12 * Decimal('0.90')  # 10% discount
+        else:
+            amount = base_rate
+        
+        booking_serialized = serialize_tutoring_booking(booking)
+        
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Booking created successfully. Please complete payment to confirm.',
+            'booking': booking_serialized,
+            'idempotent_replay': not reservation.created,
+            'payment_required': {
+                'amount': float(amount),
+                'currency': 'LKR',
+                'sessions': booking.sessions_paid,
+                'payment_type': booking.payment_type
             }
-            
-            booking = TutoringBooking.objects.create(**booking_data)
-            
-            # Calculate payment amount using tutor's hourly rate
-            base_rate = booking.tutor.hourly_rate  # Dynamic rate from tutor profile
-            
-            if payment_type == 'monthly':
-                amount = base_rate * 4 * Decimal('0.95')  # 5% discount
-            elif payment_type == 'term':
-                amount = base_rate * 12 * Decimal('0.90')  # 10% discount
-            else:
-                amount = base_rate
-            
-            booking_serialized = serialize_tutoring_booking(booking)
-            
-            return JsonResponse({
-                'status': 'success',
-                'message': 'Booking created successfully. Please complete payment to confirm.',
-                'booking': booking_serialized,
-                'payment_required': {
-                    'amount': float(amount),
-                    'currency': 'LKR',
-                    'sessions': sessions_paid,
-                    'payment_type': payment_type
-                }
-            })
+        })
     
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -1022,58 +1001,44 @@ def confirm_tutoring_booking_payment(request, booking_id):
     try:
         data = json.loads(request.body)
         
-        try:
-            booking = TutoringBooking.objects.get(booking_id=booking_id)
-        except TutoringBooking.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Booking not found'}, status=404)
-        
-        if booking.status != 'pending':
-            return JsonResponse({
-                'status': 'error',
-                'message': f'Booking is already {booking.status}'
-            }, status=400)
-        
         # Validate payment data
         required_payment_fields = ['amount', 'payment_method']
         for field in required_payment_fields:
             if field not in data:
                 return JsonResponse({'status': 'error', 'message': f'{field} is required'}, status=400)
         
-        with transaction.atomic():
-            # Create payment record
-            payment_data = {
-                'student': booking.student,
-                'booking': booking,
-                'amount': Decimal(str(data['amount'])),
-                'payment_method': data['payment_method'],
-                'paid_at': timezone.now(),
-                'created_at': timezone.now()
-            }
-            
-            # Add optional card payment details if provided
-            if data.get('card_type'):
-                payment_data['card_type'] = data['card_type']
-            if data.get('card_holder_name'):
-                payment_data['card_holder_name'] = data['card_holder_name']
-            if data.get('card_last_four'):
-                payment_data['card_last_four'] = data['card_last_four']
-            if data.get('transaction_id'):
-                payment_data['transaction_id'] = data['transaction_id']
-            
-            payment = TutoringPayments.objects.create(**payment_data)
-            
-            # Update booking status to confirmed
-            booking.status = 'confirmed'
-            booking.save()
-            
-            booking_serialized = serialize_tutoring_booking(booking)
-            
-            return JsonResponse({
-                'status': 'success',
-                'message': 'Payment confirmed! Your recurring tutoring session is now active.',
-                'booking': booking_serialized,
-                'payment_id': payment.payment_id
-            })
+        payment_data = {
+            'amount': Decimal(str(data['amount'])),
+            'payment_method': data['payment_method'],
+            'paid_at': timezone.now(),
+            'created_at': timezone.now()
+        }
+        
+        # Add optional card payment details if provided
+        if data.get('card_type'):
+            payment_data['card_type'] = data['card_type']
+        if data.get('card_holder_name'):
+            payment_data['card_holder_name'] = data['card_holder_name']
+        if data.get('card_last_four'):
+            payment_data['card_last_four'] = data['card_last_four']
+        if data.get('transaction_id'):
+            payment_data['transaction_id'] = data['transaction_id']
+        
+        # Confirmed under the slot's lock; a booking whose hold has lapsed
+        # only gets a place if the slot still has one
+        try:
+            booking, payment = confirm_booking(booking_id, payment_data)
+        except ReservationError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=e.status)
+        
+        booking_serialized = serialize_tutoring_booking(booking)
+        
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Payment confirmed! Your recurring tutoring session is now active.',
+            'booking': booking_serialized,
+            'payment_id': payment.payment_id
+        })
     
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -1153,8 +1118,10 @@ def cancel_tutoring_booking(request, booking_id):
         if booking.status == 'completed':
             return JsonResponse({'status': 'error', 'message': 'Cannot cancel completed booking'}, status=400)
         
-        booking.status = 'cancelled'
-        booking.save()
+        with transaction.atomic():
+            booking.status = 'cancelled'
+            booking.save()
+            cancel_occurrences(booking)
         
         booking_serialized = serialize_tutoring_booking(booking)
         
@@ -11,10 +11,12 @@ import json
 
 from .models import (
     Tutors, TutoringBooking, TutoringSessionReschedule, 
-    TutorAvailability
+    TutorAvailability, TutoringOccurrence
 )
-from .serializers import serialize_tutoring_booking
-from apps.mentoring.models import MentoringSessions  # For conflict checking with mentoring sessions
+from .occurrences import UPCOMING_BOOKING_STATUSES, apply_reschedule, complete_next_occurrence, next_occurrence, occurrence_on
+from .serializers import display_name, serialize_tutoring_booking
+from apps.accounts.models import UserDetails
+from apps.accounts.busy_calendar import TUTORING, conflict_message, find_conflicts, local_interval
 
 
 @csrf_exempt
@@ -22,21 +24,26 @@ from apps.mentoring.models import MentoringSessions  # For conflict checking wit
 def mark_session_completed(request, booking_id):
     """Mark an individual session as completed (increment sessions_completed)"""
     try:
-        try:
-            booking = TutoringBooking.objects.get(booking_id=booking_id)
-        except TutoringBooking.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Booking not found'}, status=404)
-        
-        # Check if already all sessions are completed
-        if booking.sessions_completed >= booking.sessions_paid:
-            return JsonResponse({
-                'status': 'error',
-                'message': 'All sessions have already been completed.'
-            }, status=400)
-        
-        # Increment sessions_completed
-        booking.sessions_completed += 1
-        booking.save()
+        # Complete the earliest scheduled session and count it, or neither
+        with transaction.atomic():
+            try:
+                booking = TutoringBooking.objects.select_for_update().get(booking_id=booking_id)
+            except TutoringBooking.DoesNotExist:
+                return JsonResponse({'status': 'error', 'message': 'Booking not found'}, status=404)
+            
+            # Check if already all sessions are completed
+            if booking.sessions_completed >= booking.sessions_paid:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'All sessions have already been completed.'
+                }, status=400)
+            if complete_next_occurrence(booking) is None:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'This booking has no scheduled session to complete.'
+                }, status=409)
+            booking.sessions_completed += 1
+            booking.save()
         
         return JsonResponse({
             'status': 'success',
@@ -89,7 +96,7 @@ def reschedule_tutoring_session(request, booking_id):
         
         # Get booking
         try:
-            booking = TutoringBooking.objects.get(booking_id=booking_id)
+            booking = TutoringBooking.objects.select_related('tutor', 'student').get(booking_id=booking_id)
         except TutoringBooking.DoesNotExist:
             return JsonResponse({'status': 'error', 'message': 'Booking not found'}, status=404)
         
@@ -128,6 +135,19 @@ def reschedule_tutoring_session(request, booking_id):
                 'message': 'Original date is not within booking period'
             }, status=400)
         
+        # The session being moved, with any earlier reschedule applied
+        occurrence = occurrence_on(booking, original_date)
+        if occurrence is None:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'No session of this booking falls on the original date'
+            }, status=400)
+        if occurrence.status != 'scheduled':
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Cannot reschedule a {occurrence.status} session'
+            }, status=400)
+        
         # Check if original date is in the past
         if original_date < date.today():
             return JsonResponse({
@@ -149,87 +169,23 @@ def reschedule_tutoring_session(request, booking_id):
                 'message': 'Start time must be before end time'
             }, status=400)
         
-        # Check for conflicts with existing tutoring bookings
-        tutor = booking.tutor
-        day_of_week = new_date.weekday()  # 0=Monday, 6=Sunday
-        
-        # Convert to our format (0=Sunday)
-        day_of_week = (day_of_week + 1) % 7
-        
-        # Check for conflicts with tutor's existing tutoring bookings
-        conflict_bookings = TutoringBooking.objects.filter(
-            tutor=tutor,
-            status__in=['scheduled', 'active', 'confirmed']
-        ).exclude(booking_id=booking_id)
-        
-        for other_booking in conflict_bookings:
-            # Check if it's a recurring booking that falls on the new date
-            if other_booking.is_recurring:
-                slot = other_booking.availability_slot
-                if slot.day_of_week == day_of_week:
-                    # Check time overlap
-                    if not (new_end_time <= slot.start_time or new_start_time >= slot.end_time):
-                        return JsonResponse({
-                            'status': 'error',
-                            'message': f'Time slot conflicts with another tutoring booking at {slot.start_time}-{slot.end_time}'
-                        }, status=400)
-            
-            # Check reschedules of other bookings
-            other_reschedules = TutoringSessionReschedule.objects.filter(
-                booking=other_booking,
-                new_date=new_date,
-                status='approved'
-            )
-            for reschedule in other_reschedules:
-                if not (new_end_time <= reschedule.new_start_time or new_start_time >= reschedule.new_end_time):
-                    return JsonResponse({
-                        'status': 'error',
-                        'message': f'Time slot conflicts with a rescheduled tutoring session at {reschedule.new_start_time}-{reschedule.new_end_time}'
-                    }, status=400)
-        
-        # Check for conflicts with mentoring sessions
-        try:
-            from apps.mentoring.models import Mentors as MentoringMentors
-            
-            # Get the mentor profile from the tutor's user
-            try:
-                mentor = MentoringMentors.objects.get(user=tutor.user)
-                
-                # Check for scheduled mentoring sessions on the new date
-                mentoring_conflicts = MentoringSessions.objects.filter(
-                    mentor=mentor,
-                    status__in=['scheduled', 'pending'],
-                )
-                
-                for mentoring_session in mentoring_conflicts:
-                    # Extract date and time from scheduled_at
-                    session_datetime = mentoring_session.scheduled_at
-                    session_date = session_datetime.date()
-                    session_start_time = session_datetime.time()
-                    
-                    # Calculate end time using duration_minutes
-                    if mentoring_session.duration_minutes:
-                        session_end_datetime = session_datetime + timedelta(minutes=mentoring_session.duration_minutes)
-                        session_end_time = session_end_datetime.time()
-                    else:
-                        # Default to 1 hour if duration not specified
-                        session_end_datetime = session_datetime + timedelta(hours=1)
-                        session_end_time = session_end_datetime.time()
-                    
-                    # Check if it's on the same date
-                    if session_date == new_date:
-                        # Check for time overlap
-                        if not (new_end_time <= session_start_time or new_start_time >= session_end_time):
-                            return JsonResponse({
-                                'status': 'error',
-                                'message': f'Time slot conflicts with a mentoring session at {session_start_time.strftime("%H:%M")}-{session_end_time.strftime("%H:%M")}'
-                            }, status=400)
-            except MentoringMentors.DoesNotExist:
-                pass  # Tutor is not a mentor, no conflicts possible
-        except Exception as e:
-            # Log error but don't fail the request if mentoring module is unavailable
-            print(f"Warning: Could not check mentoring conflicts: {str(e)}")
-            pass
+        # Check the tutor's and student's calendars across every service,
+        # ignoring this booking's own sessions. Only materialized sessions
+        # around the new time are read, in a fixed number of queries, and
+        # every conflict is reported.
+        new_start, new_end = local_interval(new_date, new_start_time, new_end_time)
+        conflicts = find_conflicts(
+            [booking.tutor.user_id, booking.student.user_id],
+            new_start,
+            new_end,
+            exclude=[(TUTORING, booking.booking_id)],
+        )
+        if conflicts:
+            return JsonResponse({
+                'status': 'error',
+                'message': conflict_message(conflicts),
+                'conflicts': [conflict.as_dict() for conflict in conflicts]
+            }, status=400)
         
         # Create reschedule record
         with transaction.atomic():
@@ -243,6 +199,7 @@ def reschedule_tutoring_session(request, booking_id):
                 requested_by=data['requested_by'],
                 status='approved'  # Auto-approve for now
             )
+            apply_reschedule(occurrence, reschedule)
             
             return JsonResponse({
                 'status': 'success',
@@ -308,105 +265,75 @@ def get_tutor_sessions_detailed(request, tutor_id):
         
         status_filter = request.GET.get('status', 'scheduled')
         
-        # Get bookings
-        filters = {'tutor': tutor}
+        # Sessions are materialized with reschedules applied, so the calendar
+        # is one range scan over (tutor, starts_at) joined to its bookings.
+        occurrences = TutoringOccurrence.objects.filter(tutor=tutor).select_related(
+            'booking', 'student__user__userdetails'
+        )
         if status_filter:
             if status_filter == 'upcoming':
-                filters['status__in'] = ['scheduled', 'active', 'confirmed']
+                occurrences = occurrences.filter(booking__status__in=UPCOMING_BOOKING_STATUSES)
             elif status_filter == 'completed':
-                filters['status'] = 'completed'
+                occurrences = occurrences.filter(booking__status='completed')
             else:
-                filters['status'] = status_filter
+                occurrences = occurrences.filter(booking__status=status_filter)
         
-        bookings = TutoringBooking.objects.filter(**filters).select_related(
-            'student', 'student__user', 'availability_slot'
-        )
+        # Optional date window (YYYY-MM-DD, inclusive)
+        try:
+            window_start = datetime.strptime(request.GET['from'], '%Y-%m-%d').date() if request.GET.get('from') else None
+            window_end = datetime.strptime(request.GET['to'], '%Y-%m-%d').date() if request.GET.get('to') else None
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': f'Invalid date format: {str(e)}'}, status=400)
+        if window_start:
+            occurrences = occurrences.filter(starts_at__gte=timezone.make_aware(datetime.combine(window_start, time.min)))
+        if window_end:
+            occurrences = occurrences.filter(
+                starts_at__lt=timezone.make_aware(datetime.combine(window_end + timedelta(days=1), time.min))
+            )
         
         sessions_data = []
-        today = date.today()
+        today = timezone.localdate()
         
-        for booking in bookings:
-            # Get student details
-            student_user = booking.student.user
+        for occurrence in occurrences.order_by('starts_at', 'occurrence_id'):
+            booking = occurrence.booking
+            student_user = occurrence.student.user
             try:
-                from apps.accounts.models import UserDetails
-                student_details = UserDetails.objects.get(user=student_user)
-                student_name = student_details.full_name or student_user.username
-                student_picture = student_details.profile_picture or ''
-            except:
-                student_name = student_user.username
+                student_picture = student_user.userdetails.profile_picture or ''
+            except UserDetails.DoesNotExist:
                 student_picture = ''
             
-            # Get all reschedules for this booking
-            reschedules = TutoringSessionReschedule.objects.filter(
-                booking=booking,
-                status='approved'
-            )
-            reschedules_dict = {r.original_date: r for r in reschedules}
-            
-            # Generate session dates
-            slot = booking.availability_slot
+            # Determine if session is expired (date has passed)
+            is_expired = occurrence.session_date < today
             
-            # Skip bookings without a valid availability slot
-            if not slot:
-                continue
-            
-            current_date = booking.start_date
-            end_date = booking.end_date or (today + timedelta(days=365))  # Default to 1 year
+            # Determine session status
+            if occurrence.status != 'scheduled':
+                session_status = occurrence.status
+            elif is_expired:
+                session_status = 'expired'
+            else:
+                session_status = 'scheduled'
             
-            session_count = 0
-            while current_date <= end_date and session_count < booking.sessions_paid:
-                # Check if this date matches the availability slot's day of week
-                day_of_week = (current_date.weekday() + 1) % 7  # Convert to 0=Sunday
-                
-                if day_of_week == slot.day_of_week and current_date >= booking.start_date:
-                    # Check if this session has been rescheduled
-                    if current_date in reschedules_dict:
-                        reschedule = reschedules_dict[current_date]
-                        session_date = reschedule.new_date
-                        start_time = reschedule.new_start_time
-                        end_time = reschedule.new_end_time
-                        is_rescheduled = True
-                    else:
-                        session_date = current_date
-                        start_time = slot.start_time
-                        end_time = slot.end_time
-                        is_rescheduled = False
-                    
-                    # Determine if session is expired (date has passed)
-                    is_expired = session_date < today
-                    
-                    # Determine session status
-                    if session_count < booking.sessions_completed:
-                        session_status = 'completed'
-                    elif is_expired:
-                        session_status = 'expired'
-                    else:
-                        session_status = 'scheduled'
-                    
-                    sessions_data.append({
-                        'booking_id': booking.booking_id,
-                        'session_number': session_count + 1,
-                        'student_id': booking.student.student_id,
-                        'student_name': student_name,
-                        'student_picture': student_picture,
-                        'subject': booking.topic or 'General Tutoring',  # Use topic as subject since subject field has issues
-                        'topic': booking.topic or '',
-                        'description': booking.description or '',
-                        'date': session_date.isoformat(),
-                        'start_time': start_time.strftime('%H:%M'),
-                        'end_time': end_time.strftime('%H:%M'),
-                        'status': session_status,
-                        'is_rescheduled': is_rescheduled,
-                        'is_expired': is_expired,
-                        'payment_type': booking.payment_type,
-                        'sessions_total': booking.sessions_paid,
-                        'sessions_completed': booking.sessions_completed,
-                    })
-                    
-                    session_count += 1
-                
-                current_date += timedelta(days=1)
+            sessions_data.append({
+                'booking_id': booking.booking_id,
+                'occurrence_id': occurrence.occurrence_id,
+                'session_number': occurrence.sequence,
+                'student_id': occurrence.student_id,
+                'student_name': display_name(student_user),
+                'student_picture': student_picture,
+                'subject': booking.topic or 'General Tutoring',  # Use topic as subject since subject field has issues
+                'topic': booking.topic or '',
+                'description': booking.description or '',
+                'date': occurrence.session_date.isoformat(),
+                'original_date': occurrence.original_date.isoformat(),
+                'start_time': occurrence.start_time.strftime('%H:%M'),
+                'end_time': occurrence.end_time.strftime('%H:%M'),
+                'status': session_status,
+                'is_rescheduled': occurrence.is_rescheduled,
+                'is_expired': is_expired,
+                'payment_type': booking.payment_type,
+                'sessions_total': booking.sessions_paid,
+                'sessions_completed': booking.sessions_completed,
+            })
         
         return JsonResponse({
             'status': 'success',
@@ -441,6 +368,18 @@ def get_tutor_stats(request, tutor_id):
         # Calculate average rating (if available)
         avg_rating = float(tutor.rating) if tutor.rating else 0.0
         
+        upcoming = next_occurrence(tutor_id=tutor.tutor_id)
+        next_session = None
+        if upcoming is not None:
+            next_session = {
+                'booking_id': upcoming.booking_id,
+                'session_number': upcoming.sequence,
+                'date': upcoming.session_date.isoformat(),
+                'start_time': upcoming.start_time.strftime('%H:%M'),
+                'end_time': upcoming.end_time.strftime('%H:%M'),
+                'is_rescheduled': upcoming.is_rescheduled,
+            }
+        
         return JsonResponse({
             'status': 'success',
             'stats': {
@@ -450,6 +389,7 @@ def get_tutor_stats(request, tutor_id):
                 'total_sessions': total_sessions,
                 'completed_sessions': completed_sessions,
                 'average_rating': avg_rating,
+                'next_session': next_session,
             }
         })
     except Exception as e:
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UniversityProgramsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.university_programs'
+
+    def ready(self):
+        import apps.university_programs.signals
@@ -0,0 +1,113 @@
+"""Degree program catalog served by ``get_all_programs``.
+
+The catalog query is constant-size: the latest cutoff is a correlated
+subquery and durations are prefetched. The unfiltered catalog is also kept
+as a gzip-compressed JSON snapshot with an ETag in each process's cache,
+keyed by a version stamp the signals in ``signals.py`` bump whenever catalog
+data changes. The stamp is a ``cache_versions`` row, so a bump from any
+worker or management command reaches every process; each process re-reads
+it at most every ``CACHE_VERSION_MAX_AGE`` seconds, so ``If-None-Match``
+revalidation is usually answered without a query.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from apps.accounts.cache_versions import bump_version, current_version as _current_version
+
+from .models import DegreeProgramDurations, DegreePrograms, DegreeProgramZScores
+
+
+VERSION_CACHE_KEY = 'university_programs:catalog_version'
+SNAPSHOT_CACHE_KEY = 'university_programs:catalog:{version}'
+
+
+def program_catalog_queryset():
+    """Active programs with their latest cutoff (any district) and durations, in two queries."""
+    latest_z_score = DegreeProgramZScores.objects.filter(
+        degree_program=OuterRef('pk')
+    ).order_by('-year', '-z_score').values('z_score')[:1]
+    return (
+        DegreePrograms.objects.filter(is_active=1)
+        .select_related('university', 'faculty')
+        .annotate(latest_z_score=Subquery(latest_z_score))
+        .prefetch_related(Prefetch(
+            'degreeprogramdurations_set',
+            queryset=DegreeProgramDurations.objects.order_by('pk'),
+            to_attr='durations',
+        ))
+    )
+
+
+def serialize_program(program) -> Dict[str, object]:
+    duration_info = program.durations[0] if program.durations else None
+    return {
+        'id': program.degree_program_id,
+        'name': program.title,
+        'code': program.code,
+        'university': program.university.name if program.university else None,
+        'university_id': program.university.university_id if program.university else None,
+        'faculty': program.faculty.name if program.faculty else None,
+        'faculty_id': program.faculty.faculty_id if program.faculty else None,
+        'duration': f"{duration_info.duration_years} years" if duration_info else "N/A",
+        'duration_years': duration_info.duration_years if duration_info else None,
+        'degree_type': duration_info.degree_type if duration_info else None,
+        'zScoreRequired': float(program.latest_z_score) if program.latest_z_score is not None else None,
+        'description': program.description,
+        'careerProspects': program.career_paths.split(',') if program.career_paths else [],
+        'syllabus_url': program.syllabus_url,
+        # Use subject_stream_required directly as category
+        'category': program.subject_stream_required or 'Other',
+        'subject_stream_required': program.subject_stream_required,
+    }
+
+
+def catalog_payload(programs: List[Dict[str, object]]) -> Dict[str, object]:
+    return {'success': True, 'programs': programs, 'total': len(programs)}
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    etag: str
+    gzipped: bytes
+
+    def content(self) -> bytes:
+        return gzip.decompress(self.gzipped)
+
+
+def build_catalog_snapshot() -> CatalogSnapshot:
+    programs = [serialize_program(program) for program in program_catalog_queryset()]
+    content = json.dumps(catalog_payload(programs), cls=DjangoJSONEncoder).encode()
+    # mtime=0 keeps the compressed bytes identical for identical catalogs.
+    return CatalogSnapshot(
+        etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"',
+        gzipped=gzip.compress(content, compresslevel=6, mtime=0),
+    )
+
+
+def current_version() -> str:
+    return _current_version(VERSION_CACHE_KEY, max_age=settings.CACHE_VERSION_MAX_AGE)
+
+
+def invalidate_program_catalog() -> None:
+    bump_version(VERSION_CACHE_KEY)
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """The snapshot for the current version, built on first use."""
+    key = SNAPSHOT_CACHE_KEY.format(version=current_version())
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_catalog_snapshot()
+        # Superseded versions are never read again and age out of the cache.
+        cache.set(key, snapshot, timeout=24 * 60 * 60)
+    return snapshot
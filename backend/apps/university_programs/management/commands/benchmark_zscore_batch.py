@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.university_programs.zscore_batch import BANDS, Candidate
+from apps.university_programs.zscore_index import STREAM_MAPPING, Cutoff, ZScoreIndex
+
+
+DEFAULT_CANDIDATES = 10000
+DEFAULT_PROGRAMS = 400
+DEFAULT_DISTRICTS = 25
+PROGRAM_STREAMS = ['Maths', 'Science', 'Commerce', 'Arts', 'Technology', 'Other', None]
+
+
+def synthetic_index(programs: int, districts: int, seed: int = 0) -> ZScoreIndex:
+    rng = random.Random(seed)
+    cutoffs = {}
+    for district_number in range(districts):
+        district = f'District {district_number}'
+        for program_id in range(1, programs + 1):
+            # Roughly one program in ten is not offered in a given district.
+            if rng.random() < 0.1:
+                continue
+            stream = PROGRAM_STREAMS[program_id % len(PROGRAM_STREAMS)]
+            program = {'degree_program_id': program_id, 'title': f'Program {program_id}'}
+            cutoff = Cutoff(round(rng.uniform(-1.0, 2.5), 4), 2024, program, stream)
+            cutoffs.setdefault(district, {}).setdefault(stream, []).append(cutoff)
+    return ZScoreIndex('benchmark', cutoffs)
+
+
+class Command(BaseCommand):
+    help = 'Compare batch z-score eligibility against per-candidate lookups on synthetic cutoffs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=DEFAULT_CANDIDATES, help=f'Candidates per batch (default {DEFAULT_CANDIDATES})')
+        parser.add_argument('--programs', type=int, default=DEFAULT_PROGRAMS, help=f'Synthetic degree programs (default {DEFAULT_PROGRAMS})')
+        parser.add_argument('--districts', type=int, default=DEFAULT_DISTRICTS, help=f'Synthetic districts (default {DEFAULT_DISTRICTS})')
+
+    def handle(self, *args, **options):
+        index = synthetic_index(options['programs'], options['districts'])
+        rng = random.Random(1)
+        streams = list(STREAM_MAPPING)
+        candidates = [
+            Candidate(
+                zscore=round(rng.uniform(-1.0, 2.5), 4),
+                district=f'District {rng.randrange(options["districts"])}',
+                stream=rng.choice(streams),
+                ref=number,
+            )
+            for number in range(max(options['candidates'], 1))
+        ]
+
+        started = time.perf_counter()
+        matrix = index.cutoff_matrix()
+        build_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = matrix.evaluate(candidates)
+        batch_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        single = [index.eligible_programs(c.zscore, c.district, c.stream) for c in candidates]
+        single_elapsed = time.perf_counter() - started
+
+        for result, programs in zip(batch, single):
+            expected = {band: [p['degree_program_id'] for p in programs if p['probability'].lower() == band] for band, _ in BANDS}
+            if any(result[band] != expected[band] for band, _ in BANDS):
+                raise CommandError(f'Batch result for candidate {result["id"]} differs from analyze_zscore')
+
+        count = len(candidates)
+        self.stdout.write(f'Cutoff matrix: {len(matrix.districts)} districts x {len(matrix.program_ids)} programs, built in {build_elapsed * 1000:.1f}ms')
+        self.stdout.write(f'   per-candidate: {count} candidates in {single_elapsed:.3f}s ({count / single_elapsed:,.0f}/s)')
+        self.stdout.write(
+            f'           batch: {count} candidates in {batch_elapsed:.3f}s ({count / batch_elapsed:,.0f}/s, '
+            f'{single_elapsed / batch_elapsed:.1f}x)'
+        )
+        self.stdout.write(self.style.SUCCESS('Z-score batch benchmark complete'))
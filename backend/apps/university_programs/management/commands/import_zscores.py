@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.university_programs.zscore_import import DEFAULT_BATCH_SIZE, ZScoreImportError, import_zscores
+
+
+class Command(BaseCommand):
+    help = (
+        'Upsert z-score cutoffs from a CSV with program_code, year, district and z_score columns '
+        '(Excel sheets: save as CSV UTF-8).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import, or '-' for stdin")
+        parser.add_argument('--year', type=int, help='Year for every row when the file has no year column')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'Rows per upsert (default {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
+        parser.add_argument('--rebuild-trends', action='store_true', help='Refit z-score trends after importing')
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                report = self._import(sys.stdin, options)
+            else:
+                # utf-8-sig drops the byte-order mark Excel writes at the start of "CSV UTF-8" files.
+                with open(options['path'], newline='', encoding='utf-8-sig') as stream:
+                    report = self._import(stream, options)
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}') from exc
+        except (ZScoreImportError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for error in report.errors:
+            self.stderr.write(error)
+        if report.rows_skipped > len(report.errors):
+            self.stderr.write(f'... and {report.rows_skipped - len(report.errors)} more invalid rows')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report.rows_written} z-scores from {report.rows_read} rows '
+            f'({report.rows_skipped} skipped) in {report.elapsed:.2f}s ({report.rows_per_second:,.0f} rows/s)'
+        ))
+
+        if options['rebuild_trends'] and report.rows_written and not options['dry_run']:
+            call_command('rebuild_zscore_trends', stdout=self.stdout)
+
+    def _import(self, stream, options):
+        return import_zscores(
+            stream,
+            default_year=options['year'],
+            batch_size=max(options['batch_size'], 1),
+            dry_run=options['dry_run'],
+        )
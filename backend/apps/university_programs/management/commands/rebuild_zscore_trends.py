@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.university_programs.trends import TREND_WINDOW_YEARS, rebuild_zscore_trends
+
+
+class Command(BaseCommand):
+    help = 'Fit cutoff trends (slope, volatility, next-year projection) for every program and district.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=TREND_WINDOW_YEARS,
+            help=f'Most recent years of each series to fit (default {TREND_WINDOW_YEARS})',
+        )
+
+    def handle(self, *args, **options):
+        if options['window'] < 1:
+            raise CommandError('--window must be at least 1')
+        started = time.perf_counter()
+        written = rebuild_zscore_trends(window=options['window'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} z-score trends in {elapsed:.2f}s'))
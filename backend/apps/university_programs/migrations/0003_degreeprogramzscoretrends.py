@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_programs', '0002_add_faculty_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DegreeProgramZScoreTrends',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('district', models.CharField(max_length=50)),
+                ('years_observed', models.IntegerField()),
+                ('first_year', models.IntegerField()),
+                ('last_year', models.IntegerField()),
+                ('slope', models.FloatField()),
+                ('volatility', models.FloatField()),
+                ('projected_year', models.IntegerField()),
+                ('projected_z_score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('degree_program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='z_score_trends', to='university_programs.degreeprograms')),
+            ],
+            options={
+                'db_table': 'degree_program_z_score_trends',
+                'managed': True,
+                'constraints': [models.UniqueConstraint(fields=('degree_program', 'district'), name='unique_z_score_trend')],
+            },
+        ),
+    ]
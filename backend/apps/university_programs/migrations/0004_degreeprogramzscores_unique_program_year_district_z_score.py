@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:03
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_z_scores(apps, schema_editor):
+    # Keep the first row of each (program, year, district), the one lookups already used.
+    DegreeProgramZScores = apps.get_model('university_programs', 'DegreeProgramZScores')
+    duplicates = (
+        DegreeProgramZScores.objects.values('degree_program_id', 'year', 'district')
+        .annotate(keep=Min('pk'), rows=Count('pk'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        DegreeProgramZScores.objects.filter(
+            degree_program_id=row['degree_program_id'], year=row['year'], district=row['district'],
+        ).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_programs', '0003_degreeprogramzscoretrends'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_z_scores, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='degreeprogramzscores',
+            constraint=models.UniqueConstraint(fields=('degree_program', 'year', 'district'), name='unique_program_year_district_z_score'),
+        ),
+    ]
@@ -60,4 +60,30 @@ class DegreeProgramZScores(models.Model):
 
     class Meta:
         managed = True
-        db_table = 'degree_program_z_scores'
\ No newline at end of file
+        db_table = 'degree_program_z_scores'
+        constraints = [
+            models.UniqueConstraint(fields=['degree_program', 'year', 'district'], name='unique_program_year_district_z_score'),
+        ]
+
+
+class DegreeProgramZScoreTrends(models.Model):
+    """Least-squares trend of each (program, district) cutoff series, rebuilt by ``rebuild_zscore_trends``."""
+    degree_program = models.ForeignKey(DegreePrograms, models.CASCADE, related_name='z_score_trends')
+    district = models.CharField(max_length=50)
+    years_observed = models.IntegerField()
+    first_year = models.IntegerField()
+    last_year = models.IntegerField()
+    # Change in cutoff per year
+    slope = models.FloatField()
+    # Standard deviation of the cutoffs around the fitted line
+    volatility = models.FloatField()
+    projected_year = models.IntegerField()
+    projected_z_score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = 'degree_program_z_score_trends'
+        constraints = [
+            models.UniqueConstraint(fields=['degree_program', 'district'], name='unique_z_score_trend'),
+        ]
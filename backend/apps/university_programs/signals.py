@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.universities.models import Faculties, Universities
+
+from .catalog import invalidate_program_catalog
+from .models import DegreeProgramDurations, DegreePrograms, DegreeProgramZScores
+from .zscore_index import invalidate_zscore_index
+
+
+@receiver(post_save, sender=DegreeProgramZScores)
+@receiver(post_delete, sender=DegreeProgramZScores)
+@receiver(post_save, sender=DegreePrograms)
+@receiver(post_delete, sender=DegreePrograms)
+@receiver(post_save, sender=Universities)
+@receiver(post_delete, sender=Universities)
+@receiver(post_save, sender=Faculties)
+@receiver(post_delete, sender=Faculties)
+def invalidate_cutoff_index(sender, **kwargs):
+    """Rebuild the z-score index once the change is visible to other connections."""
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(invalidate_zscore_index)
+
+
+@receiver(post_save, sender=DegreeProgramZScores)
+@receiver(post_delete, sender=DegreeProgramZScores)
+@receiver(post_save, sender=DegreePrograms)
+@receiver(post_delete, sender=DegreePrograms)
+@receiver(post_save, sender=DegreeProgramDurations)
+@receiver(post_delete, sender=DegreeProgramDurations)
+@receiver(post_save, sender=Universities)
+@receiver(post_delete, sender=Universities)
+@receiver(post_save, sender=Faculties)
+@receiver(post_delete, sender=Faculties)
+def invalidate_catalog_snapshot(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(invalidate_program_catalog)
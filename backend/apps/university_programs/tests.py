@@ -1,3 +1,335 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
-# Create your tests here.
+from apps.accounts.cache_versions import LOCAL_VERSION_KEY
+from apps.accounts.models import CacheVersion
+from apps.universities.models import Faculties, Universities
+
+from .catalog import VERSION_CACHE_KEY as CATALOG_VERSION_CACHE_KEY
+from .models import DegreeProgramDurations, DegreePrograms, DegreeProgramZScores, DegreeProgramZScoreTrends
+from .trends import fit_trends
+from .zscore_index import PROBABILITIES, VERSION_CACHE_KEY, Cutoff, CutoffBucket, admission_probability
+
+
+class AnalyzeZScoreIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = Universities.objects.create(name='University of Colombo', is_active=1)
+        faculty = Faculties.objects.create(university=university, name='Science', is_active=1)
+
+        def program(title, stream, is_active=1):
+            return DegreePrograms.objects.create(
+                university=university, faculty=faculty, title=title, subject_stream_required=stream, is_active=is_active,
+            )
+
+        cls.physics = program('Physics', 'Maths')
+        cls.engineering = program('Engineering', 'Maths')
+        cls.management = program('Management', 'Other')
+        cls.medicine = program('Medicine', 'Science')
+        cls.archived = program('Archived', 'Maths', is_active=0)
+
+        for degree_program, year, z_score in [
+            (cls.physics, 2022, '1.9000'),
+            (cls.physics, 2023, '1.2000'),
+            (cls.engineering, 2023, '1.6000'),
+            (cls.management, 2023, '0.9000'),
+            (cls.medicine, 2023, '1.3000'),
+            (cls.archived, 2023, '0.1000'),
+        ]:
+            DegreeProgramZScores.objects.create(
+                degree_program=degree_program, year=year, district='Colombo', z_score=Decimal(z_score),
+            )
+        DegreeProgramZScores.objects.create(degree_program=cls.physics, year=2023, district='Kandy', z_score=Decimal('1.1'))
+
+    def setUp(self):
+        cache.clear()
+
+    def _analyze(self, zscore, stream='Physical Science', district='Colombo'):
+        response = self.client.get('/api/university-programs/analyze-zscore/', {
+            'zscore': zscore, 'district': district, 'stream': stream,
+        })
+        self.assertEqual(response.status_code, 200)
+        return [
+            (program['title'], program['required_zscore'], program['year'], program['probability'])
+            for program in response.json()['eligible_programs']
+        ]
+
+    def test_latest_year_cutoffs_banded_by_probability(self):
+        self.assertEqual(self._analyze('1.55'), [
+            ('Physics', 1.2, 2023, 'High'),
+            ('Management', 0.9, 2023, 'High'),
+            ('Engineering', 1.6, 2023, 'Medium'),
+        ])
+        self.assertEqual(self._analyze('1.0'), [
+            ('Management', 0.9, 2023, 'High'),
+            ('Engineering', 1.6, 2023, 'Low'),
+            ('Physics', 1.2, 2023, 'Low'),
+        ])
+        # Streams without programs of their own still see open programs.
+        self.assertEqual([title for title, *_ in self._analyze('2.0', stream='Arts')], ['Management'])
+
+    def test_repeat_lookups_make_no_queries(self):
+        self._analyze('1.5')
+        with self.assertNumQueries(0):
+            self._analyze('0.5', stream='Biological Science')
+            self._analyze('1.5', district='Kandy')
+
+    def test_changes_invalidate_the_index(self):
+        self._analyze('1.5')
+        with self.captureOnCommitCallbacks(execute=True):
+            DegreeProgramZScores.objects.create(
+                degree_program=self.engineering, year=2024, district='Colombo', z_score=Decimal('1.4'),
+            )
+        self.assertIn(('Engineering', 1.4, 2024, 'High'), self._analyze('1.5'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DegreePrograms.objects.filter(pk=self.engineering.pk).update(is_active=0)
+            self.engineering.refresh_from_db()
+            self.engineering.save()
+        self.assertNotIn('Engineering', [title for title, *_ in self._analyze('1.5')])
+
+    def test_bumps_from_other_processes_rebuild_the_index(self):
+        self._analyze('1.5')
+        # Bulk writes send no signals, so this process does not see the new cutoff...
+        DegreeProgramZScores.objects.bulk_create([DegreeProgramZScores(
+            degree_program=self.engineering, year=2024, district='Colombo', z_score=Decimal('1.4'),
+        )])
+        self.assertNotIn(('Engineering', 1.4, 2024, 'High'), self._analyze('1.5'))
+        # ...until another process, sharing only the database, bumps the stamp
+        # and this process's copy of it expires.
+        CacheVersion.objects.filter(key=VERSION_CACHE_KEY).update(version='bumped-elsewhere')
+        self.assertNotIn(('Engineering', 1.4, 2024, 'High'), self._analyze('1.5'))
+        cache.delete(LOCAL_VERSION_KEY.format(key=VERSION_CACHE_KEY))
+        self.assertIn(('Engineering', 1.4, 2024, 'High'), self._analyze('1.5'))
+
+    def test_projected_and_historical_bands_use_the_same_thresholds(self):
+        bucket = CutoffBucket.from_cutoffs([Cutoff(1.2, 2023, {'degree_program_id': 1})])
+        for zscore in (1.3, 1.2, 1.15, 1.1, 1.0999, 0.5):
+            bands = [bool(cutoffs) for cutoffs in bucket.split(zscore)]
+            self.assertEqual(admission_probability(zscore, 1.2), PROBABILITIES[bands.index(True)], zscore)
+
+    def _batch(self, candidates):
+        return self.client.post(
+            '/api/university-programs/analyze-zscore/batch/', {'candidates': candidates}, content_type='application/json',
+        )
+
+    def test_batch_matches_single_lookups(self):
+        candidates = [
+            {'id': 'a', 'zscore': 1.55, 'district': 'Colombo', 'stream': 'Physical Science'},
+            {'id': 'b', 'zscore': '1.0', 'district': 'Colombo', 'stream': 'Physical Science'},
+            {'id': 'c', 'zscore': 1.25, 'district': 'Colombo', 'stream': 'Biological Science'},
+            {'id': 'd', 'zscore': 1.0, 'district': 'Kandy', 'stream': 'Mathematics'},
+            {'id': 'e', 'zscore': 2.0, 'district': 'Galle', 'stream': 'Arts'},
+        ]
+        response = self._batch(candidates)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['total_candidates'], 5)
+
+        for candidate, result in zip(candidates, body['results']):
+            self.assertEqual(result['id'], candidate['id'])
+            single = self.client.get('/api/university-programs/analyze-zscore/', candidate).json()['eligible_programs']
+            for band in ('high', 'medium', 'low'):
+                self.assertEqual(
+                    result[band],
+                    [program['degree_program_id'] for program in single if program['probability'].lower() == band],
+                )
+
+        self.assertEqual(body['results'][0]['medium'], [self.engineering.pk])
+        self.assertEqual(body['programs'][str(self.engineering.pk)]['title'], 'Engineering')
+        self.assertEqual(body['cutoffs']['Colombo'][str(self.physics.pk)], {'z_score': 1.2, 'year': 2023})
+        self.assertEqual(body['cutoffs']['Galle'], {})
+
+    def test_batch_rejects_invalid_candidates(self):
+        self.assertEqual(self._batch([]).status_code, 400)
+        response = self._batch([
+            {'zscore': 1.2, 'district': 'Colombo', 'stream': 'Arts'},
+            {'zscore': 'high', 'district': 'Colombo', 'stream': 'Arts'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Candidate 1: Invalid Z-score format')
+        self.assertEqual(self.client.get('/api/university-programs/analyze-zscore/batch/').status_code, 405)
+
+
+class ProgramCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = Universities.objects.create(name='University of Moratuwa', is_active=1)
+        cls.programs = []
+        for number in range(5):
+            program = DegreePrograms.objects.create(
+                university=university, title=f'Program {number}', subject_stream_required='Maths', is_active=1,
+                career_paths='Engineer,Researcher',
+            )
+            DegreeProgramDurations.objects.create(degree_program=program, duration_years=4, degree_type='BSc')
+            for year, district, z_score in [(2022, 'Colombo', '1.9'), (2023, 'Colombo', '1.4'), (2023, 'Kandy', '1.6')]:
+                DegreeProgramZScores.objects.create(degree_program=program, year=year, district=district, z_score=Decimal(z_score))
+            cls.programs.append(program)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_filtered_catalog_uses_constant_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/university-programs/programs/', {'category': 'Maths'})
+        programs = response.json()['programs']
+        self.assertEqual(len(programs), 5)
+        self.assertEqual(programs[0]['zScoreRequired'], 1.6)
+        self.assertEqual(programs[0]['duration'], '4 years')
+        self.assertEqual(programs[0]['careerProspects'], ['Engineer', 'Researcher'])
+
+    def test_snapshot_is_gzipped_and_revalidated_by_etag(self):
+        response = self.client.get('/api/university-programs/programs/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(body['total'], 5)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/university-programs/programs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        plain = self.client.get('/api/university-programs/programs/')
+        self.assertEqual(json.loads(plain.content), body)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DegreeProgramDurations.objects.filter(degree_program=self.programs[0]).delete()
+            DegreeProgramDurations.objects.create(degree_program=self.programs[0], duration_years=3, degree_type='BSc')
+        response = self.client.get('/api/university-programs/programs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('3 years', [program['duration'] for program in response.json()['programs']])
+
+    def test_bumps_from_other_processes_replace_the_snapshot(self):
+        etag = self.client.get('/api/university-programs/programs/')['ETag']
+        DegreePrograms.objects.filter(pk=self.programs[0].pk).update(title='Renamed')
+        self.assertEqual(self.client.get('/api/university-programs/programs/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A bump made elsewhere (an import command, another worker) only reaches this process through the database.
+        CacheVersion.objects.filter(key=CATALOG_VERSION_CACHE_KEY).update(version='bumped-elsewhere')
+        self.assertEqual(self.client.get('/api/university-programs/programs/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # It is picked up once this process's copy of the stamp expires.
+        cache.delete(LOCAL_VERSION_KEY.format(key=CATALOG_VERSION_CACHE_KEY))
+        response = self.client.get('/api/university-programs/programs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed', [program['name'] for program in response.json()['programs']])
+
+
+class ZScoreTrendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = Universities.objects.create(name='University of Peradeniya', is_active=1)
+        cls.rising = DegreePrograms.objects.create(university=university, title='Rising', subject_stream_required='Maths', is_active=1)
+        cls.single = DegreePrograms.objects.create(university=university, title='Single', subject_stream_required='Maths', is_active=1)
+        for year, z_score in [(2015, '0.1000'), (2020, '1.0000'), (2021, '1.1000'), (2022, '1.3000'), (2023, '1.2000')]:
+            DegreeProgramZScores.objects.create(degree_program=cls.rising, year=year, district='Kandy', z_score=Decimal(z_score))
+        DegreeProgramZScores.objects.create(degree_program=cls.single, year=2023, district='Kandy', z_score=Decimal('0.8'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fit_matches_per_series_least_squares(self):
+        fit = fit_trends(
+            np.array([1, 1, 1, 1, 2, 2]),
+            np.array(['Kandy', 'Kandy', 'Kandy', 'Kandy', 'Kandy', 'Galle']),
+            np.array([2020, 2021, 2022, 2023, 2023, 2023]),
+            np.array([1.0, 1.1, 1.3, 1.2, 0.8, 0.5]),
+        )
+        slope, intercept = np.polyfit([2020, 2021, 2022, 2023], [1.0, 1.1, 1.3, 1.2], 1)
+        residuals = np.array([1.0, 1.1, 1.3, 1.2]) - (intercept + slope * np.array([2020, 2021, 2022, 2023]))
+
+        series = {(int(p), str(d)): i for i, (p, d) in enumerate(zip(fit.program_ids, fit.districts))}
+        rising = series[(1, 'Kandy')]
+        self.assertAlmostEqual(fit.slope[rising], slope)
+        self.assertAlmostEqual(fit.volatility[rising], np.sqrt((residuals ** 2).sum() / 2))
+        self.assertAlmostEqual(fit.projected_z_score[rising], intercept + slope * 2024)
+        self.assertEqual(fit.years_observed[rising], 4)
+
+        single = series[(2, 'Galle')]
+        self.assertEqual(fit.slope[single], 0)
+        self.assertEqual(fit.volatility[single], 0)
+        self.assertAlmostEqual(fit.projected_z_score[single], 0.5)
+
+    def test_command_feeds_projections_into_analyze_zscore(self):
+        out = io.StringIO()
+        call_command('rebuild_zscore_trends', stdout=out)
+        self.assertIn('Rebuilt 2 z-score trends', out.getvalue())
+
+        trend = DegreeProgramZScoreTrends.objects.get(degree_program=self.rising, district='Kandy')
+        # 2015 falls outside the five-year window.
+        self.assertEqual((trend.first_year, trend.last_year, trend.years_observed), (2020, 2023, 4))
+        self.assertEqual(trend.projected_year, 2024)
+        self.assertAlmostEqual(trend.projected_z_score, 1.35)
+
+        response = self.client.get('/api/university-programs/analyze-zscore/', {
+            'zscore': '1.25', 'district': 'Kandy', 'stream': 'Physical Science',
+        })
+        programs = {program['title']: program for program in response.json()['eligible_programs']}
+        self.assertEqual(programs['Rising']['probability'], 'High')
+        self.assertEqual(programs['Rising']['projected_probability'], 'Medium')
+        self.assertAlmostEqual(programs['Rising']['trend_slope'], 0.08)
+        self.assertEqual(programs['Single']['projected_zscore'], 0.8)
+        self.assertEqual(programs['Single']['projected_probability'], 'High')
+
+
+class ImportZScoresCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = Universities.objects.create(name='University of Ruhuna', is_active=1)
+        cls.medicine = DegreePrograms.objects.create(university=university, title='Medicine', code='001A', is_active=1)
+        cls.law = DegreePrograms.objects.create(university=university, title='Law', code='002', is_active=1)
+        DegreePrograms.objects.create(university=university, title='Law (Old)', code='002', is_active=0)
+        DegreeProgramZScores.objects.create(degree_program=cls.medicine, year=2023, district='Galle', z_score=Decimal('1.90'))
+
+    def _import(self, content, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8-sig', delete=False) as handle:
+            handle.write(content)
+        self.addCleanup(os.remove, handle.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_zscores', handle.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_upserts_valid_rows_and_reports_invalid_ones(self):
+        out, err = self._import(
+            'Program_Code,Year,District,Z_Score\n'
+            '001a,2023,Galle,2.0451\n'
+            '001A,2023,  Matara ,1.95\n'
+            '001A,2023,Matara,1.97\n'
+            '999,2023,Galle,1.0\n'
+            '002,2023,Galle,1.1\n'
+            '001A,20x3,Galle,1.0\n'
+            '001A,2023,Galle,9.5\n'
+            ',,,\n'
+        )
+        self.assertIn('Imported 2 z-scores from 7 rows (4 skipped)', out)
+        self.assertIn('rows/s', out)
+        self.assertIn("line 5: unknown program code '999'", err)
+        self.assertIn("line 6: program code '002' matches more than one program", err)
+        self.assertIn("line 7: invalid year '20x3'", err)
+        self.assertIn("line 8: invalid z-score '9.5'", err)
+
+        self.assertEqual(
+            sorted(DegreeProgramZScores.objects.values_list('district', 'z_score')),
+            [('Galle', Decimal('2.05')), ('Matara', Decimal('1.97'))],
+        )
+
+    def test_default_year_dry_run_and_missing_columns(self):
+        out, _ = self._import('code,district,zscore\n001A,Kandy,1.5\n', '--year', '2024', '--dry-run')
+        self.assertIn('Validated 1 z-scores', out)
+        self.assertFalse(DegreeProgramZScores.objects.filter(year=2024).exists())
+
+        self._import('code,district,zscore\n001A,Kandy,1.5\n', '--year', '2024')
+        self.assertTrue(DegreeProgramZScores.objects.filter(year=2024, district='Kandy').exists())
+
+        with self.assertRaisesMessage(CommandError, 'Missing required column(s): year'):
+            self._import('code,district,zscore\n001A,Kandy,1.5\n')
@@ -0,0 +1,135 @@
+"""Cutoff trends per (program, district), fitted for all series at once.
+
+Every series is a handful of (year, z-score) points, so instead of looping
+over them the fit is expressed with ``np.bincount`` sums keyed by series:
+ordinary least squares needs only per-series counts, means and centred
+cross-products.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+from django.db import transaction
+
+from .models import DegreeProgramZScores, DegreeProgramZScoreTrends
+from .zscore_index import invalidate_zscore_index
+
+
+logger = logging.getLogger(__name__)
+
+# Only the most recent intakes say much about next year's cutoff.
+TREND_WINDOW_YEARS = 5
+
+
+@dataclass
+class TrendFit:
+    program_ids: np.ndarray
+    districts: np.ndarray
+    years_observed: np.ndarray
+    first_year: np.ndarray
+    last_year: np.ndarray
+    slope: np.ndarray
+    volatility: np.ndarray
+    projected_z_score: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.program_ids)
+
+
+def fit_trends(program_ids: np.ndarray, districts: np.ndarray, years: np.ndarray, z_scores: np.ndarray,
+               window: int = TREND_WINDOW_YEARS) -> TrendFit:
+    """Fit ``z = a + slope * year`` for every (program, district) series.
+
+    Inputs are parallel arrays with one point per (program, district, year).
+    Points older than ``window`` years before a series' latest year are
+    ignored. Volatility is the residual standard deviation (0 until a series
+    has three points), and the projection is the fitted line one year after
+    the latest observation.
+    """
+    keys = np.rec.fromarrays([program_ids, districts], names='program,district')
+    series_keys, series = np.unique(keys, return_inverse=True)
+    series = series.ravel()
+    years = years.astype(float)
+    z_scores = z_scores.astype(float)
+
+    last_year = np.full(len(series_keys), -np.inf)
+    np.maximum.at(last_year, series, years)
+    recent = years > last_year[series] - window
+    series, years, z_scores = series[recent], years[recent], z_scores[recent]
+
+    size = len(series_keys)
+    count = np.bincount(series, minlength=size).astype(float)
+    first_year = np.full(size, np.inf)
+    np.minimum.at(first_year, series, years)
+    mean_year = np.bincount(series, years, minlength=size) / count
+    mean_z = np.bincount(series, z_scores, minlength=size) / count
+
+    year_offset = years - mean_year[series]
+    z_offset = z_scores - mean_z[series]
+    sxx = np.bincount(series, year_offset * year_offset, minlength=size)
+    sxy = np.bincount(series, year_offset * z_offset, minlength=size)
+    slope = np.divide(sxy, sxx, out=np.zeros(size), where=sxx > 0)
+
+    residuals = z_offset - slope[series] * year_offset
+    sse = np.bincount(series, residuals * residuals, minlength=size)
+    dof = count - 2
+    volatility = np.sqrt(np.divide(sse, dof, out=np.zeros(size), where=dof > 0))
+    projected = mean_z + slope * (last_year + 1 - mean_year)
+
+    return TrendFit(
+        program_ids=series_keys['program'],
+        districts=series_keys['district'],
+        years_observed=count.astype(int),
+        first_year=first_year.astype(int),
+        last_year=last_year.astype(int),
+        slope=slope,
+        volatility=volatility,
+        projected_z_score=projected,
+    )
+
+
+def load_series():
+    """One point per (program, district, year); the first row wins, as in the cutoff index."""
+    points = {}
+    rows = DegreeProgramZScores.objects.order_by('pk').values_list('degree_program_id', 'district', 'year', 'z_score')
+    for program_id, district, year, z_score in rows.iterator(chunk_size=5000):
+        points.setdefault((program_id, district, year), float(z_score))
+    if not points:
+        return None
+    keys = list(points)
+    return (
+        np.array([key[0] for key in keys], dtype=np.int64),
+        np.array([key[1] for key in keys], dtype=object).astype(str),
+        np.array([key[2] for key in keys], dtype=np.int64),
+        np.array(list(points.values()), dtype=float),
+    )
+
+
+def rebuild_zscore_trends(window: int = TREND_WINDOW_YEARS, batch_size: int = 1000) -> int:
+    """Replace the trend table from the current cutoffs; returns the number of series."""
+    series = load_series()
+    trends: List[DegreeProgramZScoreTrends] = []
+    if series is not None:
+        fit = fit_trends(*series, window=window)
+        for index in range(len(fit)):
+            trends.append(DegreeProgramZScoreTrends(
+                degree_program_id=int(fit.program_ids[index]),
+                district=str(fit.districts[index]),
+                years_observed=int(fit.years_observed[index]),
+                first_year=int(fit.first_year[index]),
+                last_year=int(fit.last_year[index]),
+                slope=round(float(fit.slope[index]), 6),
+                volatility=round(float(fit.volatility[index]), 6),
+                projected_year=int(fit.last_year[index]) + 1,
+                projected_z_score=round(float(fit.projected_z_score[index]), 4),
+            ))
+
+    with transaction.atomic():
+        DegreeProgramZScoreTrends.objects.all().delete()
+        DegreeProgramZScoreTrends.objects.bulk_create(trends, batch_size=batch_size)
+        transaction.on_commit(invalidate_zscore_index)
+    logger.info('Rebuilt %d z-score trends', len(trends))
+    return len(trends)
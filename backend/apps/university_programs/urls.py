@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     # Z-Score Analysis endpoint
     path('analyze-zscore/', views.analyze_zscore, name='analyze_zscore'),
+    # Batch Z-Score Analysis for a whole class of candidates
+    path('analyze-zscore/batch/', views.analyze_zscore_batch, name='analyze_zscore_batch'),
     # Get all programs for program matching page
     path('programs/', views.get_all_programs, name='get_all_programs'),
 ]
@@ -1,10 +1,15 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Max
 import json
-from .models import DegreePrograms, DegreeProgramZScores, DegreeProgramDurations
+import math
 from apps.universities.models import Universities, Faculties
+from .catalog import catalog_payload, get_catalog_snapshot, program_catalog_queryset, serialize_program
+from .zscore_batch import BANDS, MAX_BATCH_CANDIDATES, Candidate
+from .zscore_index import get_zscore_index
 
 
 def analyze_zscore(request):
@@ -33,89 +38,9 @@ def analyze_zscore(request):
                     'message': 'Invalid Z-score format'
                 }, status=400)
             
-            # Get the most recent year for each degree program in the specified district
-            # Subquery to get the max year per degree_program and district
-            recent_years = DegreeProgramZScores.objects.filter(
-                district=district
-            ).values('degree_program_id').annotate(
-                max_year=Max('year')
-            )
-            
-            # Build a list of (degree_program_id, max_year) tuples
-            program_year_pairs = [(item['degree_program_id'], item['max_year']) for item in recent_years]
-            
-            # Get all z-score records for the most recent year of each program in this district
-            eligible_programs = []
-            
-            for program_id, max_year in program_year_pairs:
-                z_score_record = DegreeProgramZScores.objects.filter(
-                    degree_program_id=program_id,
-                    district=district,
-                    year=max_year
-                ).first()
-                
-                if not z_score_record:
-                    continue
-                
-                # Get the degree program with related data
-                try:
-                    degree_program = DegreePrograms.objects.select_related(
-                        'university', 'faculty'
-                    ).get(
-                        degree_program_id=program_id,
-                        is_active=1
-                    )
-                except DegreePrograms.DoesNotExist:
-                    continue
-                
-                # Filter by stream
-                # Map frontend stream to database values
-                stream_mapping = {
-                    'Physical Science': 'Maths',
-                    'Biological Science': 'Science',
-                    'Mathematics': 'Maths',
-                    'Commerce': 'Commerce',
-                    'Arts': 'Arts',
-                    'Technology': 'Technology',
-                    'Other': 'Other'
-                }
-                
-                db_stream = stream_mapping.get(stream, stream)
-                
-                # Check if program matches the stream or accepts "Other" (any stream)
-                if degree_program.subject_stream_required not in [db_stream, 'Other', None]:
-                    continue
-                
-                # Calculate probability
-                program_zscore = float(z_score_record.z_score)
-                
-                if user_zscore >= program_zscore:
-                    probability = 'High'
-                elif user_zscore >= (program_zscore - 0.1):
-                    probability = 'Medium'
-                else:
-                    probability = 'Low'
-                
-                # Build response object
-                eligible_programs.append({
-                    'degree_program_id': degree_program.degree_program_id,
-                    'title': degree_program.title,
-                    'code': degree_program.code,
-                    'description': degree_program.description,
-                    'career_paths': degree_program.career_paths,
-                    'university_id': degree_program.university.university_id if degree_program.university else None,
-                    'university_name': degree_program.university.name if degree_program.university else None,
-                    'faculty_id': degree_program.faculty.faculty_id if degree_program.faculty else None,
-                    'faculty_name': degree_program.faculty.name if degree_program.faculty else None,
-                    'required_zscore': program_zscore,
-                    'year': z_score_record.year,
-                    'district': district,
-                    'probability': probability
-                })
-            
-            # Sort by probability (High first, then Medium, then Low) and then by required z-score
-            probability_order = {'High': 0, 'Medium': 1, 'Low': 2}
-            eligible_programs.sort(key=lambda x: (probability_order[x['probability']], -x['required_zscore']))
+            # Latest-year cutoffs come from the in-memory index, already ordered
+            # High, Medium, Low and by required z-score within each band.
+            eligible_programs = get_zscore_index().eligible_programs(user_zscore, district, stream)
             
             return JsonResponse({
                 'success': True,
@@ -138,6 +63,90 @@ def analyze_zscore(request):
     }, status=405)
 
 
+def _parse_candidates(raw_candidates):
+    if not isinstance(raw_candidates, list) or not raw_candidates:
+        raise ValueError('candidates must be a non-empty list')
+    if len(raw_candidates) > MAX_BATCH_CANDIDATES:
+        raise ValueError(f'At most {MAX_BATCH_CANDIDATES} candidates per request')
+
+    candidates = []
+    for position, raw in enumerate(raw_candidates):
+        if not isinstance(raw, dict):
+            raise ValueError(f'Candidate {position} must be an object')
+        zscore, district, stream = raw.get('zscore'), raw.get('district'), raw.get('stream')
+        if zscore in (None, '') or not district or not stream:
+            raise ValueError(f'Candidate {position}: Z-score, district, and stream are required')
+        try:
+            zscore = float(zscore)
+        except (TypeError, ValueError):
+            raise ValueError(f'Candidate {position}: Invalid Z-score format')
+        if not math.isfinite(zscore):
+            raise ValueError(f'Candidate {position}: Invalid Z-score format')
+        candidates.append(Candidate(zscore=zscore, district=str(district), stream=str(stream), ref=raw.get('id', position)))
+    return candidates
+
+
+@csrf_exempt
+def analyze_zscore_batch(request):
+    """
+    Run analyze_zscore for a list of candidates in one request.
+
+    Each result lists program ids per band (high/medium/low) in the same order
+    analyze_zscore returns them; program details and the cutoffs for the
+    requested districts are included once for the whole batch.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            candidates = _parse_candidates(data.get('candidates') if isinstance(data, dict) else None)
+        except json.JSONDecodeError:
+            return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+        try:
+            matrix = get_zscore_index().cutoff_matrix()
+            results = matrix.evaluate(candidates)
+
+            listed = {program_id for result in results for band, _ in BANDS for program_id in result[band]}
+            programs = {
+                program['degree_program_id']: program
+                for program in matrix.programs
+                if program['degree_program_id'] in listed
+            }
+            districts = sorted({candidate.district for candidate in candidates})
+            return JsonResponse({
+                'success': True,
+                'results': results,
+                'programs': programs,
+                'cutoffs': {district: matrix.district_cutoffs(district) for district in districts},
+                'total_candidates': len(results),
+            })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'message': f'Error analyzing Z-scores: {str(e)}'
+            }, status=500)
+
+    return JsonResponse({
+        'success': False,
+        'message': 'Only POST method allowed'
+    }, status=405)
+
+
+def _catalog_snapshot_response(request, snapshot):
+    if snapshot.etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(snapshot.gzipped, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(snapshot.content(), content_type='application/json')
+    response['ETag'] = snapshot.etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
 def get_all_programs(request):
     """
     Get all degree programs with their details for program matching page
@@ -148,10 +157,12 @@ def get_all_programs(request):
             search_term = request.GET.get('search', '').strip()
             category = request.GET.get('category', 'all')
             
+            # The unfiltered catalog is served from the precomputed snapshot
+            if category == 'all' and not search_term:
+                return _catalog_snapshot_response(request, get_catalog_snapshot())
+            
             # Start with active programs
-            programs_query = DegreePrograms.objects.filter(is_active=1).select_related(
-                'university', 'faculty'
-            )
+            programs_query = program_catalog_queryset()
             
             # Apply category filter based on subject_stream_required
             # Category now directly maps to subject_stream_required values
@@ -160,7 +171,6 @@ def get_all_programs(request):
             
             # Apply search filter
             if search_term:
-                from django.db.models import Q
                 programs_query = programs_query.filter(
                     Q(title__icontains=search_term) |
                     Q(description__icontains=search_term) |
@@ -168,47 +178,8 @@ def get_all_programs(request):
                     Q(faculty__name__icontains=search_term)
                 )
             
-            # Build response
-            programs_list = []
-            
-            for program in programs_query:
-                # Get duration information
-                duration_info = DegreeProgramDurations.objects.filter(
-                    degree_program=program
-                ).first()
-                
-                # Get the most recent z-score (from any district)
-                recent_zscore = DegreeProgramZScores.objects.filter(
-                    degree_program=program
-                ).order_by('-year', '-z_score').first()
-                
-                # Use subject_stream_required directly as category
-                program_category = program.subject_stream_required or 'Other'
-                
-                programs_list.append({
-                    'id': program.degree_program_id,
-                    'name': program.title,
-                    'code': program.code,
-                    'university': program.university.name if program.university else None,
-                    'university_id': program.university.university_id if program.university else None,
-                    'faculty': program.faculty.name if program.faculty else None,
-                    'faculty_id': program.faculty.faculty_id if program.faculty else None,
-                    'duration': f"{duration_info.duration_years} years" if duration_info else "N/A",
-                    'duration_years': duration_info.duration_years if duration_info else None,
-                    'degree_type': duration_info.degree_type if duration_info else None,
-                    'zScoreRequired': float(recent_zscore.z_score) if recent_zscore else None,
-                    'description': program.description,
-                    'careerProspects': program.career_paths.split(',') if program.career_paths else [],
-                    'syllabus_url': program.syllabus_url,
-                    'category': program_category,
-                    'subject_stream_required': program.subject_stream_required,
-                })
-            
-            return JsonResponse({
-                'success': True,
-                'programs': programs_list,
-                'total': len(programs_list)
-            })
+            programs_list = [serialize_program(program) for program in programs_query]
+            return JsonResponse(catalog_payload(programs_list))
             
         except Exception as e:
             return JsonResponse({
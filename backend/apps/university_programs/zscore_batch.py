@@ -0,0 +1,150 @@
+"""Batch eligibility checks over a programs x districts cutoff matrix.
+
+Gives the same High/Medium/Low bands as ``analyze_zscore``, but for many
+candidates at once. Candidates are compared against their district's row of
+the matrix with NumPy broadcasting, in chunks that keep memory bounded.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .zscore_index import MEDIUM_MARGIN, OPEN_STREAMS, STREAM_MAPPING, ZScoreIndex
+
+
+MAX_BATCH_CANDIDATES = 10000
+# Candidates compared per broadcast; bounds the (chunk x programs) temporaries.
+CHUNK_SIZE = 2048
+
+HIGH, MEDIUM, LOW, INELIGIBLE = 0, 1, 2, -1
+BANDS = (('high', HIGH), ('medium', MEDIUM), ('low', LOW))
+
+
+@dataclass(frozen=True)
+class Candidate:
+    zscore: float
+    district: str
+    stream: str
+    ref: object = None
+
+
+@dataclass
+class CutoffMatrix:
+    program_ids: np.ndarray            # (P,)
+    programs: List[Dict[str, object]]  # (P,) serialized program fields
+    districts: Dict[str, int]          # district -> row; the extra last row is all-NaN
+    cutoffs: np.ndarray                # (D + 1, P), NaN where a program has no cutoff
+    medium_cutoffs: np.ndarray         # cutoffs - MEDIUM_MARGIN
+    years: np.ndarray                  # (D + 1, P)
+    order: np.ndarray                  # (D + 1, P) columns by cutoff descending, then program id
+    stream_masks: Dict[Optional[str], np.ndarray]  # db stream -> (P,) programs open to it
+
+    @classmethod
+    def from_index(cls, index: ZScoreIndex) -> 'CutoffMatrix':
+        programs: Dict[int, Dict[str, object]] = {}
+        streams: Dict[int, Optional[str]] = {}
+        for district_streams in index.cutoffs.values():
+            for stream, cutoffs in district_streams.items():
+                for cutoff in cutoffs:
+                    program_id = cutoff.program['degree_program_id']
+                    programs[program_id] = cutoff.program
+                    streams[program_id] = stream
+
+        program_ids = np.array(sorted(programs), dtype=np.int64)
+        column = {program_id: position for position, program_id in enumerate(program_ids.tolist())}
+        districts = {district: row for row, district in enumerate(sorted(index.cutoffs))}
+
+        cutoffs = np.full((len(districts) + 1, len(program_ids)), np.nan)
+        years = np.zeros(cutoffs.shape, dtype=np.int32)
+        for district, district_streams in index.cutoffs.items():
+            row = districts[district]
+            for stream_cutoffs in district_streams.values():
+                for cutoff in stream_cutoffs:
+                    position = column[cutoff.program['degree_program_id']]
+                    cutoffs[row, position] = cutoff.z_score
+                    years[row, position] = cutoff.year
+
+        # lexsort keys run last-first: missing cutoffs last, then cutoff descending, then id ascending.
+        order = np.array([
+            np.lexsort((program_ids, -np.nan_to_num(row, nan=0.0), np.isnan(row))) for row in cutoffs
+        ], dtype=np.intp).reshape(cutoffs.shape)
+
+        program_streams = [streams[program_id] for program_id in program_ids.tolist()]
+        open_mask = np.array([stream in OPEN_STREAMS for stream in program_streams], dtype=bool)
+        stream_masks = {None: open_mask}
+        for stream in set(program_streams) - set(OPEN_STREAMS):
+            stream_masks[stream] = open_mask | np.array([value == stream for value in program_streams], dtype=bool)
+
+        return cls(
+            program_ids=program_ids,
+            programs=[programs[program_id] for program_id in program_ids.tolist()],
+            districts=districts,
+            cutoffs=cutoffs,
+            medium_cutoffs=cutoffs - MEDIUM_MARGIN,
+            years=years,
+            order=order,
+            stream_masks=stream_masks,
+        )
+
+    def stream_mask(self, stream: str) -> np.ndarray:
+        db_stream = STREAM_MAPPING.get(stream, stream)
+        return self.stream_masks.get(db_stream, self.stream_masks[None])
+
+    def classify(self, zscores: np.ndarray, district_rows: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """(n, P) band codes; ``masks`` marks which programs accept each candidate's stream."""
+        cutoffs = self.cutoffs[district_rows]
+        user = zscores[:, None]
+        with np.errstate(invalid='ignore'):
+            codes = np.where(user >= cutoffs, HIGH, np.where(user >= self.medium_cutoffs[district_rows], MEDIUM, LOW))
+        return np.where(np.isnan(cutoffs) | ~masks, INELIGIBLE, codes).astype(np.int8)
+
+    def evaluate(self, candidates: Sequence[Candidate], chunk_size: int = CHUNK_SIZE) -> List[Dict[str, object]]:
+        """Per candidate, program ids in each band ordered as ``analyze_zscore`` orders them."""
+        missing_row = len(self.districts)
+        stream_keys: Dict[str, int] = {}
+        stream_rows: List[np.ndarray] = []
+        for candidate in candidates:
+            if candidate.stream not in stream_keys:
+                stream_keys[candidate.stream] = len(stream_rows)
+                stream_rows.append(self.stream_mask(candidate.stream))
+        stream_table = np.array(stream_rows, dtype=bool).reshape(len(stream_rows), len(self.program_ids))
+
+        results: List[Dict[str, object]] = []
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            zscores = np.fromiter((candidate.zscore for candidate in chunk), dtype=float, count=len(chunk))
+            district_rows = np.fromiter(
+                (self.districts.get(candidate.district, missing_row) for candidate in chunk), dtype=np.intp, count=len(chunk)
+            )
+            stream_index = np.fromiter((stream_keys[candidate.stream] for candidate in chunk), dtype=np.intp, count=len(chunk))
+            order = self.order[district_rows]
+            codes = np.take_along_axis(self.classify(zscores, district_rows, stream_table[stream_index]), order, axis=1)
+            ordered_ids = self.program_ids[order]
+            chunk_results = [
+                {'id': candidate.ref, 'zscore': candidate.zscore, 'district': candidate.district, 'stream': candidate.stream}
+                for candidate in chunk
+            ]
+            for band, code in BANDS:
+                # One boolean select per band, then cut the flat id list at each candidate's boundary.
+                selected = codes == code
+                flat_ids = ordered_ids[selected].tolist()
+                bounds = [0, *np.cumsum(selected.sum(axis=1)).tolist()]
+                for position, result in enumerate(chunk_results):
+                    result[band] = flat_ids[bounds[position]:bounds[position + 1]]
+            results.extend(chunk_results)
+        return results
+
+    def district_cutoffs(self, district: str) -> Dict[int, Dict[str, object]]:
+        """``{program_id: {'z_score', 'year'}}`` for the programs with a cutoff in ``district``."""
+        row = self.districts.get(district)
+        if row is None:
+            return {}
+        present = ~np.isnan(self.cutoffs[row])
+        return {
+            program_id: {'z_score': z_score, 'year': year}
+            for program_id, z_score, year in zip(
+                self.program_ids[present].tolist(), self.cutoffs[row][present].tolist(), self.years[row][present].tolist()
+            )
+        }
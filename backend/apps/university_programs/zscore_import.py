@@ -0,0 +1,174 @@
+"""Streaming import of z-score cutoffs from CSV (including CSV saved from Excel).
+
+Rows are read one at a time, validated, resolved to programs through an
+in-memory code map and upserted in batches, so memory stays flat however
+large the handbook table is.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from django.db import connection, transaction
+
+from .catalog import invalidate_program_catalog
+from .models import DegreePrograms, DegreeProgramZScores
+from .zscore_index import invalidate_zscore_index
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 2000
+# Published cutoffs sit well inside this range; anything outside is a typo.
+Z_SCORE_LIMIT = Decimal('5')
+Z_SCORE_PLACES = Decimal('0.01')
+DISTRICT_MAX_LENGTH = DegreeProgramZScores._meta.get_field('district').max_length
+MAX_REPORTED_ERRORS = 50
+
+# Accepted spellings of each column, compared case-insensitively
+COLUMN_ALIASES = {
+    'code': ('program_code', 'code', 'course_code', 'degree_program_code'),
+    'year': ('year', 'academic_year'),
+    'district': ('district',),
+    'z_score': ('z_score', 'zscore', 'z-score', 'cutoff'),
+}
+
+ZScoreKey = Tuple[int, int, str]
+
+
+class ZScoreImportError(Exception):
+    """The file cannot be imported at all (e.g. required columns are missing)."""
+
+
+@dataclass
+class ImportReport:
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_skipped: int = 0
+    elapsed: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line_number: int, message: str) -> None:
+        self.rows_skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'line {line_number}: {message}')
+
+
+def program_code_map() -> Tuple[Dict[str, int], Set[str]]:
+    """Program ids by normalised code, and the codes shared by several programs."""
+    codes: Dict[str, int] = {}
+    ambiguous: Set[str] = set()
+    for code, program_id in DegreePrograms.objects.exclude(code__isnull=True).values_list('code', 'degree_program_id'):
+        code = code.strip().upper()
+        if not code:
+            continue
+        if code in codes and codes[code] != program_id:
+            ambiguous.add(code)
+        codes[code] = program_id
+    return codes, ambiguous
+
+
+def _resolve_columns(fieldnames: Optional[Iterable[str]], default_year: Optional[int]) -> Dict[str, str]:
+    headers = {name.strip().lower(): name for name in fieldnames or [] if name}
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        match = next((headers[alias] for alias in aliases if alias in headers), None)
+        if match is not None:
+            columns[column] = match
+    missing = [column for column in COLUMN_ALIASES if column not in columns and not (column == 'year' and default_year)]
+    if missing:
+        raise ZScoreImportError(f'Missing required column(s): {", ".join(missing)}')
+    return columns
+
+
+def iter_cutoffs(stream: TextIO, report: ImportReport, default_year: Optional[int] = None) -> Iterator[Tuple[ZScoreKey, Decimal]]:
+    """Validated ``((program_id, year, district), z_score)`` rows; invalid rows are recorded on ``report``."""
+    reader = csv.DictReader(stream)
+    columns = _resolve_columns(reader.fieldnames, default_year)
+    codes, ambiguous = program_code_map()
+
+    for row in reader:
+        report.rows_read += 1
+        line_number = reader.line_num
+        code = (row.get(columns['code']) or '').strip().upper()
+        district = ' '.join((row.get(columns['district']) or '').split())
+        raw_year = (row.get(columns['year']) or '').strip() if 'year' in columns else ''
+        raw_z_score = (row.get(columns['z_score']) or '').strip()
+
+        if not code and not district and not raw_z_score:
+            report.rows_read -= 1  # blank spacer row
+            continue
+        if code in ambiguous:
+            report.reject(line_number, f'program code {code!r} matches more than one program')
+            continue
+        program_id = codes.get(code)
+        if program_id is None:
+            report.reject(line_number, f'unknown program code {code!r}')
+            continue
+        if not district or len(district) > DISTRICT_MAX_LENGTH:
+            report.reject(line_number, f'invalid district {district!r}')
+            continue
+        try:
+            year = int(raw_year) if raw_year else default_year
+        except ValueError:
+            year = None
+        if year is None or not 1900 <= year <= 2100:
+            report.reject(line_number, f'invalid year {raw_year!r}')
+            continue
+        try:
+            z_score = Decimal(raw_z_score).quantize(Z_SCORE_PLACES, rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            z_score = None
+        if z_score is None or not z_score.is_finite() or abs(z_score) > Z_SCORE_LIMIT:
+            report.reject(line_number, f'invalid z-score {raw_z_score!r}')
+            continue
+        yield (program_id, year, district), z_score
+
+
+def _upsert(batch: Dict[ZScoreKey, Decimal]) -> int:
+    rows = [
+        DegreeProgramZScores(degree_program_id=program_id, year=year, district=district, z_score=z_score)
+        for (program_id, year, district), z_score in batch.items()
+    ]
+    # MySQL upserts on any unique key and rejects an explicit conflict target.
+    unique_fields = ['degree_program', 'year', 'district'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        DegreeProgramZScores.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=unique_fields, update_fields=['z_score'],
+        )
+    return len(rows)
+
+
+def import_zscores(stream: TextIO, default_year: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                   dry_run: bool = False) -> ImportReport:
+    """Validate and upsert every row of ``stream``; a later row for the same key replaces an earlier one."""
+    report = ImportReport()
+    started = time.perf_counter()
+    batch: Dict[ZScoreKey, Decimal] = {}
+    for key, z_score in iter_cutoffs(stream, report, default_year):
+        # Keyed so one statement never upserts the same row twice.
+        batch[key] = z_score
+        if len(batch) >= batch_size:
+            report.rows_written += len(batch) if dry_run else _upsert(batch)
+            batch = {}
+    if batch:
+        report.rows_written += len(batch) if dry_run else _upsert(batch)
+    report.elapsed = time.perf_counter() - started
+
+    if report.rows_written and not dry_run:
+        # bulk_create bypasses the signals that normally refresh these.
+        invalidate_zscore_index()
+        invalidate_program_catalog()
+    logger.info(
+        'Imported %d z-scores (%d rows read, %d skipped) in %.2fs',
+        report.rows_written, report.rows_read, report.rows_skipped, report.elapsed,
+    )
+    return report
@@ -0,0 +1,228 @@
+"""Process-local index of the latest z-score cutoffs for eligibility checks.
+
+The index holds, for every (district, stream), the latest-year cutoff of each
+active degree program sorted ascending, so a student's z-score splits it into
+High/Medium/Low with two bisects, so a lookup makes no query. It is rebuilt
+lazily when its version stamp changes. The signals in ``signals.py`` bump
+the stamp whenever a program, cutoff, university or faculty changes; it is
+a ``cache_versions`` row, so bumps made by management commands or other
+workers reach every process. Each process re-reads the row at most every
+``CACHE_VERSION_MAX_AGE`` seconds.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from apps.accounts.cache_versions import bump_version, current_version as _current_version
+
+from .models import DegreePrograms, DegreeProgramZScores, DegreeProgramZScoreTrends
+
+if TYPE_CHECKING:
+    from .zscore_batch import CutoffMatrix
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'university_programs:zscore_index_version'
+# A student within this margin below the cutoff still has a 'Medium' chance.
+MEDIUM_MARGIN = 0.1
+# Programs with one of these streams accept students from any stream.
+OPEN_STREAMS = ('Other', None)
+
+# Frontend stream names mapped to degree_programs.subject_stream_required
+STREAM_MAPPING = {
+    'Physical Science': 'Maths',
+    'Biological Science': 'Science',
+    'Mathematics': 'Maths',
+    'Commerce': 'Commerce',
+    'Arts': 'Arts',
+    'Technology': 'Technology',
+    'Other': 'Other'
+}
+
+
+PROBABILITIES = ('High', 'Medium', 'Low')
+
+
+def probability_thresholds(cutoff: float) -> Tuple[float, float]:
+    """The lowest z-scores with a High and with a Medium chance against ``cutoff``."""
+    return cutoff, cutoff - MEDIUM_MARGIN
+
+
+def admission_probability(user_zscore: float, cutoff: float) -> str:
+    """The band for one cutoff; ``CutoffBucket.split`` bands many by the same thresholds."""
+    return PROBABILITIES[sum(user_zscore < threshold for threshold in probability_thresholds(cutoff))]
+
+
+@dataclass(frozen=True)
+class Cutoff:
+    z_score: float
+    year: int
+    # Serialized program fields, shared by every district's entry for the program
+    program: Dict[str, object]
+    stream: Optional[str] = None
+    # Projection fields from DegreeProgramZScoreTrends, when a trend has been built
+    trend: Optional[Dict[str, object]] = None
+
+
+@dataclass
+class CutoffBucket:
+    """Cutoffs for one (district, stream), ascending by z-score."""
+    cutoffs: List[Cutoff] = field(default_factory=list)
+    high_keys: List[float] = field(default_factory=list)
+    medium_keys: List[float] = field(default_factory=list)
+
+    @classmethod
+    def from_cutoffs(cls, cutoffs: List[Cutoff]) -> 'CutoffBucket':
+        # Ties keep ascending program ids once the slices are reversed.
+        ordered = sorted(cutoffs, key=lambda cutoff: (cutoff.z_score, -cutoff.program['degree_program_id']))
+        thresholds = [probability_thresholds(cutoff.z_score) for cutoff in ordered]
+        return cls(
+            cutoffs=ordered,
+            high_keys=[high for high, _ in thresholds],
+            medium_keys=[medium for _, medium in thresholds],
+        )
+
+    def split(self, user_zscore: float) -> Tuple[List[Cutoff], List[Cutoff], List[Cutoff]]:
+        """(high, medium, low) cutoffs, each highest z-score first."""
+        high_end = bisect_right(self.high_keys, user_zscore)
+        medium_end = bisect_right(self.medium_keys, user_zscore)
+        return (
+            self.cutoffs[:high_end][::-1],
+            self.cutoffs[high_end:medium_end][::-1],
+            self.cutoffs[medium_end:][::-1],
+        )
+
+
+def _serialize_program(row: Dict[str, object]) -> Dict[str, object]:
+    return {
+        'degree_program_id': row['degree_program_id'],
+        'title': row['title'],
+        'code': row['code'],
+        'description': row['description'],
+        'career_paths': row['career_paths'],
+        'university_id': row['university__university_id'],
+        'university_name': row['university__name'],
+        'faculty_id': row['faculty__faculty_id'],
+        'faculty_name': row['faculty__name'],
+    }
+
+
+class ZScoreIndex:
+    def __init__(self, version: Optional[str], cutoffs: Dict[str, Dict[Optional[str], List[Cutoff]]]):
+        """``cutoffs`` maps district -> program stream -> latest cutoff per program."""
+        self.version = version
+        self.cutoffs = cutoffs
+        self._buckets: Dict[Tuple[str, Optional[str]], CutoffBucket] = {}
+        for district, streams in cutoffs.items():
+            open_cutoffs = [cutoff for stream in OPEN_STREAMS for cutoff in streams.get(stream, [])]
+            # (district, None) serves any stream with no programs of its own.
+            self._buckets[(district, None)] = CutoffBucket.from_cutoffs(open_cutoffs)
+            for stream, stream_cutoffs in streams.items():
+                if stream not in OPEN_STREAMS:
+                    self._buckets[(district, stream)] = CutoffBucket.from_cutoffs(stream_cutoffs + open_cutoffs)
+        self._matrix = None
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'ZScoreIndex':
+        """Load active programs, their latest cutoff per district and cutoff trends in three queries."""
+        programs = {
+            row['degree_program_id']: (row['subject_stream_required'], _serialize_program(row))
+            for row in DegreePrograms.objects.filter(is_active=1).values(
+                'degree_program_id', 'title', 'code', 'description', 'career_paths', 'subject_stream_required',
+                'university__university_id', 'university__name', 'faculty__faculty_id', 'faculty__name',
+            )
+        }
+
+        latest: Dict[Tuple[str, int], Tuple[int, float]] = {}
+        rows = DegreeProgramZScores.objects.filter(degree_program__is_active=1).order_by('pk').values_list(
+            'degree_program_id', 'district', 'year', 'z_score'
+        )
+        for program_id, district, year, z_score in rows.iterator(chunk_size=5000):
+            current = latest.get((district, program_id))
+            # The first row of the latest year wins, as the per-program lookup used to.
+            if current is None or year > current[0]:
+                latest[(district, program_id)] = (year, float(z_score))
+
+        trends = {
+            (district, program_id): {
+                'projected_year': projected_year,
+                'projected_zscore': projected_z_score,
+                'trend_slope': slope,
+                'trend_volatility': volatility,
+            }
+            for program_id, district, projected_year, projected_z_score, slope, volatility
+            in DegreeProgramZScoreTrends.objects.filter(degree_program__is_active=1).values_list(
+                'degree_program_id', 'district', 'projected_year', 'projected_z_score', 'slope', 'volatility'
+            )
+        }
+
+        by_stream: Dict[str, Dict[Optional[str], List[Cutoff]]] = {}
+        for (district, program_id), (year, z_score) in latest.items():
+            stream, program = programs[program_id]
+            cutoff = Cutoff(z_score, year, program, stream, trends.get((district, program_id)))
+            by_stream.setdefault(district, {}).setdefault(stream, []).append(cutoff)
+        return cls(version, by_stream)
+
+    def cutoff_matrix(self) -> CutoffMatrix:
+        """The same cutoffs as a programs x districts array for batch lookups."""
+        if self._matrix is None:
+            from .zscore_batch import CutoffMatrix
+
+            self._matrix = CutoffMatrix.from_index(self)
+        return self._matrix
+
+    def bucket(self, district: str, stream: str) -> CutoffBucket:
+        db_stream = STREAM_MAPPING.get(stream, stream)
+        return self._buckets.get((district, db_stream)) or self._buckets.get((district, None)) or CutoffBucket()
+
+    def eligible_programs(self, user_zscore: float, district: str, stream: str) -> List[Dict[str, object]]:
+        """Programs for ``district``/``stream``, High then Medium then Low, highest cutoff first."""
+        results = []
+        for probability, cutoffs in zip(PROBABILITIES, self.bucket(district, stream).split(user_zscore)):
+            for cutoff in cutoffs:
+                result = {
+                    **cutoff.program,
+                    'required_zscore': cutoff.z_score,
+                    'year': cutoff.year,
+                    'district': district,
+                    'probability': probability,
+                }
+                if cutoff.trend is not None:
+                    result.update(cutoff.trend)
+                    result['projected_probability'] = admission_probability(user_zscore, cutoff.trend['projected_zscore'])
+                results.append(result)
+        return results
+
+
+_index: Optional[ZScoreIndex] = None
+_index_lock = threading.Lock()
+
+
+def current_version() -> str:
+    return _current_version(VERSION_CACHE_KEY, max_age=settings.CACHE_VERSION_MAX_AGE)
+
+
+def invalidate_zscore_index() -> None:
+    """Force every process to rebuild on its next lookup; call after bulk writes that bypass signals."""
+    bump_version(VERSION_CACHE_KEY)
+
+
+def get_zscore_index() -> ZScoreIndex:
+    """The current index, rebuilt first if the version stamp has moved."""
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = ZScoreIndex.build(version)
+            logger.info('Rebuilt z-score index (version %s)', version)
+        return _index
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+from apps.reports.rendering import build_pdf, render_pdf, sample_styles
+
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=sample_styles()['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    textColor=colors.HexColor('#2563eb'),
+    alignment=1  # Center alignment
+)
+
+INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+STATS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')])
+])
+
+FEEDBACK_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+def _share(count: int, total: int) -> str:
+    return f"{(count / total * 100):.1f}%" if total > 0 else "0%"
+
+
+def render_feedback_report(payload: Dict[str, object]) -> bytes:
+    """Render the feedback report from plain data prepared by ``export_feedback_report``."""
+    styles = sample_styles()
+    stats = payload['stats']
+    feedback_list = payload['feedback']
+    total = stats['total_feedback']
+    story: List = []
+
+    story.append(Paragraph("Feedback Report", TITLE_STYLE))
+    story.append(Spacer(1, 20))
+
+    report_info = [
+        ["Report Generated:", payload['generated_at']],
+        ["University Student ID:", str(payload['university_student_id'])],
+        ["Service Type Filter:", payload['service_type'].title()],
+        ["Total Feedback:", str(total)],
+        ["Average Rating:", f"{stats['average_rating']}/5"],
+    ]
+    info_table = Table(report_info, colWidths=[2*inch, 3*inch])
+    info_table.setStyle(INFO_TABLE_STYLE)
+    story.append(info_table)
+    story.append(Spacer(1, 20))
+
+    stats_data = [
+        ["Metric", "Count", "Percentage"],
+        ["Positive Feedback", str(stats['positive']), _share(stats['positive'], total)],
+        ["Neutral Feedback", str(stats['neutral']), _share(stats['neutral'], total)],
+        ["Negative Feedback", str(stats['negative']), _share(stats['negative'], total)],
+        ["Mentoring Sessions", str(stats['mentoring_count']), _share(stats['mentoring_count'], total)],
+        ["Tutoring Sessions", str(stats['tutoring_count']), _share(stats['tutoring_count'], total)],
+    ]
+    stats_table = Table(stats_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
+    stats_table.setStyle(STATS_TABLE_STYLE)
+
+    story.append(Paragraph("Feedback Statistics", styles['Heading2']))
+    story.append(Spacer(1, 10))
+    story.append(stats_table)
+    story.append(Spacer(1, 30))
+
+    if feedback_list:
+        story.append(Paragraph("Detailed Feedback", styles['Heading2']))
+        story.append(Spacer(1, 10))
+
+        feedback_data = [["Date", "Student", "Service", "Rating", "Sentiment", "Comment"]]
+        for feedback in feedback_list:
+            # Truncate long comments for the table
+            comment = feedback['comment'][:100] + "..." if len(feedback['comment']) > 100 else feedback['comment']
+            feedback_data.append([
+                feedback['date'],
+                feedback['student'],
+                feedback['service_type'].title(),
+                f"{feedback['rating']}/5",
+                feedback['sentiment'].title(),
+                comment
+            ])
+
+        feedback_table = Table(feedback_data, colWidths=[0.8*inch, 1.2*inch, 0.8*inch, 0.6*inch, 0.8*inch, 2.8*inch])
+        feedback_table.setStyle(FEEDBACK_TABLE_STYLE)
+        story.append(feedback_table)
+    else:
+        story.append(Paragraph("No feedback found for the selected criteria.", styles['Normal']))
+
+    return build_pdf(story)
+
+
+def generate_feedback_report_pdf(payload: Dict[str, object]) -> bytes:
+    return render_pdf(render_feedback_report, payload)
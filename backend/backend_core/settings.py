@@ -63,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.administration.middleware.RequestMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'backend_core.urls'
@@ -98,6 +99,44 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Celery configuration (background jobs such as admin PDF reports)
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=None)
+# Without a broker, tasks run in-process when they are queued
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not CELERY_BROKER_URL, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TIMEZONE = 'Asia/Colombo'
+# Seconds between expiry sweeps (lapsed requests, stale video rooms, unpaid bookings)
+EXPIRY_SWEEP_INTERVAL = config('EXPIRY_SWEEP_INTERVAL', default=300, cast=int)
+# Seconds between runs that move the materialized tutoring session horizon forward
+OCCURRENCE_EXTENSION_INTERVAL = config('OCCURRENCE_EXTENSION_INTERVAL', default=24 * 60 * 60, cast=int)
+CELERY_BEAT_SCHEDULE = {
+    'sweep-expired': {
+        'task': 'accounts.sweep_expired',
+        'schedule': EXPIRY_SWEEP_INTERVAL,
+    },
+    'extend-tutoring-occurrences': {
+        'task': 'tutoring.extend_occurrences',
+        'schedule': OCCURRENCE_EXTENSION_INTERVAL,
+    },
+}
+
+# Seconds hot read paths (z-score lookups, the program catalog) reuse a cache
+# version stamp before re-reading it, i.e. how late bumps from other processes may be seen
+CACHE_VERSION_MAX_AGE = config('CACHE_VERSION_MAX_AGE', default=5, cast=int)
+
+# Worker processes for ReportLab rendering; 0 renders in the calling process
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=2, cast=int)
+
+# Per-view request metrics, served at api/administration/metrics/
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+# Requests running more queries than this are logged and counted; 0 disables the check
+REQUEST_QUERY_BUDGET = config('REQUEST_QUERY_BUDGET', default=50, cast=int)
+# Recent requests per view that percentiles are computed from
+REQUEST_METRICS_SAMPLE_SIZE = config('REQUEST_METRICS_SAMPLE_SIZE', default=1000, cast=int)
+# Lets a scraper read metrics with "Authorization: Bearer <token>" instead of an admin_id
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.sqlite3',
@@ -31,6 +31,7 @@ import {
   Briefcase
 } from 'lucide-react';
 import AdminLayout from '../../components/common/Admin/AdminLayout';
+import { waitForReportJob } from '../../utils/reportJobs';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
 const ACTIVITY_COUNT_KEYS = [
@@ -521,17 +522,18 @@ const AdminDashboard = () => {
         throw new Error(data.message || 'Failed to generate PDF report.');
       }
 
-      if (data.report?.download_url) {
-        window.open(data.report.download_url, '_blank', 'noopener');
+      const report = await waitForReportJob(data);
+      if (report?.download_url) {
+        window.open(report.download_url, '_blank', 'noopener');
       }
 
-      if (data.report?.data_snapshot) {
-        setReportSummary(data.report.data_snapshot);
+      if (report?.data_snapshot) {
+        setReportSummary(report.data_snapshot);
       } else if (!reportSummary) {
         await handlePreviewReport();
       }
 
-      if (data.report?.persisted === false) {
+      if (report?.persisted === false) {
         setReportWarning('Report generated, but it could not be saved for history. Please apply the latest database migrations to enable archives.');
       }
     } catch (error) {
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from 'react';
 import { Download, FileText, Loader2, RefreshCw, TrendingUp, Users } from 'lucide-react';
 import AdminLayout from '../../../components/common/Admin/AdminLayout';
 import { getCurrentUser } from '../../../utils/auth';
+import { waitForReportJob } from '../../../utils/reportJobs';
 
 const buildQuery = (params) => {
   const query = new URLSearchParams();
@@ -107,12 +108,13 @@ const AdminReportGenerator = () => {
         throw new Error(data.message || 'Failed to export PDF report');
       }
 
-      if (data.report?.data_snapshot) {
-        setSummary(data.report.data_snapshot);
+      const report = await waitForReportJob(data);
+      if (report?.data_snapshot) {
+        setSummary(report.data_snapshot);
       }
 
       await fetchHistory();
-      const downloadUrl = data.report?.download_url;
+      const downloadUrl = report?.download_url;
       if (downloadUrl) {
         window.open(downloadUrl, '_blank', 'noopener');
       }
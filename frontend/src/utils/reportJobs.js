@@ -0,0 +1,39 @@
+/**
+ * Helpers for the asynchronous admin report export flow
+ */
+
+const POLL_INTERVAL_MS = 1500;
+const MAX_POLL_ATTEMPTS = 200;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Resolve the generated report for an export response, polling the job
+ * status endpoint while the report is still being rendered.
+ * @param {object} data - JSON body returned by POST /api/admin-reports/export/
+ * @returns {Promise<object|null>} - The serialized report once available
+ */
+export const waitForReportJob = async (data) => {
+  if (data?.report || !data?.job?.status_url) {
+    return data?.report || null;
+  }
+
+  for (let attempt = 0; attempt < MAX_POLL_ATTEMPTS; attempt += 1) {
+    await sleep(POLL_INTERVAL_MS);
+    const response = await fetch(data.job.status_url);
+    const statusData = await response.json();
+    if (!response.ok || !statusData.success) {
+      throw new Error(statusData.message || 'Failed to check report status');
+    }
+
+    const { job } = statusData;
+    if (job.status === 'completed') {
+      return job.report;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to generate PDF report');
+    }
+  }
+
+  throw new Error('Report generation is taking longer than expected. Check the report history shortly.');
+};